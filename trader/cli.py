@@ -1,12 +1,16 @@
 import os
+from functools import cache
+from typing import TYPE_CHECKING, Optional, Tuple
 
 import rich_click as click
 from loguru import logger
 
 from trader.client.navigation import FlightModes
 from trader.exceptions import TraderException
-from trader.main import Trader
-from trader.print.print import print_alert
+from trader.print.print import print_alert, print_as_table
+
+if TYPE_CHECKING:
+    from trader.main import Trader
 
 if "DEBUG" not in os.environ:
     logger.remove()
@@ -19,13 +23,11 @@ class ClickCommandWrapper(click.Command):
             super().invoke(ctx)
         except TraderException as e:
             print_alert(
-                message=f"Error encountered: {e.message}", console=trader.console
+                message=f"Error encountered: {e.message}", console=get_console()
             )
             close_cli(code=1)
         except Exception as e:
-            print_alert(
-                message=f"Uncaught exception: {repr(e)}", console=trader.console
-            )
+            print_alert(message=f"Uncaught exception: {repr(e)}", console=get_console())
             close_cli(code=1)
 
 
@@ -40,7 +42,21 @@ def trader_command(func=None, **kwargs):
     return decorator if func is None else decorator(func)
 
 
-trader = Trader()
+@cache
+def get_trader() -> "Trader":
+    """
+    Trader is only constructed once a command runs, so parsing arguments and printing
+    help never touch the database, client, or their background threads.
+    """
+    from trader.main import Trader
+
+    return Trader()
+
+
+def get_console():
+    from trader.main import Trader
+
+    return Trader.console
 
 
 @click.group()
@@ -65,7 +81,7 @@ def status():
     """
     Print out information about the backend. Ex: [yellow]cli.py status[/yellow]
     """
-    trader.status()
+    get_trader().status()
 
 
 @trader_command()
@@ -76,7 +92,7 @@ def register(call_sign: str, faction: str):
     Registers and stores token locally. Ex: [yellow]cli.py register CALL_SIGN FACTION[/yellow]
     """
     click.echo(f"Registering client for call_sign: {call_sign} ({faction})")
-    trader.register(call_sign=call_sign, faction=faction)
+    get_trader().register(call_sign=call_sign, faction=faction)
 
 
 @trader_command()
@@ -84,7 +100,7 @@ def agent():
     """
     Print out information for a given agent. Ex: [yellow]cli.py agent[/yellow]
     """
-    trader.agent()
+    get_trader().agent()
 
 
 @trader_command()
@@ -92,7 +108,7 @@ def agents():
     """
     Print out information for all agents. Ex: [yellow]cli.py agents[/yellow]
     """
-    trader.agents()
+    get_trader().agents()
 
 
 @trader_command()
@@ -100,7 +116,7 @@ def contracts():
     """
     Print out information for all active contracts. Ex: [yellow]cli.py contracts[/yellow]
     """
-    trader.contracts()
+    get_trader().contracts()
 
 
 @trader_command()
@@ -108,7 +124,7 @@ def ships():
     """
     Print out information for all ships the active agent has access to. Ex: [yellow]cli.py ships[/yellow]
     """
-    trader.ships()
+    get_trader().ships()
 
 
 @trader_command()
@@ -117,7 +133,7 @@ def ship(call_sign: str):
     """
     Print out information for a specific ship by a provided call sign. Ex: [yellow]cli.py ship CALL_SIGN[/yellow]
     """
-    trader.ship(call_sign=call_sign)
+    get_trader().ship(call_sign=call_sign)
 
 
 @trader_command()
@@ -125,7 +141,7 @@ def systems():
     """
     Print out information for all systems. Ex: [yellow]cli.py systems[/yellow]
     """
-    trader.systems()
+    get_trader().systems()
 
 
 @trader_command()
@@ -134,7 +150,7 @@ def system(symbol: str):
     """
     Print out information for a specific system by a provided symbol. Ex: [yellow]cli.py system SYMBOL[/yellow]
     """
-    trader.system(symbol=symbol)
+    get_trader().system(symbol=symbol)
 
 
 @trader_command()
@@ -143,7 +159,7 @@ def waypoints(system_symbol: str):
     """
     Print out information for all waypoints for a provided system symbol. Ex: [yellow]cli.py waypoints SYMBOL[/yellow]
     """
-    trader.waypoints(system_symbol=system_symbol)
+    get_trader().waypoints(system_symbol=system_symbol)
 
 
 @trader_command()
@@ -153,7 +169,7 @@ def waypoint(system_symbol: str, waypoint_symbol: str):
     """
     Print out information for all waypoints for a provided system symbol. Ex: [yellow]cli.py waypoints SYMBOL[/yellow]
     """
-    trader.waypoint(system_symbol=system_symbol, waypoint_symbol=waypoint_symbol)
+    get_trader().waypoint(system_symbol=system_symbol, waypoint_symbol=waypoint_symbol)
 
 
 @trader_command()
@@ -162,7 +178,7 @@ def dock(call_sign: str):
     """
     Attempts to dock a ship based on a provided call sign. Ex: [yellow]cli.py dock CALL_SIGN[/yellow]
     """
-    trader.dock(call_sign=call_sign)
+    get_trader().dock(call_sign=call_sign)
 
 
 @trader_command()
@@ -171,7 +187,7 @@ def refuel(call_sign: str):
     """
     Attempts to refuel a ship based on a provided call sign. Ex: [yellow]cli.py refuel CALL_SIGN[/yellow]
     """
-    trader.refuel(call_sign=call_sign)
+    get_trader().refuel(call_sign=call_sign)
 
 
 @trader_command()
@@ -180,7 +196,7 @@ def orbit(call_sign: str):
     """
     Attempts to orbit a ship based on a provided call sign. Ex: [yellow]cli.py orbit CALL_SIGN[/yellow]
     """
-    trader.orbit(call_sign=call_sign)
+    get_trader().orbit(call_sign=call_sign)
 
 
 @trader_command()
@@ -189,7 +205,7 @@ def cooldown(call_sign: str):
     """
     Prints active cooldown information for a given ship by its call sign. Ex: [yellow]cli.py cooldown CALL_SIGN[/yellow]
     """
-    trader.cooldown(call_sign=call_sign)
+    get_trader().cooldown(call_sign=call_sign)
 
 
 @trader_command()
@@ -198,7 +214,7 @@ def extract(call_sign: str):
     """
     Attempts to start extraction from a ship based on a provided call sign. Ex: [yellow]cli.py extract CALL_SIGN[/yellow]
     """
-    trader.extract(call_sign=call_sign)
+    get_trader().extract(call_sign=call_sign)
 
 
 @trader_command()
@@ -208,7 +224,7 @@ def navigate(call_sign: str, waypoint_symbol: str):
     """
     Attempts to navigate a ship based on a provided call sign towards a provided waypoint symbol. Ex: [yellow]cli.py navigate CALL_SIGN WAYPOINT_SYMBOL[/yellow]
     """
-    trader.navigate(call_sign=call_sign, waypoint_symbol=waypoint_symbol)
+    get_trader().navigate(call_sign=call_sign, waypoint_symbol=waypoint_symbol)
 
 
 @trader_command()
@@ -218,7 +234,7 @@ def market(system_symbol: str, waypoint_symbol: str):
     """
     Prints market information for a provided system and waypoint symbol. Ex: [yellow]cli.py market SYSTEM_SYMBOL WAYPOINT_SYMBOL[/yellow]
     """
-    trader.market(system_symbol=system_symbol, waypoint_symbol=waypoint_symbol)
+    get_trader().market(system_symbol=system_symbol, waypoint_symbol=waypoint_symbol)
 
 
 @trader_command()
@@ -228,7 +244,7 @@ def shipyard(system_symbol: str, waypoint_symbol: str):
     """
     Prints shipyard information for a provided system and waypoint symbol. Ex: [yellow]cli.py shipyard SYSTEM_SYMBOL WAYPOINT_SYMBOL[/yellow]
     """
-    trader.shipyard(system_symbol=system_symbol, waypoint_symbol=waypoint_symbol)
+    get_trader().shipyard(system_symbol=system_symbol, waypoint_symbol=waypoint_symbol)
 
 
 @trader_command()
@@ -237,7 +253,7 @@ def cargo(call_sign: str):
     """
     Prints cargo for a given ship based on a provided call sign. Ex: [yellow]cli.py cargo CALL_SIGN[/yellow]
     """
-    trader.cargo(call_sign=call_sign)
+    get_trader().cargo(call_sign=call_sign)
 
 
 @trader_command()
@@ -247,7 +263,7 @@ def set_flight_mode(call_sign: str, flight_mode: FlightModes):
     """
     Sets flight mode for a given ship based on a provided call sign. Ex: [yellow]cli.py set-flight-mode CALL_SIGN FLIGHT_MODE[/yellow]
     """
-    trader.set_flight_mode(call_sign=call_sign, flight_mode=flight_mode)
+    get_trader().set_flight_mode(call_sign=call_sign, flight_mode=flight_mode)
 
 
 @trader_command()
@@ -258,7 +274,7 @@ def sell(call_sign: str, symbol: str, units: int):
     """
     Attempts to conduct a sale for a given ship's call sign, and will sell X units (provided) of Y symbols (provided). Ex: [yellow]cli.py sell CALL_SIGN SYMBOL UNITS[/yellow]
     """
-    trader.sell(call_sign=call_sign, symbol=symbol, units=units)
+    get_trader().sell(call_sign=call_sign, symbol=symbol, units=units)
 
 
 @trader_command()
@@ -268,7 +284,7 @@ def purchase_ship(waypoint_symbol: str, ship_type: str):
     """
     Starts purchase of a ship with a payload. Requires another ship at its station.  Ex: [yellow]cli.py purchase-ship WAYPOINT_SYMBOL SHIP_TYPE [/yellow]
     """
-    trader.purchase_ship(waypoint_symbol=waypoint_symbol, ship_type=ship_type)
+    get_trader().purchase_ship(waypoint_symbol=waypoint_symbol, ship_type=ship_type)
 
 
 @trader_command()
@@ -282,7 +298,7 @@ def miner_loop(call_sign: str, repeat: bool):
     """
     Begins a naive mine, refuel, and sell loop for a given call sign. Ex: [yellow]cli.py miner-loop --repeat true CALL_SIGN[/yellow]
     """
-    trader.miner_loop(call_sign=call_sign, repeat=repeat)
+    get_trader().miner_loop(call_sign=call_sign, repeat=repeat)
 
 
 @trader_command()
@@ -296,7 +312,7 @@ def trader_loop(call_sign: str, repeat: bool):
     """
     Begins a naive buy and sell loop for a given call sign. Ex: [yellow]cli.py trader-loop --repeat true CALL_SIGN[/yellow]
     """
-    trader.trader_loop(call_sign=call_sign, repeat=repeat)
+    get_trader().trader_loop(call_sign=call_sign, repeat=repeat)
 
 
 @trader_command()
@@ -310,15 +326,27 @@ def explorer_loop(call_sign: str, repeat: bool):
     """
     Begins a naive exploration loop for a given call sign. Ex: [yellow]cli.py explorer-loop --repeat true CALL_SIGN[/yellow]
     """
-    trader.explorer_loop(call_sign=call_sign, repeat=repeat)
+    get_trader().explorer_loop(call_sign=call_sign, repeat=repeat)
 
 
 @trader_command()
-def fleet_loop():
+@click.option(
+    "--processes",
+    default=1,
+    type=int,
+    help="Shard ships across this many worker processes, sharing one rate limiter",
+)
+@click.option(
+    "--api-key",
+    "api_keys",
+    multiple=True,
+    help="Token of another agent to run alongside, each with its own rate limiter",
+)
+def fleet_loop(processes: int, api_keys: Tuple[str, ...]):
     """
-    Begins a naive set of loops for all ships in the fleet. Ex: [yellow]cli.py fleet-loop [/yellow]
+    Begins a naive set of loops for all ships in the fleet. Ex: [yellow]cli.py fleet-loop --processes 4[/yellow]
     """
-    trader.fleet_loop()
+    get_trader().fleet_loop(processes=processes, api_keys=list(api_keys))
 
 
 @trader_command()
@@ -326,7 +354,7 @@ def fleet_summary():
     """
     Print out a summary table of the fleet and its ongoing actions. Ex: [yellow]cli.py fleet-summary[/yellow]
     """
-    trader.fleet_summary()
+    get_trader().fleet_summary()
 
 
 @trader_command()
@@ -335,7 +363,7 @@ def ship_summary(call_sign: str):
     """
     Print out a summary table of a ship and its recent history. Ex: [yellow]cli.py ship-summary CALL_SIGN[/yellow]
     """
-    trader.fleet_summary(call_sign=call_sign, limit=20)
+    get_trader().fleet_summary(call_sign=call_sign, limit=20)
 
 
 @trader_command()
@@ -343,7 +371,128 @@ def agent_history():
     """
     Print out a summary table of an agent and its recent history. Ex: [yellow]cli.py agent-history[/yellow]
     """
-    trader.agent_history()
+    get_trader().agent_history()
+
+
+@trader_command()
+@click.option("--port", default=8080, type=int, help="Port to serve on")
+@click.option("--seed", default=0, type=int, help="Seed the galaxy is generated from")
+@click.option("--systems", default=10, type=int, help="Number of systems to generate")
+@click.option(
+    "--speed",
+    default=1.0,
+    type=float,
+    help="How many times faster than the game travel and cooldowns run",
+)
+@click.option(
+    "--requests-per-second",
+    default=2.0,
+    type=float,
+    help="Sustained requests per second allowed per agent",
+)
+@click.option(
+    "--agent",
+    "agents",
+    multiple=True,
+    help="Symbol of an agent to register on start, its token is printed",
+)
+def emulator(
+    port: int,
+    seed: int,
+    systems: int,
+    speed: float,
+    requests_per_second: float,
+    agents: Tuple[str, ...],
+):
+    """
+    Serves a local emulation of the API to run against offline. Ex: [yellow]cli.py emulator --speed 10 --agent EMULATED[/yellow]
+    then [yellow]API_URL=http://127.0.0.1:8080/v2 cli.py fleet-loop[/yellow]
+    """
+    from trader.emulator.galaxy import generate_galaxy
+    from trader.emulator.server import EmulatorServer
+    from trader.emulator.world import World
+
+    server = EmulatorServer(
+        world=World(galaxy=generate_galaxy(seed=seed, systems=systems), speed=speed),
+        port=port,
+        requests_per_second=requests_per_second,
+    )
+    for symbol in agents:
+        click.echo(f"Registered {symbol} with token: {server.register(symbol=symbol)}")
+    click.echo(f"Serving the emulated API at {server.url()}")
+    server.server.serve_forever()
+
+
+@trader_command()
+@click.argument("path")
+@click.option("--seed", default=0, type=int, help="Seed the galaxy is generated from")
+@click.option("--systems", default=10, type=int, help="Number of systems to generate")
+@click.option("--waypoints", default=12, type=int, help="Waypoints in every system")
+@click.option(
+    "--observations",
+    default=1,
+    type=int,
+    help="Hourly price observations recorded of every market",
+)
+def generate_galaxy(
+    path: str, seed: int, systems: int, waypoints: int, observations: int
+):
+    """
+    Writes a generated galaxy to a new SQLite database, as if fully explored, to profile against at scale. Ex: [yellow]cli.py generate-galaxy galaxy.db --systems 10000[/yellow]
+    then [yellow]DB_URL=sqlite:///galaxy.db pytest trader/tests/benchmarks[/yellow]
+    """
+    from trader.emulator.populate import create_database
+
+    counts = create_database(
+        path=path,
+        seed=seed,
+        systems=systems,
+        waypoints_per_system=waypoints,
+        observations=observations,
+    )
+    click.echo(
+        f"Wrote {counts.systems} systems, {counts.waypoints} waypoints, "
+        f"{counts.markets} markets and {counts.price_observations} prices to {path}"
+    )
+
+
+@trader_command()
+@click.argument("archive")
+def traffic_summary(archive: str):
+    """
+    Print out requests, errors and API time by endpoint of a traffic archive, recorded with RECORD_TRAFFIC set. Ex: [yellow]cli.py traffic-summary traffic.jsonl.gz[/yellow]
+    """
+    from trader.client.traffic import get_traffic_summary, read_traffic_archive
+
+    exchanges = read_traffic_archive(archive)
+    print_as_table(
+        title=f"Traffic of {archive} ({len(exchanges)} requests)",
+        data=get_traffic_summary(exchanges),
+        console=get_console(),
+    )
+
+
+@trader_command()
+@click.argument("source", required=False)
+def metrics(source: Optional[str]):
+    """
+    Print out runtime metrics (request queue, cache, database, ship actions) from a dump of a run with METRICS_FILE set, or from the endpoint of one with METRICS_PORT set. Ex: [yellow]cli.py metrics metrics.txt[/yellow] or [yellow]cli.py metrics http://127.0.0.1:9100[/yellow]
+    """
+    import httpx
+
+    from trader.util.metrics import METRICS_FILE, get_metric_rows
+
+    source = source or METRICS_FILE
+    if not source:
+        raise TraderException("No metrics to read, pass a dump or set METRICS_FILE")
+    if source.startswith(("http://", "https://")):
+        text = httpx.get(source).text
+    else:
+        with open(source, encoding="utf-8") as file:
+            text = file.read()
+    print_as_table(
+        title=f"Metrics of {source}", data=get_metric_rows(text), console=get_console()
+    )
 
 
 # unique status cli command of backend
@@ -383,6 +532,12 @@ cli.add_command(fleet_loop)
 cli.add_command(fleet_summary)
 cli.add_command(ship_summary)
 cli.add_command(agent_history)
+cli.add_command(metrics)
+
+# commands for running offline
+cli.add_command(emulator)
+cli.add_command(generate_galaxy)
+cli.add_command(traffic_summary)
 
 click.rich_click.USE_RICH_MARKUP = True
 click.rich_click.SHOW_ARGUMENTS = True
@@ -397,7 +552,7 @@ click.rich_click.COMMAND_GROUPS = {
         },
         {
             "name": "Summaries and Reports",
-            "commands": ["fleet-summary", "ship-summary", "agent-history"],
+            "commands": ["fleet-summary", "ship-summary", "agent-history", "metrics"],
         },
     ]
 }
@@ -0,0 +1,95 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal, Optional, Pattern
+
+# invalidation targets ending in this suffix also drop every url beneath the path
+SUBPATHS = "/*"
+
+
+@dataclass
+class CacheInvalidation:
+    """
+    Declares the cached reads made stale by a mutating endpoint. Endpoint and target
+    paths are relative to the API base url and may reference {placeholders}, which are
+    filled from the endpoint path, from the request body (by snake cased key), and with
+    a system_symbol derived from any waypoint_symbol.
+    """
+
+    method: Literal["POST", "PATCH"]
+    endpoint: str
+    targets: List[str]
+    pattern: Pattern = field(init=False)
+
+    def __post_init__(self):
+        self.pattern = re.compile(
+            "^" + re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", self.endpoint) + "$"
+        )
+
+
+SHIP_TARGETS = ["/my/ships", "/my/ships/{call_sign}" + SUBPATHS]
+AGENT_TARGETS = ["/my/agent", "/agents"]
+
+CACHE_INVALIDATIONS = [
+    CacheInvalidation("POST", "/my/ships/{call_sign}/navigate", SHIP_TARGETS),
+    CacheInvalidation("POST", "/my/ships/{call_sign}/orbit", SHIP_TARGETS),
+    CacheInvalidation("POST", "/my/ships/{call_sign}/dock", SHIP_TARGETS),
+    CacheInvalidation("PATCH", "/my/ships/{call_sign}/nav", SHIP_TARGETS),
+    CacheInvalidation("POST", "/my/ships/{call_sign}/extract", SHIP_TARGETS),
+    CacheInvalidation(
+        "POST", "/my/ships/{call_sign}/refuel", SHIP_TARGETS + AGENT_TARGETS
+    ),
+    CacheInvalidation(
+        "POST", "/my/ships/{call_sign}/purchase", SHIP_TARGETS + AGENT_TARGETS
+    ),
+    CacheInvalidation(
+        "POST", "/my/ships/{call_sign}/sell", SHIP_TARGETS + AGENT_TARGETS
+    ),
+    CacheInvalidation(
+        "POST",
+        "/my/ships",
+        [
+            "/my/ships",
+            "/systems/{system_symbol}/waypoints/{waypoint_symbol}/shipyard",
+            *AGENT_TARGETS,
+        ],
+    ),
+]
+
+
+def to_snake_case(key: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower()
+
+
+def get_invalidated_paths(
+    method: str,
+    path: str,
+    data: Optional[Dict[str, Any]] = None,
+    invalidations: List[CacheInvalidation] = CACHE_INVALIDATIONS,
+) -> List[str]:
+    """
+    Resolves the target paths invalidated by a mutating request against path. Targets
+    whose placeholders cannot be filled from the request are skipped.
+    """
+    paths: List[str] = []
+    for invalidation in invalidations:
+        if invalidation.method != method:
+            continue
+        match = invalidation.pattern.match(path)
+        if not match:
+            continue
+
+        values = {
+            to_snake_case(key): value
+            for key, value in (data or {}).items()
+            if isinstance(value, str)
+        }
+        values.update(match.groupdict())
+        if "waypoint_symbol" in values and "system_symbol" not in values:
+            values["system_symbol"] = "-".join(values["waypoint_symbol"].split("-")[:2])
+
+        for target in invalidation.targets:
+            try:
+                paths.append(target.format(**values))
+            except KeyError:
+                continue
+    return paths
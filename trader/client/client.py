@@ -1,10 +1,14 @@
+import hashlib
 import os
-from typing import Any, Dict, List, Literal, Optional, Type, cast
+from threading import Lock, Thread
+from time import monotonic
+from typing import Any, Dict, List, Literal, Optional, Set, Type, cast
 from uuid import uuid4
 
 import httpx
 from loguru import logger
 
+from trader.client.cache_invalidation import SUBPATHS, get_invalidated_paths
 from trader.client.cargo import CargoRequest
 from trader.client.navigation import NavigationRequestData, NavigationRequestPatch
 from trader.client.payload import (
@@ -34,30 +38,59 @@ from trader.client.payload import (
     WaypointsPayload,
 )
 from trader.client.registration import RegistrationRequestData
-from trader.client.request import ClientRequest
-from trader.client.request_cache import Cache
+from trader.client.request import CancellationToken, ClientRequest
+from trader.client.request_cache import DEFAULT_CACHE_TIMEOUT, Cache, RequestKey
+from trader.client.request_coalescer import RequestCoalescer
 from trader.client.shipyard import ShipPurchaseRequestData
 from trader.exceptions import TraderClientException
-from trader.queues.request_queue import RequestQueue
-from trader.util.singleton import Singleton
-
-BASE_URL = "https://api.spacetraders.io/v2"
-
-
-class CoreClient(metaclass=Singleton):
+from trader.queues.request_queue import MINIMUM_PRIORITY, RequestQueue
+from trader.util.singleton import KeyedSingleton
+
+# set API_URL to use another server, ex: the emulator (see trader.emulator.server)
+BASE_URL = os.environ.get("API_URL", "https://api.spacetraders.io/v2")
+REVALIDATION_PRIORITY = MINIMUM_PRIORITY
+# refreshes still queued after this long are dropped, the stale value has served anyway
+REVALIDATION_DEADLINE = 60 * 5
+# how long past their cache timeout responses may be served while refreshed in the
+# background, after which a blocking fetch is forced
+SHIPYARD_CACHE_TIMEOUT = 120
+SHIPYARD_STALE_WHILE_REVALIDATE = 60 * 30
+SYSTEM_STALE_WHILE_REVALIDATE = DEFAULT_CACHE_TIMEOUT
+# reads that our own mutations invalidate, bounded in case state changes elsewhere
+MUTABLE_CACHE_TIMEOUT = 60 * 5
+
+
+class CoreClient(metaclass=KeyedSingleton):
     """
     Intensive DAO and Cache heavy component of client. This portion is a singleton
-    to avoid reinstantiation and is consistently referenced.
+    per API key to avoid reinstantiation and is consistently referenced, while agents
+    run side by side each get their own.
+
+    The cache is shared by every agent. Responses under /my/ describe the agent that
+    asked, so they are cached under a scope derived from the API key and never served
+    to another agent.
     """
 
     api_key: Optional[str]
     bearer: str
     cache: Cache
+    coalescer: RequestCoalescer
+    revalidation_lock: Lock
+    revalidations: Set[str]
+    scope: str
 
     def __init__(self, api_key: Optional[str]) -> None:
         self.api_key = api_key
         self.bearer = f"Bearer {self.api_key}".replace("\n", "")
+        self.scope = (
+            hashlib.blake2b((api_key or "").encode(), digest_size=8).hexdigest()
+            if api_key
+            else ""
+        )
         self.cache = Cache()
+        self.coalescer = RequestCoalescer()
+        self.revalidation_lock = Lock()
+        self.revalidations = set()
 
     def ensure_api_key(self):
         if not self.api_key:
@@ -71,7 +104,9 @@ class Client:
     """
 
     base_priority: int
+    cancellation: Optional[CancellationToken]
     client_id: str
+    flow: Optional[str]
     core: CoreClient
     debug: bool
     request_queue: RequestQueue
@@ -81,12 +116,17 @@ class Client:
         api_key: Optional[str],
         base_priority: int = 0,
         disable_background_processes: bool = False,
+        flow: Optional[str] = None,
     ) -> None:
         self.base_priority = base_priority
+        self.cancellation = None
         self.client_id = str(uuid4())
+        # requests are queued fairly between flows, ex: one per ship
+        self.flow = flow
         self.core_client = CoreClient(api_key=api_key)
         self.debug = "DEBUG" in os.environ
         self.request_queue = RequestQueue(
+            api_key=api_key,
             client_id=self.client_id,
             disable_background_processes=disable_background_processes,
         )
@@ -94,6 +134,17 @@ class Client:
     def set_base_priority(self, base_priority: int):
         self.base_priority = base_priority
 
+    def get_cache_scope(self, url: str) -> str:
+        if url.startswith(f"{BASE_URL}/my/"):
+            return self.core_client.scope
+        return ""
+
+    def set_cancellation(self, cancellation: Optional[CancellationToken]):
+        """
+        Requests made from here on can be dropped from the queue by cancelling this
+        """
+        self.cancellation = cancellation
+
     def ensure_success(self, response: CommonPayloadFields):
         if response.error and response.error.code and response.error.code >= 400:
             logger.error(
@@ -132,12 +183,14 @@ class Client:
         url: str,
         method: Literal["GET", "POST", "PATCH"],
         cache_timeout: Optional[float] = None,
+        stale_while_revalidate: Optional[float] = None,
         check_cache: bool = True,
         data: Optional[Dict[str, Any]] = {},
         is_paged: bool = False,
         page: int = 1,
         added_priority: int = 0,
         limit: int = 20,
+        deadline: Optional[float] = None,
     ) -> httpx.Response:
         logger.debug(f"📤     {method}: {url}")
 
@@ -145,51 +198,216 @@ class Client:
         if is_paged:
             params = {"limit": limit, "page": page}
 
-        if check_cache:
-            cached_response = self.core_client.cache.get_kv_cache(
-                method=method, url=url, data=data, params=params
+        # computed once and passed through so the cache never re-serializes the request
+        key = RequestKey.create(
+            method=method,
+            url=url,
+            data=data,
+            params=params,
+            scope=self.get_cache_scope(url=url),
+        )
+
+        def request() -> httpx.Response:
+            return self.execute_uncoalesced_request(
+                key=key,
+                url=url,
+                method=method,
+                cache_timeout=cache_timeout,
+                stale_while_revalidate=stale_while_revalidate,
+                check_cache=check_cache,
+                data=data,
+                params=params,
+                added_priority=added_priority,
+                deadline=deadline,
             )
-            if cached_response:
+
+        if method != "GET":
+            response = request()
+            self.invalidate_cache(method=method, url=url, data=data)
+            return response
+
+        # identical reads in flight at the same time share a single call to the API
+        request_key = key.id
+        if not check_cache:
+            # never hand a cached response to a caller that asked to skip the cache
+            request_key = f"{request_key}-uncached"
+        if deadline is not None or self.cancellation:
+            # a request that may be dropped is only shared by callers that agreed to it
+            request_key = f"{request_key}-{id(self.cancellation)}-{deadline}"
+        return self.core_client.coalescer.execute(key=request_key, request=request)
+
+    def execute_uncoalesced_request(
+        self,
+        key: RequestKey,
+        url: str,
+        method: Literal["GET", "POST", "PATCH"],
+        params: Dict[str, Any],
+        cache_timeout: Optional[float] = None,
+        stale_while_revalidate: Optional[float] = None,
+        check_cache: bool = True,
+        data: Optional[Dict[str, Any]] = {},
+        added_priority: int = 0,
+        deadline: Optional[float] = None,
+    ) -> httpx.Response:
+        if check_cache:
+            cached_response = self.core_client.cache.get_kv_cache(key=key)
+            if cached_response and (
+                not cached_response.stale or stale_while_revalidate
+            ):
+                if cached_response.stale:
+                    self.revalidate_in_background(
+                        key=key,
+                        url=url,
+                        method=method,
+                        params=params,
+                        cache_timeout=cache_timeout,
+                        stale_while_revalidate=stale_while_revalidate,
+                        data=data,
+                    )
                 if self.debug:
-                    logger.trace(cached_response.content)
-                return cached_response
+                    logger.trace(cached_response.response.content)
+                return cached_response.response
+
+        response = self.dispatch_request(
+            url=url,
+            method=method,
+            params=params,
+            data=data,
+            priority=self.base_priority + added_priority,
+            deadline=deadline,
+        )
+
+        if check_cache:
+            self.store_in_cache(
+                key=key,
+                response=response,
+                cache_timeout=cache_timeout,
+                stale_while_revalidate=stale_while_revalidate,
+            )
+
+        logger.debug(f"📨 {response.status_code} {method}: {url}")
+
+        if self.debug:
+            logger.trace(response.content)
 
+        return response
+
+    def invalidate_cache(
+        self,
+        method: Literal["GET", "POST", "PATCH"],
+        url: str,
+        data: Optional[Dict[str, Any]] = {},
+    ):
+        """
+        Drops cached reads made stale by a mutating request, as declared in
+        CACHE_INVALIDATIONS.
+        """
+        if not url.startswith(BASE_URL):
+            return
+        for path in get_invalidated_paths(
+            method=method, path=url[len(BASE_URL) :], data=data
+        ):
+            include_subpaths = path.endswith(SUBPATHS)
+            if include_subpaths:
+                path = path[: -len(SUBPATHS)]
+            logger.debug(f"🧹     {method}: {url} invalidates {path}")
+            self.core_client.cache.invalidate_url(
+                url=f"{BASE_URL}{path}", include_subpaths=include_subpaths
+            )
+
+    def dispatch_request(
+        self,
+        url: str,
+        method: Literal["GET", "POST", "PATCH"],
+        params: Dict[str, Any],
+        priority: int,
+        data: Optional[Dict[str, Any]] = {},
+        deadline: Optional[float] = None,
+    ) -> httpx.Response:
         arguments: Dict[str, Any] = {"url": url, "params": params}
         if self.core_client.api_key:
             arguments["headers"] = {"Authorization": self.core_client.bearer}
         if data:
             arguments["json"] = data
 
+        function = httpx.get
         if method == "POST":
-            request = ClientRequest(function=httpx.post, arguments=arguments)
+            function = httpx.post
         elif method == "PATCH":
-            request = ClientRequest(function=httpx.patch, arguments=arguments)
-        else:
-            request = ClientRequest(function=httpx.get, arguments=arguments)
-
-        request_id = self.request_queue.enqueue(
-            request=request, priority=self.base_priority + added_priority
+            function = httpx.patch
+        request = ClientRequest(
+            function=function,
+            arguments=arguments,
+            deadline=deadline,
+            cancellation=self.cancellation,
+            flow=self.flow,
         )
-        response = self.request_queue.wait_for_response(request_id=request_id)
-
-        if check_cache:
-            cache_arguments = {
-                "method": method,
-                "url": url,
-                "data": data,
-                "response": response,
-                "params": params,
-            }
-            if cache_timeout:
-                cache_arguments["cache_timeout"] = cache_timeout
-            self.core_client.cache.set_kv_cache(**cache_arguments)
-
-        logger.debug(f"📨 {response.status_code} {method}: {url}")
 
-        if self.debug:
-            logger.trace(response.content)
+        request_id = self.request_queue.enqueue(request=request, priority=priority)
+        return self.request_queue.wait_for_response(request_id=request_id)
 
-        return response
+    def store_in_cache(
+        self,
+        key: RequestKey,
+        response: httpx.Response,
+        cache_timeout: Optional[float] = None,
+        stale_while_revalidate: Optional[float] = None,
+    ):
+        cache_arguments: Dict[str, Any] = {"key": key, "response": response}
+        if cache_timeout:
+            cache_arguments["cache_timeout"] = cache_timeout
+        if stale_while_revalidate:
+            cache_arguments["stale_while_revalidate"] = stale_while_revalidate
+        self.core_client.cache.set_kv_cache(**cache_arguments)
+
+    def revalidate_in_background(
+        self,
+        key: RequestKey,
+        url: str,
+        method: Literal["GET", "POST", "PATCH"],
+        params: Dict[str, Any],
+        cache_timeout: Optional[float] = None,
+        stale_while_revalidate: Optional[float] = None,
+        data: Optional[Dict[str, Any]] = {},
+    ):
+        """
+        Refreshes a stale cache entry without blocking the caller that was just served
+        the stale value. Refreshes run at the lowest request priority so they only ever
+        use rate limit budget that nothing else wants.
+        """
+        revalidation_key = key.id
+        with self.core_client.revalidation_lock:
+            if revalidation_key in self.core_client.revalidations:
+                return
+            self.core_client.revalidations.add(revalidation_key)
+
+        def revalidate():
+            try:
+                logger.debug(f"🔄     {method}: {url}")
+                response = self.dispatch_request(
+                    url=url,
+                    method=method,
+                    params=params,
+                    data=data,
+                    priority=REVALIDATION_PRIORITY,
+                    deadline=monotonic() + REVALIDATION_DEADLINE,
+                )
+                if response.is_success:
+                    self.store_in_cache(
+                        key=key,
+                        response=response,
+                        cache_timeout=cache_timeout,
+                        stale_while_revalidate=stale_while_revalidate,
+                    )
+            except Exception as e:
+                logger.exception(e)
+            finally:
+                with self.core_client.revalidation_lock:
+                    self.core_client.revalidations.discard(revalidation_key)
+
+        thread = Thread(target=revalidate)
+        thread.daemon = True
+        thread.start()
 
     def conduct_request(
         self,
@@ -197,6 +415,7 @@ class Client:
         method: Literal["GET", "POST", "PATCH"],
         data_type: Type[PayloadTypes | StatusPayload],
         cache_timeout: Optional[float] = None,
+        stale_while_revalidate: Optional[float] = None,
         check_cache: bool = True,
         data: Optional[Dict[str, Any]] = {},
         is_paged: bool = False,
@@ -204,6 +423,7 @@ class Client:
         requires_auth: bool = True,
         added_priority: int = 0,
         limit: int = 20,
+        deadline: Optional[float] = None,
     ) -> PayloadTypes | StatusPayload:
         if requires_auth:
             self.core_client.ensure_api_key()
@@ -212,12 +432,14 @@ class Client:
             url=url,
             method=method,
             cache_timeout=cache_timeout,
+            stale_while_revalidate=stale_while_revalidate,
             check_cache=check_cache,
             data=data,
             is_paged=is_paged,
             page=page,
             added_priority=added_priority,
             limit=limit,
+            deadline=deadline,
         )
 
         result = self.ensure_singular_payload(
@@ -243,19 +465,21 @@ class Client:
                             url=url,
                             method=method,
                             cache_timeout=cache_timeout,
+                            stale_while_revalidate=stale_while_revalidate,
                             check_cache=check_cache,
                             data=data,
                             is_paged=is_paged,
                             page=page,
                             added_priority=added_priority,
                             limit=limit,
+                            deadline=deadline,
                         ).content,
                         data_type=data_type,
                     ),
                 )
                 results.append(paged_result)
                 accumulated_total += limit
-            for paged_result in results:
+            for paged_result in results[1:]:
                 if result.data and paged_result.data:
                     # below line is commented because
                     result.data = result.data + paged_result.data  # type: ignore
@@ -286,7 +510,10 @@ class Client:
 
     def agents(self) -> AgentsPayload:
         result = self.conduct_request(
-            url=f"{BASE_URL}/agents", method="GET", data_type=AgentsPayload
+            url=f"{BASE_URL}/agents",
+            method="GET",
+            cache_timeout=MUTABLE_CACHE_TIMEOUT,
+            data_type=AgentsPayload,
         )
 
         return cast(AgentsPayload, result)
@@ -295,14 +522,17 @@ class Client:
         result = self.conduct_request(
             url=f"{BASE_URL}/my/agent",
             method="GET",
-            check_cache=False,
+            cache_timeout=MUTABLE_CACHE_TIMEOUT,
             data_type=AgentPayload,
         )
         return cast(AgentPayload, result)
 
     def contracts(self) -> ContractsPayload:
         result = self.conduct_request(
-            url=f"{BASE_URL}/my/contracts", method="GET", data_type=ContractsPayload
+            url=f"{BASE_URL}/my/contracts",
+            method="GET",
+            cache_timeout=MUTABLE_CACHE_TIMEOUT,
+            data_type=ContractsPayload,
         )
         return cast(ContractsPayload, result)
 
@@ -327,7 +557,10 @@ class Client:
 
     def system(self, symbol: str) -> SystemPayload:
         result = self.conduct_request(
-            url=f"{BASE_URL}/systems/{symbol}", method="GET", data_type=SystemPayload
+            url=f"{BASE_URL}/systems/{symbol}",
+            method="GET",
+            stale_while_revalidate=SYSTEM_STALE_WHILE_REVALIDATE,
+            data_type=SystemPayload,
         )
         return cast(SystemPayload, result)
 
@@ -335,6 +568,7 @@ class Client:
         result = self.conduct_request(
             url=f"{BASE_URL}/systems",
             method="GET",
+            stale_while_revalidate=SYSTEM_STALE_WHILE_REVALIDATE,
             is_paged=True,
             data_type=SystemsPayload,
         )
@@ -344,6 +578,7 @@ class Client:
         result = self.conduct_request(
             url=f"{BASE_URL}/systems/{system_symbol}/waypoints/{waypoint_symbol}",
             method="GET",
+            stale_while_revalidate=SYSTEM_STALE_WHILE_REVALIDATE,
             data_type=WaypointPayload,
         )
         return cast(WaypointPayload, result)
@@ -352,6 +587,7 @@ class Client:
         result = self.conduct_request(
             url=f"{BASE_URL}/systems/{system_symbol}/waypoints",
             method="GET",
+            stale_while_revalidate=SYSTEM_STALE_WHILE_REVALIDATE,
             is_paged=True,
             data_type=WaypointsPayload,
         )
@@ -389,7 +625,7 @@ class Client:
         result = self.conduct_request(
             url=f"{BASE_URL}/my/ships/{call_sign}/cargo",
             method="GET",
-            check_cache=False,
+            cache_timeout=MUTABLE_CACHE_TIMEOUT,
             data_type=CargoPayload,
         )
         return cast(CargoPayload, result)
@@ -467,7 +703,8 @@ class Client:
             url=f"{BASE_URL}/systems/{system_symbol}/waypoints/{waypoint_symbol}/shipyard",
             method="GET",
             check_cache=True,
-            cache_timeout=120,  # drop cache every 120 seconds or so
+            cache_timeout=SHIPYARD_CACHE_TIMEOUT,
+            stale_while_revalidate=SHIPYARD_STALE_WHILE_REVALIDATE,
             data_type=ShipyardPayload,
         )
         return cast(ShipyardPayload, result)
@@ -482,7 +719,6 @@ class Client:
                 ship_type=ship_type, waypoint_symbol=waypoint_symbol
             ).to_dict(),
             check_cache=False,
-            cache_timeout=120,  # drop cache every 120 seconds or so
             data_type=ShipPurchasePayload,
         )
         return cast(ShipPurchasePayload, result)
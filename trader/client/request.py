@@ -1,8 +1,34 @@
 from dataclasses import dataclass
-from typing import Any, Callable, Dict
+from threading import Event
+from typing import Any, Callable, Dict, Optional
+
+
+class CancellationToken:
+    """
+    Shared by requests that should be abandoned together, ex: everything a ship's loop
+    has queued once the loop has moved on. Cancelled requests still queued are dropped
+    rather than sent.
+    """
+
+    event: Event
+
+    def __init__(self):
+        self.event = Event()
+
+    def cancel(self):
+        self.event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
 
 
 @dataclass
 class ClientRequest:
     function: Callable
     arguments: Dict[str, Any]
+    # monotonic time after which the request is no longer worth sending
+    deadline: Optional[float] = None
+    cancellation: Optional[CancellationToken] = None
+    # the ship the request is made for, ships share the rate limit fairly
+    flow: Optional[str] = None
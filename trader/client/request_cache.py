@@ -1,21 +1,102 @@
 import hashlib
 import json
-from datetime import datetime, timedelta
+from dataclasses import dataclass
+from datetime import timedelta
 from threading import Thread
-from time import sleep
-from typing import Any, Dict, Optional
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
 
 import dill as pickle
 import httpx
 from loguru import logger
-from sqlmodel import Session, delete, select
+from sqlmodel import Session, col, delete, func, select, update
 
 from trader.dao.dao import DAO
 from trader.dao.requests import CachedRequest
+from trader.util import clock
+from trader.util.metrics import MetricsRegistry
 from trader.util.singleton import Singleton
 
 DEFAULT_TIMEOUT_TO_PRUNE_EXPIRATIONS = 30
 DEFAULT_CACHE_TIMEOUT = 60 * 60 * 24 * 3  # 3 days
+DEFAULT_MAXIMUM_CACHE_ENTRIES = 20_000
+DEFAULT_MAXIMUM_CACHE_BYTES = 256 * 1024 * 1024  # 256 MiB
+# deletes are issued in batches of this size so no single prune holds the write lock for long
+PRUNE_BATCH_SIZE = 500
+# last access times are only written back when older than this to keep reads cheap
+LAST_ACCESSED_RESOLUTION = 60
+# sorts after any character that can appear in a url, closing url prefix range scans
+URL_PREFIX_UPPER_BOUND = "\uffff"
+
+metrics = MetricsRegistry()
+cache_hits = metrics.counter(
+    "trader_cache_hits", "Requests answered from the cache", labels=["stale"]
+)
+cache_misses = metrics.counter("trader_cache_misses", "Requests not in the cache")
+cache_expirations = metrics.counter(
+    "trader_cache_expirations", "Cache records deleted once expired"
+)
+cache_evictions = metrics.counter(
+    "trader_cache_evictions", "Cache records evicted to stay within budget"
+)
+cache_entries = metrics.gauge("trader_cache_entries", "Records in the cache")
+cache_bytes = metrics.gauge("trader_cache_bytes", "Bytes of responses in the cache")
+cache_prune_duration = metrics.histogram(
+    "trader_cache_prune_seconds", "Time taken to expire and evict cache records"
+)
+
+
+@dataclass(frozen=True)
+class RequestKey:
+    """
+    Canonical identity of a request in the cache. Built once per request so the
+    serialized body and params, and the hash of them, are not recomputed on every
+    cache read and write.
+    """
+
+    method: str
+    url: str
+    # canonical JSON of the request body and query params, as stored on the record
+    data: str
+    params: str
+    id: str
+
+    @classmethod
+    def create(
+        cls,
+        method: str,
+        url: str,
+        data: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        scope: str = "",
+    ) -> "RequestKey":
+        """
+        scope separates otherwise identical requests whose responses differ by who
+        made them (ex: the agent's own ships), it only goes into the id so
+        invalidation by url still covers every scope
+        """
+        serialized_data = json.dumps(data or {}, sort_keys=True)
+        serialized_params = json.dumps(params or {}, sort_keys=True)
+        identity = f"{method}\0{url}\0{serialized_data}\0{serialized_params}"
+        if scope:
+            # unscoped ids are left as they were so existing records still match
+            identity = f"{identity}\0{scope}"
+        id = hashlib.blake2b(identity.encode(), digest_size=16).hexdigest()
+        return cls(
+            method=method,
+            url=url,
+            data=serialized_data,
+            params=serialized_params,
+            id=id,
+        )
+
+
+@dataclass
+class CachedResponse:
+    response: httpx.Response
+    # stale responses are past their cache timeout but still inside the window in
+    # which they may be served while a refresh happens in the background
+    stale: bool
 
 
 class Cache(metaclass=Singleton):
@@ -23,99 +104,261 @@ class Cache(metaclass=Singleton):
     This class is a utility to cache requests. This is because we are only allowed
     2 RPS per token. It's better to have long lived caches of things that don't change
     very often.
+
+    The cache is bounded by both a number of entries and a total number of response
+    bytes. Once either is exceeded, the least recently accessed records are evicted
+    during the periodic prune.
     """
 
     dao: DAO
+    maximum_entries: int
+    maximum_bytes: int
+    # metrics, refreshed on every prune
+    entries: int = 0
+    total_bytes: int = 0
+    expirations: int = 0
+    evictions: int = 0
+    last_prune_duration: float = 0
 
-    def __init__(self, disable_background_processes: bool = False):
+    def __init__(
+        self,
+        disable_background_processes: bool = False,
+        maximum_entries: int = DEFAULT_MAXIMUM_CACHE_ENTRIES,
+        maximum_bytes: int = DEFAULT_MAXIMUM_CACHE_BYTES,
+    ):
         self.dao = DAO()
+        self.maximum_entries = maximum_entries
+        self.maximum_bytes = maximum_bytes
         if not disable_background_processes:
             thread = Thread(target=self.run_loop)
             thread.daemon = True
             thread.start()
 
-    def generate_cached_request_id(
-        self, method: str, url: str, serialized_data: str, params: str
-    ) -> str:
-        return hashlib.md5(
-            bytes(f"{method}-{url}-{serialized_data}-{params}", "UTF-8")
-        ).hexdigest()
-
-    def get_kv_cache(
-        self,
-        method: str,
-        url: str,
-        data: Optional[Dict[str, Any]] = {},
-        params: Optional[Dict[str, Any]] = {},
-    ) -> Optional[httpx.Response]:
-        id = self.generate_cached_request_id(
-            method=method,
-            url=url,
-            serialized_data=json.dumps(data, sort_keys=True),
-            params=json.dumps(params, sort_keys=True),
-        )
+    def get_kv_cache(self, key: RequestKey) -> Optional[CachedResponse]:
+        id = key.id
         logger.debug(
-            f"Getting KV populated with value - {method}: {url} {params} ({id})"
+            f"Getting KV populated with value - {key.method}: {key.url} ({id})"
         )
+        now = clock.now().timestamp()
         try:
             with Session(self.dao.engine) as session:
-                expression = select(CachedRequest).where(CachedRequest.id == id)
+                expression = (
+                    select(CachedRequest)
+                    .where(CachedRequest.id == id)
+                    .where(CachedRequest.expiration > now)
+                )
                 results = session.exec(expression)
                 cached_response = results.first()
                 if not cached_response:
-                    logger.debug(f"Cache miss - {method}: {url} ({id})")
+                    logger.debug(f"Cache miss - {key.method}: {key.url} ({id})")
+                    cache_misses.inc()
                     return None
+                serialized_response = cached_response.response
 
-                logger.debug(f"Cache hit, returning value for - {method}: {url} ({id})")
-                return pickle.loads(cached_response.response)
+                if now - cached_response.last_accessed > LAST_ACCESSED_RESOLUTION:
+                    session.exec(
+                        update(CachedRequest)  # type: ignore
+                        .where(col(CachedRequest.id) == id)
+                        .values(last_accessed=now)
+                    )
+                    session.commit()
+
+                revalidate_after = (
+                    cached_response.revalidate_after or cached_response.expiration
+                )
+                stale = revalidate_after <= now
+                cache_hits.inc(stale=str(stale).lower())
+                logger.debug(
+                    f"Cache hit{' (stale)' if stale else ''}, returning value for - {key.method}: {key.url} ({id})"
+                )
+                return CachedResponse(
+                    response=pickle.loads(serialized_response), stale=stale
+                )
         except Exception as e:
             logger.exception(e)
             return None
 
     def set_kv_cache(
         self,
-        method: str,
-        url: str,
+        key: RequestKey,
         response: httpx.Response,
-        data: Optional[Dict[str, Any]] = {},
-        params: Optional[Dict[str, Any]] = {},
         cache_timeout: float = DEFAULT_CACHE_TIMEOUT,
+        stale_while_revalidate: float = 0,
     ):
-        id = self.generate_cached_request_id(
-            method=method,
-            url=url,
-            serialized_data=json.dumps(data, sort_keys=True),
-            params=json.dumps(params, sort_keys=True),
+        """
+        Stores a response for cache_timeout seconds. If stale_while_revalidate is provided,
+        the response is kept for that many more seconds to be served as stale while it
+        is refreshed, after which a blocking fetch is forced.
+        """
+        logger.debug(
+            f"Setting KV populated with value - {key.method}: {key.url} ({key.id})"
         )
-        logger.debug(f"Setting KV populated with value - {method}: {url} ({id})")
         try:
+            now = clock.now()
+            revalidate_after = now + timedelta(seconds=cache_timeout)
+            serialized_response = pickle.dumps(response)
             cached_request = CachedRequest(
-                id=id,
-                method=method,
-                url=url,
-                data=json.dumps(data, sort_keys=True),
-                params=json.dumps(data, sort_keys=True),
+                id=key.id,
+                method=key.method,
+                url=key.url,
+                data=key.data,
+                params=key.params,
                 expiration=(
-                    datetime.now() + timedelta(seconds=cache_timeout)
+                    revalidate_after + timedelta(seconds=stale_while_revalidate)
                 ).timestamp(),
-                response=pickle.dumps(response),
+                revalidate_after=revalidate_after.timestamp(),
+                response=serialized_response,
+                last_accessed=now.timestamp(),
+                size=len(serialized_response),
             )
             with Session(self.dao.engine) as session:
-                session.add(cached_request)
+                # merge as revalidated responses replace an existing record
+                session.merge(cached_request)
+                session.commit()
+        except Exception as e:
+            logger.exception(e)
+
+    def invalidate_url(self, url: str, include_subpaths: bool = False) -> int:
+        """
+        Deletes every cached record for url, regardless of method, body or params. If
+        include_subpaths is set, records for any url beneath it are deleted as well.
+        Failures are logged rather than raised, as this runs after a mutation that has
+        already happened.
+        """
+        try:
+            with Session(self.dao.engine) as session:
+                invalidated = session.exec(
+                    delete(CachedRequest).where(col(CachedRequest.url) == url)  # type: ignore
+                ).rowcount
                 session.commit()
         except Exception as e:
             logger.exception(e)
+            invalidated = 0
+        if include_subpaths:
+            invalidated += self.invalidate_url_prefix(url_prefix=f"{url}/")
+        return invalidated
 
-    def expire_cache_records(self):
+    def invalidate_url_prefix(self, url_prefix: str) -> int:
+        """
+        Deletes every cached record whose url starts with url_prefix, regardless of
+        method, body or params. The prefix is matched as a range over url so the
+        lookup can be served from an index rather than a LIKE scan. Failures are logged
+        rather than raised, like invalidate_url.
+        """
+        invalidated = 0
+        try:
+            with Session(self.dao.engine) as session:
+                ids = session.exec(
+                    select(CachedRequest.id)
+                    .where(col(CachedRequest.url) >= url_prefix)
+                    .where(col(CachedRequest.url) < url_prefix + URL_PREFIX_UPPER_BOUND)
+                ).all()
+                for idx in range(0, len(ids), PRUNE_BATCH_SIZE):
+                    invalidated += self.delete_cache_records(
+                        session=session,
+                        ids=[id for id in ids[idx : idx + PRUNE_BATCH_SIZE] if id],
+                    )
+                session.commit()
+        except Exception as e:
+            logger.exception(e)
+            return 0
+        logger.debug(f"Invalidated {invalidated} cache records under {url_prefix}")
+        return invalidated
+
+    def delete_cache_records(self, session: Session, ids: List[str]) -> int:
+        expression = delete(CachedRequest).where(col(CachedRequest.id).in_(ids))
+        return session.exec(expression).rowcount  # type: ignore - This is done because sqlalchemy stubs are a bit off for deletes
+
+    def get_cache_usage(self) -> Tuple[int, int]:
+        """
+        Returns the number of cached records and the total size of their responses.
+        """
         with Session(self.dao.engine) as session:
-            logger.debug("Pruning expired cache records")
-            expression = delete(CachedRequest).where(
-                CachedRequest.expiration <= datetime.now().timestamp()
-            )
-            session.exec(expression)  # type: ignore - This is done because sqlalchemy stubs are a bit off for deletes
-            session.commit()
+            entries, total_bytes = session.exec(
+                select(
+                    func.count(col(CachedRequest.id)),
+                    func.coalesce(func.sum(col(CachedRequest.size)), 0),
+                )
+            ).one()
+        return entries, total_bytes
+
+    def expire_cache_records(self) -> int:
+        """
+        Deletes expired records a batch at a time, committing between batches. Each
+        batch is found through the expiration index rather than a scan of the table.
+        """
+        logger.debug("Pruning expired cache records")
+        now = clock.now().timestamp()
+        expired = 0
+        while True:
+            with Session(self.dao.engine) as session:
+                ids = session.exec(
+                    select(CachedRequest.id)
+                    .where(CachedRequest.expiration <= now)
+                    .limit(PRUNE_BATCH_SIZE)
+                ).all()
+                if ids:
+                    expired += self.delete_cache_records(
+                        session=session, ids=[id for id in ids if id]
+                    )
+                    session.commit()
+            if len(ids) < PRUNE_BATCH_SIZE:
+                break
+        self.expirations += expired
+        cache_expirations.inc(expired)
+        return expired
+
+    def evict_cache_records(self) -> int:
+        """
+        Evicts the least recently accessed records until the cache is back within both
+        its entry and byte budgets.
+        """
+        entries, total_bytes = self.get_cache_usage()
+        evicted = 0
+        while entries > self.maximum_entries or total_bytes > self.maximum_bytes:
+            with Session(self.dao.engine) as session:
+                candidates = session.exec(
+                    select(CachedRequest.id, CachedRequest.size)
+                    .order_by(col(CachedRequest.last_accessed).asc())
+                    .limit(PRUNE_BATCH_SIZE)
+                ).all()
+                if not candidates:
+                    break
+
+                ids = []
+                for id, size in candidates:
+                    if (
+                        entries <= self.maximum_entries
+                        and total_bytes <= self.maximum_bytes
+                    ):
+                        break
+                    if id:
+                        ids.append(id)
+                    entries -= 1
+                    total_bytes -= size
+                evicted += self.delete_cache_records(session=session, ids=ids)
+                session.commit()
+        if evicted:
+            logger.debug(f"Evicted {evicted} least recently used cache records")
+        self.evictions += evicted
+        cache_evictions.inc(evicted)
+        return evicted
+
+    def prune(self):
+        start = perf_counter()
+        self.expire_cache_records()
+        self.evict_cache_records()
+        self.entries, self.total_bytes = self.get_cache_usage()
+        cache_entries.set(self.entries)
+        cache_bytes.set(self.total_bytes)
+        self.last_prune_duration = perf_counter() - start
+        cache_prune_duration.observe(self.last_prune_duration)
+        logger.debug(
+            f"Pruned cache in {self.last_prune_duration:.3f}s "
+            f"({self.entries} records, {self.total_bytes} bytes)"
+        )
 
     def run_loop(self):
         while True:
-            self.expire_cache_records()
-            sleep(DEFAULT_TIMEOUT_TO_PRUNE_EXPIRATIONS)
+            self.prune()
+            clock.sleep(DEFAULT_TIMEOUT_TO_PRUNE_EXPIRATIONS)
@@ -0,0 +1,65 @@
+from dataclasses import dataclass, field
+from threading import Event, Lock
+from typing import Callable, Dict, Optional, cast
+
+import httpx
+from loguru import logger
+
+
+@dataclass
+class InFlightRequest:
+    event: Event = field(default_factory=Event)
+    response: Optional[httpx.Response] = None
+    exception: Optional[BaseException] = None
+
+
+class RequestCoalescer:
+    """
+    Single-flight de-duplication of identical requests. The first caller for a given key
+    executes the request while every other caller arriving before it completes waits on
+    the same result instead of enqueueing a duplicate call against the rate limit.
+
+    Keys are expected to be the cache id of the request, so only requests that would
+    share a cache entry are ever coalesced.
+    """
+
+    lock: Lock
+    in_flight: Dict[str, InFlightRequest]
+    # metrics
+    coalesced_requests: int = 0
+    dispatched_requests: int = 0
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.in_flight = {}
+
+    def execute(
+        self, key: str, request: Callable[[], httpx.Response]
+    ) -> httpx.Response:
+        with self.lock:
+            in_flight = self.in_flight.get(key)
+            is_leader = in_flight is None
+            if in_flight is None:
+                in_flight = InFlightRequest()
+                self.in_flight[key] = in_flight
+                self.dispatched_requests += 1
+            else:
+                self.coalesced_requests += 1
+
+        if not is_leader:
+            logger.debug(f"Coalescing request onto in-flight request ({key})")
+            in_flight.event.wait()
+            if in_flight.exception:
+                raise in_flight.exception
+            return cast(httpx.Response, in_flight.response)
+
+        try:
+            in_flight.response = request()
+            return in_flight.response
+        except BaseException as e:
+            in_flight.exception = e
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            in_flight.event.set()
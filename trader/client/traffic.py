@@ -0,0 +1,274 @@
+import atexit
+import gzip
+import json
+import os
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass
+from threading import Lock
+from time import perf_counter
+from typing import IO, Any, Deque, Dict, List, Optional
+
+import httpx
+from loguru import logger
+
+from trader.print.models import TrafficSummaryRow
+from trader.util import clock
+from trader.util.singleton import KeyedSingleton
+
+# set RECORD_TRAFFIC to a path to archive every exchange with the API there, or
+# REPLAY_TRAFFIC to answer requests from such an archive instead of the API
+RECORD_TRAFFIC = os.environ.get("RECORD_TRAFFIC")
+REPLAY_TRAFFIC = os.environ.get("REPLAY_TRAFFIC")
+# how many times faster than recorded replayed responses arrive, 0 for no latency
+REPLAY_SPEED = float(os.environ.get("REPLAY_SPEED", 1))
+TRAFFIC_ARCHIVE_VERSION = 1
+# response headers that change how the client behaves, the rest aren't kept
+RECORDED_HEADERS = {"content-type", "retry-after"}
+# seconds between flushes of the archive, so a killed run loses at most this much
+TRAFFIC_ARCHIVE_FLUSH_INTERVAL = 5.0
+
+
+@dataclass
+class RecordedExchange:
+    # seconds since recording started that the request was sent
+    offset: float
+    # seconds the API took to answer
+    elapsed: float
+    method: str
+    path: str
+    params: Dict[str, str]
+    body: Optional[Any]
+    status_code: int
+    headers: Dict[str, str]
+    content: str
+
+    @property
+    def key(self) -> str:
+        return get_exchange_key(
+            method=self.method, path=self.path, params=self.params, body=self.body
+        )
+
+
+def get_exchange_key(
+    method: str, path: str, params: Dict[str, str], body: Optional[Any]
+) -> str:
+    """
+    Identifies a request regardless of the server and agent token it was sent with,
+    so an archive replays against any API_URL and agent
+    """
+    return json.dumps([method, path, sorted(params.items()), body], sort_keys=True)
+
+
+def get_request_body(request: httpx.Request) -> Optional[Any]:
+    content = request.read()
+    return json.loads(content) if content else None
+
+
+class TrafficArchive(metaclass=KeyedSingleton):
+    """
+    Gzipped JSON lines of every exchange with the API in the order sent, with the
+    time each was sent and took. Entries are flushed every few seconds (and on close),
+    so the archive of a run that was killed can still be read up to its last flush.
+
+    One per path, shared by every agent's request queue in the process.
+    """
+
+    singleton_key = "path"
+
+    file: IO[str]
+    flushed_at: float
+    lock: Lock
+    path: str
+    recorded: int
+    started_at: float
+
+    def __init__(self, path: str):
+        self.lock = Lock()
+        self.path = path
+        self.recorded = 0
+        self.started_at = perf_counter()
+        self.flushed_at = self.started_at
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+        self.write({"version": TRAFFIC_ARCHIVE_VERSION})
+        atexit.register(self.close)
+
+    def write(self, entry: Dict[str, Any]):
+        self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        # flushing every entry would cost a write per request and hurt compression
+        if perf_counter() - self.flushed_at >= TRAFFIC_ARCHIVE_FLUSH_INTERVAL:
+            self.file.flush()
+            self.flushed_at = perf_counter()
+
+    def record(self, request: httpx.Request, response: httpx.Response, sent_at: float):
+        exchange = RecordedExchange(
+            offset=round(sent_at - self.started_at, 4),
+            elapsed=round(perf_counter() - sent_at, 4),
+            method=request.method,
+            path=request.url.path,
+            params=dict(request.url.params),
+            body=get_request_body(request),
+            status_code=response.status_code,
+            headers={
+                name: value
+                for name, value in response.headers.items()
+                if name in RECORDED_HEADERS
+            },
+            content=response.text,
+        )
+        with self.lock:
+            if self.file.closed:
+                return
+            self.write(asdict(exchange))
+            self.recorded += 1
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+
+def read_traffic_archive(path: str) -> List[RecordedExchange]:
+    exchanges: List[RecordedExchange] = []
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        try:
+            header = json.loads(file.readline())
+            if header.get("version") != TRAFFIC_ARCHIVE_VERSION:
+                logger.warning(f"Unexpected traffic archive version in {path}")
+            for line in file:
+                exchanges.append(RecordedExchange(**json.loads(line)))
+        except (EOFError, json.JSONDecodeError):
+            # the recording process was stopped before closing the archive
+            logger.warning(
+                f"Traffic archive {path} is truncated after {len(exchanges)} exchanges"
+            )
+    return exchanges
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """
+    Sends requests to the API as usual, archiving each exchange on the way back
+    """
+
+    archive: TrafficArchive
+    transport: httpx.BaseTransport
+
+    def __init__(
+        self, archive: TrafficArchive, transport: Optional[httpx.BaseTransport] = None
+    ):
+        self.archive = archive
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        sent_at = perf_counter()
+        response = self.transport.handle_request(request)
+        response.read()
+        self.archive.record(request=request, response=response, sent_at=sent_at)
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """
+    Answers requests from an archive instead of the API, so loops can be profiled
+    offline against recorded traffic. Identical requests are answered in the order
+    they were recorded, the last answer repeating once they run out, each after the
+    time the API took divided by speed (by the clock, see trader.util.clock).
+
+    Requests that were never recorded get a 404 and are counted as missed, a sign
+    that the code replayed has diverged from the code recorded.
+    """
+
+    exchanges: Dict[str, Deque[RecordedExchange]]
+    lock: Lock
+    missed: int
+    served: int
+    speed: float
+
+    def __init__(self, exchanges: List[RecordedExchange], speed: float = 1):
+        self.exchanges = defaultdict(deque)
+        for exchange in exchanges:
+            self.exchanges[exchange.key].append(exchange)
+        self.lock = Lock()
+        self.missed = 0
+        self.served = 0
+        self.speed = speed
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = get_exchange_key(
+            method=request.method,
+            path=request.url.path,
+            params=dict(request.url.params),
+            body=get_request_body(request),
+        )
+        with self.lock:
+            recorded = self.exchanges.get(key)
+            exchange = None
+            if recorded:
+                exchange = recorded.popleft() if len(recorded) > 1 else recorded[0]
+                self.served += 1
+            else:
+                self.missed += 1
+        if not exchange:
+            logger.warning(
+                f"Request not in traffic archive: {request.method} {request.url}"
+            )
+            return httpx.Response(
+                404,
+                json={
+                    "error": {
+                        "message": "Request not found in the traffic archive.",
+                        "code": 404,
+                    }
+                },
+                request=request,
+            )
+        if self.speed > 0:
+            clock.sleep(exchange.elapsed / self.speed)
+        return httpx.Response(
+            exchange.status_code,
+            headers=exchange.headers,
+            content=exchange.content.encode(),
+            request=request,
+        )
+
+
+def get_transport() -> Optional[httpx.BaseTransport]:
+    """
+    Transport for requests to the API, recording or replaying traffic if asked to
+    """
+    if REPLAY_TRAFFIC:
+        return ReplayTransport(
+            exchanges=read_traffic_archive(REPLAY_TRAFFIC), speed=REPLAY_SPEED
+        )
+    if RECORD_TRAFFIC:
+        return RecordingTransport(archive=TrafficArchive(path=RECORD_TRAFFIC))
+    return None
+
+
+def get_traffic_summary(exchanges: List[RecordedExchange]) -> List[TrafficSummaryRow]:
+    """
+    Requests, errors and API time by endpoint, busiest first, to compare the traffic
+    of runs (ex: before and after a change)
+    """
+    by_endpoint: Dict[str, List[RecordedExchange]] = defaultdict(list)
+    for exchange in exchanges:
+        by_endpoint[f"{exchange.method} {exchange.path}"].append(exchange)
+    rows = [
+        TrafficSummaryRow(
+            endpoint=endpoint,
+            requests=len(endpoint_exchanges),
+            errors=sum(exchange.status_code >= 400 for exchange in endpoint_exchanges),
+            mean_elapsed=round(
+                sum(exchange.elapsed for exchange in endpoint_exchanges)
+                / len(endpoint_exchanges),
+                3,
+            ),
+            total_elapsed=round(
+                sum(exchange.elapsed for exchange in endpoint_exchanges), 3
+            ),
+        )
+        for endpoint, endpoint_exchanges in by_endpoint.items()
+    ]
+    return sorted(rows, key=lambda row: (-row.requests, row.endpoint))
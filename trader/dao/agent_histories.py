@@ -1,14 +1,16 @@
-from datetime import UTC, datetime
+from datetime import datetime
 from typing import List, Optional
 
 from sqlalchemy.engine import Engine
 from sqlmodel import Field, Session, SQLModel, col, select
 
+from trader.util import clock
+
 
 class AgentHistory(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     agent_symbol: str
-    created_at: datetime = Field(index=True, default=datetime.now(UTC))
+    created_at: datetime = Field(index=True, default_factory=clock.now)
     ship_count: int
     in_system_count: int
     credits: int
@@ -48,7 +50,7 @@ def save_agent_history(
             AgentHistory(
                 agent_symbol=agent_symbol,
                 credits=credits,
-                created_at=datetime.now(UTC),
+                created_at=clock.now(),
                 ship_count=ship_count,
                 in_system_count=in_system_count,
             )
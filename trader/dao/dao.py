@@ -1,9 +1,15 @@
 import os
+from time import perf_counter
+from typing import Optional
 
+from loguru import logger
+from sqlalchemy import Column, MetaData, String, Table, event, inspect, select
 from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
 from sqlmodel import SQLModel, create_engine
 
 from trader.dao.agent_histories import AgentHistory
+from trader.dao.market_prices import MarketPrice, MarketSymbol
 from trader.dao.markets import (
     MarketExchange,
     MarketExport,
@@ -17,6 +23,8 @@ from trader.dao.ships import Ship
 from trader.dao.shipyards import ShipyardShip, ShipyardTransaction
 from trader.dao.squads import Squad, SquadMember
 from trader.dao.waypoints import Waypoint, WaypointTrait
+from trader.exceptions import TraderDaoException
+from trader.util.metrics import MetricsRegistry
 from trader.util.singleton import Singleton
 
 Tables = [
@@ -25,6 +33,8 @@ Tables = [
     MarketExchange,
     MarketExport,
     MarketImport,
+    MarketPrice,
+    MarketSymbol,
     MarketTransaction,
     Queue,
     QueueEntry,
@@ -39,6 +49,133 @@ Tables = [
 ]
 
 DB_URL = os.environ.get("DB_URL", "sqlite:///db.db")
+# alembic head the models above correspond to, bump this alongside every new migration
+SCHEMA_REVISION = "37794328425f"
+# writers in other processes (ex: fleet workers) wait up to this long for the lock
+SQLITE_BUSY_TIMEOUT_MS = 30_000
+# seconds, most statements take well under a millisecond unless waiting on the lock
+QUERY_DURATION_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.05,
+    0.25,
+    1,
+    5,
+    30,
+)
+
+metrics = MetricsRegistry()
+query_duration = metrics.histogram(
+    "trader_db_query_seconds",
+    "Time taken by database statements, waits on the SQLite lock included",
+    labels=["operation"],
+    buckets=QUERY_DURATION_BUCKETS,
+)
+query_errors = metrics.counter(
+    "trader_db_query_errors",
+    "Database statements that failed, ex: when the lock wait timed out",
+    labels=["operation"],
+)
+
+alembic_version = Table(
+    "alembic_version",
+    MetaData(),
+    Column("version_num", String(32), primary_key=True),
+)
+
+
+def configure_sqlite_connection(dbapi_connection, _):
+    """
+    WAL lets readers proceed alongside a writer, and the busy timeout makes concurrent
+    writers from other processes wait on the lock instead of failing immediately.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def get_operation(statement: str) -> str:
+    words = statement.split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+
+def record_query_start(connection, cursor, statement, parameters, context, executemany):
+    connection.info.setdefault("query_started_at", []).append(perf_counter())
+
+
+def record_query_end(connection, cursor, statement, parameters, context, executemany):
+    started_at = connection.info["query_started_at"].pop()
+    query_duration.observe(
+        perf_counter() - started_at, operation=get_operation(statement)
+    )
+
+
+def record_query_error(context):
+    # failures to connect happen before there is a connection or statement
+    started_at = context.connection and context.connection.info.get("query_started_at")
+    if started_at:
+        started_at.pop()
+    query_errors.inc(operation=get_operation(context.statement or ""))
+
+
+def instrument_engine(engine: Engine):
+    """
+    Times every statement run through the engine, by whichever session or connection
+    """
+    event.listen(engine, "before_cursor_execute", record_query_start)
+    event.listen(engine, "after_cursor_execute", record_query_end)
+    event.listen(engine, "handle_error", record_query_error)
+
+
+def get_schema_revision(engine: Engine) -> Optional[str]:
+    """
+    Reads the alembic revision directly, which is considerably cheaper than setting up
+    an alembic migration context. Returns None for an unversioned database.
+    """
+    try:
+        with engine.connect() as connection:
+            return connection.execute(
+                select(alembic_version.c.version_num)
+            ).scalar_one_or_none()
+    except DBAPIError:
+        return None
+
+
+def ensure_schema(engine: Engine) -> None:
+    """
+    Checks the alembic revision of the database against the models instead of running
+    create_all on every start. A fresh database is created from the models and stamped
+    at SCHEMA_REVISION. An unversioned database with existing tables predates
+    migrations and falls back to create_all. A database at any other revision must be
+    migrated first.
+    """
+    revision = get_schema_revision(engine)
+    if revision == SCHEMA_REVISION:
+        return
+
+    if revision is None:
+        if inspect(engine).get_table_names():
+            logger.warning("Database is not versioned, falling back to create_all")
+            SQLModel.metadata.create_all(engine)
+            return
+        SQLModel.metadata.create_all(engine)
+        with engine.begin() as connection:
+            alembic_version.create(connection)
+            connection.execute(
+                alembic_version.insert().values(version_num=SCHEMA_REVISION)
+            )
+        return
+
+    raise TraderDaoException(
+        f"Database is at revision {revision} but {SCHEMA_REVISION} is required, "
+        "run `alembic upgrade head` to migrate it"
+    )
 
 
 class DAO(metaclass=Singleton):
@@ -51,4 +188,7 @@ class DAO(metaclass=Singleton):
 
     def ensure_db(self):
         self.engine = create_engine(self.db_url, echo="SQL_DEBUG" in os.environ)
-        SQLModel.metadata.create_all(self.engine)
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine, "connect", configure_sqlite_connection)
+        instrument_engine(engine=self.engine)
+        ensure_schema(engine=self.engine)
@@ -0,0 +1,227 @@
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Index
+from sqlalchemy import select as select_columns
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Engine
+from sqlmodel import Field, Session, SQLModel, col, select
+
+from trader.client.market import TradeGood
+from trader.util import clock
+
+
+class MarketSymbol(SQLModel, table=True):
+    """
+    Integer encoding of the waypoint, good and supply symbols in price history, so every
+    observation is a handful of integers rather than repeated strings
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    symbol: str = Field(unique=True)
+
+
+class MarketPrice(SQLModel, table=True):
+    """
+    Append only history of market prices. The table has no rowid, so rows are stored
+    clustered by (waypoint, good, time) and a market's history for a good is one range
+    read. Prices of a good across every market are served by the (good, time) index.
+    """
+
+    __table_args__ = (
+        Index("ix_marketprice_good_id_observed_at", "good_id", "observed_at"),
+        {"sqlite_with_rowid": False},
+    )
+
+    waypoint_id: int = Field(primary_key=True)
+    good_id: int = Field(primary_key=True)
+    # seconds since epoch
+    observed_at: int = Field(primary_key=True)
+    supply_id: int
+    trade_volume: int
+    purchase_price: int
+    sell_price: int
+
+
+@dataclass
+class MarketPriceObservation:
+    waypoint_symbol: str
+    good_symbol: str
+    observed_at: datetime
+    supply: str
+    trade_volume: int
+    purchase_price: int
+    sell_price: int
+
+
+# symbols never change id once assigned, so they're cached per database
+symbol_ids: Dict[str, Dict[str, int]] = {}
+symbols: Dict[str, Dict[int, str]] = {}
+symbols_lock = Lock()
+
+
+def get_database(session: Session) -> str:
+    """
+    The database a session is bound to, which may be through a connection
+    """
+    bind = session.get_bind()
+    engine = bind if isinstance(bind, Engine) else bind.engine
+    return str(engine.url)
+
+
+def get_symbol_ids(session: Session, values: Iterable[str]) -> Dict[str, int]:
+    return {
+        symbol: symbol_id
+        for symbol_id, symbol in session.exec(
+            select(MarketSymbol.id, MarketSymbol.symbol).where(
+                col(MarketSymbol.symbol).in_(values)
+            )
+        ).all()
+        if symbol_id is not None
+    }
+
+
+def encode_symbols(session: Session, values: Iterable[str]) -> Dict[str, int]:
+    database = get_database(session)
+    values = set(values)
+    with symbols_lock:
+        cached_ids = symbol_ids.setdefault(database, {})
+        cached_symbols = symbols.setdefault(database, {})
+        ids = {value: cached_ids[value] for value in values if value in cached_ids}
+        missing = values - ids.keys()
+        if not missing:
+            return ids
+
+        for symbol, symbol_id in get_symbol_ids(session, missing).items():
+            cached_ids[symbol] = symbol_id
+            cached_symbols[symbol_id] = symbol
+            ids[symbol] = symbol_id
+        missing = values - ids.keys()
+        if missing:
+            # new symbols are only cached once seen committed, in case this rolls back
+            session.exec(
+                insert(MarketSymbol)
+                .values([{"symbol": value} for value in missing])
+                .on_conflict_do_nothing()
+            )
+            ids.update(get_symbol_ids(session, missing))
+        return ids
+
+
+def decode_symbols(session: Session, ids: Iterable[int]) -> Dict[int, str]:
+    database = get_database(session)
+    with symbols_lock:
+        cached_ids = symbol_ids.setdefault(database, {})
+        cached_symbols = symbols.setdefault(database, {})
+        missing = {symbol_id for symbol_id in ids if symbol_id not in cached_symbols}
+        if missing:
+            for symbol_id, symbol in session.exec(
+                select(MarketSymbol.id, MarketSymbol.symbol).where(
+                    col(MarketSymbol.id).in_(missing)
+                )
+            ).all():
+                if symbol_id is None:
+                    continue
+                cached_ids[symbol] = symbol_id
+                cached_symbols[symbol_id] = symbol
+        return {symbol_id: cached_symbols[symbol_id] for symbol_id in ids}
+
+
+def append_market_prices(
+    session: Session,
+    waypoint_symbol: str,
+    trade_goods: List[TradeGood],
+    observed_at: Optional[datetime] = None,
+) -> None:
+    """
+    Records an observation of every good at a market. Repeat observations within the
+    same second are dropped.
+    """
+    if not trade_goods:
+        return
+    timestamp = int((observed_at or clock.now()).timestamp())
+    ids = encode_symbols(
+        session,
+        {waypoint_symbol}
+        | {trade_good.symbol for trade_good in trade_goods}
+        | {trade_good.supply for trade_good in trade_goods},
+    )
+    session.exec(
+        insert(MarketPrice)
+        .values(
+            [
+                {
+                    "waypoint_id": ids[waypoint_symbol],
+                    "good_id": ids[trade_good.symbol],
+                    "observed_at": timestamp,
+                    "supply_id": ids[trade_good.supply],
+                    "trade_volume": trade_good.trade_volume,
+                    "purchase_price": trade_good.purchase_price,
+                    "sell_price": trade_good.sell_price,
+                }
+                for trade_good in trade_goods
+            ]
+        )
+        .on_conflict_do_nothing()
+    )
+
+
+def get_market_price_history(
+    engine: Engine,
+    good_symbol: str,
+    since: datetime,
+    until: Optional[datetime] = None,
+    waypoint_symbol: Optional[str] = None,
+) -> List[MarketPriceObservation]:
+    """
+    Prices of a good over a time range, at every market or only at waypoint_symbol,
+    ordered by time
+    """
+    with Session(engine) as session:
+        keys = [good_symbol] + ([waypoint_symbol] if waypoint_symbol else [])
+        known_ids = get_symbol_ids(session, keys)
+        if any(key not in known_ids for key in keys):
+            return []
+
+        # more columns than sqlmodel's select is typed for, so read as plain rows
+        expression = (
+            select_columns(
+                col(MarketPrice.waypoint_id),
+                col(MarketPrice.observed_at),
+                col(MarketPrice.supply_id),
+                col(MarketPrice.trade_volume),
+                col(MarketPrice.purchase_price),
+                col(MarketPrice.sell_price),
+            )
+            .where(col(MarketPrice.good_id) == known_ids[good_symbol])
+            .where(col(MarketPrice.observed_at) >= int(since.timestamp()))
+            .order_by(col(MarketPrice.observed_at))
+        )
+        if until:
+            expression = expression.where(
+                col(MarketPrice.observed_at) <= int(until.timestamp())
+            )
+        if waypoint_symbol:
+            expression = expression.where(
+                col(MarketPrice.waypoint_id) == known_ids[waypoint_symbol]
+            )
+        prices = session.connection().execute(expression).all()
+        decoded = decode_symbols(
+            session,
+            {price.waypoint_id for price in prices}
+            | {price.supply_id for price in prices},
+        )
+    return [
+        MarketPriceObservation(
+            waypoint_symbol=decoded[price.waypoint_id],
+            good_symbol=good_symbol,
+            observed_at=datetime.fromtimestamp(price.observed_at, UTC),
+            supply=decoded[price.supply_id],
+            trade_volume=price.trade_volume,
+            purchase_price=price.purchase_price,
+            sell_price=price.sell_price,
+        )
+        for price in prices
+    ]
@@ -1,4 +1,4 @@
-from datetime import UTC, datetime
+from datetime import datetime
 from typing import List, Optional
 
 from sqlalchemy.engine import Engine
@@ -7,6 +7,8 @@ from sqlmodel import Field, Session, SQLModel, select
 from trader.client.market import Exchange, Export, Import
 from trader.client.market import Market as MarketClient
 from trader.client.market import Transaction
+from trader.dao.market_prices import append_market_prices
+from trader.util import clock
 
 
 class MarketImport(SQLModel, table=True):
@@ -14,7 +16,7 @@ class MarketImport(SQLModel, table=True):
     symbol: str
     name: str
     description: str
-    created_at: datetime = Field(index=True, default=datetime.now(UTC))
+    created_at: datetime = Field(index=True, default_factory=clock.now)
     waypoint_symbol: str = Field(index=True)
     system_symbol: str
 
@@ -24,7 +26,7 @@ class MarketExport(SQLModel, table=True):
     symbol: str
     name: str
     description: str
-    created_at: datetime = Field(index=True, default=datetime.now(UTC))
+    created_at: datetime = Field(index=True, default_factory=clock.now)
     waypoint_symbol: str = Field(index=True)
     system_symbol: str
 
@@ -34,7 +36,7 @@ class MarketExchange(SQLModel, table=True):
     symbol: str
     name: str
     description: str
-    created_at: datetime = Field(index=True, default=datetime.now(UTC))
+    created_at: datetime = Field(index=True, default_factory=clock.now)
     waypoint_symbol: str = Field(index=True)
     system_symbol: str
 
@@ -47,7 +49,7 @@ class MarketTransaction(SQLModel, table=True):
     units: int
     price_per_unit: int
     total_price: int
-    created_at: datetime = Field(index=True, default=datetime.now(UTC))
+    created_at: datetime = Field(index=True, default_factory=clock.now)
     waypoint_symbol: str = Field(index=True)
     system_symbol: str
 
@@ -143,6 +145,13 @@ def upsert_market_exchange(
         session.add(market_exchange_creation)
 
 
+def parse_transaction_timestamp(timestamp: str) -> datetime:
+    try:
+        return datetime.fromisoformat(timestamp)
+    except ValueError:
+        return clock.now()
+
+
 def upsert_market_transaction(
     session: Session,
     market_transaction: Transaction,
@@ -154,6 +163,7 @@ def upsert_market_transaction(
     ).one_or_none()
     market_transaction_creation = MarketTransaction(
         id=f"{system_symbol}-{market_transaction.trade_symbol}-{market_transaction.ship_symbol}-{market_transaction.timestamp}",
+        created_at=parse_transaction_timestamp(market_transaction.timestamp),
         ship_symbol=market_transaction.ship_symbol,
         waypoint_symbol=market_transaction.waypoint_symbol,
         units=market_transaction.units,
@@ -206,18 +216,24 @@ def save_client_market(
                     system_symbol=system_symbol,
                 )
         if market.trade_goods:
-            existing_goods = session.exec(
-                select(MarketTradeGood).where(
-                    MarketTradeGood.waypoint_symbol == market.symbol
-                )
-            ).all()
-            for existing_good in existing_goods:
-                session.delete(existing_good)
-            session.commit()
-
+            # history is appended, the latest price of each good is updated in place
+            append_market_prices(
+                session=session,
+                waypoint_symbol=market.symbol,
+                trade_goods=market.trade_goods,
+            )
+            existing_goods = {
+                existing_good.symbol: existing_good
+                for existing_good in session.exec(
+                    select(MarketTradeGood).where(
+                        MarketTradeGood.waypoint_symbol == market.symbol
+                    )
+                ).all()
+            }
             for market_trade_good in market.trade_goods:
-                session.add(
-                    MarketTradeGood(
+                upsert = existing_goods.pop(market_trade_good.symbol, None)
+                if not upsert:
+                    upsert = MarketTradeGood(
                         system_symbol=system_symbol,
                         waypoint_symbol=market.symbol,
                         symbol=market_trade_good.symbol,
@@ -226,7 +242,14 @@ def save_client_market(
                         purchase_price=market_trade_good.purchase_price,
                         sell_price=market_trade_good.sell_price,
                     )
-                )
+                else:
+                    upsert.trade_volume = market_trade_good.trade_volume
+                    upsert.supply = market_trade_good.supply
+                    upsert.purchase_price = market_trade_good.purchase_price
+                    upsert.sell_price = market_trade_good.sell_price
+                session.add(upsert)
+            for existing_good in existing_goods.values():
+                session.delete(existing_good)
         session.commit()
 
 
@@ -237,7 +260,17 @@ def get_market_trade_goods_by_system(
         expression = select(MarketTradeGood).where(
             MarketTradeGood.system_symbol == system_symbol
         )
-        return session.exec(expression).all()
+        return list(session.exec(expression).all())
+
+
+def get_market_trade_goods_by_waypoint(
+    engine: Engine, waypoint_symbol: str
+) -> List[MarketTradeGood]:
+    with Session(engine) as session:
+        expression = select(MarketTradeGood).where(
+            MarketTradeGood.waypoint_symbol == waypoint_symbol
+        )
+        return list(session.exec(expression).all())
 
 
 def get_market_trade_good_by_waypoint(
@@ -1,9 +1,11 @@
 from typing import List, Optional
 
-from sqlmodel import Column, Field, ForeignKey, Relationship, SQLModel, String
+from sqlmodel import Column, Field, ForeignKey, Index, Relationship, SQLModel, String
 
 
 class QueueEntry(SQLModel, table=True):
+    __table_args__ = (Index("ix_queueentry_queue_id_order", "queue_id", "order"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     queue_id: Optional[str] = Field(
         default=None,
@@ -16,6 +18,8 @@ class QueueEntry(SQLModel, table=True):
 class Queue(SQLModel, table=True):
     id: Optional[str] = Field(default=None, primary_key=True)
     name: str
+    # monotonic counter handed out as the order of the next appended entry
+    sequence: int = Field(default=0)
     entries: List[QueueEntry] = Relationship(
         sa_relationship_kwargs={
             "cascade": "all, delete",
@@ -6,8 +6,14 @@ from sqlmodel import Field, SQLModel
 class CachedRequest(SQLModel, table=True):
     id: Optional[str] = Field(default=None, primary_key=True)
     method: str
-    url: str
+    url: str = Field(index=True)
     data: str
     params: str
     response: bytes
-    expiration: float
+    expiration: float = Field(index=True)
+    # past this point the response is stale, but may still be served while it is refreshed
+    revalidate_after: Optional[float] = None
+    # used to evict least recently used records once the cache is over budget
+    last_accessed: float = Field(default=0, index=True)
+    # size of the pickled response in bytes, counted against the cache byte budget
+    size: int = Field(default=0)
@@ -1,13 +1,15 @@
-from datetime import UTC, datetime
+from datetime import datetime
 from typing import Optional
 
 from sqlmodel import Field, SQLModel
 
+from trader.util import clock
+
 
 class ShipEvent(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     ship_id: Optional[str] = Field(default=None, foreign_key="ship.id")
-    created_at: datetime = Field(index=True, default=datetime.now(UTC))
+    created_at: datetime = Field(index=True, default_factory=clock.now)
     event_name: str
     waypoint_symbol: Optional[str]
     system_symbol: Optional[str]
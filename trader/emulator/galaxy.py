@@ -0,0 +1,378 @@
+from dataclasses import dataclass, field
+from math import cos, pi, sin
+from random import Random
+from typing import Dict, Iterator, List, Literal, Optional, Set, Tuple
+
+TradeTypes = Literal["EXPORT", "IMPORT", "EXCHANGE"]
+
+SECTOR_SYMBOL = "X1"
+FACTION_SYMBOL = "COSMIC"
+STAR_TYPES = ["RED_STAR", "ORANGE_STAR", "BLUE_STAR", "YOUNG_STAR", "WHITE_DWARF"]
+# prices by supply relative to a good's base price, and the spread a market keeps
+# between what it sells a good for and what it buys it back at
+SUPPLY_PRICE_MULTIPLIER = {
+    "SCARCE": 1.4,
+    "LIMITED": 1.2,
+    "MODERATE": 1.0,
+    "HIGH": 0.85,
+    "ABUNDANT": 0.7,
+}
+SELL_PRICE_SPREAD = 0.92
+TRADE_VOLUMES = [10, 20, 40, 60]
+# prices of a good drift across the galaxy in waves this many units long, so markets
+# near each other price it alike and arbitrage grows with distance
+PRICE_WAVELENGTH = 2000
+PRICE_REGIONAL_VARIATION = 0.2
+# asteroid fields are found in clusters along a system's belt
+ASTEROID_FIELDS_PER_CLUSTER = 6
+
+
+@dataclass
+class Good:
+    symbol: str
+    name: str
+    description: str
+    base_price: int
+
+
+GOODS: Dict[str, Good] = {
+    good.symbol: good
+    for good in [
+        Good("FUEL", "Fuel", "Refined fuel for ship engines.", 72),
+        Good("ICE_WATER", "Ice Water", "Frozen water mined from ice.", 14),
+        Good("QUARTZ_SAND", "Quartz Sand", "Sand rich in silica.", 22),
+        Good("SILICON_CRYSTALS", "Silicon Crystals", "Crystalline silicon.", 36),
+        Good("IRON_ORE", "Iron Ore", "Ore refined into iron.", 44),
+        Good("COPPER_ORE", "Copper Ore", "Ore refined into copper.", 50),
+        Good("ALUMINUM_ORE", "Aluminum Ore", "Ore refined into aluminum.", 56),
+        Good("PRECIOUS_STONES", "Precious Stones", "Gems of many kinds.", 64),
+        Good("IRON", "Iron", "Refined iron.", 96),
+        Good("COPPER", "Copper", "Refined copper.", 104),
+        Good("ALUMINUM", "Aluminum", "Refined aluminum.", 112),
+        Good("FOOD", "Food", "Rations for crews.", 80),
+        Good("FABRICS", "Fabrics", "Textiles for crews.", 74),
+        Good("MACHINERY", "Machinery", "Industrial machinery.", 168),
+        Good("ELECTRONICS", "Electronics", "Electronic components.", 232),
+    ]
+}
+# goods extracted from asteroid fields, raw ores being the most common
+DEPOSITS = [
+    "ICE_WATER",
+    "QUARTZ_SAND",
+    "SILICON_CRYSTALS",
+    "IRON_ORE",
+    "COPPER_ORE",
+    "ALUMINUM_ORE",
+    "PRECIOUS_STONES",
+]
+MARKET_GOODS = [symbol for symbol in GOODS if symbol != "FUEL"]
+WAYPOINT_TRAITS = {
+    "MARKETPLACE": ("Marketplace", "A thriving center of commerce."),
+    "SHIPYARD": ("Shipyard", "A facility for building ships."),
+    "COMMON_METAL_DEPOSITS": ("Common Metal Deposits", "Deposits of common ores."),
+    "MINERAL_DEPOSITS": ("Mineral Deposits", "Deposits of minerals."),
+    "BARREN": ("Barren", "A lifeless surface."),
+    "TEMPERATE": ("Temperate", "A mild climate."),
+    "OUTPOST": ("Outpost", "A small settlement."),
+}
+# each system is laid out as a planet and station at its core, asteroid fields in a
+# belt around it and planets, moons and a gas giant further out
+CORE_WAYPOINT_TYPES = ["PLANET", "ORBITAL_STATION"]
+OUTER_WAYPOINT_TYPES = ["PLANET", "MOON", "GAS_GIANT", "PLANET", "MOON"]
+
+
+@dataclass
+class MarketGood:
+    symbol: str
+    trade_type: TradeTypes
+    trade_volume: int
+    supply: str
+    # price the market sells at when undisturbed, trades move it (see world)
+    base_purchase_price: int
+
+
+@dataclass
+class EmulatedMarket:
+    symbol: str
+    goods: Dict[str, MarketGood]
+
+
+@dataclass
+class EmulatedShipyard:
+    symbol: str
+    ship_types: List[str]
+
+
+@dataclass
+class EmulatedWaypoint:
+    symbol: str
+    system_symbol: str
+    waypoint_type: str
+    x: int
+    y: int
+    traits: List[str]
+    deposits: List[str] = field(default_factory=list)
+    orbitals: List[str] = field(default_factory=list)
+    orbits: Optional[str] = None
+
+
+@dataclass
+class EmulatedSystem:
+    symbol: str
+    system_type: str
+    x: int
+    y: int
+    waypoints: List[EmulatedWaypoint]
+
+
+@dataclass
+class Galaxy:
+    seed: int
+    systems: Dict[str, EmulatedSystem]
+    waypoints: Dict[str, EmulatedWaypoint]
+    markets: Dict[str, EmulatedMarket]
+    shipyards: Dict[str, EmulatedShipyard]
+    # waypoint new agents start at, always has a marketplace and a shipyard
+    headquarters: str
+
+
+# phases of the price waves of each good, see get_price_factors
+PriceWaves = Dict[str, Tuple[float, float]]
+
+
+def generate_symbol(rng: Random, taken: Set[str]) -> str:
+    # numbers grow a digit with every order of magnitude of systems, so symbols of
+    # large galaxies are found without many collisions
+    digits = max(2, len(str(len(taken))))
+    while True:
+        letters = "".join(rng.choice("ABCDEFGHJKLMNPQRSTUVWXYZ") for _ in range(2))
+        symbol = f"{SECTOR_SYMBOL}-{letters}{rng.randint(1, 10**digits - 1)}"
+        if symbol not in taken:
+            return symbol
+
+
+def get_price_factors(
+    rng: Random, price_waves: PriceWaves, x: int, y: int
+) -> Dict[str, float]:
+    """
+    Relative price of every good in a system, following the galaxy's price waves
+    with a little local noise
+    """
+    return {
+        symbol: (
+            1
+            + PRICE_REGIONAL_VARIATION
+            * sin(x / PRICE_WAVELENGTH * 2 * pi + phase_x)
+            * cos(y / PRICE_WAVELENGTH * 2 * pi + phase_y)
+        )
+        * rng.uniform(0.95, 1.05)
+        for symbol, (phase_x, phase_y) in price_waves.items()
+    }
+
+
+def generate_market(
+    rng: Random,
+    symbol: str,
+    deposits: List[str],
+    with_fuel: bool,
+    price_factors: Optional[Dict[str, float]] = None,
+) -> EmulatedMarket:
+    """
+    Markets export a couple of goods cheaply, import a couple at a premium and
+    exchange the rest. Raw goods mined in the system are the first to be imported.
+    Prices follow the system's price factors, so markets of a system are correlated.
+    """
+    goods = sorted(rng.sample(MARKET_GOODS, k=6), key=lambda good: good not in deposits)
+    imports, exports, exchange = goods[:2], goods[2:4], goods[4:]
+    if with_fuel:
+        exchange.append("FUEL")
+    market_goods: Dict[str, MarketGood] = {}
+    for trade_type, symbols, supplies in [
+        ("EXPORT", exports, ["HIGH", "ABUNDANT"]),
+        ("IMPORT", imports, ["SCARCE", "LIMITED"]),
+        ("EXCHANGE", exchange, ["MODERATE"]),
+    ]:
+        for good_symbol in symbols:
+            supply = rng.choice(supplies)
+            market_goods[good_symbol] = MarketGood(
+                symbol=good_symbol,
+                trade_type=trade_type,  # type: ignore
+                trade_volume=rng.choice(TRADE_VOLUMES),
+                supply=supply,
+                base_purchase_price=max(
+                    1,
+                    round(
+                        GOODS[good_symbol].base_price
+                        * SUPPLY_PRICE_MULTIPLIER[supply]
+                        * (price_factors or {}).get(good_symbol, 1)
+                        * rng.uniform(0.95, 1.05)
+                    ),
+                ),
+            )
+    return EmulatedMarket(symbol=symbol, goods=market_goods)
+
+
+def generate_system(
+    rng: Random,
+    symbol: str,
+    waypoint_count: int,
+    markets: Dict[str, EmulatedMarket],
+    shipyards: Dict[str, EmulatedShipyard],
+    is_headquarters: bool = False,
+    price_waves: Optional[PriceWaves] = None,
+) -> EmulatedSystem:
+    waypoint_count = max(waypoint_count, 4)
+    asteroid_count = max(1, waypoint_count // 3)
+    outer_count = waypoint_count - len(CORE_WAYPOINT_TYPES) - asteroid_count
+    waypoints: List[EmulatedWaypoint] = []
+    planets: List[EmulatedWaypoint] = []
+
+    def add_waypoint(
+        waypoint_type: str,
+        radius: float,
+        traits: List[str],
+        angle: Optional[float] = None,
+    ):
+        angle = rng.uniform(0, 2 * pi) if angle is None else angle
+        waypoint = EmulatedWaypoint(
+            symbol=f"{symbol}-{chr(ord('A') + len(waypoints) % 26)}{len(waypoints) + 1}",
+            system_symbol=symbol,
+            waypoint_type=waypoint_type,
+            x=round(radius * cos(angle)),
+            y=round(radius * sin(angle)),
+            traits=traits,
+        )
+        waypoints.append(waypoint)
+        if waypoint_type == "PLANET":
+            planets.append(waypoint)
+        return waypoint
+
+    for idx, waypoint_type in enumerate(CORE_WAYPOINT_TYPES):
+        add_waypoint(
+            waypoint_type,
+            radius=rng.uniform(5, 20),
+            traits=["MARKETPLACE", "TEMPERATE"] + (["SHIPYARD"] if idx == 0 else []),
+        )
+    # fields of a cluster lie close together and mostly share the cluster's deposits
+    belt_radius = rng.uniform(40, 80)
+    clusters = [
+        (rng.uniform(0, 2 * pi), rng.sample(DEPOSITS, k=4))
+        for _ in range(-(-asteroid_count // ASTEROID_FIELDS_PER_CLUSTER))
+    ]
+    for idx in range(asteroid_count):
+        cluster_angle, cluster_deposits = clusters[idx % len(clusters)]
+        asteroid = add_waypoint(
+            "ASTEROID_FIELD",
+            radius=belt_radius + rng.gauss(0, 3),
+            traits=[rng.choice(["COMMON_METAL_DEPOSITS", "MINERAL_DEPOSITS"])],
+            angle=cluster_angle + rng.gauss(0, 0.05),
+        )
+        asteroid.deposits = sorted(
+            set(rng.sample(cluster_deposits, k=3) + [rng.choice(DEPOSITS)])
+        )
+    for idx in range(max(0, outer_count)):
+        waypoint_type = OUTER_WAYPOINT_TYPES[idx % len(OUTER_WAYPOINT_TYPES)]
+        traits = [rng.choice(["BARREN", "OUTPOST", "TEMPERATE"])]
+        if rng.random() < 0.4:
+            traits.append("MARKETPLACE")
+        outer = add_waypoint(waypoint_type, radius=rng.uniform(90, 300), traits=traits)
+        if waypoint_type == "MOON":
+            parent = rng.choice(planets)
+            outer.orbits = parent.symbol
+            outer.x, outer.y = parent.x, parent.y
+            parent.orbitals.append(outer.symbol)
+
+    angle = rng.uniform(0, 2 * pi)
+    radius = 0 if is_headquarters else rng.uniform(200, 5000)
+    x, y = round(radius * cos(angle)), round(radius * sin(angle))
+    price_factors = get_price_factors(rng, price_waves=price_waves or {}, x=x, y=y)
+    deposits = sorted(
+        {deposit for waypoint in waypoints for deposit in waypoint.deposits}
+    )
+    for waypoint in waypoints:
+        if "MARKETPLACE" in waypoint.traits:
+            markets[waypoint.symbol] = generate_market(
+                rng,
+                symbol=waypoint.symbol,
+                deposits=deposits,
+                # every market at the core sells fuel, so no ship is ever stranded
+                with_fuel=waypoint.waypoint_type in CORE_WAYPOINT_TYPES
+                or rng.random() < 0.5,
+                price_factors=price_factors,
+            )
+        if "SHIPYARD" in waypoint.traits:
+            shipyards[waypoint.symbol] = EmulatedShipyard(
+                symbol=waypoint.symbol,
+                ship_types=["SHIP_PROBE", "SHIP_MINING_DRONE", "SHIP_LIGHT_HAULER"],
+            )
+    return EmulatedSystem(
+        symbol=symbol,
+        system_type=rng.choice(STAR_TYPES),
+        x=x,
+        y=y,
+        waypoints=waypoints,
+    )
+
+
+def generate_systems(
+    seed: int = 0, systems: int = 10, waypoints_per_system: int = 12
+) -> Iterator[
+    Tuple[EmulatedSystem, Dict[str, EmulatedMarket], Dict[str, EmulatedShipyard]]
+]:
+    """
+    Systems of the galaxy generate_galaxy builds from the same arguments, one at a
+    time with their markets and shipyards, so galaxies too large to hold in memory
+    can still be written out (see trader.emulator.populate)
+    """
+    rng = Random(seed)
+    price_waves: PriceWaves = {
+        symbol: (rng.uniform(0, 2 * pi), rng.uniform(0, 2 * pi)) for symbol in GOODS
+    }
+    taken: Set[str] = set()
+    for idx in range(max(1, systems)):
+        symbol = generate_symbol(rng, taken=taken)
+        taken.add(symbol)
+        markets: Dict[str, EmulatedMarket] = {}
+        shipyards: Dict[str, EmulatedShipyard] = {}
+        system = generate_system(
+            rng,
+            symbol=symbol,
+            waypoint_count=waypoints_per_system,
+            markets=markets,
+            shipyards=shipyards,
+            is_headquarters=idx == 0,
+            price_waves=price_waves,
+        )
+        yield system, markets, shipyards
+
+
+def generate_galaxy(
+    seed: int = 0, systems: int = 10, waypoints_per_system: int = 12
+) -> Galaxy:
+    """
+    Builds a galaxy deterministically from the seed, so emulated runs are repeatable.
+    Every system has a marketplace and shipyard at its core and clusters of asteroid
+    fields in a belt to mine, the first system being the headquarters of new agents.
+    """
+    generated: Dict[str, EmulatedSystem] = {}
+    markets: Dict[str, EmulatedMarket] = {}
+    shipyards: Dict[str, EmulatedShipyard] = {}
+    for system, system_markets, system_shipyards in generate_systems(
+        seed=seed, systems=systems, waypoints_per_system=waypoints_per_system
+    ):
+        generated[system.symbol] = system
+        markets.update(system_markets)
+        shipyards.update(system_shipyards)
+    headquarters_system = next(iter(generated.values()))
+    return Galaxy(
+        seed=seed,
+        systems=generated,
+        waypoints={
+            waypoint.symbol: waypoint
+            for system in generated.values()
+            for waypoint in system.waypoints
+        },
+        markets=markets,
+        shipyards=shipyards,
+        headquarters=headquarters_system.waypoints[0].symbol,
+    )
@@ -0,0 +1,355 @@
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from random import Random
+from typing import Dict, List, Optional, Type, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, create_engine
+
+from trader.client.market import Exchange, Export, Import, Market, TradeGood
+from trader.client.system import Faction as SystemFaction
+from trader.client.system import Orbital as SystemOrbital
+from trader.client.system import System
+from trader.client.system import Waypoint as SystemWaypoint
+from trader.client.waypoint import Chart, Faction, Orbital, Traits, Waypoint
+from trader.dao.dao import configure_sqlite_connection, ensure_schema
+from trader.dao.market_prices import MarketPrice, encode_symbols
+from trader.dao.markets import (
+    MarketExchange,
+    MarketExport,
+    MarketImport,
+    MarketTradeGood,
+)
+from trader.dao.waypoints import Waypoint as WaypointDAO
+from trader.dao.waypoints import WaypointTrait
+from trader.emulator.galaxy import (
+    FACTION_SYMBOL,
+    GOODS,
+    SECTOR_SYMBOL,
+    SELL_PRICE_SPREAD,
+    SUPPLY_PRICE_MULTIPLIER,
+    WAYPOINT_TRAITS,
+    EmulatedMarket,
+    EmulatedSystem,
+    EmulatedWaypoint,
+    generate_systems,
+)
+from trader.exceptions import TraderDaoException
+from trader.util import clock
+
+CHARTED_ON = "2023-01-01T00:00:00.000Z"
+# systems written per transaction when populating a database
+POPULATE_BATCH_SIZE = 100
+# how far apart and how much price observations of a market drift
+OBSERVATION_INTERVAL = timedelta(hours=1)
+OBSERVATION_DRIFT = 0.03
+
+MarketGood = TypeVar("MarketGood", Export, Import, Exchange)
+
+
+@dataclass
+class PopulatedCounts:
+    systems: int = 0
+    waypoints: int = 0
+    markets: int = 0
+    price_observations: int = 0
+
+
+def to_client_system(system: EmulatedSystem) -> System:
+    return System(
+        symbol=system.symbol,
+        sector_symbol=SECTOR_SYMBOL,
+        system_type=system.system_type,
+        x=system.x,
+        y=system.y,
+        waypoints=[
+            SystemWaypoint(
+                symbol=waypoint.symbol,
+                waypoint_type=waypoint.waypoint_type,
+                x=waypoint.x,
+                y=waypoint.y,
+                orbitals=[
+                    SystemOrbital(symbol=orbital) for orbital in waypoint.orbitals
+                ],
+            )
+            for waypoint in system.waypoints
+        ],
+        factions=[SystemFaction(symbol=FACTION_SYMBOL)],
+    )
+
+
+def to_client_waypoint(waypoint: EmulatedWaypoint) -> Waypoint:
+    return Waypoint(
+        symbol=waypoint.symbol,
+        waypoint_system_type=waypoint.waypoint_type,
+        system_symbol=waypoint.system_symbol,
+        x=waypoint.x,
+        y=waypoint.y,
+        orbitals=[Orbital(symbol=orbital) for orbital in waypoint.orbitals],
+        faction=Faction(symbol=FACTION_SYMBOL),
+        traits=[
+            Traits(
+                symbol=trait,
+                name=WAYPOINT_TRAITS[trait][0],
+                description=WAYPOINT_TRAITS[trait][1],
+            )
+            for trait in waypoint.traits
+        ],
+        chart=Chart(
+            submitted_by=FACTION_SYMBOL,
+            submitted_on=CHARTED_ON,
+            waypoint_symbol=waypoint.symbol,
+        ),
+        orbits=waypoint.orbits,
+    )
+
+
+def to_client_trade_goods(
+    market: EmulatedMarket, price_levels: Optional[Dict[str, float]] = None
+) -> List[TradeGood]:
+    """
+    Trade goods as a ship at the market sees them, undisturbed unless given the
+    price level of goods (see World.get_prices)
+    """
+    trade_goods = []
+    for good in market.goods.values():
+        level = (price_levels or {}).get(good.symbol, 1)
+        trade_goods.append(
+            TradeGood(
+                symbol=good.symbol,
+                trade_volume=good.trade_volume,
+                supply=good.supply,
+                purchase_price=max(1, round(good.base_purchase_price * level)),
+                sell_price=max(
+                    1, round(good.base_purchase_price * level * SELL_PRICE_SPREAD)
+                ),
+            )
+        )
+    return trade_goods
+
+
+def to_client_market(market: EmulatedMarket, with_trade_goods: bool = True) -> Market:
+    """
+    The market as the client receives it, with undisturbed trade goods as if a ship
+    was there unless with_trade_goods is False
+    """
+
+    def get_goods(trade_type: str, client_class: Type[MarketGood]) -> List[MarketGood]:
+        return [
+            client_class(
+                symbol=good.symbol,
+                name=GOODS[good.symbol].name,
+                description=GOODS[good.symbol].description,
+            )
+            for good in market.goods.values()
+            if good.trade_type == trade_type
+        ]
+
+    return Market(
+        symbol=market.symbol,
+        exports=get_goods("EXPORT", Export),
+        imports=get_goods("IMPORT", Import),
+        exchange=get_goods("EXCHANGE", Exchange),
+        transactions=[] if with_trade_goods else None,
+        trade_goods=to_client_trade_goods(market) if with_trade_goods else None,
+    )
+
+
+def insert_systems(
+    session: Session,
+    systems: List[EmulatedSystem],
+    markets: Dict[str, EmulatedMarket],
+    rng: Random,
+    observations: int,
+    observed_at: datetime,
+    counts: PopulatedCounts,
+):
+    """
+    Writes waypoints and markets with bulk inserts rather than through
+    save_client_waypoints and save_client_market, which look up every row before
+    writing it and would take hours at these sizes. Rows are identified and prices
+    encoded the same way those do, so the database reads back as if the client had
+    explored the galaxy.
+    """
+    connection = session.connection()
+    waypoints = [waypoint for system in systems for waypoint in system.waypoints]
+    connection.execute(
+        WaypointDAO.__table__.insert(),  # type: ignore
+        [
+            {
+                "id": waypoint.symbol,
+                "type": waypoint.waypoint_type,
+                "system_symbol": waypoint.system_symbol,
+                "x": waypoint.x,
+                "y": waypoint.y,
+                "symbol": waypoint.symbol,
+            }
+            for waypoint in waypoints
+        ],
+    )
+    connection.execute(
+        WaypointTrait.__table__.insert(),  # type: ignore
+        [
+            {
+                "symbol": trait,
+                "waypoint_id": waypoint.symbol,
+                "name": WAYPOINT_TRAITS[trait][0],
+                "description": WAYPOINT_TRAITS[trait][1],
+            }
+            for waypoint in waypoints
+            for trait in waypoint.traits
+        ],
+    )
+    counts.systems += len(systems)
+    counts.waypoints += len(waypoints)
+
+    system_markets = [
+        (system.symbol, markets[waypoint.symbol])
+        for system in systems
+        for waypoint in system.waypoints
+        if waypoint.symbol in markets
+    ]
+    if not system_markets:
+        return
+    for table, trade_type in [
+        (MarketExport, "EXPORT"),
+        (MarketImport, "IMPORT"),
+        (MarketExchange, "EXCHANGE"),
+    ]:
+        connection.execute(
+            table.__table__.insert(),  # type: ignore
+            [
+                {
+                    "id": f"{good.symbol}-{market.symbol}",
+                    "symbol": good.symbol,
+                    "name": GOODS[good.symbol].name,
+                    "description": GOODS[good.symbol].description,
+                    "created_at": observed_at,
+                    "waypoint_symbol": market.symbol,
+                    "system_symbol": system_symbol,
+                }
+                for system_symbol, market in system_markets
+                for good in market.goods.values()
+                if good.trade_type == trade_type
+            ],
+        )
+
+    ids = encode_symbols(
+        session,
+        {market.symbol for _, market in system_markets}
+        | set(GOODS)
+        | set(SUPPLY_PRICE_MULTIPLIER),
+    )
+    prices = []
+    latest_trade_goods = []
+    for system_symbol, market in system_markets:
+        # prices wander away from undisturbed going back in time from observed_at
+        levels = {symbol: 1.0 for symbol in market.goods}
+        for observation in range(observations):
+            trade_goods = to_client_trade_goods(market, price_levels=levels)
+            timestamp = int(
+                (observed_at - OBSERVATION_INTERVAL * observation).timestamp()
+            )
+            prices.extend(
+                {
+                    "waypoint_id": ids[market.symbol],
+                    "good_id": ids[trade_good.symbol],
+                    "observed_at": timestamp,
+                    "supply_id": ids[trade_good.supply],
+                    "trade_volume": trade_good.trade_volume,
+                    "purchase_price": trade_good.purchase_price,
+                    "sell_price": trade_good.sell_price,
+                }
+                for trade_good in trade_goods
+            )
+            if observation == 0:
+                latest_trade_goods.extend(
+                    {
+                        "symbol": trade_good.symbol,
+                        "trade_volume": trade_good.trade_volume,
+                        "supply": trade_good.supply,
+                        "purchase_price": trade_good.purchase_price,
+                        "sell_price": trade_good.sell_price,
+                        "waypoint_symbol": market.symbol,
+                        "system_symbol": system_symbol,
+                    }
+                    for trade_good in trade_goods
+                )
+            levels = {
+                symbol: level
+                * rng.uniform(1 - OBSERVATION_DRIFT, 1 + OBSERVATION_DRIFT)
+                for symbol, level in levels.items()
+            }
+    if prices:
+        connection.execute(MarketPrice.__table__.insert(), prices)  # type: ignore
+        connection.execute(
+            MarketTradeGood.__table__.insert(), latest_trade_goods  # type: ignore
+        )
+    counts.price_observations += len(prices)
+    counts.markets += len(system_markets)
+
+
+def populate_database(
+    engine: Engine,
+    seed: int = 0,
+    systems: int = 10,
+    waypoints_per_system: int = 12,
+    observations: int = 1,
+    batch_size: int = POPULATE_BATCH_SIZE,
+    observed_at: Optional[datetime] = None,
+) -> PopulatedCounts:
+    """
+    Writes the galaxy generate_galaxy builds from the same arguments into a database
+    as if every system had been explored and every market visited observations times
+    an hour apart, the last at observed_at. Meant for profiling planners and DAO code
+    at many times the data of a real run, the galaxy is generated system by system so
+    its size is only bound by the disk.
+    """
+    observed_at = observed_at or clock.now()
+    rng = Random(seed)
+    counts = PopulatedCounts()
+    batch: List[EmulatedSystem] = []
+    batch_markets: Dict[str, EmulatedMarket] = {}
+
+    def flush():
+        with Session(engine) as session:
+            insert_systems(
+                session=session,
+                systems=batch,
+                markets=batch_markets,
+                rng=rng,
+                observations=observations,
+                observed_at=observed_at,  # type: ignore
+                counts=counts,
+            )
+            session.commit()
+        batch.clear()
+        batch_markets.clear()
+
+    for system, markets, _ in generate_systems(
+        seed=seed, systems=systems, waypoints_per_system=waypoints_per_system
+    ):
+        batch.append(system)
+        batch_markets.update(markets)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return counts
+
+
+def create_database(path: str, **kwargs) -> PopulatedCounts:
+    """
+    Creates a SQLite database at path with the current schema and populates it, see
+    populate_database for the arguments
+    """
+    if os.path.exists(path):
+        raise TraderDaoException(f"{path} already exists, galaxies are written anew")
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", configure_sqlite_connection)
+    ensure_schema(engine=engine)
+    counts = populate_database(engine=engine, **kwargs)
+    engine.dispose()
+    return counts
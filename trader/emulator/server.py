@@ -0,0 +1,458 @@
+import json
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from trader.emulator.galaxy import generate_galaxy
+from trader.emulator.world import EmulatedAgent, Json, World
+from trader.exceptions import TraderEmulatorException
+
+API_PREFIX = "/v2"
+# the API allows a sustained 2 requests per second per agent, with short bursts
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+DEFAULT_BURST = 10
+DEFAULT_PAGE_LIMIT = 10
+MAXIMUM_PAGE_LIMIT = 20
+
+
+class RateLimiter:
+    """
+    Token bucket per key (agent token, or client address when unauthenticated)
+    """
+
+    burst: int
+    buckets: Dict[str, Tuple[float, float]]
+    lock: Lock
+    requests_per_second: float
+
+    def __init__(self, requests_per_second: float, burst: int):
+        self.burst = burst
+        self.buckets = {}
+        self.lock = Lock()
+        self.requests_per_second = requests_per_second
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """
+        Takes a request from the key's bucket, returning 0 if it may be served or
+        else how many seconds until it could be
+        """
+        now = monotonic() if now is None else now
+        with self.lock:
+            tokens, updated_at = self.buckets.get(key, (float(self.burst), now))
+            tokens = min(
+                float(self.burst),
+                tokens + (now - updated_at) * self.requests_per_second,
+            )
+            if tokens < 1:
+                self.buckets[key] = (tokens, now)
+                return (1 - tokens) / self.requests_per_second
+            self.buckets[key] = (tokens - 1, now)
+            return 0
+
+
+@dataclass
+class Route:
+    method: str
+    path: str
+    handler: Callable[["EmulatorRequest"], Any]
+    requires_auth: bool = True
+    is_paged: bool = False
+    wrap: bool = True
+
+    def __post_init__(self):
+        self.pattern = re.compile(f"{self.path}/?$")
+
+
+@dataclass
+class EmulatorRequest:
+    agent: Optional[EmulatedAgent]
+    body: Json
+    groups: Tuple[str, ...]
+
+    @property
+    def authenticated_agent(self) -> EmulatedAgent:
+        # only routes requiring auth use this, and those are never handled without one
+        assert self.agent is not None, "Route requires an authenticated agent"
+        return self.agent
+
+    def get_string(self, name: str) -> str:
+        value = self.body.get(name, "")
+        if not isinstance(value, str):
+            raise TraderEmulatorException(f"{name} must be a string.")
+        return value
+
+    def get_integer(self, name: str) -> int:
+        value = self.body.get(name) or 0
+        # bools are ints to python, but not to the API
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise TraderEmulatorException(f"{name} must be an integer.")
+        return value
+
+
+class EmulatorServer:
+    """
+    Local stand in for the SpaceTraders API, implementing the endpoints the client
+    uses against an emulated world (see World), so whole fleets can be run and
+    benchmarked without the network. Point the client at it with the API_URL
+    environment variable set to url().
+
+    Requests are rate limited per agent like the API, responding 429 with a
+    retry-after, and counted by endpoint for reporting throughput.
+    """
+
+    lock: Lock
+    rate_limiter: RateLimiter
+    rate_limited: int
+    requests_by_endpoint: Dict[str, int]
+    routes: List[Route]
+    server: ThreadingHTTPServer
+    world: World
+
+    def __init__(
+        self,
+        world: Optional[World] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        burst: int = DEFAULT_BURST,
+    ):
+        self.lock = Lock()
+        self.rate_limiter = RateLimiter(
+            requests_per_second=requests_per_second, burst=burst
+        )
+        self.rate_limited = 0
+        self.requests_by_endpoint = defaultdict(int)
+        self.world = world or World(galaxy=generate_galaxy())
+        self.routes = self.build_routes()
+        emulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # keep alive like the API, and don't hold small responses back for acks
+            disable_nagle_algorithm = True
+            protocol_version = "HTTP/1.1"
+
+            def respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                status_code, body, headers = emulator.handle(
+                    method=self.command,
+                    path=self.path,
+                    authorization=self.headers.get("Authorization"),
+                    body=self.rfile.read(length) if length else b"",
+                    client=self.client_address[0],
+                )
+                self.send_response(status_code)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self.respond()
+
+            def do_POST(self):
+                self.respond()
+
+            def do_PATCH(self):
+                self.respond()
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    def build_routes(self) -> List[Route]:
+        world = self.world
+        ship = r"/my/ships/(?P<ship>[^/]+)"
+        system = r"/systems/(?P<system>[^/]+)"
+        waypoint = rf"{system}/waypoints/(?P<waypoint>[^/]+)"
+        return [
+            # the status endpoint is the one response not wrapped in data
+            Route("GET", "", lambda _: world.status(), requires_auth=False, wrap=False),
+            Route(
+                "POST",
+                "/register",
+                lambda request: world.register(
+                    symbol=request.get_string("symbol"),
+                    faction=request.get_string("faction"),
+                ),
+                requires_auth=False,
+            ),
+            Route(
+                "GET",
+                "/agents",
+                lambda _: world.list_agents(),
+                requires_auth=False,
+                is_paged=True,
+            ),
+            Route(
+                "GET",
+                "/my/agent",
+                lambda request: world.agent(request.authenticated_agent),
+            ),
+            Route(
+                "GET",
+                "/my/contracts",
+                lambda request: world.contracts(request.authenticated_agent),
+                is_paged=True,
+            ),
+            Route(
+                "GET",
+                "/my/ships",
+                lambda request: world.list_ships(request.authenticated_agent),
+                is_paged=True,
+            ),
+            Route(
+                "POST",
+                "/my/ships",
+                lambda request: world.purchase_ship(
+                    request.authenticated_agent,
+                    ship_type=request.get_string("shipType"),
+                    waypoint_symbol=request.get_string("waypointSymbol"),
+                ),
+            ),
+            Route(
+                "GET",
+                ship,
+                lambda request: world.ship(
+                    request.authenticated_agent, *request.groups
+                ),
+            ),
+            Route(
+                "GET",
+                f"{ship}/nav",
+                lambda request: world.nav(request.authenticated_agent, *request.groups),
+            ),
+            Route(
+                "PATCH",
+                f"{ship}/nav",
+                lambda request: world.set_flight_mode(
+                    request.authenticated_agent,
+                    *request.groups,
+                    flight_mode=request.get_string("flightMode"),
+                ),
+            ),
+            Route(
+                "GET",
+                f"{ship}/cargo",
+                lambda request: world.cargo(
+                    request.authenticated_agent, *request.groups
+                ),
+            ),
+            Route(
+                "GET",
+                f"{ship}/cooldown",
+                lambda request: world.cooldown(
+                    request.authenticated_agent, *request.groups
+                ),
+            ),
+            Route(
+                "POST",
+                f"{ship}/orbit",
+                lambda request: world.orbit(
+                    request.authenticated_agent, *request.groups
+                ),
+            ),
+            Route(
+                "POST",
+                f"{ship}/dock",
+                lambda request: world.dock(
+                    request.authenticated_agent, *request.groups
+                ),
+            ),
+            Route(
+                "POST",
+                f"{ship}/navigate",
+                lambda request: world.navigate(
+                    request.authenticated_agent,
+                    *request.groups,
+                    waypoint_symbol=request.get_string("waypointSymbol"),
+                ),
+            ),
+            Route(
+                "POST",
+                f"{ship}/extract",
+                lambda request: world.extract(
+                    request.authenticated_agent, *request.groups
+                ),
+            ),
+            Route(
+                "POST",
+                f"{ship}/refuel",
+                lambda request: world.refuel(
+                    request.authenticated_agent, *request.groups
+                ),
+            ),
+            *[
+                Route(
+                    "POST",
+                    f"{ship}/{path}",
+                    lambda request, transaction_type=transaction_type: world.trade(
+                        request.authenticated_agent,
+                        *request.groups,
+                        good_symbol=request.get_string("symbol"),
+                        units=request.get_integer("units"),
+                        transaction_type=transaction_type,
+                    ),
+                )
+                for path, transaction_type in [
+                    ("purchase", "PURCHASE"),
+                    ("sell", "SELL"),
+                ]
+            ],
+            Route(
+                "GET",
+                "/systems",
+                lambda _: world.list_systems(),
+                requires_auth=False,
+                is_paged=True,
+            ),
+            Route(
+                "GET",
+                system,
+                lambda request: world.system(*request.groups),
+                requires_auth=False,
+            ),
+            Route(
+                "GET",
+                f"{system}/waypoints",
+                lambda request: world.list_waypoints(*request.groups),
+                requires_auth=False,
+                is_paged=True,
+            ),
+            Route(
+                "GET",
+                waypoint,
+                lambda request: world.waypoint(*request.groups),
+                requires_auth=False,
+            ),
+            Route(
+                "GET",
+                f"{waypoint}/market",
+                lambda request: world.market(request.agent, request.groups[1]),
+                requires_auth=False,
+            ),
+            Route(
+                "GET",
+                f"{waypoint}/shipyard",
+                lambda request: world.shipyard(request.agent, request.groups[1]),
+                requires_auth=False,
+            ),
+        ]
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        authorization: Optional[str],
+        body: bytes,
+        client: str = "",
+    ) -> Tuple[int, bytes, Dict[str, str]]:
+        """
+        Serves a request, returning its status code, body and headers
+        """
+        url = urlparse(path)
+        route_path = (
+            url.path[len(API_PREFIX) :] if url.path.startswith(API_PREFIX) else url.path
+        )
+        token = (authorization or "").removeprefix("Bearer ").strip() or None
+        agent = self.world.agents_by_token.get(token or "")
+        retry_after = self.rate_limiter.acquire(key=agent.symbol if agent else client)
+        if retry_after:
+            with self.lock:
+                self.rate_limited += 1
+            return self.error(
+                TraderEmulatorException(
+                    "You have reached your rate limit, retry after "
+                    f"{retry_after:.3f} seconds.",
+                    status_code=429,
+                    code=429,
+                ),
+                headers={"retry-after": f"{retry_after:.3f}"},
+            )
+
+        for route in self.routes:
+            match = route.pattern.match(route_path)
+            if not match or route.method != method:
+                continue
+            with self.lock:
+                self.requests_by_endpoint[f"{method} {route.path or '/'}"] += 1
+            try:
+                if route.requires_auth:
+                    agent = self.world.get_agent(token)
+                data = route.handler(
+                    EmulatorRequest(
+                        agent=agent, body=self.parse_body(body), groups=match.groups()
+                    )
+                )
+                if data is None:
+                    return 204, b"", {}
+                if route.is_paged:
+                    return self.page(items=data, query=parse_qs(url.query))
+            except TraderEmulatorException as e:
+                return self.error(e)
+            return 200, json.dumps({"data": data} if route.wrap else data).encode(), {}
+        return self.error(
+            TraderEmulatorException(
+                f"Route {method} {url.path} not found.", status_code=404, code=404
+            )
+        )
+
+    def parse_body(self, body: bytes) -> Json:
+        if not body:
+            return {}
+        try:
+            parsed = json.loads(body)
+        except ValueError:
+            raise TraderEmulatorException("Request body is not valid JSON.")
+        if not isinstance(parsed, dict):
+            raise TraderEmulatorException("Request body must be a JSON object.")
+        return parsed
+
+    def page(
+        self, items: List[Json], query: Dict[str, List[str]]
+    ) -> Tuple[int, bytes, Dict[str, str]]:
+        try:
+            limit = min(
+                MAXIMUM_PAGE_LIMIT, int(query.get("limit", [DEFAULT_PAGE_LIMIT])[0])
+            )
+            page = max(1, int(query.get("page", [1])[0]))
+        except ValueError:
+            raise TraderEmulatorException("Paging limit and page must be integers.")
+        payload = {
+            "data": items[(page - 1) * limit : page * limit],
+            "meta": {"total": len(items), "page": page, "limit": limit},
+        }
+        return 200, json.dumps(payload).encode(), {}
+
+    def error(
+        self, exception: TraderEmulatorException, headers: Dict[str, str] = {}
+    ) -> Tuple[int, bytes, Dict[str, str]]:
+        payload = {"error": {"message": exception.message, "code": exception.code}}
+        return exception.status_code, json.dumps(payload).encode(), headers
+
+    def register(self, symbol: str, faction: str = "COSMIC") -> str:
+        """
+        Registers an agent directly with the world, returning its token
+        """
+        return self.world.register(symbol=symbol, faction=faction)["token"]
+
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self):
+        thread = Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
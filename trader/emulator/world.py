@@ -0,0 +1,1037 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from hashlib import blake2b
+from math import ceil, dist
+from random import Random
+from threading import RLock
+from typing import Any, Dict, List, Optional, Tuple
+
+from trader.emulator.galaxy import (
+    FACTION_SYMBOL,
+    GOODS,
+    SELL_PRICE_SPREAD,
+    WAYPOINT_TRAITS,
+    EmulatedMarket,
+    EmulatedWaypoint,
+    Galaxy,
+)
+from trader.exceptions import TraderEmulatorException
+from trader.util import clock
+
+Json = Dict[str, Any]
+
+STARTING_CREDITS = 175_000
+# game seconds, see https://docs.spacetraders.io for the travel formula
+NAVIGATION_BASE_SECONDS = 15
+FLIGHT_MODE_MULTIPLIER = {"CRUISE": 25, "DRIFT": 250, "BURN": 12.5, "STEALTH": 30}
+EXTRACTION_COOLDOWN_SECONDS = 70
+# relative price move per trade_volume units traded, by supply at the market
+SUPPLY_PRICE_IMPACT = {
+    "SCARCE": 0.08,
+    "LIMITED": 0.05,
+    "MODERATE": 0.03,
+    "HIGH": 0.02,
+    "ABUNDANT": 0.01,
+}
+# game seconds for a market to recover half way to its undisturbed prices
+PRICE_RECOVERY_HALF_LIFE = 60 * 10
+MINIMUM_PRICE_LEVEL = 0.2
+# units of fuel in a ship's tank bought per unit of the FUEL good
+FUEL_UNITS_PER_GOOD = 100
+MAXIMUM_MARKET_TRANSACTIONS = 20
+
+
+@dataclass
+class ShipSpec:
+    ship_type: str
+    name: str
+    role: str
+    frame_symbol: str
+    frame_name: str
+    engine_speed: int
+    fuel_capacity: int
+    cargo_capacity: int
+    # most units a single extraction yields, ships without a mining laser have none
+    mining_strength: int
+    purchase_price: int
+
+
+SHIP_SPECS: Dict[str, ShipSpec] = {
+    spec.ship_type: spec
+    for spec in [
+        ShipSpec(
+            "SHIP_COMMAND_FRIGATE",
+            "Command Frigate",
+            "COMMAND",
+            "FRAME_FRIGATE",
+            "Frigate",
+            30,
+            400,
+            40,
+            10,
+            0,
+        ),
+        ShipSpec(
+            "SHIP_PROBE",
+            "Probe",
+            "SATELLITE",
+            "FRAME_PROBE",
+            "Probe",
+            3,
+            0,
+            0,
+            0,
+            25_000,
+        ),
+        ShipSpec(
+            "SHIP_MINING_DRONE",
+            "Mining Drone",
+            "EXCAVATOR",
+            "FRAME_DRONE",
+            "Drone",
+            10,
+            100,
+            15,
+            5,
+            40_000,
+        ),
+        ShipSpec(
+            "SHIP_LIGHT_HAULER",
+            "Light Hauler",
+            "HAULER",
+            "FRAME_LIGHT_FREIGHTER",
+            "Light Freighter",
+            30,
+            600,
+            80,
+            0,
+            120_000,
+        ),
+    ]
+}
+STARTING_SHIP_TYPES = ["SHIP_COMMAND_FRIGATE", "SHIP_PROBE"]
+
+
+@dataclass
+class EmulatedAgent:
+    symbol: str
+    token: str
+    account_id: str
+    headquarters: str
+    credits: int
+    ship_symbols: List[str] = field(default_factory=list)
+    contracts: List[Json] = field(default_factory=list)
+
+
+@dataclass
+class EmulatedShip:
+    symbol: str
+    agent_symbol: str
+    spec: ShipSpec
+    waypoint_symbol: str
+    status: str
+    flight_mode: str
+    origin_symbol: str
+    departure_time: datetime
+    arrival: datetime
+    fuel: int
+    fuel_consumed: int
+    fuel_consumed_at: datetime
+    cargo: Dict[str, int] = field(default_factory=dict)
+    cooldown_total: int = 0
+    cooldown_expiration: Optional[datetime] = None
+
+
+def format_timestamp(timestamp: datetime) -> str:
+    return timestamp.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def get_system_symbol(waypoint_symbol: str) -> str:
+    return waypoint_symbol.rsplit("-", 1)[0]
+
+
+class World:
+    """
+    State and rules of the emulated game, shared by every agent registered with it.
+
+    Timers run speed times faster than the real game: travel and cooldowns last
+    their game duration divided by speed, and are reported in clock times so an
+    unmodified client waits the right amount. Sharing an accelerated clock with the
+    client (see trader.util.clock) does the same with speed left at 1. Randomness (extraction yields) is
+    seeded from the galaxy, so the same requests in the same order play out the same.
+    """
+
+    agents: Dict[str, EmulatedAgent]
+    agents_by_token: Dict[str, EmulatedAgent]
+    galaxy: Galaxy
+    lock: RLock
+    # (waypoint, good) -> (price level relative to undisturbed, when it was set)
+    price_levels: Dict[Tuple[str, str], Tuple[float, datetime]]
+    rng: Random
+    ships: Dict[str, EmulatedShip]
+    speed: float
+    transactions: Dict[str, List[Json]]
+
+    def __init__(self, galaxy: Galaxy, speed: float = 1):
+        self.agents = {}
+        self.agents_by_token = {}
+        self.galaxy = galaxy
+        self.lock = RLock()
+        self.price_levels = {}
+        self.rng = Random(galaxy.seed)
+        self.ships = {}
+        self.speed = speed
+        self.transactions = {}
+
+    def now(self) -> datetime:
+        return clock.now()
+
+    def get_duration(self, game_seconds: float) -> timedelta:
+        return timedelta(seconds=game_seconds / self.speed)
+
+    def get_waypoint(self, waypoint_symbol: str) -> EmulatedWaypoint:
+        waypoint = self.galaxy.waypoints.get(waypoint_symbol)
+        if not waypoint:
+            raise TraderEmulatorException(
+                f"Waypoint {waypoint_symbol} not found.", status_code=404, code=404
+            )
+        return waypoint
+
+    def get_market(self, waypoint_symbol: str) -> EmulatedMarket:
+        market = self.galaxy.markets.get(self.get_waypoint(waypoint_symbol).symbol)
+        if not market:
+            raise TraderEmulatorException(
+                f"Market not found at waypoint {waypoint_symbol}.",
+                status_code=404,
+                code=404,
+            )
+        return market
+
+    def get_agent(self, token: Optional[str]) -> EmulatedAgent:
+        agent = self.agents_by_token.get(token or "")
+        if not agent:
+            raise TraderEmulatorException(
+                "Missing or invalid token.", status_code=401, code=401
+            )
+        return agent
+
+    def get_ship(self, agent: EmulatedAgent, ship_symbol: str) -> EmulatedShip:
+        ship = self.ships.get(ship_symbol)
+        if not ship or ship.agent_symbol != agent.symbol:
+            raise TraderEmulatorException(
+                f"Ship {ship_symbol} not found.", status_code=404, code=404
+            )
+        self.update_ship(ship)
+        return ship
+
+    def update_ship(self, ship: EmulatedShip):
+        if ship.status == "IN_TRANSIT" and self.now() >= ship.arrival:
+            ship.status = "IN_ORBIT"
+
+    def ensure_not_in_transit(self, ship: EmulatedShip):
+        if ship.status == "IN_TRANSIT":
+            seconds = ceil((ship.arrival - self.now()).total_seconds())
+            raise TraderEmulatorException(
+                f"Ship is currently in-transit from {ship.origin_symbol} to "
+                f"{ship.waypoint_symbol} and arrives in {seconds} seconds.",
+                code=4214,
+            )
+
+    def ensure_status(self, ship: EmulatedShip, status: str):
+        self.ensure_not_in_transit(ship)
+        if ship.status != status:
+            description = "docked" if status == "DOCKED" else "in orbit"
+            raise TraderEmulatorException(
+                f"Ship is not currently {description} at {ship.waypoint_symbol}.",
+                code=4244 if status == "DOCKED" else 4236,
+            )
+
+    def ensure_no_cooldown(self, ship: EmulatedShip):
+        remaining = self.get_cooldown_remaining(ship)
+        if remaining:
+            raise TraderEmulatorException(
+                f"Ship action is still on cooldown for {remaining} second(s).",
+                status_code=409,
+                code=4000,
+            )
+
+    def get_cooldown_remaining(self, ship: EmulatedShip) -> int:
+        if not ship.cooldown_expiration:
+            return 0
+        return max(0, ceil((ship.cooldown_expiration - self.now()).total_seconds()))
+
+    def get_cargo_units(self, ship: EmulatedShip) -> int:
+        return sum(ship.cargo.values())
+
+    def get_prices(self, waypoint_symbol: str, good_symbol: str) -> Tuple[int, int]:
+        """
+        Purchase and sell price of a good, trades having moved the price level away
+        from undisturbed and time since then having recovered it part of the way
+        """
+        good = self.galaxy.markets[waypoint_symbol].goods[good_symbol]
+        level = self.get_price_level(waypoint_symbol, good_symbol)
+        return (
+            max(1, round(good.base_purchase_price * level)),
+            max(1, round(good.base_purchase_price * level * SELL_PRICE_SPREAD)),
+        )
+
+    def get_price_level(self, waypoint_symbol: str, good_symbol: str) -> float:
+        level, updated_at = self.price_levels.get(
+            (waypoint_symbol, good_symbol), (1.0, self.now())
+        )
+        game_seconds = (self.now() - updated_at).total_seconds() * self.speed
+        return 1 + (level - 1) * 0.5 ** (game_seconds / PRICE_RECOVERY_HALF_LIFE)
+
+    def move_price(self, waypoint_symbol: str, good_symbol: str, units: int):
+        good = self.galaxy.markets[waypoint_symbol].goods[good_symbol]
+        impact = SUPPLY_PRICE_IMPACT[good.supply] * abs(units) / good.trade_volume
+        level = self.get_price_level(waypoint_symbol, good_symbol)
+        level *= 1 + impact if units > 0 else 1 - impact
+        self.price_levels[(waypoint_symbol, good_symbol)] = (
+            max(MINIMUM_PRICE_LEVEL, level),
+            self.now(),
+        )
+
+    def record_transaction(self, waypoint_symbol: str, transaction: Json):
+        transactions = self.transactions.setdefault(waypoint_symbol, [])
+        transactions.append(transaction)
+        del transactions[:-MAXIMUM_MARKET_TRANSACTIONS]
+
+    def has_ship_at(self, agent: Optional[EmulatedAgent], waypoint_symbol: str) -> bool:
+        if not agent:
+            return False
+        for ship_symbol in agent.ship_symbols:
+            ship = self.ships[ship_symbol]
+            self.update_ship(ship)
+            if ship.waypoint_symbol == waypoint_symbol and ship.status != "IN_TRANSIT":
+                return True
+        return False
+
+    def create_ship(self, agent: EmulatedAgent, ship_type: str) -> EmulatedShip:
+        spec = SHIP_SPECS[ship_type]
+        now = self.now()
+        ship = EmulatedShip(
+            symbol=f"{agent.symbol}-{len(agent.ship_symbols) + 1:X}",
+            agent_symbol=agent.symbol,
+            spec=spec,
+            waypoint_symbol=agent.headquarters,
+            status="DOCKED",
+            flight_mode="CRUISE",
+            origin_symbol=agent.headquarters,
+            departure_time=now,
+            arrival=now,
+            fuel=spec.fuel_capacity,
+            fuel_consumed=0,
+            fuel_consumed_at=now,
+        )
+        self.ships[ship.symbol] = ship
+        agent.ship_symbols.append(ship.symbol)
+        return ship
+
+    def render_agent(self, agent: EmulatedAgent, private: bool = True) -> Json:
+        data: Json = {
+            "symbol": agent.symbol,
+            "headquarters": agent.headquarters,
+            "credits": agent.credits,
+            "startingFaction": FACTION_SYMBOL,
+            "shipCount": len(agent.ship_symbols),
+        }
+        if private:
+            data["accountId"] = agent.account_id
+        return data
+
+    def render_route_waypoint(self, waypoint_symbol: str) -> Json:
+        waypoint = self.galaxy.waypoints[waypoint_symbol]
+        return {
+            "symbol": waypoint.symbol,
+            "type": waypoint.waypoint_type,
+            "systemSymbol": waypoint.system_symbol,
+            "x": waypoint.x,
+            "y": waypoint.y,
+        }
+
+    def render_nav(self, ship: EmulatedShip) -> Json:
+        return {
+            "systemSymbol": get_system_symbol(ship.waypoint_symbol),
+            "waypointSymbol": ship.waypoint_symbol,
+            "route": {
+                "destination": self.render_route_waypoint(ship.waypoint_symbol),
+                "departure": self.render_route_waypoint(ship.origin_symbol),
+                "origin": self.render_route_waypoint(ship.origin_symbol),
+                "departureTime": format_timestamp(ship.departure_time),
+                "arrival": format_timestamp(ship.arrival),
+            },
+            "status": ship.status,
+            "flightMode": ship.flight_mode,
+        }
+
+    def render_fuel(self, ship: EmulatedShip) -> Json:
+        return {
+            "current": ship.fuel,
+            "capacity": ship.spec.fuel_capacity,
+            "consumed": {
+                "amount": ship.fuel_consumed,
+                "timestamp": format_timestamp(ship.fuel_consumed_at),
+            },
+        }
+
+    def render_cargo(self, ship: EmulatedShip) -> Json:
+        return {
+            "capacity": ship.spec.cargo_capacity,
+            "units": self.get_cargo_units(ship),
+            "inventory": [
+                {
+                    "symbol": symbol,
+                    "name": GOODS[symbol].name,
+                    "description": GOODS[symbol].description,
+                    "units": units,
+                }
+                for symbol, units in ship.cargo.items()
+            ],
+        }
+
+    def render_cooldown(self, ship: EmulatedShip) -> Json:
+        cooldown: Json = {
+            "shipSymbol": ship.symbol,
+            "totalSeconds": ship.cooldown_total,
+            "remainingSeconds": self.get_cooldown_remaining(ship),
+        }
+        if ship.cooldown_expiration:
+            cooldown["expiration"] = format_timestamp(ship.cooldown_expiration)
+        return cooldown
+
+    def render_ship_parts(self, spec: ShipSpec) -> Json:
+        requirements = {"power": 1, "crew": 0, "slots": 1}
+        mounts = []
+        if spec.mining_strength:
+            mounts.append(
+                {
+                    "symbol": "MOUNT_MINING_LASER_I",
+                    "name": "Mining Laser I",
+                    "description": "A basic mining laser.",
+                    "strength": spec.mining_strength,
+                    "requirements": requirements,
+                }
+            )
+        return {
+            "crew": {"required": 0, "capacity": 0, "current": 0, "morale": 100},
+            "frame": {
+                "symbol": spec.frame_symbol,
+                "name": spec.frame_name,
+                "description": f"Frame of the {spec.name}.",
+                "moduleSlots": 1,
+                "mountingPoints": len(mounts),
+                "fuelCapacity": spec.fuel_capacity,
+                "requirements": requirements,
+                "condition": 100,
+            },
+            "reactor": {
+                "symbol": "REACTOR_FISSION_I",
+                "name": "Fission Reactor I",
+                "description": "A basic fission reactor.",
+                "powerOutput": 31,
+                "requirements": requirements,
+                "condition": 100,
+            },
+            "engine": {
+                "symbol": "ENGINE_ION_DRIVE_I",
+                "name": "Ion Drive I",
+                "description": "A basic ion drive.",
+                "speed": spec.engine_speed,
+                "requirements": requirements,
+                "condition": 100,
+            },
+            "modules": [
+                {
+                    "symbol": "MODULE_CARGO_HOLD_I",
+                    "name": "Cargo Hold",
+                    "description": "Holds cargo.",
+                    "capacity": spec.cargo_capacity,
+                    "requirements": requirements,
+                }
+            ],
+            "mounts": mounts,
+        }
+
+    def render_ship(self, ship: EmulatedShip) -> Json:
+        return {
+            "symbol": ship.symbol,
+            "registration": {
+                "name": ship.symbol,
+                "factionSymbol": FACTION_SYMBOL,
+                "role": ship.spec.role,
+            },
+            "nav": self.render_nav(ship),
+            "cooldown": self.render_cooldown(ship),
+            "cargo": self.render_cargo(ship),
+            "fuel": self.render_fuel(ship),
+            **self.render_ship_parts(ship.spec),
+        }
+
+    def render_waypoint(self, waypoint: EmulatedWaypoint) -> Json:
+        data: Json = {
+            "symbol": waypoint.symbol,
+            "type": waypoint.waypoint_type,
+            "systemSymbol": waypoint.system_symbol,
+            "x": waypoint.x,
+            "y": waypoint.y,
+            "orbitals": [{"symbol": orbital} for orbital in waypoint.orbitals],
+            "faction": {"symbol": FACTION_SYMBOL},
+            "traits": [
+                {
+                    "symbol": trait,
+                    "name": WAYPOINT_TRAITS[trait][0],
+                    "description": WAYPOINT_TRAITS[trait][1],
+                }
+                for trait in waypoint.traits
+            ],
+            "chart": {
+                "waypointSymbol": waypoint.symbol,
+                "submittedBy": FACTION_SYMBOL,
+                "submittedOn": "2023-01-01T00:00:00.000Z",
+            },
+        }
+        if waypoint.orbits:
+            data["orbits"] = waypoint.orbits
+        return data
+
+    def render_good(self, symbol: str) -> Json:
+        good = GOODS[symbol]
+        return {
+            "symbol": good.symbol,
+            "name": good.name,
+            "description": good.description,
+        }
+
+    def register(self, symbol: str, faction: str) -> Json:
+        with self.lock:
+            symbol = symbol.upper()
+            if faction != FACTION_SYMBOL:
+                raise TraderEmulatorException(
+                    f"Faction {faction} is not recruiting.", status_code=422, code=422
+                )
+            if symbol in self.agents:
+                raise TraderEmulatorException(
+                    f"Agent symbol {symbol} has already been claimed.",
+                    status_code=409,
+                    code=4111,
+                )
+            digest = blake2b(f"{self.galaxy.seed}:{symbol}".encode()).hexdigest()
+            agent = EmulatedAgent(
+                symbol=symbol,
+                token=digest[:48],
+                account_id=digest[48:72],
+                headquarters=self.galaxy.headquarters,
+                credits=STARTING_CREDITS,
+            )
+            self.agents[symbol] = agent
+            self.agents_by_token[agent.token] = agent
+            ships = [
+                self.create_ship(agent=agent, ship_type=ship_type)
+                for ship_type in STARTING_SHIP_TYPES
+            ]
+            now = self.now()
+            agent.contracts.append(
+                {
+                    "id": digest[72:96],
+                    "factionSymbol": FACTION_SYMBOL,
+                    "type": "PROCUREMENT",
+                    "terms": {
+                        "deadline": format_timestamp(now + timedelta(days=7)),
+                        "payment": {"onAccepted": 1_000, "onFulfilled": 10_000},
+                        "deliver": [
+                            {
+                                "tradeSymbol": "IRON_ORE",
+                                "destinationSymbol": agent.headquarters,
+                                "unitsRequired": 100,
+                                "unitsFulfilled": 0,
+                            }
+                        ],
+                    },
+                    "accepted": False,
+                    "fulfilled": False,
+                    "expiration": format_timestamp(now + timedelta(days=1)),
+                    "deadlineToAccept": format_timestamp(now + timedelta(days=1)),
+                }
+            )
+            return {
+                "token": agent.token,
+                "agent": self.render_agent(agent),
+                "contract": agent.contracts[0],
+                "faction": {
+                    "symbol": FACTION_SYMBOL,
+                    "name": "Cosmic Engineers",
+                    "description": "Engineers of the cosmos.",
+                    "headquarters": get_system_symbol(agent.headquarters),
+                    "traits": [],
+                    "isRecruiting": True,
+                },
+                "ship": self.render_ship(ships[0]),
+            }
+
+    def list_agents(self) -> List[Json]:
+        with self.lock:
+            return [
+                self.render_agent(agent, private=False)
+                for agent in self.agents.values()
+            ]
+
+    def agent(self, agent: EmulatedAgent) -> Json:
+        with self.lock:
+            return self.render_agent(agent)
+
+    def contracts(self, agent: EmulatedAgent) -> List[Json]:
+        with self.lock:
+            return list(agent.contracts)
+
+    def list_ships(self, agent: EmulatedAgent) -> List[Json]:
+        with self.lock:
+            return [
+                self.render_ship(self.get_ship(agent, ship_symbol))
+                for ship_symbol in agent.ship_symbols
+            ]
+
+    def ship(self, agent: EmulatedAgent, ship_symbol: str) -> Json:
+        with self.lock:
+            return self.render_ship(self.get_ship(agent, ship_symbol))
+
+    def nav(self, agent: EmulatedAgent, ship_symbol: str) -> Json:
+        with self.lock:
+            return self.render_nav(self.get_ship(agent, ship_symbol))
+
+    def cargo(self, agent: EmulatedAgent, ship_symbol: str) -> Json:
+        with self.lock:
+            return self.render_cargo(self.get_ship(agent, ship_symbol))
+
+    def cooldown(self, agent: EmulatedAgent, ship_symbol: str) -> Optional[Json]:
+        """
+        The ship's active cooldown, None if it has none (the API responds 204)
+        """
+        with self.lock:
+            ship = self.get_ship(agent, ship_symbol)
+            if not self.get_cooldown_remaining(ship):
+                return None
+            return self.render_cooldown(ship)
+
+    def orbit(self, agent: EmulatedAgent, ship_symbol: str) -> Json:
+        with self.lock:
+            ship = self.get_ship(agent, ship_symbol)
+            self.ensure_not_in_transit(ship)
+            ship.status = "IN_ORBIT"
+            return {"nav": self.render_nav(ship)}
+
+    def dock(self, agent: EmulatedAgent, ship_symbol: str) -> Json:
+        with self.lock:
+            ship = self.get_ship(agent, ship_symbol)
+            self.ensure_not_in_transit(ship)
+            ship.status = "DOCKED"
+            return {"nav": self.render_nav(ship)}
+
+    def set_flight_mode(
+        self, agent: EmulatedAgent, ship_symbol: str, flight_mode: str
+    ) -> Json:
+        with self.lock:
+            ship = self.get_ship(agent, ship_symbol)
+            if flight_mode not in FLIGHT_MODE_MULTIPLIER:
+                raise TraderEmulatorException(
+                    f"Flight mode {flight_mode} is not valid.",
+                    status_code=422,
+                    code=422,
+                )
+            ship.flight_mode = flight_mode
+            return self.render_nav(ship)
+
+    def navigate(
+        self, agent: EmulatedAgent, ship_symbol: str, waypoint_symbol: str
+    ) -> Json:
+        with self.lock:
+            ship = self.get_ship(agent, ship_symbol)
+            destination = self.get_waypoint(waypoint_symbol)
+            self.ensure_status(ship, "IN_ORBIT")
+            if destination.symbol == ship.waypoint_symbol:
+                raise TraderEmulatorException(
+                    f"Navigate request failed. Ship {ship.symbol} is currently "
+                    "located at the destination.",
+                    code=4204,
+                )
+            origin = self.galaxy.waypoints[ship.waypoint_symbol]
+            if destination.system_symbol != origin.system_symbol:
+                raise TraderEmulatorException(
+                    f"Navigate request failed. Destination {destination.symbol} is "
+                    "not in the current system.",
+                    code=4202,
+                )
+            distance = max(
+                1, round(dist([origin.x, origin.y], [destination.x, destination.y]))
+            )
+            fuel_cost = 0
+            if ship.spec.fuel_capacity:
+                fuel_cost = {
+                    "CRUISE": distance,
+                    "DRIFT": 1,
+                    "BURN": 2 * distance,
+                    "STEALTH": distance,
+                }[ship.flight_mode]
+            if fuel_cost > ship.fuel:
+                raise TraderEmulatorException(
+                    f"Navigate request failed. Ship {ship.symbol} requires "
+                    f"{fuel_cost - ship.fuel} more fuel for navigation.",
+                    code=4203,
+                )
+            now = self.now()
+            game_seconds = (
+                distance
+                * FLIGHT_MODE_MULTIPLIER[ship.flight_mode]
+                / ship.spec.engine_speed
+                + NAVIGATION_BASE_SECONDS
+            )
+            ship.fuel -= fuel_cost
+            ship.fuel_consumed = fuel_cost
+            ship.fuel_consumed_at = now
+            ship.origin_symbol = origin.symbol
+            ship.waypoint_symbol = destination.symbol
+            ship.departure_time = now
+            ship.arrival = now + self.get_duration(round(game_seconds))
+            ship.status = "IN_TRANSIT"
+            return {"fuel": self.render_fuel(ship), "nav": self.render_nav(ship)}
+
+    def extract(self, agent: EmulatedAgent, ship_symbol: str) -> Json:
+        with self.lock:
+            ship = self.get_ship(agent, ship_symbol)
+            self.ensure_status(ship, "IN_ORBIT")
+            self.ensure_no_cooldown(ship)
+            waypoint = self.galaxy.waypoints[ship.waypoint_symbol]
+            if not waypoint.deposits:
+                raise TraderEmulatorException(
+                    f"Ship extract failed. Waypoint {waypoint.symbol} is not an "
+                    "asteroid field.",
+                    code=4205,
+                )
+            if not ship.spec.mining_strength:
+                raise TraderEmulatorException(
+                    f"Ship {ship.symbol} does not have a required mining laser mount.",
+                    code=4243,
+                )
+            units = min(
+                self.rng.randint(1, ship.spec.mining_strength),
+                ship.spec.cargo_capacity - self.get_cargo_units(ship),
+            )
+            if units <= 0:
+                raise TraderEmulatorException(
+                    "Failed to update ship cargo. Cannot add units to ship cargo. "
+                    f"Exceeds max limit of {ship.spec.cargo_capacity}.",
+                    code=4228,
+                )
+            symbol = self.rng.choice(waypoint.deposits)
+            ship.cargo[symbol] = ship.cargo.get(symbol, 0) + units
+            ship.cooldown_total = ceil(EXTRACTION_COOLDOWN_SECONDS / self.speed)
+            ship.cooldown_expiration = self.now() + self.get_duration(
+                EXTRACTION_COOLDOWN_SECONDS
+            )
+            return {
+                "cooldown": self.render_cooldown(ship),
+                "extraction": {
+                    "shipSymbol": ship.symbol,
+                    "yield": {"symbol": symbol, "units": units},
+                },
+                "cargo": self.render_cargo(ship),
+            }
+
+    def trade(
+        self,
+        agent: EmulatedAgent,
+        ship_symbol: str,
+        good_symbol: str,
+        units: int,
+        transaction_type: str,
+    ) -> Json:
+        """
+        Buys or sells a good at the market the ship is docked at, at most the good's
+        trade volume at once and moving its price by the supply's impact per volume
+        """
+        with self.lock:
+            ship = self.get_ship(agent, ship_symbol)
+            self.ensure_status(ship, "DOCKED")
+            market = self.get_market(ship.waypoint_symbol)
+            good = market.goods.get(good_symbol)
+            if not good:
+                raise TraderEmulatorException(
+                    f"Market {transaction_type.lower()} failed. Trade good "
+                    f"{good_symbol} is not listed at market {market.symbol}.",
+                    code=4601 if transaction_type == "SELL" else 4602,
+                )
+            if units <= 0 or units > good.trade_volume:
+                raise TraderEmulatorException(
+                    f"Market transaction failed. Trade good {good_symbol} has a "
+                    f"limit of {good.trade_volume} units per transaction.",
+                    code=4604,
+                )
+            purchase_price, sell_price = self.get_prices(market.symbol, good_symbol)
+            if transaction_type == "PURCHASE":
+                price_per_unit = purchase_price
+                if units * price_per_unit > agent.credits:
+                    raise TraderEmulatorException(
+                        f"Agent {agent.symbol} does not have sufficient credits to "
+                        f"purchase {units} unit(s) of {good_symbol}.",
+                        code=4600,
+                    )
+                if self.get_cargo_units(ship) + units > ship.spec.cargo_capacity:
+                    raise TraderEmulatorException(
+                        f"Failed to update ship cargo. Cannot add {units} unit(s) to "
+                        f"ship cargo. Exceeds max limit of {ship.spec.cargo_capacity}.",
+                        code=4228,
+                    )
+                agent.credits -= units * price_per_unit
+                ship.cargo[good_symbol] = ship.cargo.get(good_symbol, 0) + units
+                self.move_price(market.symbol, good_symbol, units)
+            else:
+                price_per_unit = sell_price
+                held = ship.cargo.get(good_symbol, 0)
+                if units > held:
+                    raise TraderEmulatorException(
+                        f"Failed to update ship cargo. Cannot remove {units} unit(s) "
+                        f"of {good_symbol} from ship cargo. Ship has {held} unit(s) "
+                        f"of {good_symbol}.",
+                        code=4219,
+                    )
+                agent.credits += units * price_per_unit
+                ship.cargo[good_symbol] = held - units
+                if not ship.cargo[good_symbol]:
+                    del ship.cargo[good_symbol]
+                self.move_price(market.symbol, good_symbol, -units)
+            transaction = {
+                "waypointSymbol": market.symbol,
+                "shipSymbol": ship.symbol,
+                "tradeSymbol": good_symbol,
+                "type": transaction_type,
+                "units": units,
+                "pricePerUnit": price_per_unit,
+                "totalPrice": units * price_per_unit,
+                "timestamp": format_timestamp(self.now()),
+            }
+            self.record_transaction(market.symbol, transaction)
+            return {
+                "agent": self.render_agent(agent),
+                "cargo": self.render_cargo(ship),
+                "transaction": transaction,
+            }
+
+    def refuel(self, agent: EmulatedAgent, ship_symbol: str) -> Json:
+        with self.lock:
+            ship = self.get_ship(agent, ship_symbol)
+            self.ensure_status(ship, "DOCKED")
+            market = self.get_market(ship.waypoint_symbol)
+            if "FUEL" not in market.goods:
+                raise TraderEmulatorException(
+                    f"Ship refuel failed. Market {market.symbol} does not sell fuel.",
+                    code=4602,
+                )
+            units = ship.spec.fuel_capacity - ship.fuel
+            purchase_price, _ = self.get_prices(market.symbol, "FUEL")
+            total_price = ceil(units / FUEL_UNITS_PER_GOOD) * purchase_price
+            if total_price > agent.credits:
+                raise TraderEmulatorException(
+                    f"Agent {agent.symbol} does not have sufficient credits to refuel.",
+                    code=4600,
+                )
+            agent.credits -= total_price
+            ship.fuel += units
+            transaction = {
+                "waypointSymbol": market.symbol,
+                "shipSymbol": ship.symbol,
+                "tradeSymbol": "FUEL",
+                "type": "PURCHASE",
+                "units": units,
+                "pricePerUnit": purchase_price,
+                "totalPrice": total_price,
+                "timestamp": format_timestamp(self.now()),
+            }
+            if units:
+                self.record_transaction(market.symbol, transaction)
+            return {
+                "agent": self.render_agent(agent),
+                "fuel": self.render_fuel(ship),
+                "transaction": transaction,
+            }
+
+    def purchase_ship(
+        self, agent: EmulatedAgent, ship_type: str, waypoint_symbol: str
+    ) -> Json:
+        with self.lock:
+            shipyard = self.galaxy.shipyards.get(
+                self.get_waypoint(waypoint_symbol).symbol
+            )
+            if not shipyard or ship_type not in shipyard.ship_types:
+                raise TraderEmulatorException(
+                    f"Ship type {ship_type} is not sold at {waypoint_symbol}.",
+                    code=4600 if shipyard else 404,
+                    status_code=400 if shipyard else 404,
+                )
+            if not self.has_ship_at(agent, waypoint_symbol):
+                raise TraderEmulatorException(
+                    f"A ship must be present at {waypoint_symbol} to purchase a ship.",
+                    code=4250,
+                )
+            price = SHIP_SPECS[ship_type].purchase_price
+            if price > agent.credits:
+                raise TraderEmulatorException(
+                    f"Agent {agent.symbol} does not have sufficient credits to "
+                    f"purchase {ship_type}.",
+                    code=4216,
+                )
+            agent.credits -= price
+            ship = self.create_ship(agent=agent, ship_type=ship_type)
+            ship.waypoint_symbol = ship.origin_symbol = waypoint_symbol
+            return {
+                "agent": self.render_agent(agent),
+                "ship": self.render_ship(ship),
+                "transaction": {
+                    "waypointSymbol": waypoint_symbol,
+                    "shipSymbol": ship.symbol,
+                    "price": price,
+                    "agentSymbol": agent.symbol,
+                    "timestamp": format_timestamp(self.now()),
+                },
+            }
+
+    def list_systems(self) -> List[Json]:
+        return [
+            self.system(system_symbol) for system_symbol in self.galaxy.systems.keys()
+        ]
+
+    def system(self, system_symbol: str) -> Json:
+        system = self.galaxy.systems.get(system_symbol)
+        if not system:
+            raise TraderEmulatorException(
+                f"System {system_symbol} not found.", status_code=404, code=404
+            )
+        return {
+            "symbol": system.symbol,
+            "sectorSymbol": get_system_symbol(system.symbol),
+            "type": system.system_type,
+            "x": system.x,
+            "y": system.y,
+            "waypoints": [
+                {
+                    "symbol": waypoint.symbol,
+                    "type": waypoint.waypoint_type,
+                    "x": waypoint.x,
+                    "y": waypoint.y,
+                    "orbitals": [{"symbol": orbital} for orbital in waypoint.orbitals],
+                }
+                for waypoint in system.waypoints
+            ],
+            "factions": [{"symbol": FACTION_SYMBOL}],
+        }
+
+    def list_waypoints(self, system_symbol: str) -> List[Json]:
+        self.system(system_symbol)
+        return [
+            self.render_waypoint(waypoint)
+            for waypoint in self.galaxy.systems[system_symbol].waypoints
+        ]
+
+    def waypoint(self, system_symbol: str, waypoint_symbol: str) -> Json:
+        waypoint = self.get_waypoint(waypoint_symbol)
+        if waypoint.system_symbol != system_symbol:
+            raise TraderEmulatorException(
+                f"Waypoint {waypoint_symbol} not found.", status_code=404, code=404
+            )
+        return self.render_waypoint(waypoint)
+
+    def market(self, agent: Optional[EmulatedAgent], waypoint_symbol: str) -> Json:
+        """
+        Prices and recent transactions are only shown to agents with a ship there
+        """
+        with self.lock:
+            market = self.get_market(waypoint_symbol)
+            data: Json = {
+                "symbol": market.symbol,
+                **{
+                    key: [
+                        self.render_good(good.symbol)
+                        for good in market.goods.values()
+                        if good.trade_type == trade_type
+                    ]
+                    for key, trade_type in [
+                        ("exports", "EXPORT"),
+                        ("imports", "IMPORT"),
+                        ("exchange", "EXCHANGE"),
+                    ]
+                },
+            }
+            if self.has_ship_at(agent, market.symbol):
+                data["transactions"] = list(self.transactions.get(market.symbol, []))
+                data["tradeGoods"] = []
+                for good in market.goods.values():
+                    purchase_price, sell_price = self.get_prices(
+                        market.symbol, good.symbol
+                    )
+                    data["tradeGoods"].append(
+                        {
+                            "symbol": good.symbol,
+                            "type": good.trade_type,
+                            "tradeVolume": good.trade_volume,
+                            "supply": good.supply,
+                            "purchasePrice": purchase_price,
+                            "sellPrice": sell_price,
+                        }
+                    )
+            return data
+
+    def shipyard(self, agent: Optional[EmulatedAgent], waypoint_symbol: str) -> Json:
+        with self.lock:
+            shipyard = self.galaxy.shipyards.get(
+                self.get_waypoint(waypoint_symbol).symbol
+            )
+            if not shipyard:
+                raise TraderEmulatorException(
+                    f"Shipyard not found at waypoint {waypoint_symbol}.",
+                    status_code=404,
+                    code=404,
+                )
+            data: Json = {
+                "symbol": shipyard.symbol,
+                "shipTypes": [{"type": ship_type} for ship_type in shipyard.ship_types],
+                "modificationsFee": 100,
+            }
+            if self.has_ship_at(agent, shipyard.symbol):
+                data["transactions"] = []
+                data["ships"] = [
+                    {
+                        "type": spec.ship_type,
+                        "name": spec.name,
+                        "description": f"A {spec.name.lower()}.",
+                        "supply": "MODERATE",
+                        "activity": "GROWING",
+                        "purchasePrice": spec.purchase_price,
+                        **self.render_ship_parts(spec),
+                    }
+                    for spec in [
+                        SHIP_SPECS[ship_type] for ship_type in shipyard.ship_types
+                    ]
+                ]
+            return data
+
+    def status(self) -> Json:
+        with self.lock:
+            leaders = sorted(
+                self.agents.values(), key=lambda agent: agent.credits, reverse=True
+            )
+            return {
+                "status": "SpaceTraders is currently online and available to play",
+                "version": "v2",
+                "resetDate": "2023-01-01",
+                "description": "Emulated SpaceTraders API",
+                "leaderboards": {
+                    "mostCredits": [
+                        {"agentSymbol": agent.symbol, "credits": agent.credits}
+                        for agent in leaders[:10]
+                    ],
+                    "mostSubmittedCharts": [],
+                },
+                "serverResets": {
+                    "next": format_timestamp(self.now() + timedelta(days=7)),
+                    "frequency": "weekly",
+                },
+            }
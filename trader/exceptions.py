@@ -12,5 +12,33 @@ class TraderDaoException(TraderException):
     pass
 
 
+class TraderEmulatorException(TraderException):
+    """
+    An error response of the emulated API, with its HTTP status and API error code
+    """
+
+    def __init__(self, message: str, status_code: int = 400, code: int = 4000):
+        self.status_code = status_code
+        self.code = code
+        super().__init__(message)
+
+
 class TraderQueueException(TraderException):
     pass
+
+
+class TraderCircuitOpenException(TraderQueueException):
+    pass
+
+
+class TraderRequestCancelledException(TraderQueueException):
+    pass
+
+
+class TraderRequestAbandonedException(TraderRequestCancelledException):
+    """
+    The caller gave up waiting on a request that was already sent, so unlike one
+    dropped before it was sent it may still have been applied
+    """
+
+    pass
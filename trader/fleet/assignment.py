@@ -0,0 +1,244 @@
+from dataclasses import dataclass
+from threading import Lock
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from scipy.optimize import linear_sum_assignment
+
+from trader.dao.markets import MarketTradeGood
+from trader.dao.waypoints import Waypoint
+from trader.fleet.planner import Planner, get_market_snapshot_version
+from trader.roles.context import ShipContext
+from trader.roles.merchant.finder import ArbitrageOpportunity, TradeCandidate
+from trader.roles.merchant.merchant import MAXIMUM_PERCENT_OF_ACCOUNT_PURCHASE
+from trader.util.singleton import Singleton
+
+
+@dataclass
+class TraderPosition:
+    call_sign: str
+    x: float
+    y: float
+    cargo_space: int
+
+
+def solve_trade_assignment(
+    traders: List[TraderPosition],
+    candidates: List[TradeCandidate],
+    budget: float,
+) -> Dict[str, TradeCandidate]:
+    """
+    Hands each trader a distinct trade in one batched solve, maximizing the fleet's
+    total profit per distance travelled. A trader's profit on a trade is limited by its
+    cargo space, the market's trade volume and what the budget buys, and the distance
+    covers getting to the purchase market and hauling to the sale market.
+
+    Traders left without a worthwhile trade (ex: more traders than trades) are omitted.
+    """
+    if not traders or not candidates:
+        return {}
+    trader_coords = np.array([[trader.x, trader.y] for trader in traders], dtype=float)
+    cargo_space = np.array([trader.cargo_space for trader in traders], dtype=float)
+    purchase_coords = np.array(
+        [
+            [
+                candidate.opportunity.purchase_waypoint.x,
+                candidate.opportunity.purchase_waypoint.y,
+            ]
+            for candidate in candidates
+        ],
+        dtype=float,
+    )
+    sell_coords = np.array(
+        [
+            [
+                candidate.opportunity.sell_waypoint.x,
+                candidate.opportunity.sell_waypoint.y,
+            ]
+            for candidate in candidates
+        ],
+        dtype=float,
+    )
+    purchase_prices = np.array(
+        [candidate.opportunity.purchase_price for candidate in candidates], dtype=float
+    )
+    profits = np.array(
+        [candidate.opportunity.profit or 0 for candidate in candidates], dtype=float
+    )
+    trade_volumes = np.array(
+        [candidate.trade_volume for candidate in candidates], dtype=float
+    )
+
+    affordable_units = np.floor(budget / purchase_prices)
+    units = np.minimum(
+        cargo_space[:, None], np.minimum(trade_volumes, affordable_units)[None, :]
+    )
+    approach = np.linalg.norm(
+        trader_coords[:, None, :] - purchase_coords[None, :, :], axis=2
+    )
+    haul = np.linalg.norm(purchase_coords - sell_coords, axis=1)
+    score = units * profits[None, :] / (1 + approach + haul[None, :])
+
+    rows, columns = linear_sum_assignment(score, maximize=True)
+    return {
+        traders[row].call_sign: candidates[column]
+        for row, column in zip(rows, columns)
+        if score[row, column] > 0
+    }
+
+
+class TradeAssigner(metaclass=Singleton):
+    """
+    Assigns trades across every trader in a system at once, so they don't each pick
+    the same top opportunity and crash one market between them.
+
+    The first trader in a system to ask for a trade triggers a batched solve over
+    every registered trader there that isn't mid trade. The others are handed the
+    trade solved for them when they next ask, provided markets haven't moved since.
+    Purchase markets being worked by a trader are left out of later solves until
+    that trader finishes its trade (see release) or asks for its next one.
+
+    Trade candidates are planned outside the lock, so traders in other systems aren't
+    held up by one system's planning, only the solve and the claims are serialized.
+
+    There is one per process. Under the multi process fleet runner each worker has its
+    own, so trades are only coordinated between the traders of one worker (shard).
+    """
+
+    claimed: Dict[str, TradeCandidate]
+    contexts: Dict[str, ShipContext]
+    lock: Lock
+    pending: Dict[str, Tuple[str, TradeCandidate]]
+    # metrics
+    solves: int = 0
+    last_solve_duration: float = 0
+
+    def __init__(self):
+        self.claimed = {}
+        self.contexts = {}
+        self.lock = Lock()
+        self.pending = {}
+
+    def register(self, context: ShipContext):
+        with self.lock:
+            self.contexts[context.call_sign] = context
+
+    def get_trader_positions(
+        self, system_symbol: str, waypoints: List[Waypoint]
+    ) -> List[TraderPosition]:
+        waypoints_by_symbol = {waypoint.symbol: waypoint for waypoint in waypoints}
+        traders: List[TraderPosition] = []
+        for call_sign, context in self.contexts.items():
+            ship = context.ship
+            if ship.nav.system_symbol != system_symbol or call_sign in self.claimed:
+                continue
+            waypoint = waypoints_by_symbol.get(ship.nav.waypoint_symbol)
+            if not waypoint:
+                continue
+            traders.append(
+                TraderPosition(
+                    call_sign=call_sign,
+                    x=waypoint.x,
+                    y=waypoint.y,
+                    cargo_space=ship.cargo.capacity - ship.cargo.units,
+                )
+            )
+        return traders
+
+    def assign(
+        self,
+        call_sign: str,
+        system_symbol: str,
+        credits: int,
+        trade_goods: List[MarketTradeGood],
+        waypoints: List[Waypoint],
+    ) -> Optional[ArbitrageOpportunity]:
+        """
+        The trade for a trader to make next, which also releases its previous trade
+        """
+        market_snapshot_version = get_market_snapshot_version(trade_goods)
+        with self.lock:
+            self.claimed.pop(call_sign, None)
+            opportunity = self.claim_pending(
+                call_sign=call_sign, market_snapshot_version=market_snapshot_version
+            )
+            if opportunity:
+                return opportunity
+
+        # planning may wait on the process pool, so it is kept out of the lock
+        planned_candidates = Planner().plan_trade_candidates(
+            system_symbol=system_symbol,
+            market_snapshot_version=market_snapshot_version,
+            trade_goods=trade_goods,
+            waypoints=waypoints,
+        )
+
+        with self.lock:
+            # another trader in the system may have solved for this one meanwhile
+            opportunity = self.claim_pending(
+                call_sign=call_sign, market_snapshot_version=market_snapshot_version
+            )
+            if opportunity:
+                return opportunity
+
+            start = perf_counter()
+            claimed_markets = {
+                candidate.purchase_market for candidate in self.claimed.values()
+            }
+            candidates = [
+                candidate
+                for candidate in planned_candidates
+                if candidate.purchase_market not in claimed_markets
+            ]
+            traders = self.get_trader_positions(
+                system_symbol=system_symbol, waypoints=waypoints
+            )
+            # never commit more than the agent has across every trader in the solve
+            budget = min(
+                MAXIMUM_PERCENT_OF_ACCOUNT_PURCHASE * credits,
+                credits / max(1, len(traders)),
+            )
+            assignments = solve_trade_assignment(
+                traders=traders, candidates=candidates, budget=budget
+            )
+            for trader in traders:
+                self.pending.pop(trader.call_sign, None)
+            for assigned_call_sign, candidate in assignments.items():
+                self.pending[assigned_call_sign] = (market_snapshot_version, candidate)
+            self.solves += 1
+            self.last_solve_duration = perf_counter() - start
+            logger.debug(
+                f"Assigned {len(assignments)} trade(s) to {len(traders)} trader(s) in "
+                f"{system_symbol} in {self.last_solve_duration:.3f}s"
+            )
+
+            pending = self.pending.pop(call_sign, None)
+            if not pending:
+                return None
+            self.claimed[call_sign] = pending[1]
+            return pending[1].opportunity
+
+    def claim_pending(
+        self, call_sign: str, market_snapshot_version: str
+    ) -> Optional[ArbitrageOpportunity]:
+        """
+        Claims the trade solved for a trader, if markets haven't moved since. Called
+        with the lock held.
+        """
+        pending = self.pending.get(call_sign)
+        if not pending or pending[0] != market_snapshot_version:
+            return None
+        del self.pending[call_sign]
+        self.claimed[call_sign] = pending[1]
+        return pending[1].opportunity
+
+    def release(self, call_sign: str):
+        """
+        Gives up a trader's trade once it's done with it, made or failed, so its
+        purchase market is back in the next solve
+        """
+        with self.lock:
+            self.claimed.pop(call_sign, None)
+            self.pending.pop(call_sign, None)
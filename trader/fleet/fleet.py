@@ -1,21 +1,31 @@
 from threading import Thread
-from time import sleep
-from typing import List
+from typing import List, Optional
 
 from trader.dao.ships import Ship
+from trader.fleet.runner import FleetRunner
+from trader.fleet.state import FleetState
 from trader.logic.simple_explorer import SimpleExplorer
 from trader.logic.simple_trader import SimpleTrader
+from trader.util import clock
 
 MAP_OF_SHIP_FRAME_TO_LOGIC = {"Frigate": SimpleTrader, "Probe": SimpleExplorer}
 MAXIMUM_PROBES_PER_SYSTEM = 5
 
 
 class Fleet:
+    """
+    Runs the ship loops of one agent. Fleets of several agents (tokens) can run side by
+    side in one process, see run_fleets, each with its own rate limit.
+    """
+
     api_key: str
+    fleet_state: FleetState
+    runner: Optional[FleetRunner] = None
     ships: List[Ship]
 
     def __init__(self, api_key: str, ships: List[Ship]) -> None:
         self.api_key = api_key
+        self.fleet_state = FleetState(api_key=api_key)
         self.ships = ships
 
     def break_system_into_grids(self, grid_count: int, filters: List[str] = []):
@@ -25,7 +35,23 @@ class Fleet:
         """
         pass
 
-    def run_loop(self):
+    def start(self, processes: int = 1):
+        """
+        Starts every ship loop without blocking
+        """
+        if processes > 1:
+            self.runner = FleetRunner(
+                api_key=self.api_key,
+                ships=self.ships,
+                logic_by_frame=MAP_OF_SHIP_FRAME_TO_LOGIC,
+                processes=processes,
+            )
+            self.runner.start()
+            return
+
+        # hydrate every ship loop from one bulk refresh instead of a fetch per ship,
+        # already done if the fleet was built from its fleet state
+        self.fleet_state.ensure_fresh()
         for ship in self.ships:
             ship_loop = MAP_OF_SHIP_FRAME_TO_LOGIC[ship.frame_name](
                 api_key=self.api_key, call_sign=ship.call_sign, repeat=True
@@ -33,5 +59,26 @@ class Fleet:
             thread = Thread(target=ship_loop.run_loop)
             thread.daemon = True
             thread.start()
+
+    def stop(self):
+        if self.runner:
+            self.runner.stop()
+            self.runner = None
+
+    def run_loop(self, processes: int = 1):
+        run_fleets(fleets=[self], processes=processes)
+
+
+def run_fleets(fleets: List[Fleet], processes: int = 1):
+    """
+    Drives the fleets of several agents concurrently. Each agent has its own request
+    queue and so its own rate limit, while the cache and database are shared.
+    """
+    for fleet in fleets:
+        fleet.start(processes=processes)
+    try:
         while True:
-            sleep(30)
+            clock.sleep(30)
+    finally:
+        for fleet in fleets:
+            fleet.stop()
@@ -0,0 +1,245 @@
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from hashlib import blake2b
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+from loguru import logger
+
+from trader.client.waypoint import Waypoint
+from trader.dao.markets import MarketTradeGood
+from trader.dao.waypoints import Waypoint as WaypointDAO
+from trader.roles.merchant.finder import (
+    DEFAULT_TRADE_CANDIDATES,
+    ArbitrageOpportunity,
+    TradeCandidate,
+    find_profitable_trades_in_system,
+    generate_trade_candidates,
+)
+from trader.roles.navigator.geometry import (
+    generate_graph_from_waypoints_all_connected,
+    generate_shortest_path_with_graph,
+)
+from trader.util.singleton import Singleton
+
+DEFAULT_PLANNER_PROCESSES = int(
+    os.environ.get("PLANNER_PROCESSES", max(1, min(2, (os.cpu_count() or 1) - 1)))
+)
+DEFAULT_MAXIMUM_PLANS = 128
+
+
+def get_waypoint_set_hash(waypoints: Sequence[Waypoint | WaypointDAO]) -> str:
+    """
+    Order independent hash of the waypoints (and where they are) a plan was made for
+    """
+    waypoint_set = sorted(
+        f"{waypoint.symbol}:{waypoint.x}:{waypoint.y}" for waypoint in waypoints
+    )
+    return blake2b("\0".join(waypoint_set).encode(), digest_size=16).hexdigest()
+
+
+def get_market_snapshot_version(trade_goods: Sequence[MarketTradeGood]) -> str:
+    """
+    Order independent hash of the trade goods stored for a system, so it only changes
+    when a refresh actually moved prices, supply or volume
+    """
+    snapshot = sorted(
+        f"{good.waypoint_symbol}:{good.symbol}:{good.supply}:{good.trade_volume}:"
+        f"{good.purchase_price}:{good.sell_price}"
+        for good in trade_goods
+    )
+    return blake2b("\0".join(snapshot).encode(), digest_size=16).hexdigest()
+
+
+def plan_trades(
+    trade_goods: List[MarketTradeGood],
+    waypoints: List[WaypointDAO],
+    limit: int,
+    prefer_within_cluster: bool,
+) -> Dict[float, ArbitrageOpportunity]:
+    if not trade_goods or not waypoints:
+        return {}
+    return find_profitable_trades_in_system(
+        trade_goods=trade_goods,
+        waypoints=waypoints,
+        limit=limit,
+        prefer_within_cluster=prefer_within_cluster,
+    )
+
+
+def plan_route(
+    waypoints: List[Waypoint] | List[WaypointDAO], starting_position: str
+) -> List[Waypoint] | List[WaypointDAO]:
+    graph = generate_graph_from_waypoints_all_connected(waypoints=waypoints)
+    return generate_shortest_path_with_graph(
+        starting_position=starting_position, graph=graph
+    )
+
+
+class Planner(metaclass=Singleton):
+    """
+    Runs CPU heavy planning (arbitrage, clustering and routing) in a pool of worker
+    processes so it doesn't hold the GIL over every ship's loop, and memoizes the plans
+    so ships in the same system share one.
+
+    Trade plans are keyed by system, market snapshot version and waypoint set, so a plan
+    is only made again once markets in the system are refreshed. Routes are keyed by
+    system, waypoint set and starting position. Plans are kept as futures so concurrent
+    callers asking for the same plan wait on the one computation.
+
+    With no processes (or inside a daemonic fleet worker, which can't have children)
+    plans are made in the calling thread but are still shared.
+    """
+
+    executor: Optional[Executor] = None
+    lock: Lock
+    maximum_plans: int
+    plans: OrderedDict[Hashable, Future]
+    processes: int
+    # metrics
+    hits: int = 0
+    misses: int = 0
+
+    def __init__(
+        self,
+        processes: int = DEFAULT_PLANNER_PROCESSES,
+        maximum_plans: int = DEFAULT_MAXIMUM_PLANS,
+    ):
+        self.lock = Lock()
+        self.maximum_plans = maximum_plans
+        self.plans = OrderedDict()
+        self.processes = processes
+        if multiprocessing.current_process().daemon:
+            self.processes = 0
+
+    def get_executor(self) -> Optional[Executor]:
+        if self.processes > 0 and not self.executor:
+            # spawn so workers never inherit this process's threads, engine or locks
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self.executor
+
+    def get_plan(self, key: Hashable, function: Callable, **kwargs: Any) -> Any:
+        make_inline = False
+        with self.lock:
+            future = self.plans.get(key)
+            if future:
+                self.plans.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                executor = self.get_executor()
+                if executor:
+                    future = executor.submit(function, **kwargs)
+                else:
+                    future = Future()
+                    make_inline = True
+                self.plans[key] = future
+                while len(self.plans) > self.maximum_plans:
+                    self.plans.popitem(last=False)
+
+        if make_inline:
+            try:
+                future.set_result(function(**kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+        try:
+            return future.result()
+        except Exception:
+            # forget failed plans so the next caller tries again
+            with self.lock:
+                if self.plans.get(key) is future:
+                    del self.plans[key]
+            raise
+
+    def plan_trades(
+        self,
+        system_symbol: str,
+        market_snapshot_version: str,
+        trade_goods: List[MarketTradeGood],
+        waypoints: List[WaypointDAO],
+        limit: int = 10,
+        prefer_within_cluster: bool = True,
+    ) -> Dict[float, ArbitrageOpportunity]:
+        """
+        Every profitable trade in the system by profit to distance, to be narrowed down
+        by each ship to what it can afford
+        """
+        key = (
+            "trades",
+            system_symbol,
+            market_snapshot_version,
+            get_waypoint_set_hash(waypoints),
+            limit,
+            prefer_within_cluster,
+        )
+        return self.get_plan(
+            key,
+            plan_trades,
+            trade_goods=trade_goods,
+            waypoints=waypoints,
+            limit=limit,
+            prefer_within_cluster=prefer_within_cluster,
+        )
+
+    def plan_trade_candidates(
+        self,
+        system_symbol: str,
+        market_snapshot_version: str,
+        trade_goods: List[MarketTradeGood],
+        waypoints: List[WaypointDAO],
+        limit: int = DEFAULT_TRADE_CANDIDATES,
+    ) -> List[TradeCandidate]:
+        """
+        Every profitable purchase market in the system, for trades to be assigned across
+        the fleet's traders
+        """
+        key = (
+            "trade-candidates",
+            system_symbol,
+            market_snapshot_version,
+            get_waypoint_set_hash(waypoints),
+            limit,
+        )
+        return self.get_plan(
+            key,
+            generate_trade_candidates,
+            trade_goods=trade_goods,
+            waypoints=waypoints,
+            limit=limit,
+        )
+
+    def plan_route(
+        self,
+        system_symbol: str,
+        waypoints: List[Waypoint] | List[WaypointDAO],
+        starting_position: str,
+    ) -> List[Waypoint] | List[WaypointDAO]:
+        """
+        Approximate shortest route through every waypoint from the starting position
+        """
+        key = (
+            "route",
+            system_symbol,
+            get_waypoint_set_hash(waypoints),
+            starting_position,
+        )
+        return self.get_plan(
+            key,
+            plan_route,
+            waypoints=waypoints,
+            starting_position=starting_position,
+        )
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        logger.debug(
+            f"Planner shut down after {self.hits} hit(s), {self.misses} miss(es)"
+        )
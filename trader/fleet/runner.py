@@ -0,0 +1,242 @@
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.process import BaseProcess
+from multiprocessing.queues import Queue as ProcessQueue
+from threading import Thread
+from time import sleep
+from typing import Any, Dict, List, Optional, Tuple, Type
+from uuid import uuid4
+
+from loguru import logger
+
+from trader.client.request import ClientRequest
+from trader.dao.ships import Ship
+from trader.fleet.state import FleetState, RemoteFleetState
+from trader.queues.remote_request_queue import (
+    REQUEST_FUNCTIONS,
+    RemoteRequestQueue,
+    serialize_response,
+)
+from trader.queues.request_queue import RequestQueue
+
+DEFAULT_FLEET_PROCESSES = max(1, min(4, (os.cpu_count() or 1) - 1))
+# threads the coordinator waits on forwarded requests with, on top of one per ship as a
+# ship's loop mostly has a single request in flight
+EXTRA_REQUEST_THREADS = 8
+
+ShipAssignment = Tuple[str, str]
+
+
+def run_fleet_worker(
+    api_key: str,
+    worker_id: int,
+    ships: List[ShipAssignment],
+    logic_by_frame: Dict[str, Type],
+    outgoing_requests: ProcessQueue,
+    incoming_responses: ProcessQueue,
+    snapshot_requests: ProcessQueue,
+    incoming_snapshots: ProcessQueue,
+):
+    """
+    Entrypoint of a fleet worker process, runs the loop of every ship in its shard as
+    threads the same way the single process fleet does. All requests are forwarded to
+    the coordinator so the rate limit is shared with every other worker, and fleet
+    state is loaded from the coordinator's rather than refreshed by every worker.
+    """
+    if "DEBUG" not in os.environ:
+        logger.remove()
+        logger.add("out.log", enqueue=True)
+
+    RemoteRequestQueue(
+        api_key=api_key,
+        worker_id=worker_id,
+        outgoing_requests=outgoing_requests,
+        incoming_responses=incoming_responses,
+    ).install(api_key=api_key)
+    RemoteFleetState(
+        api_key=api_key,
+        worker_id=worker_id,
+        snapshot_requests=snapshot_requests,
+        incoming_snapshots=incoming_snapshots,
+    ).install(api_key=api_key)
+
+    for call_sign, frame_name in ships:
+        ship_loop = logic_by_frame[frame_name](
+            api_key=api_key, call_sign=call_sign, repeat=True
+        )
+        thread = Thread(target=ship_loop.run_loop)
+        thread.daemon = True
+        thread.start()
+    while True:
+        sleep(30)
+
+
+class FleetRunner:
+    """
+    Runs the fleet's ship loops sharded across worker processes, so CPU heavy planning
+    in one ship's loop doesn't stall every other ship on the GIL.
+
+    This process acts as the coordinator. It owns the one RequestQueue (and with it the
+    rate limit for the API key) and the one FleetState refreshing the fleet in bulk, and
+    serves both to the workers over multiprocessing queues. Workers still share the
+    SQLite database, which the DAO opens in WAL mode with a busy timeout so writers
+    across processes wait rather than fail.
+    """
+
+    api_key: str
+    fleet_state: FleetState
+    incoming_requests: ProcessQueue
+    logic_by_frame: Dict[str, Type]
+    outgoing_responses: List[ProcessQueue]
+    outgoing_snapshots: List[ProcessQueue]
+    processes: int
+    request_executor: ThreadPoolExecutor
+    request_queue: RequestQueue
+    ships: List[Ship]
+    snapshot_requests: ProcessQueue
+    workers: List[BaseProcess]
+
+    def __init__(
+        self,
+        api_key: str,
+        ships: List[Ship],
+        logic_by_frame: Dict[str, Type],
+        processes: int = DEFAULT_FLEET_PROCESSES,
+    ) -> None:
+        self.api_key = api_key
+        self.logic_by_frame = logic_by_frame
+        self.processes = max(1, min(processes, len(ships)))
+        self.ships = ships
+        self.outgoing_responses = []
+        self.outgoing_snapshots = []
+        self.request_executor = ThreadPoolExecutor(
+            max_workers=len(ships) + EXTRA_REQUEST_THREADS
+        )
+        self.workers = []
+
+    def shard(self) -> List[List[ShipAssignment]]:
+        shards: List[List[ShipAssignment]] = [[] for _ in range(self.processes)]
+        for idx, ship in enumerate(self.ships):
+            shards[idx % self.processes].append((ship.call_sign, ship.frame_name))
+        return shards
+
+    def start(self):
+        # spawn so workers never inherit the coordinator's threads, engine or locks
+        context = multiprocessing.get_context("spawn")
+        self.request_queue = RequestQueue(api_key=self.api_key, client_id=str(uuid4()))
+        self.fleet_state = FleetState(api_key=self.api_key)
+        self.incoming_requests = context.Queue()
+        self.snapshot_requests = context.Queue()
+        for target in [self.serve_requests, self.serve_snapshots]:
+            thread = Thread(target=target)
+            thread.daemon = True
+            thread.start()
+
+        for worker_id, ships in enumerate(self.shard()):
+            outgoing_responses = context.Queue()
+            self.outgoing_responses.append(outgoing_responses)
+            outgoing_snapshots = context.Queue()
+            self.outgoing_snapshots.append(outgoing_snapshots)
+            worker = context.Process(
+                target=run_fleet_worker,
+                kwargs={
+                    "api_key": self.api_key,
+                    "worker_id": worker_id,
+                    "ships": ships,
+                    "logic_by_frame": self.logic_by_frame,
+                    "outgoing_requests": self.incoming_requests,
+                    "incoming_responses": outgoing_responses,
+                    "snapshot_requests": self.snapshot_requests,
+                    "incoming_snapshots": outgoing_snapshots,
+                },
+                daemon=True,
+            )
+            worker.start()
+            self.workers.append(worker)
+            logger.info(f"Started fleet worker {worker_id} for {len(ships)} ship(s)")
+
+    def stop(self):
+        for worker in self.workers:
+            worker.terminate()
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+        self.outgoing_responses = []
+        self.outgoing_snapshots = []
+
+    def serve_requests(self):
+        while True:
+            try:
+                request = self.incoming_requests.get()
+            except (EOFError, OSError):
+                # the queue was closed on shutdown
+                return
+            self.serve_request(*request)
+
+    def serve_request(
+        self,
+        worker_id: int,
+        request_id: str,
+        priority: int,
+        method: str,
+        arguments: Dict[str, Any],
+        deadline: Optional[float] = None,
+        flow: Optional[str] = None,
+    ):
+        """
+        Enqueues the request as it arrives, so it is dispatched in priority order, and
+        waits on its response from the request pool
+        """
+        try:
+            queued_request_id = self.request_queue.enqueue(
+                priority=priority,
+                request=ClientRequest(
+                    function=REQUEST_FUNCTIONS[method],
+                    arguments=arguments,
+                    deadline=deadline,
+                    flow=flow,
+                ),
+            )
+        except Exception as e:
+            logger.exception(e)
+            self.outgoing_responses[worker_id].put((request_id, None, repr(e)))
+            return
+        self.request_executor.submit(
+            self.respond, worker_id, request_id, queued_request_id
+        )
+
+    def respond(self, worker_id: int, request_id: str, queued_request_id: str):
+        error: Optional[str] = None
+        serialized_response = None
+        try:
+            response = self.request_queue.wait_for_response(
+                request_id=queued_request_id
+            )
+            serialized_response = serialize_response(response)
+        except Exception as e:
+            logger.exception(e)
+            error = repr(e)
+        self.outgoing_responses[worker_id].put((request_id, serialized_response, error))
+
+    def serve_snapshots(self):
+        while True:
+            try:
+                worker_id = self.snapshot_requests.get()
+            except (EOFError, OSError):
+                # the queue was closed on shutdown
+                return
+            try:
+                self.fleet_state.ensure_fresh()
+            except Exception as e:
+                # the worker is sent what the coordinator has, stale or not
+                logger.exception(e)
+            self.outgoing_snapshots[worker_id].put(self.fleet_state.get_snapshot())
+
+    def run_loop(self):
+        self.start()
+        try:
+            while True:
+                sleep(30)
+        finally:
+            self.stop()
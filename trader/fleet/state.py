@@ -0,0 +1,226 @@
+from dataclasses import dataclass
+from datetime import datetime
+from multiprocessing.queues import Queue as ProcessQueue
+from threading import Lock, RLock, Thread
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from trader.client.agent import Agent
+from trader.client.client import Client
+from trader.client.ship import Ship
+from trader.dao.dao import DAO
+from trader.dao.ships import save_client_ships
+from trader.exceptions import TraderClientException
+from trader.util import clock
+from trader.util.singleton import KeyedSingleton
+
+DEFAULT_TIMEOUT_TO_REFRESH_FLEET_STATE = 60
+
+
+@dataclass
+class FleetSnapshot:
+    ships: List[Ship]
+    agent: Optional[Agent]
+    refreshed_at: Optional[datetime]
+
+
+class FleetState(metaclass=KeyedSingleton):
+    """
+    Shared view of every ship in the fleet and the agent that owns them. Ships are
+    refreshed in bulk with a single paged ships call on a schedule (or on demand), and
+    roles read from here rather than each fetching their own ship.
+
+    Single ship fetches are reserved for a ship that has just acted and needs its own
+    state to be current, see refresh_ship.
+
+    There is one per API key, as each agent has its own fleet.
+    """
+
+    agent: Optional[Agent] = None
+    client: Client
+    dao: DAO
+    lock: Lock
+    refresh_interval: float
+    refresh_lock: RLock
+    refreshed_at: Optional[datetime] = None
+    ships: Dict[str, Ship]
+    # metrics
+    bulk_refreshes: int = 0
+    ship_refreshes: int = 0
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        disable_background_processes: bool = False,
+        refresh_interval: float = DEFAULT_TIMEOUT_TO_REFRESH_FLEET_STATE,
+    ):
+        self.client = Client(
+            api_key=api_key, disable_background_processes=disable_background_processes
+        )
+        self.dao = DAO()
+        self.lock = Lock()
+        self.refresh_interval = refresh_interval
+        self.refresh_lock = RLock()
+        self.ships = {}
+        if not disable_background_processes:
+            thread = Thread(target=self.run_loop)
+            thread.daemon = True
+            thread.start()
+
+    def is_stale(self) -> bool:
+        return (
+            self.refreshed_at is None
+            or (clock.now() - self.refreshed_at).total_seconds()
+            >= self.refresh_interval
+        )
+
+    def refresh(self) -> None:
+        """
+        Refreshes every ship and the agent in bulk.
+        """
+        with self.refresh_lock:
+            ships = self.client.ships().data or []
+            agent = self.client.agent().data
+            self.load(FleetSnapshot(ships=ships, agent=agent, refreshed_at=clock.now()))
+            self.bulk_refreshes += 1
+        if ships:
+            save_client_ships(engine=self.dao.engine, ships=ships)
+        logger.debug(f"Refreshed fleet state for {len(ships)} ship(s)")
+
+    def load(self, snapshot: FleetSnapshot) -> None:
+        with self.lock:
+            self.ships = {ship.symbol: ship for ship in snapshot.ships}
+            if snapshot.agent:
+                self.agent = snapshot.agent
+            self.refreshed_at = snapshot.refreshed_at
+
+    def get_snapshot(self) -> FleetSnapshot:
+        with self.lock:
+            return FleetSnapshot(
+                ships=list(self.ships.values()),
+                agent=self.agent,
+                refreshed_at=self.refreshed_at,
+            )
+
+    def ensure_fresh(self) -> None:
+        """
+        Refreshes in bulk if stale. Concurrent callers wait on the one refresh rather
+        than each running their own.
+        """
+        if not self.is_stale():
+            return
+        with self.refresh_lock:
+            # another caller may have refreshed while this one waited on the lock
+            if self.is_stale():
+                self.refresh()
+
+    def get_ship(self, call_sign: str) -> Ship:
+        self.ensure_fresh()
+        with self.lock:
+            ship = self.ships.get(call_sign)
+        if ship:
+            return ship
+        # ships bought since the last bulk refresh are fetched individually
+        return self.refresh_ship(call_sign=call_sign)
+
+    def get_agent(self) -> Agent:
+        self.ensure_fresh()
+        with self.lock:
+            agent = self.agent
+        if agent:
+            return agent
+        return self.refresh_agent()
+
+    def refresh_ship(self, call_sign: str) -> Ship:
+        ship = self.client.ship(call_sign=call_sign).data
+        if not ship:
+            raise TraderClientException(
+                f"Unable to refresh fleet state as ship payload for {call_sign} was empty!"
+            )
+        save_client_ships(engine=self.dao.engine, ships=[ship])
+        with self.lock:
+            self.ships[call_sign] = ship
+            self.ship_refreshes += 1
+        return ship
+
+    def refresh_agent(self) -> Agent:
+        agent = self.client.agent().data
+        if not agent:
+            raise TraderClientException(
+                "Unable to refresh fleet state as agent payload was empty!"
+            )
+        with self.lock:
+            self.agent = agent
+        return agent
+
+    def run_loop(self):
+        while True:
+            try:
+                # skipped when a caller has refreshed within the interval, as on startup
+                self.ensure_fresh()
+            except Exception as e:
+                logger.exception(e)
+            clock.sleep(self.refresh_interval)
+
+
+class RemoteFleetState(FleetState):
+    """
+    Stands in for the FleetState inside fleet worker processes. Bulk refreshes are
+    served from the coordinator's fleet state instead of each worker fetching every
+    ship, so the fleet is fetched once per interval however many workers there are.
+
+    Call install in a worker before any role is created, see RemoteRequestQueue.
+    """
+
+    incoming_snapshots: ProcessQueue
+    # ships refreshed individually, kept over older snapshots from the coordinator
+    ship_refreshed_at: Dict[str, datetime]
+    snapshot_requests: ProcessQueue
+    worker_id: int
+
+    def __init__(
+        self,
+        worker_id: int,
+        snapshot_requests: ProcessQueue,
+        incoming_snapshots: ProcessQueue,
+        api_key: Optional[str] = None,
+        refresh_interval: float = DEFAULT_TIMEOUT_TO_REFRESH_FLEET_STATE,
+    ):
+        super().__init__(
+            api_key=api_key,
+            disable_background_processes=True,
+            refresh_interval=refresh_interval,
+        )
+        self.incoming_snapshots = incoming_snapshots
+        self.ship_refreshed_at = {}
+        self.snapshot_requests = snapshot_requests
+        self.worker_id = worker_id
+
+    def install(self, api_key: Optional[str]):
+        FleetState.register_instance(self, api_key=api_key)
+
+    def refresh(self) -> None:
+        with self.refresh_lock:
+            self.snapshot_requests.put(self.worker_id)
+            snapshot: FleetSnapshot = self.incoming_snapshots.get()
+            with self.lock:
+                for call_sign, refreshed_at in list(self.ship_refreshed_at.items()):
+                    if (
+                        snapshot.refreshed_at is None
+                        or refreshed_at > snapshot.refreshed_at
+                    ):
+                        ship = self.ships.get(call_sign)
+                        if ship:
+                            snapshot.ships.append(ship)
+                    else:
+                        del self.ship_refreshed_at[call_sign]
+            self.load(snapshot)
+        logger.debug(f"Loaded fleet state for {len(snapshot.ships)} ship(s)")
+
+    def refresh_ship(self, call_sign: str) -> Ship:
+        refreshed_at = clock.now()
+        ship = super().refresh_ship(call_sign=call_sign)
+        with self.lock:
+            self.ship_refreshed_at[call_sign] = refreshed_at
+        return ship
@@ -1,5 +1,4 @@
 from abc import ABC, abstractmethod
-from datetime import UTC, datetime
 from typing import List, Optional
 
 from loguru import logger
@@ -8,6 +7,8 @@ from trader.client.ship import Ship
 from trader.dao.squads import Squad
 from trader.queues.action_queue import ActionQueue
 from trader.roles.common import Common as CommonRole
+from trader.roles.context import ShipContext
+from trader.util import clock
 
 DEFAULT_INTERNAL_LOOP_INTERVAL = 3
 
@@ -25,18 +26,22 @@ class Common(ABC):
 
     action_queue: ActionQueue
     base_priority: int
-    ship: Ship
+    context: ShipContext
     squad: Optional[Squad]
     roles: List[CommonRole]
     repeat: bool
     running_loop: bool = False
 
+    @property
+    def ship(self) -> Ship:
+        return self.context.ship
+
     def compute_role_metrics(self, **_):
         total_credits_earned = sum([role.credits_earned for role in self.roles])
         total_credits_spent = sum([role.credits_spent for role in self.roles])
         total_time_spent = sum(
             [
-                int((datetime.now(UTC) - role.time_started).total_seconds())
+                int((clock.now() - role.time_started).total_seconds())
                 for role in self.roles
             ]
         )
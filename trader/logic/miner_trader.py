@@ -1,13 +1,14 @@
 import os
-from time import sleep
 from typing import List
 
 from loguru import logger
 
 from trader.logic.common import DEFAULT_INTERNAL_LOOP_INTERVAL, Common
 from trader.queues.action_queue import ActionQueue, ActionQueueElement
+from trader.roles.context import ShipContext
 from trader.roles.harvester import Harvester
 from trader.roles.merchant.merchant import Merchant
+from trader.util import clock
 
 
 class MinerTrader(Common):
@@ -28,15 +29,23 @@ class MinerTrader(Common):
 
     def __init__(self, api_key: str, call_sign: str, repeat: bool = False):
         super().__init__()
-        self.harvester = Harvester(
+        self.context = ShipContext(
             api_key=api_key, call_sign=call_sign, base_priority=self.base_priority
         )
+        self.harvester = Harvester(
+            api_key=api_key,
+            call_sign=call_sign,
+            base_priority=self.base_priority,
+            context=self.context,
+        )
         self.merchant = Merchant(
-            api_key=api_key, call_sign=call_sign, base_priority=self.base_priority
+            api_key=api_key,
+            call_sign=call_sign,
+            base_priority=self.base_priority,
+            context=self.context,
         )
         self.roles = [self.harvester, self.merchant]
         self.repeat = repeat
-        self.ship = self.harvester.ship
         self.action_queue = ActionQueue(
             ship=self.ship,
             queue_name="miner-trader",
@@ -97,12 +106,13 @@ class MinerTrader(Common):
 
                 while self.action_queue.len():
                     # wait for internal queue to be empty before trying again
-                    sleep(DEFAULT_INTERNAL_LOOP_INTERVAL)
+                    clock.sleep(DEFAULT_INTERNAL_LOOP_INTERVAL)
             except KeyboardInterrupt:
                 os._exit(1)
             except Exception as e:
                 # just log the exception and loop, avoid the crash
                 logger.exception(e)
+                self.context.cancel_requests()
             if not self.repeat:
                 break
             iteration += 1
@@ -1,13 +1,14 @@
 import os
-from time import sleep
 from typing import List
 
 from loguru import logger
 
 from trader.logic.common import DEFAULT_INTERNAL_LOOP_INTERVAL, ActionQueue, Common
 from trader.queues.action_queue import ActionQueueElement
+from trader.roles.context import ShipContext
 from trader.roles.explorer import Explorer
 from trader.roles.navigator.navigator import Navigator
+from trader.util import clock
 
 
 class SimpleExplorer(Common):
@@ -23,15 +24,23 @@ class SimpleExplorer(Common):
 
     def __init__(self, api_key: str, call_sign: str, repeat: bool = False):
         super().__init__()
-        self.explorer = Explorer(
+        self.context = ShipContext(
             api_key=api_key, call_sign=call_sign, base_priority=self.base_priority
         )
+        self.explorer = Explorer(
+            api_key=api_key,
+            call_sign=call_sign,
+            base_priority=self.base_priority,
+            context=self.context,
+        )
         self.navigator = Navigator(
-            api_key=api_key, call_sign=call_sign, base_priority=self.base_priority
+            api_key=api_key,
+            call_sign=call_sign,
+            base_priority=self.base_priority,
+            context=self.context,
         )
         self.roles = [self.explorer]
         self.repeat = repeat
-        self.ship = self.explorer.ship
         self.action_queue = ActionQueue(
             ship=self.ship, queue_name="simple-explorer", purge=True
         )
@@ -76,12 +85,13 @@ class SimpleExplorer(Common):
 
                 while self.action_queue.len():
                     # wait for internal queue to be empty before trying again
-                    sleep(DEFAULT_INTERNAL_LOOP_INTERVAL)
+                    clock.sleep(DEFAULT_INTERNAL_LOOP_INTERVAL)
             except KeyboardInterrupt:
                 os._exit(1)
-            except:
+            except Exception as e:
                 # just log the exception and loop, avoid the crash
-                logger.exception
+                logger.exception(e)
+                self.context.cancel_requests()
 
             if not self.repeat:
                 break
@@ -1,5 +1,4 @@
 import os
-from time import sleep
 from typing import List, cast
 
 from loguru import logger
@@ -7,14 +6,16 @@ from loguru import logger
 from trader.dao.markets import get_market_trade_goods_by_system
 from trader.dao.waypoints import get_waypoints_by_system_symbol
 from trader.exceptions import TraderException
+from trader.fleet.assignment import TradeAssigner
 from trader.logic.common import DEFAULT_INTERNAL_LOOP_INTERVAL, Common
 from trader.queues.action_queue import (
     ActionQueue,
     ActionQueueElement,
     ActionQueueParameters,
 )
-from trader.roles.merchant.finder import find_most_profitable_trade_in_system
-from trader.roles.merchant.merchant import MAXIMUM_PERCENT_OF_ACCOUNT_PURCHASE, Merchant
+from trader.roles.context import ShipContext
+from trader.roles.merchant.merchant import Merchant
+from trader.util import clock
 
 
 class SimpleTrader(Common):
@@ -29,12 +30,18 @@ class SimpleTrader(Common):
 
     def __init__(self, api_key: str, call_sign: str, repeat: bool = False):
         super().__init__()
-        self.merchant = Merchant(
+        self.context = ShipContext(
             api_key=api_key, call_sign=call_sign, base_priority=self.base_priority
         )
+        self.merchant = Merchant(
+            api_key=api_key,
+            call_sign=call_sign,
+            base_priority=self.base_priority,
+            context=self.context,
+        )
         self.roles = [self.merchant]
+        TradeAssigner().register(self.context)
         self.repeat = repeat
-        self.ship = self.merchant.ship
         self.action_queue = ActionQueue(
             ship=self.ship,
             queue_name="simple-trader",
@@ -52,20 +59,22 @@ class SimpleTrader(Common):
 
     def begin_trading_cycle(self) -> ActionQueueParameters:
         trading_cycle_data: ActionQueueParameters = {}
+        system_symbol = self.merchant.ship.nav.system_symbol
         waypoints = get_waypoints_by_system_symbol(
             engine=self.merchant.dao.engine,
-            system_symbol=self.merchant.ship.nav.system_symbol,
+            system_symbol=system_symbol,
         )
         trade_goods = get_market_trade_goods_by_system(
             engine=self.merchant.dao.engine,
-            system_symbol=self.merchant.ship.nav.system_symbol,
+            system_symbol=system_symbol,
         )
-        most_profitable_trade = find_most_profitable_trade_in_system(
-            maximum_purchase_price=MAXIMUM_PERCENT_OF_ACCOUNT_PURCHASE
-            * self.merchant.agent.credits,
+        # trades are assigned across every trader in the system so they don't compete
+        most_profitable_trade = TradeAssigner().assign(
+            call_sign=self.ship.symbol,
+            system_symbol=system_symbol,
+            credits=self.merchant.agent.credits,
             trade_goods=trade_goods,
             waypoints=waypoints,
-            prefer_within_cluster=True,
         )
         if most_profitable_trade:
             trading_cycle_data[
@@ -94,6 +103,9 @@ class SimpleTrader(Common):
             "system_symbol": cast(str, trading_cycle_data["buy_system_symbol"]),
             "good_symbol": cast(str, trading_cycle_data["good_symbol"]),
             "units": None,
+            "sell_waypoint_symbol": cast(
+                str, trading_cycle_data["sell_waypoint_symbol"]
+            ),
         }
         self.merchant.buy_cargo(**params)
 
@@ -107,6 +119,10 @@ class SimpleTrader(Common):
         }
         self.merchant.sell_cargo(**params)
 
+    def release_trade(self, **_):
+        # queued after the sell, which runs whether or not the buy and sell succeeded
+        TradeAssigner().release(call_sign=self.ship.symbol)
+
     def run_loop(self):
         self.running_loop = True
         iteration = 1
@@ -147,6 +163,7 @@ class SimpleTrader(Common):
                         self.translate_trading_cycle_to_sell,
                         {},
                     ),
+                    (self.release_trade, {}),
                     (self.log_audit_performance, {}),
                     (
                         self.persist_audit_performance,
@@ -159,12 +176,13 @@ class SimpleTrader(Common):
 
                 while self.action_queue.len():
                     # wait for internal queue to be empty before trying again
-                    sleep(DEFAULT_INTERNAL_LOOP_INTERVAL)
+                    clock.sleep(DEFAULT_INTERNAL_LOOP_INTERVAL)
             except KeyboardInterrupt:
                 os._exit(1)
             except Exception as e:
                 # just log the exception and loop, avoid the crash
                 logger.exception(e)
+                self.context.cancel_requests()
             if not self.repeat:
                 break
             iteration += 1
@@ -1,10 +1,9 @@
-from datetime import UTC, datetime, timedelta
+from datetime import timedelta
 from threading import Thread
-from time import sleep
 from typing import List, Optional, cast
 
 from rich.console import Console
-from sqlmodel import Session, select
+from sqlmodel import Session, col, select
 
 from trader.client.agent import Agent
 from trader.client.client import Client
@@ -34,14 +33,13 @@ from trader.dao.ships import get_ship, get_ship_events, get_ships, save_client_s
 from trader.dao.shipyards import save_client_shipyard
 from trader.dao.waypoints import save_client_waypoints
 from trader.exceptions import TraderClientException
-from trader.fleet.fleet import Fleet
-from trader.logic.simple_explorer import SimpleExplorer
-from trader.logic.simple_miner import SimpleMiner
-from trader.logic.simple_trader import SimpleTrader
 from trader.print.models import AgentHistoryRow, FleetSummaryRow
 from trader.print.print import print_alert, print_as_table
+from trader.util import clock
 from trader.util.keys import read_api_key_from_disk, write_api_key_to_disk
 
+# NOTE: logic loops and the fleet are imported where they are run, as they pull in the
+# analytics stack (pandas, scikit-learn, scipy, networkx) that simple commands don't need
 DEFAULT_TIMEOUT_TO_RUN_MAIN_TRADER_LOOP = 300
 
 
@@ -71,7 +69,7 @@ class Trader:
 
     def run_loop(self):
         while True:
-            sleep(DEFAULT_TIMEOUT_TO_RUN_MAIN_TRADER_LOOP)
+            clock.sleep(DEFAULT_TIMEOUT_TO_RUN_MAIN_TRADER_LOOP)
             self.agent(silent=True)
             self.ships(silent=True)
 
@@ -118,7 +116,7 @@ class Trader:
 
         agent_histories = get_agent_histories_by_date_cutoff(
             engine=self.dao.engine,
-            cutoff=datetime.now(UTC)
+            cutoff=clock.now()
             - timedelta(seconds=DEFAULT_TIMEOUT_TO_RUN_MAIN_TRADER_LOOP),
         )
         if not agent_histories:
@@ -313,33 +311,51 @@ class Trader:
     def miner_loop(self, call_sign: str, repeat: bool) -> None:
         if not self.api_key:
             raise TraderClientException("No API key present to proceed")
+        from trader.logic.simple_miner import SimpleMiner
+
         miner = SimpleMiner(api_key=self.api_key, call_sign=call_sign, repeat=repeat)
         miner.run_loop()
 
     def trader_loop(self, call_sign: str, repeat: bool) -> None:
         if not self.api_key:
             raise TraderClientException("No API key present to proceed")
+        from trader.logic.simple_trader import SimpleTrader
+
         trader = SimpleTrader(api_key=self.api_key, call_sign=call_sign, repeat=repeat)
         trader.run_loop()
 
     def explorer_loop(self, call_sign: str, repeat: bool) -> None:
         if not self.api_key:
             raise TraderClientException("No API key present to proceed")
+        from trader.logic.simple_explorer import SimpleExplorer
+
         explorer = SimpleExplorer(
             api_key=self.api_key, call_sign=call_sign, repeat=repeat
         )
         explorer.run_loop()
 
-    def fleet_loop(self) -> None:
+    def fleet_loop(self, processes: int = 1, api_keys: List[str] = []) -> None:
+        """
+        Runs the fleet of this agent, along with those of any other agents in api_keys
+        """
         if not self.api_key:
             raise TraderClientException("No API key present to proceed")
-        self.ships(silent=True)
-        ships: List[ShipDAO] = []
-        with Session(self.dao.engine) as session:
-            ships = session.exec(select(ShipDAO)).all()
-
-        fleet = Fleet(api_key=self.api_key, ships=ships)
-        fleet.run_loop()
+        from trader.fleet.fleet import Fleet, run_fleets
+        from trader.fleet.state import FleetState
+
+        fleets: List[Fleet] = []
+        for api_key in dict.fromkeys([self.api_key, *api_keys]):
+            fleet_state = FleetState(api_key=api_key)
+            fleet_state.ensure_fresh()
+            with Session(self.dao.engine) as session:
+                # the database is shared, so only ships this agent owns are its fleet
+                ships = session.exec(
+                    select(ShipDAO).where(
+                        col(ShipDAO.call_sign).in_(fleet_state.ships.keys())
+                    )
+                ).all()
+            fleets.append(Fleet(api_key=api_key, ships=list(ships)))
+        run_fleets(fleets=fleets, processes=processes)
 
     def fleet_summary(self, call_sign: Optional[str] = None, limit: int = 1) -> None:
         self.ships(silent=True)
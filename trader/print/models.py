@@ -25,3 +25,20 @@ class AgentHistoryRow(JSONWizard):
     in_system_count: int
     credits: int
     record_date: datetime
+
+
+@dataclass
+class TrafficSummaryRow(JSONWizard):
+    endpoint: str
+    requests: int
+    errors: int
+    mean_elapsed: float
+    total_elapsed: float
+
+
+@dataclass
+class MetricRow(JSONWizard):
+    name: str
+    metric_type: str
+    labels: str
+    value: str
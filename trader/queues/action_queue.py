@@ -1,11 +1,12 @@
 from threading import Thread
-from time import sleep
 from typing import Callable, Dict, Optional, Tuple
 
 from loguru import logger
 
 from trader.client.ship import Ship
 from trader.queues.base_queue import Queue
+from trader.util import clock
+from trader.util.metrics import MetricsRegistry
 
 MAXIMUM_RETRIES_PER_ACTION = 3
 DEFAULT_QUEUE_POLLING_INTERVAL = 0.25
@@ -14,6 +15,16 @@ ActionQueueParameters = Dict[str, int | float | str | None]
 ActionCallable = Callable[..., ActionQueueParameters | None]
 ActionQueueElement = Tuple[ActionCallable, ActionQueueParameters]
 
+metrics = MetricsRegistry()
+action_duration = metrics.histogram(
+    "trader_action_duration_seconds",
+    "Time taken by queued ship actions, retries included",
+    labels=["action"],
+)
+action_failures = metrics.counter(
+    "trader_action_failures", "Queued ship actions that failed", labels=["action"]
+)
+
 
 class ActionQueue:
     """
@@ -62,17 +73,21 @@ class ActionQueue:
         self.queue.append(function=func, data=data)
 
     def execute(self, action: ActionCallable, data: ActionQueueParameters):
-        attempt = 0
-        while True:
-            try:
-                return action(**{**self.outputs, **data})
-            except:
-                if attempt < MAXIMUM_RETRIES_PER_ACTION:
-                    attempt += 1
-                    sleep(3)
-                    continue
-                # TODO: When more stable, should probably purge the queue and start over
-                raise
+        name = getattr(action, "__name__", type(action).__name__)
+        with action_duration.time(action=name):
+            attempt = 0
+            while True:
+                try:
+                    return action(**{**self.outputs, **data})
+                except:
+                    if attempt < MAXIMUM_RETRIES_PER_ACTION:
+                        attempt += 1
+                        clock.sleep(3)
+                        continue
+                    # only counted once retries are exhausted, not for every attempt
+                    action_failures.inc(action=name)
+                    # TODO: When more stable, should probably purge the queue and start over
+                    raise
 
     def len(self):
         return self.queue.len()
@@ -87,4 +102,4 @@ class ActionQueue:
                     self.dequeue()
             except Exception as e:
                 logger.exception(e)
-            sleep(DEFAULT_QUEUE_POLLING_INTERVAL)
+            clock.sleep(DEFAULT_QUEUE_POLLING_INTERVAL)
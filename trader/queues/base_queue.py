@@ -1,13 +1,16 @@
-from typing import Any, Callable, Dict, Tuple, cast
+from typing import Any, Callable, Dict, List, Tuple, cast
 
 import dill as pickle
 from loguru import logger
-from sqlalchemy import delete
+from sqlalchemy import delete, insert, update
 from sqlmodel import Session, col, func, select
 
 from trader.dao.dao import DAO
 from trader.dao.queues import Queue as QueueDAO
 from trader.dao.queues import QueueEntry
+from trader.exceptions import TraderQueueException
+
+QueueElement = Tuple[Callable | None, Any]
 
 
 class Queue:
@@ -16,6 +19,10 @@ class Queue:
     This is useful because if the application is stopped and restarted, the
     queue mechanics will work again as they were initially intended.
 
+    Ordering is handed out from a monotonic sequence stored on the queue record,
+    so appends never need to count existing entries, and pops are a single
+    `DELETE ... RETURNING` against the `(queue_id, order)` index.
+
     WARNING: In most cases, we will just want to purge these queues on init, but on
     known start and stop. This is because the application is still very unstable
     and parameters are very likely to change.
@@ -41,11 +48,28 @@ class Queue:
                 session.add(QueueDAO(id=self.queue_id, name=self.queue_name))
                 session.commit()
 
+    def _reserve_orders(self, session: Session, count: int) -> int:
+        """
+        Atomically advances the queue's sequence by count and returns the first
+        order reserved. This runs inside the caller's transaction so the reservation
+        and the insert of the entries land together.
+        """
+        expression = (
+            update(QueueDAO)
+            .where(col(QueueDAO.id) == self.queue_id)
+            .values(sequence=col(QueueDAO.sequence) + count)
+            .returning(col(QueueDAO.sequence))
+        )
+        last_order = session.exec(expression).scalar_one_or_none()  # type: ignore
+        if last_order is None:
+            raise TraderQueueException(f"Queue {self.queue_id} does not exist")
+        return cast(int, last_order) - count + 1
+
     def len(self) -> int:
         count = 0
         with Session(self.dao.engine) as session:
             count_data = session.exec(
-                select([func.count(QueueEntry.id)]).where(
+                select(func.count(col(QueueEntry.id))).where(
                     QueueEntry.queue_id == self.queue_id
                 )
             ).one_or_none()
@@ -62,27 +86,41 @@ class Queue:
             session.delete(queue)
             session.commit()
 
-    def pop(self) -> Tuple[Callable | None, Any]:
-        # get all records ordered by size
-        # pop by removing from queue and ideally removing values and then reordering the rest
+    def pop(self) -> QueueElement:
+        elements = self.pop_many(count=1)
+        if not elements:
+            raise TraderQueueException(f"Queue {self.queue_id} is empty")
+        return elements[0]
+
+    def pop_many(self, count: int) -> List[QueueElement]:
+        """
+        Pops up to count entries from the front of the queue in one statement,
+        returned in queue order.
+        """
         with Session(self.dao.engine) as session:
-            expression = (
-                select(QueueEntry)
+            head = (
+                select(QueueEntry.id)
                 .where(QueueEntry.queue_id == self.queue_id)
                 .order_by(col(QueueEntry.order).asc())
+                .limit(count)
             )
-            queue_entry = session.exec(expression.limit(1)).one()
-            functional_return = None
-            if queue_entry.id:
-                functional_return = self.functions.get(queue_entry.id)
-                del self.functions[queue_entry.id]
-            logger.debug(
-                f"Deleting key from queue entry id: {queue_entry.id} on queue: {self.queue_id}"
+            expression = (
+                delete(QueueEntry)
+                .where(col(QueueEntry.id).in_(head.scalar_subquery()))
+                .returning(
+                    col(QueueEntry.id), col(QueueEntry.order), col(QueueEntry.data)
+                )
             )
-            data = pickle.loads(queue_entry.data)
-            session.delete(queue_entry)
+            rows = session.exec(expression).all()  # type: ignore
             session.commit()
-            return functional_return, data
+
+        elements: List[QueueElement] = []
+        for entry_id, _, data in sorted(rows, key=lambda row: row[1]):
+            logger.debug(
+                f"Deleting key from queue entry id: {entry_id} on queue: {self.queue_id}"
+            )
+            elements.append((self.functions.pop(entry_id, None), pickle.loads(data)))
+        return elements
 
     def purge(self) -> None:
         """
@@ -90,23 +128,48 @@ class Queue:
         """
 
         with Session(self.dao.engine) as session:
-            expression = delete(QueueEntry).where(QueueEntry.queue_id == self.queue_id)
+            expression = delete(QueueEntry).where(
+                col(QueueEntry.queue_id) == self.queue_id
+            )
             session.exec(expression)  # type: ignore
             session.commit()
+        self.functions = {}
 
     def append(self, function: Callable, data: Any):
-        # when appending or updating, will need to acquire locks because of the lack of guards
-        # on locking concurrent records
+        self.append_many(elements=[(function, data)])
+
+    def append_many(self, elements: List[Tuple[Callable, Any]]):
+        """
+        Appends all elements in order within a single transaction.
+        """
+        if not elements:
+            return
+
         with Session(self.dao.engine) as session:
-            queue_entry = QueueEntry(
-                queue_id=self.queue_id,
-                order=self.len() + 1,
-                data=pickle.dumps(data),
+            first_order = self._reserve_orders(session=session, count=len(elements))
+            expression = insert(QueueEntry).returning(
+                col(QueueEntry.id), sort_by_parameter_order=True
+            )
+            entry_ids = (
+                session.exec(  # type: ignore
+                    expression,
+                    params=[
+                        {
+                            "queue_id": self.queue_id,
+                            "order": first_order + idx,
+                            "data": pickle.dumps(data),
+                        }
+                        for idx, (_, data) in enumerate(elements)
+                    ],
+                )
+                .scalars()
+                .all()
             )
-            session.add(queue_entry)
             session.commit()
-            if queue_entry.id:
-                self.functions[queue_entry.id] = function
+
+        for entry_id, (function, _) in zip(entry_ids, elements):
+            if entry_id:
+                self.functions[entry_id] = function
             logger.debug(
-                f"Appending key from queue: {queue_entry.id} on queue: {self.queue_id}"
+                f"Appending key from queue: {entry_id} on queue: {self.queue_id}"
             )
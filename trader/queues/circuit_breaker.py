@@ -0,0 +1,72 @@
+from threading import Lock
+from time import monotonic
+from typing import Literal, Optional
+
+# consecutive failed calls (network errors or 5xx) before the breaker opens
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+MAXIMUM_RESET_TIMEOUT = 60.0 * 10
+
+CircuitState = Literal["CLOSED", "OPEN", "HALF_OPEN"]
+
+
+class CircuitBreaker:
+    """
+    Tracks the health of the API as seen by the request queue. After enough consecutive
+    failures the breaker opens and calls are held rather than sent. Once the reset
+    timeout passes a single probe call is let through (half open), closing the breaker
+    if it succeeds or opening it again for twice as long if it fails.
+    """
+
+    failures: int
+    failure_threshold: int
+    lock: Lock
+    opened_at: float
+    reset_timeout: float
+    base_reset_timeout: float
+    state: CircuitState
+    # metrics
+    times_opened: int = 0
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+    ):
+        self.failures = 0
+        self.failure_threshold = failure_threshold
+        self.lock = Lock()
+        self.opened_at = 0
+        self.reset_timeout = reset_timeout
+        self.base_reset_timeout = reset_timeout
+        self.state = "CLOSED"
+
+    def allow_request(self, now: Optional[float] = None) -> bool:
+        now = monotonic() if now is None else now
+        with self.lock:
+            if self.state == "OPEN" and now >= self.opened_at + self.reset_timeout:
+                self.state = "HALF_OPEN"
+            # requests are dispatched one at a time, so the first call made while half
+            # open is the probe and its outcome is recorded before any other is let out
+            return self.state != "OPEN"
+
+    def is_open(self) -> bool:
+        return self.state != "CLOSED"
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.state = "CLOSED"
+            self.reset_timeout = self.base_reset_timeout
+
+    def record_failure(self, now: Optional[float] = None):
+        now = monotonic() if now is None else now
+        with self.lock:
+            self.failures += 1
+            if self.state == "HALF_OPEN":
+                self.reset_timeout = min(MAXIMUM_RESET_TIMEOUT, self.reset_timeout * 2)
+            elif self.failures < self.failure_threshold:
+                return
+            self.state = "OPEN"
+            self.opened_at = now
+            self.times_opened += 1
@@ -0,0 +1,146 @@
+from dataclasses import dataclass, field
+from multiprocessing.queues import Queue as ProcessQueue
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+import httpx
+from loguru import logger
+
+from trader.client.request import CancellationToken, ClientRequest
+from trader.exceptions import TraderQueueException, TraderRequestCancelledException
+from trader.queues.request_queue import RequestQueue
+
+# requests cross process boundaries as plain data, the coordinator maps methods back to httpx
+REQUEST_FUNCTIONS = {"get": httpx.get, "post": httpx.post, "patch": httpx.patch}
+
+RemoteRequest = Tuple[
+    int, str, int, str, Dict[str, Any], Optional[float], Optional[str]
+]
+SerializedResponse = Tuple[int, List[Tuple[str, str]], bytes, str, str]
+RemoteResponse = Tuple[str, Optional[SerializedResponse], Optional[str]]
+
+
+def serialize_response(response: httpx.Response) -> SerializedResponse:
+    return (
+        response.status_code,
+        list(response.headers.multi_items()),
+        response.content,
+        response.request.method,
+        str(response.request.url),
+    )
+
+
+def deserialize_response(serialized_response: SerializedResponse) -> httpx.Response:
+    status_code, headers, content, method, url = serialized_response
+    return httpx.Response(
+        status_code,
+        headers=headers,
+        content=content,
+        request=httpx.Request(method=method, url=url),
+    )
+
+
+@dataclass
+class PendingRequest:
+    event: Event = field(default_factory=Event)
+    response: Optional[httpx.Response] = None
+    error: Optional[str] = None
+    cancellation: Optional[CancellationToken] = None
+
+
+class RemoteRequestQueue(RequestQueue):
+    """
+    Stands in for the RequestQueue inside fleet worker processes. Requests are sent to
+    the coordinating process, which owns the only real RequestQueue and so the only
+    rate limiter for the API key, and responses are routed back by request id.
+
+    Call install in a worker before any client is created so every RequestQueue
+    constructed in that process for the API key resolves to this one. The base queue is
+    initialized without its dispatcher, as nothing is dispatched from a worker.
+
+    Deadlines are sent along with requests (monotonic time is shared across processes)
+    but cancellation tokens are not, cancelling only stops the worker waiting.
+    """
+
+    lock: Lock
+    pending: Dict[str, PendingRequest]
+    outgoing_requests: ProcessQueue
+    incoming_responses: ProcessQueue
+    worker_id: int
+
+    def __init__(
+        self,
+        worker_id: int,
+        outgoing_requests: ProcessQueue,
+        incoming_responses: ProcessQueue,
+        api_key: Optional[str] = None,
+    ):
+        super().__init__(
+            client_id=f"fleet-worker-{worker_id}",
+            disable_background_processes=True,
+            api_key=api_key,
+        )
+        self.lock = Lock()
+        self.pending = {}
+        self.outgoing_requests = outgoing_requests
+        self.incoming_responses = incoming_responses
+        self.worker_id = worker_id
+        thread = Thread(target=self.receive_responses)
+        thread.daemon = True
+        thread.start()
+
+    def install(self, api_key: Optional[str]):
+        RequestQueue.register_instance(self, api_key=api_key)
+
+    def enqueue(self, priority: int, request: ClientRequest) -> str:
+        request_id = str(uuid4())
+        with self.lock:
+            self.pending[request_id] = PendingRequest(cancellation=request.cancellation)
+        self.outgoing_requests.put(
+            (
+                self.worker_id,
+                request_id,
+                priority,
+                request.function.__name__,
+                request.arguments,
+                request.deadline,
+                request.flow,
+            )
+        )
+        return request_id
+
+    def receive_responses(self):
+        while True:
+            try:
+                request_id, serialized_response, error = self.incoming_responses.get()
+            except (EOFError, OSError):
+                # the queue was closed on shutdown
+                return
+            with self.lock:
+                pending = self.pending.get(request_id)
+            if not pending:
+                logger.warning(f"Received response for unknown request {request_id}")
+                continue
+            if serialized_response:
+                pending.response = deserialize_response(serialized_response)
+            pending.error = error
+            pending.event.set()
+
+    def wait_for_response(self, request_id: str) -> httpx.Response:
+        with self.lock:
+            pending = self.pending[request_id]
+        while not pending.event.wait(timeout=0.5):
+            if pending.cancellation and pending.cancellation.cancelled:
+                with self.lock:
+                    del self.pending[request_id]
+                raise TraderRequestCancelledException(
+                    f"Request {request_id} cancelled while waiting on the coordinator"
+                )
+        with self.lock:
+            del self.pending[request_id]
+        if pending.error or not pending.response:
+            raise TraderQueueException(
+                pending.error or f"Empty response for request {request_id}"
+            )
+        return pending.response
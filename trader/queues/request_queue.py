@@ -1,41 +1,222 @@
-from threading import Thread
-from time import sleep
-from typing import Any, Callable, Dict, Optional, Tuple
+import random
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from itertools import count
+from threading import Condition, Lock, RLock, Thread
+from time import monotonic, sleep
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
 from uuid import uuid4
 
 import httpx
 from loguru import logger
 
-from trader.client.request import ClientRequest
+from trader.client.request import CancellationToken, ClientRequest
+from trader.client.traffic import get_transport
+from trader.exceptions import (
+    TraderCircuitOpenException,
+    TraderRequestAbandonedException,
+    TraderRequestCancelledException,
+)
 from trader.queues.base_queue import Queue
-from trader.util.singleton import Singleton
+from trader.queues.circuit_breaker import CircuitBreaker
+from trader.util.metrics import MetricsRegistry
+from trader.util.singleton import KeyedSingleton
 
 MAXIMUM_REQUESTS_PER_SECOND = 1.5
+# reserved for background work (ex: cache revalidation) that should never displace other calls
+MINIMUM_PRIORITY = -1
 MAXIMUM_RETRIES_PER_REQUEST = 10
+RETRY_BASE_DELAY = 1.0
+RETRY_MAXIMUM_DELAY = 60.0 * 5
 REQUESTS_QUEUE_DATA_PREFIX = "requests"
+# requests not made on behalf of a particular ship share one flow
+DEFAULT_FLOW = "shared"
+# a priority class is bumped up one level for every this many seconds its oldest
+# request has waited, so lower priority work is delayed but never starved
+PRIORITY_AGING_SECONDS = 30.0
+# failures worth another attempt, the request never reached the API or never came back
+RETRYABLE_ERRORS = (
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    httpx.RemoteProtocolError,
+)
+# calls safe to repeat after a server error, as the first attempt may have been applied
+IDEMPOTENT_FUNCTIONS = {httpx.get}
+POOLED_FUNCTIONS = {httpx.get, httpx.post, httpx.patch}
+# server errors where the request is known not to have been applied
+UNAVAILABLE_STATUS_CODES = {502, 503, 504}
+# waiting callers wake as soon as they're answered, this only bounds how late they
+# notice a cancellation or deadline
+RESPONSE_WAIT_INTERVAL = 0.5
 
+QueuedResponse = httpx.Response | Exception
 
-class RequestQueue(metaclass=Singleton):
+metrics = MetricsRegistry()
+queue_depth = metrics.gauge(
+    "trader_request_queue_depth", "Requests waiting to be sent", labels=["priority"]
+)
+queue_wait = metrics.histogram(
+    "trader_request_queue_wait_seconds",
+    "Time requests waited in the queue before being sent",
+    labels=["priority"],
+)
+request_latency = metrics.histogram(
+    "trader_request_latency_seconds",
+    "Time from enqueuing a request to its response, retries included",
+    labels=["priority"],
+)
+requests_retried = metrics.counter(
+    "trader_request_retries", "Attempts at requests set aside to retry"
+)
+requests_rate_limited = metrics.counter(
+    "trader_request_rate_limited", "Responses the API rate limited"
+)
+requests_dropped = metrics.counter(
+    "trader_request_dropped",
+    "Requests dropped before being sent, as cancelled or past their deadline",
+    labels=["reason"],
+)
+
+
+@dataclass
+class RequestFlow:
+    """
+    Requests queued by one ship (or the shared flow) at one priority
+    """
+
+    queue: Queue
+    enqueued_at: Deque[float] = field(default_factory=deque)
+    # dispatches this flow is owed in the current round, see select_flow
+    deficit: float = 0
+
+
+@dataclass
+class DelayedRequest:
+    not_before: float
+    sequence: int
+    priority: int
+    flow: str
+    request_id: str
+    request_function: Callable
+    request_arguments: Dict[str, Any]
+
+
+def get_retry_delay(attempt: int) -> float:
+    """
+    Exponential backoff with jitter, so requests that failed together don't all
+    retry together
+    """
+    delay = min(RETRY_MAXIMUM_DELAY, RETRY_BASE_DELAY * (2 ** (attempt - 1)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def get_retry_after(response: httpx.Response) -> Optional[float]:
+    """
+    Seconds to wait as requested by the API, from a retry-after header holding either
+    seconds or an HTTP date
+    """
+    retry_after = response.headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(UTC)).total_seconds())
+
+
+class RequestQueue(metaclass=KeyedSingleton):
     """
     This class is a queue object with a priority queue. Its purpose is to
     organize requests into a priority (1-5), where the higher the number, the
     higher it is in priority. Items are popped off (LIFO) the queue based on
     priority.
 
-    This is a singleton because there should only be one of these present per client
-    after which there will be throttling per API key. WARNING: if this becomes a distributed
+    This is a singleton per API key because the API throttles per key, so agents run
+    side by side each get their own queue and rate limit. WARNING: if this becomes a distributed
     application, you will want to move some of this logic into the data layer (namely around throttling)
 
     Doing things like system scans are much lower priority vs. operations that
     actively generate revenue (ex: harvesting/trading/navigation).
+
+    Within a priority, requests are queued per ship (flow) and served by deficit round
+    robin, so one chatty ship can't monopolize its priority level. Flows get an equal
+    share by default, or in proportion to weights set with set_flow_weight. Between
+    priorities a class is aged up the longer its oldest request waits, so explorers are
+    slowed rather than starved by busy traders.
+
+    Failed calls are never retried inline, which would stall every other request
+    behind them. They are set aside with a not before time (jittered backoff, or the
+    API's retry-after on a 429) and dispatched again once due, ahead of anything of
+    lower priority. A 429 also holds every other call until the API is ready, and a
+    circuit breaker stops calls to an API that keeps failing. While it is open,
+    background calls are failed fast and everything else waits for the probe call.
+
+    Requests may carry a deadline and/or a cancellation token. Those cancelled or past
+    their deadline by the time they come up are dropped without being sent, so work a
+    caller has moved on from doesn't eat into the rate limit.
     """
 
-    requests: Dict[int, Queue] = {}
-    responses: Dict[str, httpx.Response] = {}
+    requests: Dict[int, OrderedDict[str, RequestFlow]]
+    requests_lock: RLock
+    weights: Dict[str, float]
+    responses: Dict[str, QueuedResponse]
+    responses_condition: Condition
     request_queue_instance: str
+    attempts: Dict[str, int]
+    circuit_breaker: CircuitBreaker
+    delayed: List[DelayedRequest]
+    delayed_lock: Lock
+    delayed_sequence: Iterator[int]
+    http_client: httpx.Client
+    # nothing is dispatched before this (monotonic) time, set when rate limited
+    not_before: float
+    abandoned: Set[str]
+    cancellations: Dict[str, Tuple[Optional[float], Optional[CancellationToken]]]
+    # priority and monotonic time of every request until it is answered
+    enqueued: Dict[str, Tuple[int, float]]
+    # requests sent at least once (including those set aside to retry) until answered
+    in_flight: Set[str]
+    # metrics
+    retries: int = 0
+    rate_limited: int = 0
+    dropped_cancelled: int = 0
+    dropped_expired: int = 0
+    dispatched_by_flow: Dict[str, int]
+    waited_by_flow: Dict[str, float]
 
-    def __init__(self, client_id: str, disable_background_processes: bool = False):
+    def __init__(
+        self,
+        client_id: str,
+        disable_background_processes: bool = False,
+        api_key: Optional[str] = None,
+    ):
         self.request_queue_instance = client_id
+        self.requests = {}
+        self.requests_lock = RLock()
+        self.weights = {}
+        self.dispatched_by_flow = defaultdict(int)
+        self.waited_by_flow = defaultdict(float)
+        self.responses = {}
+        self.responses_condition = Condition()
+        self.attempts = {}
+        self.circuit_breaker = CircuitBreaker()
+        self.delayed = []
+        self.delayed_lock = Lock()
+        self.delayed_sequence = count()
+        # recording or replaying traffic when asked to (see trader.client.traffic)
+        self.http_client = httpx.Client(transport=get_transport())
+        self.not_before = 0
+        self.abandoned = set()
+        self.cancellations = {}
+        self.enqueued = {}
+        self.in_flight = set()
         if not disable_background_processes:
             thread = Thread(target=self.run_loop)
             thread.daemon = True
@@ -49,39 +230,347 @@ class RequestQueue(metaclass=Singleton):
         params = request_arguments.get("params")
         return f"{name} {url} {params}"
 
-    def get_highest_priority_queue(
+    def set_flow_weight(self, flow: str, weight: float):
+        # a flow never earning any share of dispatch would never be served
+        if weight <= 0:
+            raise ValueError(f"Flow weight must be positive, got {weight}")
+        self.weights[flow] = weight
+
+    def get_flow_shares(self) -> Dict[str, float]:
+        """
+        Fraction of dispatched requests made for each flow
+        """
+        total = sum(self.dispatched_by_flow.values())
+        return {
+            flow: dispatched / total
+            for flow, dispatched in self.dispatched_by_flow.items()
+            if total
+        }
+
+    def select_flow(self) -> Optional[Tuple[int, str, RequestFlow]]:
+        """
+        The flow to serve next. The priority class is the highest once aged by how
+        long its oldest request has waited (background work never ages). Within it,
+        flows take turns by deficit round robin: a flow at the front is owed its
+        weight in dispatches each turn and goes to the back once it has used them up.
+        """
+        now = monotonic()
+        selected: Optional[Tuple[Tuple[int, int], int]] = None
+        for priority, flows in self.requests.items():
+            effective_priority = priority
+            if priority > MINIMUM_PRIORITY:
+                oldest = min(flow.enqueued_at[0] for flow in flows.values())
+                effective_priority += int((now - oldest) // PRIORITY_AGING_SECONDS)
+            # ties go to the class that is more important to begin with
+            rank = (effective_priority, priority)
+            if selected is None or rank > selected[0]:
+                selected = (rank, priority)
+        if selected is None:
+            return None
+
+        priority = selected[1]
+        flows = self.requests[priority]
+        while True:
+            flow_name, flow = next(iter(flows.items()))
+            if flow.deficit < 1:
+                flow.deficit += self.weights.get(flow_name, 1)
+            if flow.deficit >= 1:
+                return priority, flow_name, flow
+            flows.move_to_end(flow_name)
+
+    def pop_due_retry(
+        self, minimum_priority: Optional[int]
+    ) -> Optional[DelayedRequest]:
+        """
+        The earliest due retry, provided it is at least as important as what is queued
+        """
+        now = monotonic()
+        with self.delayed_lock:
+            due = [
+                delayed_request
+                for delayed_request in self.delayed
+                if delayed_request.not_before <= now
+            ]
+            if not due:
+                return None
+            delayed_request = max(
+                due, key=lambda request: (request.priority, -request.sequence)
+            )
+            if (
+                minimum_priority is not None
+                and delayed_request.priority < minimum_priority
+            ):
+                return None
+            self.delayed.remove(delayed_request)
+            return delayed_request
+
+    def fail_background_requests(self):
+        """
+        Background calls are only ever refreshing something already served from cache,
+        so while the API is failing they are dropped rather than piled up
+        """
+        with self.requests_lock:
+            flows = self.requests.pop(MINIMUM_PRIORITY, {})
+        for flow in flows.values():
+            elements = flow.queue.pop_many(count=len(flow.enqueued_at))
+            flow.queue.delete()
+            queue_depth.dec(len(elements), priority=str(MINIMUM_PRIORITY))
+            for _, (request_id, _) in elements:
+                self.respond(
+                    request_id=request_id,
+                    response=TraderCircuitOpenException(
+                        "API is failing, background request dropped"
+                    ),
+                )
+        with self.delayed_lock:
+            background_requests = [
+                delayed_request
+                for delayed_request in self.delayed
+                if delayed_request.priority <= MINIMUM_PRIORITY
+            ]
+            self.delayed = [
+                delayed_request
+                for delayed_request in self.delayed
+                if delayed_request.priority > MINIMUM_PRIORITY
+            ]
+        for delayed_request in background_requests:
+            self.respond(
+                request_id=delayed_request.request_id,
+                response=TraderCircuitOpenException(
+                    "API is failing, background request dropped"
+                ),
+            )
+
+    def pop_next_request(
         self,
-    ) -> Optional[Tuple[int, Queue]]:
-        if not self.requests.keys():
+    ) -> Optional[Tuple[int, str, str, Optional[Callable], Dict[str, Any], float]]:
+        with self.requests_lock:
+            selected = self.select_flow()
+            delayed_request = self.pop_due_retry(
+                minimum_priority=selected[0] if selected else None
+            )
+            if delayed_request:
+                return (
+                    delayed_request.priority,
+                    delayed_request.flow,
+                    delayed_request.request_id,
+                    delayed_request.request_function,
+                    delayed_request.request_arguments,
+                    delayed_request.not_before,
+                )
+            if not selected:
+                return None
+
+            (priority, flow_name, flow) = selected
+            (request_function, (request_id, request_arguments)) = flow.queue.pop()
+            enqueued_at = flow.enqueued_at.popleft()
+            flow.deficit -= 1
+            queue_depth.dec(priority=str(priority))
+            queue_wait.observe(
+                max(0.0, monotonic() - enqueued_at), priority=str(priority)
+            )
+            flows = self.requests[priority]
+            if not flow.enqueued_at:
+                flow.queue.delete()
+                del flows[flow_name]
+                if not flows:
+                    del self.requests[priority]
+            elif flow.deficit < 1:
+                flows.move_to_end(flow_name)
+            return (
+                priority,
+                flow_name,
+                request_id,
+                request_function,
+                request_arguments,
+                enqueued_at,
+            )
+
+    def get_drop_reason(self, request_id: str) -> Optional[str]:
+        cancellation = self.cancellations.get(request_id)
+        if not cancellation:
             return None
+        deadline, token = cancellation
+        if token and token.cancelled:
+            return "cancelled"
+        if deadline is not None and monotonic() > deadline:
+            return "expired"
+        return None
 
-        priority = sorted(self.requests.keys()).pop()
-        return priority, self.requests[priority]
+    def drop(self, request_id: str, reason: str):
+        if reason == "cancelled":
+            self.dropped_cancelled += 1
+        else:
+            self.dropped_expired += 1
+        requests_dropped.inc(reason=reason)
+        # a retry is dropped the same way, though its earlier attempts were sent
+        sent = "retried" if request_id in self.in_flight else "sent"
+        self.respond(
+            request_id=request_id,
+            response=TraderRequestCancelledException(
+                f"Request {request_id} {reason} before it was {sent}"
+            ),
+        )
 
     def dequeue(self):
-        priority_queue = self.get_highest_priority_queue()
+        if monotonic() < self.not_before:
+            return
+        if not self.circuit_breaker.allow_request():
+            self.fail_background_requests()
+            return
 
-        if priority_queue:
-            (priority, queue) = priority_queue
-            (request_function, (request_id, request_arguments)) = queue.pop()
-            if queue.len() == 0:
-                queue.delete()
-                del self.requests[priority]
+        # requests nobody wants anymore are dropped without using up the dispatch
+        while next_request := self.pop_next_request():
+            (
+                priority,
+                flow,
+                request_id,
+                request_function,
+                request_arguments,
+                enqueued_at,
+            ) = next_request
+            # checked with the responses held so a caller giving up at the same time
+            # either sees the request in flight or has it dropped here
+            with self.responses_condition:
+                drop_reason = self.get_drop_reason(request_id)
+                if not drop_reason and request_function:
+                    self.in_flight.add(request_id)
+            if drop_reason:
+                logger.debug(
+                    f"Dropping (priority - {priority}) {drop_reason} request {request_id}"
+                )
+                self.drop(request_id=request_id, reason=drop_reason)
+                continue
 
             if request_function:
                 logger.debug(
-                    f"Dequeuing (priority - {priority}) "
+                    f"Dequeuing (priority - {priority}, flow - {flow}) "
                     f"- {self.get_request_debug_info(request_function=request_function, request_arguments=request_arguments)}"
                 )
-                response = self.execute(
+                self.dispatched_by_flow[flow] += 1
+                self.waited_by_flow[flow] += max(0.0, monotonic() - enqueued_at)
+                self.dispatch(
+                    priority=priority,
+                    flow=flow,
+                    request_id=request_id,
                     request_function=request_function,
                     request_arguments=request_arguments,
                 )
-                self.responses[request_id] = response
             else:
                 logger.warning(
                     f"Dequeuing (priority - {priority}) with {request_id} had no actionable queued function!"
                 )
+            return
+
+    def dispatch(
+        self,
+        priority: int,
+        flow: str,
+        request_id: str,
+        request_function: Callable,
+        request_arguments: Dict[str, Any],
+    ):
+        """
+        Makes a single attempt at a request, either responding to it or setting it
+        aside to retry
+        """
+        retry = {
+            "priority": priority,
+            "flow": flow,
+            "request_id": request_id,
+            "request_function": request_function,
+            "request_arguments": request_arguments,
+        }
+        try:
+            response = self.execute(
+                request_function=request_function,
+                request_arguments=request_arguments,
+            )
+        except RETRYABLE_ERRORS as e:
+            self.circuit_breaker.record_failure()
+            self.retry(**retry, failure=e)
+            return
+        except Exception as e:
+            self.respond(request_id=request_id, response=e)
+            return
+
+        if response.status_code == 429:
+            retry_after = get_retry_after(response)
+            if retry_after is not None:
+                self.not_before = max(self.not_before, monotonic() + retry_after)
+            self.rate_limited += 1
+            requests_rate_limited.inc()
+            self.retry(**retry, failure=response, delay=retry_after)
+        elif response.status_code >= 500:
+            self.circuit_breaker.record_failure()
+            if (
+                request_function in IDEMPOTENT_FUNCTIONS
+                or response.status_code in UNAVAILABLE_STATUS_CODES
+            ):
+                self.retry(**retry, failure=response)
+            else:
+                self.respond(request_id=request_id, response=response)
+        else:
+            self.circuit_breaker.record_success()
+            self.respond(request_id=request_id, response=response)
+
+    def retry(
+        self,
+        priority: int,
+        flow: str,
+        request_id: str,
+        request_function: Callable,
+        request_arguments: Dict[str, Any],
+        failure: QueuedResponse,
+        delay: Optional[float] = None,
+    ):
+        attempt = self.attempts.get(request_id, 0) + 1
+        if attempt > MAXIMUM_RETRIES_PER_REQUEST:
+            logger.error(
+                f"Giving up on request after {MAXIMUM_RETRIES_PER_REQUEST} retries "
+                f"{repr(failure)} - {self.get_request_debug_info(request_function=request_function, request_arguments=request_arguments)}"
+            )
+            self.respond(request_id=request_id, response=failure)
+            return
+
+        self.attempts[request_id] = attempt
+        self.retries += 1
+        requests_retried.inc()
+        time_to_wait = get_retry_delay(attempt) if delay is None else delay
+        logger.warning(
+            f"Error when conducting request {repr(failure)}, retrying in "
+            f"{time_to_wait:.1f} seconds. Attempt #{attempt}."
+        )
+        with self.delayed_lock:
+            self.delayed.append(
+                DelayedRequest(
+                    not_before=monotonic() + time_to_wait,
+                    sequence=next(self.delayed_sequence),
+                    priority=priority,
+                    flow=flow,
+                    request_id=request_id,
+                    request_function=request_function,
+                    request_arguments=request_arguments,
+                )
+            )
+
+    def respond(self, request_id: str, response: QueuedResponse):
+        # the request is answered all at once, so a caller giving up on it meanwhile
+        # never sees it as neither in flight nor answered
+        with self.responses_condition:
+            self.attempts.pop(request_id, None)
+            self.cancellations.pop(request_id, None)
+            enqueued = self.enqueued.pop(request_id, None)
+            self.in_flight.discard(request_id)
+            if request_id in self.abandoned:
+                # answered while in flight after the caller gave up waiting on it
+                self.abandoned.discard(request_id)
+            else:
+                self.responses[request_id] = response
+                self.responses_condition.notify_all()
+        if enqueued:
+            priority, enqueued_at = enqueued
+            request_latency.observe(monotonic() - enqueued_at, priority=str(priority))
 
     def run_loop(self):
         while True:
@@ -92,19 +581,28 @@ class RequestQueue(metaclass=Singleton):
             sleep(1 / MAXIMUM_REQUESTS_PER_SECOND)
 
     def enqueue(self, priority: int, request: ClientRequest) -> str:
-        if self.requests.get(priority) is None:
-            self.requests[priority] = Queue(
-                queue_id=f"{REQUESTS_QUEUE_DATA_PREFIX}-{priority}-{self.request_queue_instance}",
-                queue_name=f"{REQUESTS_QUEUE_DATA_PREFIX}-{priority}-{self.request_queue_instance}",
-            )
+        flow_name = request.flow or DEFAULT_FLOW
         request_id = str(uuid4())
         logger.debug(
-            f"Enqueued (priority - {priority}) - "
+            f"Enqueued (priority - {priority}, flow - {flow_name}) - "
             f"{self.get_request_debug_info(request_function=request.function, request_arguments=request.arguments)}"
         )
-        self.requests[priority].append(
-            function=request.function, data=(request_id, request.arguments)
-        )
+        if request.deadline is not None or request.cancellation:
+            self.cancellations[request_id] = (request.deadline, request.cancellation)
+        with self.requests_lock:
+            flows = self.requests.setdefault(priority, OrderedDict())
+            flow = flows.get(flow_name)
+            if flow is None:
+                queue_id = f"{REQUESTS_QUEUE_DATA_PREFIX}-{priority}-{flow_name}-{self.request_queue_instance}"
+                flow = flows[flow_name] = RequestFlow(
+                    queue=Queue(queue_id=queue_id, queue_name=queue_id)
+                )
+            flow.queue.append(
+                function=request.function, data=(request_id, request.arguments)
+            )
+            flow.enqueued_at.append(monotonic())
+            self.enqueued[request_id] = (priority, flow.enqueued_at[-1])
+            queue_depth.inc(priority=str(priority))
         return request_id
 
     def execute(
@@ -114,25 +612,37 @@ class RequestQueue(metaclass=Singleton):
             "Executing - "
             f"{self.get_request_debug_info(request_function=request_function, request_arguments=request_arguments)}"
         )
-        attempt = 0
-        while True:
-            try:
-                return request_function(**request_arguments)
-            except (httpx.ReadTimeout, httpx.ConnectError) as e:
-                if attempt < MAXIMUM_RETRIES_PER_REQUEST:
-                    attempt += 1
-                    time_to_wait = 5 * (2**attempt)
-                    sleep(time_to_wait)
-                    logger.warning(
-                        f"Error when conducting request and attempting retry "
-                        f"{repr(e)}. Sleeping for {time_to_wait} seconds "
-                        f"before retrying. Attempt #{attempt}."
-                    )
-                    continue
-                raise
+        if request_function in POOLED_FUNCTIONS:
+            # sent through this queue's own connection pool, as the module level
+            # functions build a new client (and TLS context) on every call
+            return self.http_client.request(
+                method=request_function.__name__.upper(), **request_arguments
+            )
+        return request_function(**request_arguments)
 
     def wait_for_response(self, request_id: str) -> httpx.Response:
-        while True:
-            if self.responses.get(request_id):
-                return self.responses.pop(request_id)
-            sleep(0.5)
+        """
+        Blocks until the request is answered, or gives up as soon as it is cancelled or
+        past its deadline. A request still queued is left for the dispatcher to drop
+        when it comes up. One already sent may still be applied, so giving up on it
+        raises TraderRequestAbandonedException and its response is discarded.
+        """
+        with self.responses_condition:
+            while True:
+                response = self.responses.pop(request_id, None)
+                if isinstance(response, Exception):
+                    raise response
+                if response is not None:
+                    return response
+                drop_reason = self.get_drop_reason(request_id)
+                if drop_reason:
+                    self.abandoned.add(request_id)
+                    if request_id in self.in_flight:
+                        raise TraderRequestAbandonedException(
+                            f"Request {request_id} {drop_reason} after it was sent, "
+                            "it may still be applied"
+                        )
+                    raise TraderRequestCancelledException(
+                        f"Request {request_id} {drop_reason} before it was sent"
+                    )
+                self.responses_condition.wait(timeout=RESPONSE_WAIT_INTERVAL)
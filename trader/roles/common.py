@@ -1,6 +1,5 @@
-from datetime import UTC, datetime
+from datetime import datetime
 from math import dist
-from time import sleep
 from typing import List, Optional
 
 from loguru import logger
@@ -15,22 +14,31 @@ from trader.client.waypoint import Waypoint
 from trader.dao.dao import DAO
 from trader.dao.markets import MarketExchange, save_client_market
 from trader.dao.ship_events import ShipEvent
-from trader.dao.ships import save_client_ships
 from trader.dao.shipyards import save_client_shipyard
 from trader.dao.waypoints import Waypoint as WaypointDAO
 from trader.dao.waypoints import get_waypoints_by_system_symbol, save_client_waypoints
-from trader.exceptions import TraderClientException, TraderException
+from trader.exceptions import TraderException
+from trader.roles.context import ShipContext
 from trader.roles.navigator.fuel import FUEL_COST_MULTIPLIER
+from trader.util import clock
 
 DEFAULT_ACTIONS_TIMEOUT = 5
 MINIMUM_FUEL_PERCENTAGE = 0.25
 
 
+def get_seconds_until(timestamp: str) -> int:
+    """
+    Seconds to sleep for an API timestamp (ex: an arrival) to have passed, with one
+    to spare, by the clock rather than the wall so waits follow accelerated time
+    """
+    remaining = (datetime.fromisoformat(timestamp) - clock.now()).total_seconds()
+    return max(0, int(remaining)) + 1
+
+
 class Common:
-    agent: Agent
     client: Client
+    context: ShipContext
     dao: DAO
-    ship: Ship
     # metrics
     credits_earned: int = 0
     credits_spent: int = 0
@@ -38,27 +46,32 @@ class Common:
     # other
     base_priority: int = 0
 
-    def __init__(self, api_key: str, base_priority: int, call_sign: str):
+    def __init__(
+        self,
+        api_key: str,
+        base_priority: int,
+        call_sign: str,
+        context: Optional[ShipContext] = None,
+    ):
+        """
+        Roles composed for the same ship should be given the same context, otherwise
+        a new one is hydrated for this role alone.
+        """
         self.base_priority = base_priority
-        self.client = Client(api_key=api_key, base_priority=self.base_priority)
+        self.context = context or ShipContext(
+            api_key=api_key, call_sign=call_sign, base_priority=base_priority
+        )
+        self.client = self.context.client
         self.dao = DAO()
-        self.time_started = datetime.now(UTC)
-        self._hydrate_ship_and_agent(call_sign=call_sign)
+        self.time_started = clock.now()
 
-    def _hydrate_ship_and_agent(self, call_sign: str):
-        ship = self.client.ship(call_sign=call_sign).data
-        if not ship:
-            raise TraderClientException(
-                "Unable to instantiate common client as ship payload was empty!"
-            )
-        self.ship = ship
+    @property
+    def agent(self) -> Agent:
+        return self.context.agent
 
-        agent = self.client.agent().data
-        if not agent:
-            raise TraderClientException(
-                "Unable to instantiate common client as agent payload was empty!"
-            )
-        self.agent = agent
+    @property
+    def ship(self) -> Ship:
+        return self.context.ship
 
     def __navigate_to_waypoint(self, waypoint_symbol: str, system_symbol: str):
         """
@@ -83,15 +96,14 @@ class Common:
                 and navigation_result.data.nav
                 and navigation_result.data.nav.status == "IN_TRANSIT"
             ):
-                time_to_wait = (
-                    datetime.fromisoformat(navigation_result.data.nav.route.arrival)
-                    - datetime.now(UTC)
-                ).seconds + 1
+                time_to_wait = get_seconds_until(
+                    navigation_result.data.nav.route.arrival
+                )
                 logger.info(
                     f"Waiting for ship {self.ship.symbol} to arrive at waypoint "
                     f"{waypoint_symbol} for {time_to_wait} second(s)"
                 )
-                sleep(time_to_wait)
+                clock.sleep(time_to_wait)
         except TraderException as e:
             if "Ship is currently in-transit" in e.message:
                 self.wait_for_ship_to_arrive_at_destination()
@@ -102,7 +114,7 @@ class Common:
     def reset_metrics(self):
         self.credits_earned = 0
         self.credits_spent = 0
-        self.time_started = datetime.now(UTC)
+        self.time_started = clock.now()
 
     def add_to_credits_earned(self, credits: int):
         self.credits_earned += credits
@@ -236,13 +248,7 @@ class Common:
             raise
 
     def reload_ship(self):
-        ship = self.client.ship(call_sign=self.ship.symbol).data
-        if ship:
-            save_client_ships(engine=self.dao.engine, ships=[ship])
-            self.ship = ship
-        agent = self.client.agent().data
-        if agent:
-            self.agent = agent
+        self.context.reload()
 
     def wait(self):
         attempts = 0
@@ -261,9 +267,9 @@ class Common:
                         logger.info(
                             f"Ship {self.ship.symbol} waiting for cooldown for {cooldown.data.remaining_seconds} seconds"
                         )
-                        sleep(cooldown.data.remaining_seconds)
+                        clock.sleep(cooldown.data.remaining_seconds)
                     else:
-                        sleep(DEFAULT_ACTIONS_TIMEOUT)
+                        clock.sleep(DEFAULT_ACTIONS_TIMEOUT)
                     attempts += 1
             except TraderException as e:
                 if "Empty response" in e.message:
@@ -273,14 +279,12 @@ class Common:
 
     def wait_for_ship_to_arrive_at_destination(self) -> None:
         self.reload_ship()
-        time_to_wait = (
-            datetime.fromisoformat(self.ship.nav.route.arrival) - datetime.now(UTC)
-        ).seconds + 1
+        time_to_wait = get_seconds_until(self.ship.nav.route.arrival)
         logger.warning(
             f"Waiting for ship {self.ship.symbol} to arrive at already "
             f"bound destination {self.ship.nav.route.destination.symbol} for {time_to_wait} second(s)"
         )
-        sleep(time_to_wait)
+        clock.sleep(time_to_wait)
 
     def refresh_market_data(self, system_symbol: str, waypoint_symbol: str) -> None:
         market = self.client.market(
@@ -349,7 +353,7 @@ class Common:
                     waypoint_symbol=waypoint_symbol,
                     credits_earned=credits_earned,
                     credits_spent=credits_spent,
-                    created_at=datetime.now(UTC),
+                    created_at=clock.now(),
                 )
             )
             session.commit()
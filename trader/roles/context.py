@@ -0,0 +1,52 @@
+from trader.client.agent import Agent
+from trader.client.client import Client
+from trader.client.request import CancellationToken
+from trader.client.ship import Ship
+from trader.fleet.state import FleetState
+
+
+class ShipContext:
+    """
+    State of a single ship shared by every role acting on it. Roles composed for the
+    same ship (ex: a harvester and a merchant) hold the same context, so the ship is
+    hydrated once and a reload by any role is immediately seen by all of them.
+
+    Ship logic builds one context per ship and passes it to every role it composes,
+    rather than letting each role build its own.
+    """
+
+    agent: Agent
+    call_sign: str
+    cancellation: CancellationToken
+    client: Client
+    fleet_state: FleetState
+    ship: Ship
+
+    def __init__(self, api_key: str, call_sign: str, base_priority: int = 0):
+        self.call_sign = call_sign
+        self.client = Client(
+            api_key=api_key, base_priority=base_priority, flow=call_sign
+        )
+        self.cancellation = CancellationToken()
+        self.client.set_cancellation(self.cancellation)
+        self.fleet_state = FleetState(api_key=api_key)
+        # read from the bulk refreshed fleet state rather than fetching per ship
+        self.ship = self.fleet_state.get_ship(call_sign=call_sign)
+        self.agent = self.fleet_state.get_agent()
+
+    def reload(self):
+        """
+        Fetches this ship individually, as it has just acted and the bulk refreshed
+        fleet state may be behind it.
+        """
+        self.ship = self.fleet_state.refresh_ship(call_sign=self.call_sign)
+        self.agent = self.fleet_state.refresh_agent()
+
+    def cancel_requests(self):
+        """
+        Drops every request this ship still has queued, for when its loop has moved on
+        from the work they were made for (ex: an action failed)
+        """
+        self.cancellation.cancel()
+        self.cancellation = CancellationToken()
+        self.client.set_cancellation(self.cancellation)
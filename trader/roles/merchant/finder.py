@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from math import dist
-from typing import Any, Dict, List, Literal, Optional, cast
+from typing import Any, Dict, List, Literal, Optional, Tuple, cast
 
 import pandas as pd
 from dataclass_wizard import JSONWizard
@@ -12,6 +12,9 @@ from trader.roles.navigator.geometry import (
 )
 
 MINIMUM_PROFIT_TO_TRADE = 0.05
+DEFAULT_TRADE_CANDIDATES = 200
+
+Market = Tuple[str, str]
 
 
 @dataclass
@@ -53,6 +56,23 @@ class ArbitrageOpportunity(ArbitrageOpportunityData):
     sell_waypoint: Waypoint
 
 
+@dataclass
+class TradeCandidate:
+    """
+    A trade to hand a ship, with the units its purchase market sells per transaction
+    """
+
+    opportunity: ArbitrageOpportunity
+    trade_volume: int
+
+    @property
+    def purchase_market(self) -> Market:
+        return (
+            self.opportunity.trade_good_symbol,
+            self.opportunity.purchase_waypoint_symbol,
+        )
+
+
 def generate_arbitrage_opportunities(
     market_trade_goods: List[MarketTradeGood],
     waypoints: List[Waypoint],
@@ -199,6 +219,20 @@ def find_most_profitable_trade_in_system(
         limit=limit,
         prefer_within_cluster=prefer_within_cluster,
     )
+    return select_most_profitable_trade(
+        profit_to_opportunity=profit_to_opportunity,
+        maximum_purchase_price=maximum_purchase_price,
+    )
+
+
+def select_most_profitable_trade(
+    profit_to_opportunity: Dict[float, ArbitrageOpportunity],
+    maximum_purchase_price: int | float,
+) -> Optional[ArbitrageOpportunity]:
+    """
+    Picks the most profitable trade (by profit to distance) that is affordable, kept apart
+    from finding trades so one set of trades can be shared by ships with different budgets
+    """
     most_profitable_trades_within_systems = list(
         reversed(sorted(profit_to_opportunity.keys()))
     )
@@ -212,3 +246,61 @@ def find_most_profitable_trade_in_system(
             break
 
     return most_profitable_trade
+
+
+def generate_trade_candidates(
+    trade_goods: List[MarketTradeGood],
+    waypoints: List[Waypoint],
+    limit: int = DEFAULT_TRADE_CANDIDATES,
+) -> List[TradeCandidate]:
+    """
+    Every profitable good to buy at a market in the system, paired with the market it
+    sells best at. Purchase markets are kept distinct (unlike the best trade per good
+    from the finder) so there are enough parallel trades to go around a fleet.
+    """
+    if not trade_goods:
+        return []
+    goods = pd.DataFrame([good.dict() for good in trade_goods])
+    goods = goods.loc[goods["purchase_price"] > 0]
+    pairs = goods.merge(goods, on="symbol", suffixes=("_purchase", "_sell"))
+    pairs = pairs.loc[
+        pairs["waypoint_symbol_purchase"] != pairs["waypoint_symbol_sell"]
+    ].copy()
+    pairs["profit"] = pairs["sell_price_sell"] - pairs["purchase_price_purchase"]
+    pairs["percent_profit"] = pairs["profit"] / pairs["purchase_price_purchase"]
+    pairs = pairs.loc[pairs["percent_profit"] > MINIMUM_PROFIT_TO_TRADE]
+    if pairs.empty:
+        return []
+    pairs = pairs.loc[
+        pairs.groupby(["symbol", "waypoint_symbol_purchase"])["profit"].idxmax()
+    ]
+    pairs = pairs.sort_values("profit", ascending=False).head(limit)
+
+    waypoints_by_symbol = {waypoint.symbol: waypoint for waypoint in waypoints}
+    candidates: List[TradeCandidate] = []
+    for pair in pairs.itertuples(index=False):
+        purchase_waypoint = waypoints_by_symbol.get(pair.waypoint_symbol_purchase)
+        sell_waypoint = waypoints_by_symbol.get(pair.waypoint_symbol_sell)
+        if not purchase_waypoint or not sell_waypoint:
+            continue
+        candidates.append(
+            TradeCandidate(
+                opportunity=ArbitrageOpportunity(
+                    purchase_waypoint_symbol=purchase_waypoint.symbol,
+                    purchase_supply=pair.supply_purchase,
+                    purchase_price=int(pair.purchase_price_purchase),
+                    sell_waypoint_symbol=sell_waypoint.symbol,
+                    sell_supply=pair.supply_sell,
+                    sell_price=int(pair.sell_price_sell),
+                    trade_good_symbol=pair.symbol,
+                    purchase_system_symbol=purchase_waypoint.system_symbol,
+                    sell_system_symbol=sell_waypoint.system_symbol,
+                    profit=int(pair.profit),
+                    percent_profit=float(pair.percent_profit),
+                    purchase_waypoint=purchase_waypoint,
+                    sell_waypoint=sell_waypoint,
+                ),
+                trade_volume=int(pair.trade_volume_purchase),
+            )
+        )
+    return candidates
@@ -0,0 +1,253 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from math import ceil
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+from sqlalchemy import String, type_coerce
+from sqlalchemy.engine import Engine
+from sqlmodel import select
+
+from trader.dao.markets import MarketTransaction
+
+# relative price move per trade_volume tranche traded, by supply at the market, for
+# markets without enough transactions to measure it
+SUPPLY_PRICE_IMPACT = {
+    "SCARCE": 0.08,
+    "LIMITED": 0.05,
+    "MODERATE": 0.03,
+    "HIGH": 0.02,
+    "ABUNDANT": 0.01,
+}
+DEFAULT_PRICE_IMPACT = 0.03
+# transactions further apart than this are assumed to have let the market recover
+MAXIMUM_TRANCHE_GAP = timedelta(minutes=10)
+# travel time in cruise, see https://docs.spacetraders.io for the formula
+CRUISE_NAVIGATION_MULTIPLIER = 25
+NAVIGATION_BASE_SECONDS = 15
+# ship time spent on each purchase or sale request
+SECONDS_PER_TRANSACTION = 1.0
+
+ImpactKey = Tuple[str, str, str]
+
+
+@dataclass
+class OrderPlan:
+    """
+    How much of a good to buy, split into tranches of at most the market's trade
+    volume, and what that is expected to make
+    """
+
+    units: int
+    tranches: List[int]
+    expected_cost: float
+    expected_revenue: float
+    expected_profit: float
+    profit_per_second: float
+
+
+def estimate_travel_seconds(distance: float, engine_speed: int) -> float:
+    return (
+        round(max(1, distance)) * (CRUISE_NAVIGATION_MULTIPLIER / max(1, engine_speed))
+        + NAVIGATION_BASE_SECONDS
+    )
+
+
+def get_transaction_prices(
+    engine: Engine,
+    waypoint_symbols: Optional[List[str]] = None,
+    since: Optional[datetime] = None,
+) -> pd.DataFrame:
+    """
+    Loads the stored transactions price impact is measured from, straight into a frame
+    rather than through ORM objects as there can be a great many of them
+    """
+    expression = select(  # type: ignore
+        MarketTransaction.waypoint_symbol,
+        MarketTransaction.trade_symbol,
+        MarketTransaction.transaction_type,
+        MarketTransaction.price_per_unit,
+        # parsed in bulk below, which is far cheaper than per row
+        type_coerce(MarketTransaction.created_at, String).label("created_at"),
+    )
+    if waypoint_symbols is not None:
+        expression = expression.where(
+            MarketTransaction.waypoint_symbol.in_(waypoint_symbols)  # type: ignore
+        )
+    if since:
+        expression = expression.where(MarketTransaction.created_at >= since)
+    with engine.connect() as connection:
+        transactions = pd.read_sql(expression, connection)
+    transactions["created_at"] = pd.to_datetime(
+        transactions["created_at"], format="ISO8601"
+    )
+    return transactions
+
+
+def estimate_price_impacts(transactions: pd.DataFrame) -> Dict[ImpactKey, float]:
+    """
+    Measures how far each (waypoint, good, transaction type) moves price per tranche
+    from stored transactions (see get_transaction_prices), as the median relative
+    change in price between back to back transactions. Prices rise after purchases
+    and fall after sales, both are reported as a positive impact.
+    """
+    if transactions.empty:
+        return {}
+    keys = ["waypoint_symbol", "trade_symbol", "transaction_type"]
+    # factorizing each key column and combining the codes is far cheaper than grouping
+    # on the strings themselves
+    groups = np.zeros(len(transactions), dtype=np.int64)
+    uniques = []
+    for key in keys:
+        codes, key_uniques = pd.factorize(transactions[key])
+        groups = groups * len(key_uniques) + codes
+        uniques.append(key_uniques)
+    created_at = transactions["created_at"].to_numpy(dtype="datetime64[ns]")
+    order = np.lexsort((created_at, groups))
+    groups = groups[order]
+    created_at = created_at[order]
+    prices = transactions["price_per_unit"].to_numpy(dtype=float)[order]
+    purchases = (transactions["transaction_type"] == "PURCHASE").to_numpy()[order]
+
+    change = (prices[1:] - prices[:-1]) / prices[:-1]
+    change = np.where(purchases[1:], change, -change)
+    back_to_back = (groups[1:] == groups[:-1]) & (
+        created_at[1:] - created_at[:-1] <= np.timedelta64(MAXIMUM_TRANCHE_GAP)
+    )
+    impacts = (
+        pd.Series(np.clip(change[back_to_back], 0, None))
+        .groupby(groups[1:][back_to_back])
+        .median()
+    )
+    decoded: Dict[ImpactKey, float] = {}
+    for group, impact in zip(impacts.index.to_numpy(dtype=np.int64), impacts):
+        key_codes = []
+        for key_uniques in reversed(uniques):
+            group, code = divmod(int(group), len(key_uniques))
+            key_codes.append(key_uniques[code])
+        waypoint_symbol, trade_symbol, transaction_type = reversed(key_codes)
+        decoded[(waypoint_symbol, trade_symbol, transaction_type)] = float(impact)
+    return decoded
+
+
+def get_price_impact(
+    impacts: Dict[ImpactKey, float],
+    waypoint_symbol: str,
+    good_symbol: str,
+    transaction_type: str,
+    supply: Optional[str] = None,
+) -> float:
+    return impacts.get(
+        (waypoint_symbol, good_symbol, transaction_type),
+        SUPPLY_PRICE_IMPACT.get(supply or "", DEFAULT_PRICE_IMPACT),
+    )
+
+
+def plan_orders(
+    purchase_prices: npt.ArrayLike,
+    sell_prices: npt.ArrayLike,
+    trade_volumes: npt.ArrayLike,
+    purchase_impacts: npt.ArrayLike,
+    sell_impacts: npt.ArrayLike,
+    cargo_space: int,
+    budget: float,
+    travel_seconds: npt.ArrayLike,
+) -> Tuple[npt.NDArray, npt.NDArray, npt.NDArray]:
+    """
+    For each candidate trade, the number of units that maximizes expected profit per
+    second of ship time, along with that profit and rate.
+
+    Buying is done in tranches of trade_volume units. Each tranche is bought at a
+    price purchase_impact higher than the last and sold at a price sell_impact lower,
+    and each costs a purchase and a sale request on top of the travel time.
+    """
+    purchase_prices = np.asarray(purchase_prices, dtype=float)[:, None]
+    sell_prices = np.asarray(sell_prices, dtype=float)[:, None]
+    trade_volumes = np.maximum(np.asarray(trade_volumes, dtype=float), 1)[:, None]
+    purchase_impacts = np.asarray(purchase_impacts, dtype=float)[:, None]
+    sell_impacts = np.asarray(sell_impacts, dtype=float)[:, None]
+    travel_seconds = np.asarray(travel_seconds, dtype=float)[:, None]
+
+    maximum_tranches = max(1, ceil(cargo_space / float(trade_volumes.min())))
+    tranche = np.arange(maximum_tranches, dtype=float)[None, :]
+    tranche_units = np.clip(cargo_space - tranche * trade_volumes, 0, trade_volumes)
+    tranche_purchase_prices = purchase_prices * (1 + purchase_impacts) ** tranche
+    tranche_sell_prices = sell_prices * (1 - sell_impacts) ** tranche
+
+    # the first tranche the budget runs out in is cut short to what is left
+    cost_before = np.cumsum(tranche_units * tranche_purchase_prices, axis=1) - (
+        tranche_units * tranche_purchase_prices
+    )
+    affordable_units = np.floor(
+        np.maximum(budget - cost_before, 0) / tranche_purchase_prices
+    )
+    tranche_units = np.minimum(tranche_units, affordable_units)
+
+    units = np.cumsum(tranche_units, axis=1)
+    cost = np.cumsum(tranche_units * tranche_purchase_prices, axis=1)
+    revenue = np.cumsum(tranche_units * tranche_sell_prices, axis=1)
+    transactions = np.cumsum(tranche_units > 0, axis=1)
+    seconds = np.maximum(
+        travel_seconds + 2 * transactions * SECONDS_PER_TRANSACTION,
+        SECONDS_PER_TRANSACTION,
+    )
+    profit_per_second = np.where(units > 0, (revenue - cost) / seconds, -np.inf)
+
+    best = np.argmax(profit_per_second, axis=1)
+    rows = np.arange(len(best))
+    best_rate = profit_per_second[rows, best]
+    worthwhile = best_rate > 0
+    return (
+        np.where(worthwhile, units[rows, best], 0).astype(int),
+        np.where(worthwhile, (revenue - cost)[rows, best], 0),
+        np.where(worthwhile, best_rate, 0),
+    )
+
+
+def plan_order(
+    purchase_price: int,
+    sell_price: int,
+    trade_volume: int,
+    purchase_impact: float,
+    sell_impact: float,
+    cargo_space: int,
+    budget: float,
+    travel_seconds: float = 0,
+) -> OrderPlan:
+    """
+    Sizes a single trade, see plan_orders
+    """
+    units, _, profit_per_second = plan_orders(
+        purchase_prices=[purchase_price],
+        sell_prices=[sell_price],
+        trade_volumes=[trade_volume],
+        purchase_impacts=[purchase_impact],
+        sell_impacts=[sell_impact],
+        cargo_space=cargo_space,
+        budget=budget,
+        travel_seconds=[travel_seconds],
+    )
+    tranches = split_into_tranches(units=int(units[0]), trade_volume=trade_volume)
+    expected_cost = sum(
+        tranche_units * purchase_price * (1 + purchase_impact) ** idx
+        for idx, tranche_units in enumerate(tranches)
+    )
+    expected_revenue = sum(
+        tranche_units * sell_price * (1 - sell_impact) ** idx
+        for idx, tranche_units in enumerate(tranches)
+    )
+    return OrderPlan(
+        units=int(units[0]),
+        tranches=tranches,
+        expected_cost=expected_cost,
+        expected_revenue=expected_revenue,
+        expected_profit=expected_revenue - expected_cost,
+        profit_per_second=float(profit_per_second[0]),
+    )
+
+
+def split_into_tranches(units: int, trade_volume: int) -> List[int]:
+    trade_volume = max(1, trade_volume)
+    return [min(trade_volume, units - start) for start in range(0, units, trade_volume)]
@@ -1,3 +1,5 @@
+from datetime import timedelta
+from math import dist
 from typing import List, Optional
 
 from loguru import logger
@@ -5,6 +7,7 @@ from loguru import logger
 from trader.dao.markets import (
     get_market_trade_good_by_waypoint,
     get_market_trade_goods_by_system,
+    get_market_trade_goods_by_waypoint,
 )
 from trader.dao.waypoints import get_waypoints_by_system_symbol
 from trader.exceptions import TraderException
@@ -13,9 +16,20 @@ from trader.roles.merchant.finder import (
     ArbitrageOpportunity,
     generate_arbitrage_opportunities,
 )
+from trader.roles.merchant.impact import (
+    estimate_price_impacts,
+    estimate_travel_seconds,
+    get_price_impact,
+    get_transaction_prices,
+    plan_order,
+    split_into_tranches,
+)
+from trader.util import clock
 
 # do not spend more than X% of the current account on any purchase
 MAXIMUM_PERCENT_OF_ACCOUNT_PURCHASE = 0.25
+# how far back stored transactions are used to measure price impact at a market
+PRICE_IMPACT_LOOKBACK = timedelta(days=1)
 
 
 class Merchant(Common):
@@ -39,15 +53,108 @@ class Merchant(Common):
         )
         return generate_arbitrage_opportunities(market_trade_goods, waypoints=waypoints)
 
+    def size_purchase(
+        self,
+        waypoint_symbol: str,
+        good_symbol: str,
+        sell_waypoint_symbol: Optional[str] = None,
+    ) -> int:
+        """
+        Sizes a purchase to maximize expected profit per second of ship time, given how
+        far prices at the purchase and sale markets move per trade_volume tranche.
+        Without a known sale market this is the single tranche the budget allows.
+        """
+        purchase_good = get_market_trade_good_by_waypoint(
+            engine=self.dao.engine,
+            waypoint_symbol=waypoint_symbol,
+            good_symbol=good_symbol,
+        )
+        budget = MAXIMUM_PERCENT_OF_ACCOUNT_PURCHASE * self.agent.credits
+        cargo_space = self.ship.cargo.capacity - self.ship.cargo.units
+        sell_good = None
+        if sell_waypoint_symbol:
+            sell_good = next(
+                (
+                    trade_good
+                    for trade_good in get_market_trade_goods_by_waypoint(
+                        engine=self.dao.engine, waypoint_symbol=sell_waypoint_symbol
+                    )
+                    if trade_good.symbol == good_symbol
+                ),
+                None,
+            )
+        if not sell_waypoint_symbol or not sell_good:
+            return min(
+                int(budget / purchase_good.purchase_price),
+                purchase_good.trade_volume,
+                cargo_space,
+            )
+
+        impacts = estimate_price_impacts(
+            get_transaction_prices(
+                engine=self.dao.engine,
+                waypoint_symbols=[waypoint_symbol, sell_waypoint_symbol],
+                since=clock.now() - PRICE_IMPACT_LOOKBACK,
+            )
+        )
+        waypoints = {
+            waypoint.symbol: waypoint
+            for waypoint in get_waypoints_by_system_symbol(
+                engine=self.dao.engine, system_symbol=self.ship.nav.system_symbol
+            )
+        }
+        travel_seconds = 0.0
+        if waypoint_symbol in waypoints and sell_waypoint_symbol in waypoints:
+            travel_seconds = estimate_travel_seconds(
+                distance=dist(
+                    [waypoints[waypoint_symbol].x, waypoints[waypoint_symbol].y],
+                    [
+                        waypoints[sell_waypoint_symbol].x,
+                        waypoints[sell_waypoint_symbol].y,
+                    ],
+                ),
+                engine_speed=self.ship.engine.speed,
+            )
+        order = plan_order(
+            purchase_price=purchase_good.purchase_price,
+            sell_price=sell_good.sell_price,
+            trade_volume=purchase_good.trade_volume,
+            purchase_impact=get_price_impact(
+                impacts,
+                waypoint_symbol=waypoint_symbol,
+                good_symbol=good_symbol,
+                transaction_type="PURCHASE",
+                supply=purchase_good.supply,
+            ),
+            sell_impact=get_price_impact(
+                impacts,
+                waypoint_symbol=sell_waypoint_symbol,
+                good_symbol=good_symbol,
+                transaction_type="SELL",
+                supply=sell_good.supply,
+            ),
+            cargo_space=cargo_space,
+            budget=budget,
+            travel_seconds=travel_seconds,
+        )
+        logger.info(
+            f"Ship {self.ship.symbol} planning to buy {order.units} units of {good_symbol} "
+            f"in {len(order.tranches)} tranche(s) for an expected profit of "
+            f"{order.expected_profit:.0f} ({order.profit_per_second:.2f}/s)"
+        )
+        return order.units
+
     def buy_cargo(
         self,
         waypoint_symbol: str,
         system_symbol: str,
         good_symbol: str,
         units: Optional[int] = None,
+        sell_waypoint_symbol: Optional[str] = None,
     ):
         """
-        Simple utility function to jump to a specific location and buy cargo
+        Simple utility function to jump to a specific location and buy cargo, in
+        tranches of at most the market's trade volume
         """
         logger.info(
             f"Ship {self.ship.symbol} starting to navigate to makes purchases of {good_symbol} ({units} units)"
@@ -62,37 +169,35 @@ class Merchant(Common):
             waypoint_symbol=waypoint_symbol,
             system_symbol=system_symbol,
         )
+        trade_good_at_location = get_market_trade_good_by_waypoint(
+            engine=self.dao.engine,
+            waypoint_symbol=waypoint_symbol,
+            good_symbol=good_symbol,
+        )
         if units is None:
-            trade_good_at_location = get_market_trade_good_by_waypoint(
-                engine=self.dao.engine,
-                waypoint_symbol=waypoint_symbol,
-                good_symbol=good_symbol,
-            )
-            maximum_amount_to_buy = (
-                MAXIMUM_PERCENT_OF_ACCOUNT_PURCHASE * self.agent.credits
-            )
-            cost_per_good: int = get_market_trade_good_by_waypoint(
-                engine=self.dao.engine,
+            units = self.size_purchase(
                 waypoint_symbol=waypoint_symbol,
                 good_symbol=good_symbol,
-            ).purchase_price
-            units = min(
-                [
-                    int(maximum_amount_to_buy / cost_per_good),
-                    trade_good_at_location.trade_volume,
-                ]
+                sell_waypoint_symbol=sell_waypoint_symbol,
             )
 
         # TODO - persist units bought into map, so we know how much to sell
 
-        logger.info(f"Ship {self.ship.symbol} buying {units} units of {good_symbol}")
-        buy_response = self.client.buy(
-            call_sign=self.ship.symbol,
-            symbol=good_symbol,
-            units=units,
-        )
-        if buy_response.data:
-            self.add_to_credits_spent(credits=buy_response.data.transaction.total_price)
+        for tranche_units in split_into_tranches(
+            units=units, trade_volume=trade_good_at_location.trade_volume
+        ):
+            logger.info(
+                f"Ship {self.ship.symbol} buying {tranche_units} units of {good_symbol}"
+            )
+            buy_response = self.client.buy(
+                call_sign=self.ship.symbol,
+                symbol=good_symbol,
+                units=tranche_units,
+            )
+            if buy_response.data:
+                self.add_to_credits_spent(
+                    credits=buy_response.data.transaction.total_price
+                )
 
     def sell_cargo(
         self,
@@ -136,16 +241,27 @@ class Merchant(Common):
         )
 
         if liquidate_inventory:
-            for inventory in self.ship.cargo.inventory:
-                logger.info(
-                    f"Ship {self.ship.symbol} selling {inventory.units} units of {inventory.symbol}"
+            trade_volumes = {
+                trade_good.symbol: trade_good.trade_volume
+                for trade_good in get_market_trade_goods_by_waypoint(
+                    engine=self.dao.engine, waypoint_symbol=waypoint_symbol
                 )
-                sale_response = self.client.sell(
-                    call_sign=self.ship.symbol,
-                    symbol=inventory.symbol,
+            }
+            for inventory in self.ship.cargo.inventory:
+                # the market only takes up to its trade volume per sale
+                for tranche_units in split_into_tranches(
                     units=inventory.units,
-                )
-                if sale_response.data:
-                    self.add_to_credits_earned(
-                        credits=sale_response.data.transaction.total_price
+                    trade_volume=trade_volumes.get(inventory.symbol, inventory.units),
+                ):
+                    logger.info(
+                        f"Ship {self.ship.symbol} selling {tranche_units} units of {inventory.symbol}"
+                    )
+                    sale_response = self.client.sell(
+                        call_sign=self.ship.symbol,
+                        symbol=inventory.symbol,
+                        units=tranche_units,
                     )
+                    if sale_response.data:
+                        self.add_to_credits_earned(
+                            credits=sale_response.data.transaction.total_price
+                        )
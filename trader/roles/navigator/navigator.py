@@ -2,11 +2,9 @@ from typing import List
 
 from trader.client.waypoint import Waypoint
 from trader.dao.waypoints import Waypoint as WaypointDAO
+from trader.fleet.planner import Planner
 from trader.roles.common import Common
-from trader.roles.navigator.geometry import (
-    generate_graph_from_waypoints_all_connected,
-    generate_shortest_path_with_graph,
-)
+from trader.roles.navigator.geometry import generate_graph_from_waypoints_all_connected
 
 
 class Navigator(Common):
@@ -37,9 +35,11 @@ class Navigator(Common):
         """
         For a given list of waypoints, find an approximate shortest possible route among all provided waypoints.
         """
-        graph = generate_graph_from_waypoints_all_connected(waypoints=waypoints)
-        return generate_shortest_path_with_graph(
-            starting_position=self.ship.nav.waypoint_symbol, graph=graph
+        # ships starting from the same waypoint in a system share one route
+        return Planner().plan_route(
+            system_symbol=self.ship.nav.system_symbol,
+            waypoints=waypoints,
+            starting_position=self.ship.nav.waypoint_symbol,
         )
 
     def shortest_route_between_groups_of_waypoints(
@@ -0,0 +1,75 @@
+"""
+Solve time of assigning a fleet of traders to trades in one batch. Run with:
+
+BENCHMARK=1 pytest trader/tests/benchmarks --benchmark-only
+"""
+import random
+from typing import List
+
+from pytest import fixture, mark
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from trader.fleet.assignment import TraderPosition, solve_trade_assignment
+from trader.roles.merchant.finder import ArbitrageOpportunity, TradeCandidate
+from trader.tests.factories.synthetic import build_waypoints, to_dao_waypoints
+
+SHIPS = 50
+OPPORTUNITIES = 200
+
+
+@fixture
+def generator() -> random.Random:
+    return random.Random(38)
+
+
+@fixture
+def traders(generator: random.Random) -> List[TraderPosition]:
+    return [
+        TraderPosition(
+            call_sign=f"SHIP-{idx}",
+            x=generator.randint(-500, 500),
+            y=generator.randint(-500, 500),
+            cargo_space=generator.choice([40, 60, 120]),
+        )
+        for idx in range(SHIPS)
+    ]
+
+
+@fixture
+def candidates(generator: random.Random) -> List[TradeCandidate]:
+    waypoints = to_dao_waypoints(build_waypoints(count=OPPORTUNITIES * 2, seed=38))
+    candidates: List[TradeCandidate] = []
+    for idx in range(OPPORTUNITIES):
+        purchase_price = generator.randint(10, 2000)
+        sell_price = int(purchase_price * generator.uniform(1.05, 1.5))
+        purchase_waypoint, sell_waypoint = waypoints[idx * 2 : idx * 2 + 2]
+        candidates.append(
+            TradeCandidate(
+                opportunity=ArbitrageOpportunity(
+                    purchase_waypoint_symbol=purchase_waypoint.symbol,
+                    purchase_supply="MODERATE",
+                    purchase_price=purchase_price,
+                    sell_waypoint_symbol=sell_waypoint.symbol,
+                    sell_supply="MODERATE",
+                    sell_price=sell_price,
+                    trade_good_symbol=f"GOOD-{idx % 30}",
+                    profit=sell_price - purchase_price,
+                    purchase_waypoint=purchase_waypoint,
+                    sell_waypoint=sell_waypoint,
+                ),
+                trade_volume=generator.choice([10, 20, 60, 100]),
+            )
+        )
+    return candidates
+
+
+@mark.benchmark(group="assignment")
+def test_solve_trade_assignment(
+    benchmark: BenchmarkFixture,
+    traders: List[TraderPosition],
+    candidates: List[TradeCandidate],
+):
+    assignments = benchmark(
+        solve_trade_assignment, traders=traders, candidates=candidates, budget=50_000
+    )
+    assert len(assignments) == SHIPS
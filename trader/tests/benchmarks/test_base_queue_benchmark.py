@@ -0,0 +1,47 @@
+"""
+Throughput of the database backed queue with a deep backlog already present. Run with:
+
+BENCHMARK=1 pytest trader/tests/benchmarks --benchmark-only
+"""
+from typing import Iterator
+from uuid import uuid4
+
+from pytest import fixture, mark
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from trader.queues.base_queue import Queue
+
+QUEUE_DEPTHS = [10_000, 100_000]
+BATCH_SIZE = 100
+# bounded so pops never drain the backlog being measured against
+ROUNDS = 50
+
+
+@fixture(params=QUEUE_DEPTHS, ids=lambda depth: f"depth-{depth}")
+def deep_queue(request) -> Iterator[Queue]:
+    queue_id = f"benchmark-{uuid4()}"
+    queue = Queue(queue_id=queue_id, queue_name=queue_id)
+    queue.append_many(elements=[(print, idx) for idx in range(request.param)])
+    yield queue
+    queue.delete()
+
+
+@mark.benchmark(group="queue-append")
+def test_append(benchmark: BenchmarkFixture, deep_queue: Queue):
+    benchmark(deep_queue.append, function=print, data=0)
+
+
+@mark.benchmark(group="queue-append")
+def test_append_many(benchmark: BenchmarkFixture, deep_queue: Queue):
+    elements = [(print, idx) for idx in range(BATCH_SIZE)]
+    benchmark(deep_queue.append_many, elements=elements)
+
+
+@mark.benchmark(group="queue-pop")
+def test_pop(benchmark: BenchmarkFixture, deep_queue: Queue):
+    benchmark.pedantic(deep_queue.pop, rounds=ROUNDS)
+
+
+@mark.benchmark(group="queue-pop")
+def test_pop_many(benchmark: BenchmarkFixture, deep_queue: Queue):
+    benchmark.pedantic(deep_queue.pop_many, kwargs={"count": BATCH_SIZE}, rounds=ROUNDS)
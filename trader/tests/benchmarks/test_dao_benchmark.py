@@ -0,0 +1,21 @@
+"""
+Cost of preparing the database schema on startup, against the migrated test database.
+Run with:
+
+BENCHMARK=1 pytest trader/tests/benchmarks --benchmark-only
+"""
+from pytest import mark
+from pytest_benchmark.fixture import BenchmarkFixture
+from sqlmodel import SQLModel
+
+from trader.dao.dao import DAO, ensure_schema
+
+
+@mark.benchmark(group="dao-startup")
+def test_ensure_schema(benchmark: BenchmarkFixture):
+    benchmark(ensure_schema, engine=DAO().engine)
+
+
+@mark.benchmark(group="dao-startup")
+def test_create_all(benchmark: BenchmarkFixture):
+    benchmark(SQLModel.metadata.create_all, DAO().engine)
@@ -0,0 +1,42 @@
+"""
+Cost of saving markets and waypoints as the client receives them, first inserted
+then upserted on every later round. Run with:
+
+BENCHMARK=1 pytest trader/tests/benchmarks --benchmark-only
+"""
+from uuid import uuid4
+
+from pytest import mark
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from trader.dao.dao import DAO
+from trader.dao.markets import save_client_market
+from trader.dao.waypoints import save_client_waypoints
+from trader.tests.factories.synthetic import build_market, build_waypoints
+
+WAYPOINT_COUNTS = [10, 100]
+TRANSACTION_COUNTS = [0, 20]
+
+
+@mark.benchmark(group="dao-save-waypoints")
+@mark.parametrize("count", WAYPOINT_COUNTS, ids=lambda count: f"waypoints-{count}")
+def test_save_client_waypoints(benchmark: BenchmarkFixture, count: int):
+    waypoints = build_waypoints(count=count, system_symbol=f"X1-{uuid4().hex[:8]}")
+    benchmark(save_client_waypoints, engine=DAO().engine, waypoints=waypoints)
+
+
+@mark.benchmark(group="dao-save-market")
+@mark.parametrize(
+    "transactions", TRANSACTION_COUNTS, ids=lambda count: f"transactions-{count}"
+)
+def test_save_client_market(benchmark: BenchmarkFixture, transactions: int):
+    system_symbol = f"X1-{uuid4().hex[:8]}"
+    market = build_market(
+        waypoint_symbol=f"{system_symbol}-A1", transactions=transactions
+    )
+    benchmark(
+        save_client_market,
+        engine=DAO().engine,
+        market=market,
+        system_symbol=system_symbol,
+    )
@@ -0,0 +1,56 @@
+"""
+Cost of finding trades in a system as it grows, from the arbitrage between its markets
+to the most profitable trade within a cluster. Run with:
+
+BENCHMARK=1 pytest trader/tests/benchmarks --benchmark-only
+"""
+from typing import List, Tuple
+
+from pytest import fixture, mark
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from trader.dao.markets import MarketTradeGood
+from trader.dao.waypoints import Waypoint
+from trader.roles.merchant.finder import (
+    find_most_profitable_trade_in_system,
+    generate_arbitrage_opportunities,
+)
+from trader.tests.factories.synthetic import (
+    build_market_trade_goods,
+    build_waypoints,
+    to_dao_waypoints,
+)
+
+WAYPOINT_COUNTS = [10, 50, 200]
+
+
+@fixture(params=WAYPOINT_COUNTS, ids=lambda count: f"waypoints-{count}")
+def system(request) -> Tuple[List[MarketTradeGood], List[Waypoint]]:
+    waypoints = build_waypoints(count=request.param, seed=11)
+    return build_market_trade_goods(waypoints, seed=11), to_dao_waypoints(waypoints)
+
+
+@mark.benchmark(group="finder-arbitrage")
+def test_generate_arbitrage_opportunities(
+    benchmark: BenchmarkFixture, system: Tuple[List[MarketTradeGood], List[Waypoint]]
+):
+    trade_goods, waypoints = system
+    opportunities = benchmark(
+        generate_arbitrage_opportunities,
+        market_trade_goods=trade_goods,
+        waypoints=waypoints,
+    )
+    assert opportunities
+
+
+@mark.benchmark(group="finder-most-profitable")
+def test_find_most_profitable_trade_in_system(
+    benchmark: BenchmarkFixture, system: Tuple[List[MarketTradeGood], List[Waypoint]]
+):
+    trade_goods, waypoints = system
+    benchmark(
+        find_most_profitable_trade_in_system,
+        maximum_purchase_price=100_000,
+        trade_goods=trade_goods,
+        waypoints=waypoints,
+    )
@@ -0,0 +1,101 @@
+"""
+Loop latency of a ship in the coordinating process while the rest of a synthetic fleet
+runs CPU bound planning, either as threads in the same process or sharded across worker
+processes. Run with:
+
+BENCHMARK=1 pytest trader/tests/benchmarks --benchmark-only
+"""
+from threading import Event, Thread
+from time import sleep
+from typing import Iterator
+
+from pytest import MonkeyPatch, fixture, mark
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from trader.dao.ships import Ship
+from trader.fleet.runner import FleetRunner
+
+SHIPS = 4
+PROCESSES = 2
+HEARTBEATS = 20
+HEARTBEAT_INTERVAL = 0.01
+# time for spawned workers to import and start their loops before measuring
+WORKER_STARTUP = 5
+ROUNDS = 5
+
+stopped = Event()
+
+
+class SyntheticShipLoop:
+    """
+    Stands in for a logic loop whose planning step is pure python and holds the GIL.
+    """
+
+    def __init__(self, api_key: str, call_sign: str, repeat: bool):
+        self.call_sign = call_sign
+
+    def run_loop(self):
+        while not stopped.is_set():
+            sum(idx * idx for idx in range(100_000))
+
+
+def heartbeat():
+    for _ in range(HEARTBEATS):
+        sleep(HEARTBEAT_INTERVAL)
+
+
+def build_ships():
+    return [
+        Ship(
+            id=f"SYNTHETIC-{idx}",
+            call_sign=f"SYNTHETIC-{idx}",
+            faction="COSMIC",
+            frame_name="Synthetic",
+            system_symbol="X1",
+            waypoint_symbol="X1-A",
+        )
+        for idx in range(SHIPS)
+    ]
+
+
+@fixture
+def threaded_fleet() -> Iterator[None]:
+    stopped.clear()
+    for ship in build_ships():
+        ship_loop = SyntheticShipLoop(api_key="", call_sign=ship.call_sign, repeat=True)
+        thread = Thread(target=ship_loop.run_loop)
+        thread.daemon = True
+        thread.start()
+    yield
+    stopped.set()
+
+
+@fixture
+def process_fleet(monkeypatch: MonkeyPatch) -> Iterator[None]:
+    # keep worker logs out of the working tree
+    monkeypatch.setenv("DEBUG", "1")
+    runner = FleetRunner(
+        api_key="",
+        ships=build_ships(),
+        logic_by_frame={"Synthetic": SyntheticShipLoop},
+        processes=PROCESSES,
+    )
+    runner.start()
+    sleep(WORKER_STARTUP)
+    yield
+    runner.stop()
+
+
+@mark.benchmark(group="fleet-loop-latency")
+def test_idle(benchmark: BenchmarkFixture):
+    benchmark.pedantic(heartbeat, rounds=ROUNDS)
+
+
+@mark.benchmark(group="fleet-loop-latency")
+def test_threaded_fleet(benchmark: BenchmarkFixture, threaded_fleet: None):
+    benchmark.pedantic(heartbeat, rounds=ROUNDS)
+
+
+@mark.benchmark(group="fleet-loop-latency")
+def test_process_fleet(benchmark: BenchmarkFixture, process_fleet: None):
+    benchmark.pedantic(heartbeat, rounds=ROUNDS)
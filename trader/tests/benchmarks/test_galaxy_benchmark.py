@@ -0,0 +1,89 @@
+"""
+DAO reads as the galaxy grows, against databases populated with generated galaxies of
+10, 100 and 1000 systems of 20 waypoints each, markets observed hourly for a day.
+Larger galaxies can be written with `cli.py generate-galaxy`. Run with:
+
+BENCHMARK=1 pytest trader/tests/benchmarks --benchmark-only
+"""
+from datetime import UTC, datetime, timedelta
+from typing import Dict
+
+from pytest import fixture, mark
+from pytest_benchmark.fixture import BenchmarkFixture
+from sqlalchemy.engine import Engine
+from sqlmodel import create_engine
+
+from trader.dao.dao import ensure_schema
+from trader.dao.market_prices import get_market_price_history
+from trader.dao.markets import get_market_trade_goods_by_system
+from trader.dao.waypoints import get_waypoints_by_system_symbol
+from trader.emulator.galaxy import generate_systems
+from trader.emulator.populate import populate_database
+
+SYSTEM_COUNTS = [10, 100, 1000]
+WAYPOINTS_PER_SYSTEM = 20
+OBSERVATIONS = 24
+NOW = datetime(2026, 10, 19, tzinfo=UTC)
+
+
+@fixture(scope="module")
+def engines(tmp_path_factory) -> Dict[int, Engine]:
+    engines = {}
+    for systems in SYSTEM_COUNTS:
+        path = tmp_path_factory.mktemp("galaxy") / f"galaxy-{systems}.db"
+        engine = create_engine(f"sqlite:///{path}")
+        ensure_schema(engine=engine)
+        populate_database(
+            engine=engine,
+            systems=systems,
+            waypoints_per_system=WAYPOINTS_PER_SYSTEM,
+            observations=OBSERVATIONS,
+            observed_at=NOW,
+        )
+        engines[systems] = engine
+    return engines
+
+
+def get_headquarters_system() -> str:
+    system, _, _ = next(generate_systems(waypoints_per_system=WAYPOINTS_PER_SYSTEM))
+    return system.symbol
+
+
+@mark.benchmark(group="galaxy-waypoints-by-system")
+@mark.parametrize("systems", SYSTEM_COUNTS, ids=lambda count: f"systems-{count}")
+def test_waypoints_of_system(
+    benchmark: BenchmarkFixture, engines: Dict[int, Engine], systems: int
+):
+    waypoints = benchmark(
+        get_waypoints_by_system_symbol,
+        engine=engines[systems],
+        system_symbol=get_headquarters_system(),
+    )
+    assert len(waypoints) == WAYPOINTS_PER_SYSTEM
+
+
+@mark.benchmark(group="galaxy-trade-goods-by-system")
+@mark.parametrize("systems", SYSTEM_COUNTS, ids=lambda count: f"systems-{count}")
+def test_trade_goods_of_system(
+    benchmark: BenchmarkFixture, engines: Dict[int, Engine], systems: int
+):
+    trade_goods = benchmark(
+        get_market_trade_goods_by_system,
+        engine=engines[systems],
+        system_symbol=get_headquarters_system(),
+    )
+    assert trade_goods
+
+
+@mark.benchmark(group="galaxy-fuel-prices-over-6h")
+@mark.parametrize("systems", SYSTEM_COUNTS, ids=lambda count: f"systems-{count}")
+def test_fuel_prices_at_every_market(
+    benchmark: BenchmarkFixture, engines: Dict[int, Engine], systems: int
+):
+    history = benchmark(
+        get_market_price_history,
+        engine=engines[systems],
+        good_symbol="FUEL",
+        since=NOW - timedelta(hours=6),
+    )
+    assert history
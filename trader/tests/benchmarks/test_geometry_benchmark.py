@@ -0,0 +1,55 @@
+"""
+Cost of building the navigation graphs of a system as it grows. Run with:
+
+BENCHMARK=1 pytest trader/tests/benchmarks --benchmark-only
+"""
+from typing import List
+
+from pytest import fixture, mark
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from trader.client.waypoint import Waypoint
+from trader.roles.navigator.geometry import (
+    generate_graph_from_waypoints_all_connected,
+    generate_graph_from_waypoints_means_shift_clustering,
+    generate_shortest_path_with_graph,
+)
+from trader.tests.factories.synthetic import build_waypoints
+
+WAYPOINT_COUNTS = [10, 50, 200]
+
+
+@fixture(params=WAYPOINT_COUNTS, ids=lambda count: f"waypoints-{count}")
+def waypoints(request) -> List[Waypoint]:
+    return build_waypoints(count=request.param, seed=13)
+
+
+@mark.benchmark(group="geometry-clustering")
+def test_generate_graph_from_waypoints_means_shift_clustering(
+    benchmark: BenchmarkFixture, waypoints: List[Waypoint]
+):
+    graph = benchmark(
+        generate_graph_from_waypoints_means_shift_clustering, waypoints=waypoints
+    )
+    assert graph.nodes
+
+
+@mark.benchmark(group="geometry-all-connected")
+def test_generate_graph_from_waypoints_all_connected(
+    benchmark: BenchmarkFixture, waypoints: List[Waypoint]
+):
+    graph = benchmark(generate_graph_from_waypoints_all_connected, waypoints=waypoints)
+    assert len(graph.edges) == len(waypoints) * (len(waypoints) - 1)
+
+
+@mark.benchmark(group="geometry-shortest-path")
+def test_generate_shortest_path_with_graph(
+    benchmark: BenchmarkFixture, waypoints: List[Waypoint]
+):
+    graph = generate_graph_from_waypoints_all_connected(waypoints=waypoints)
+    route = benchmark(
+        generate_shortest_path_with_graph,
+        starting_position=waypoints[0].symbol,
+        graph=graph,
+    )
+    assert len(route) == len(waypoints)
@@ -0,0 +1,83 @@
+"""
+Cost of measuring price impact from a history of 100,000 stored market transactions and of
+sizing orders for 200 candidate trades at once. Run with:
+
+BENCHMARK=1 pytest trader/tests/benchmarks --benchmark-only
+"""
+import random
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from pytest import fixture, mark
+from pytest_benchmark.fixture import BenchmarkFixture
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, create_engine
+
+from trader.dao.markets import MarketTransaction
+from trader.roles.merchant.impact import (
+    estimate_price_impacts,
+    get_transaction_prices,
+    plan_orders,
+)
+
+TRANSACTIONS = 100_000
+WAYPOINTS = 50
+GOODS = 20
+CANDIDATES = 200
+START = datetime(2026, 10, 1, tzinfo=UTC)
+
+
+@fixture(scope="module")
+def engine(tmp_path_factory) -> Engine:
+    path: Path = tmp_path_factory.mktemp("impact") / "impact.db"
+    engine = create_engine(f"sqlite:///{path}")
+    MarketTransaction.metadata.create_all(
+        engine, tables=[MarketTransaction.__table__]  # type: ignore
+    )
+    generator = random.Random(40)
+    with Session(engine) as session:
+        for idx in range(TRANSACTIONS):
+            price = generator.randint(10, 2000)
+            session.add(
+                MarketTransaction(
+                    id=str(idx),
+                    ship_symbol=f"SHIP-{idx % 30}",
+                    trade_symbol=f"GOOD_{generator.randrange(GOODS)}",
+                    transaction_type=generator.choice(["PURCHASE", "SELL"]),
+                    units=10,
+                    price_per_unit=price,
+                    total_price=price * 10,
+                    created_at=START + timedelta(seconds=idx * 15),
+                    waypoint_symbol=f"X1-BENCH-{generator.randrange(WAYPOINTS)}",
+                    system_symbol="X1-BENCH",
+                )
+            )
+        session.commit()
+    return engine
+
+
+@mark.benchmark(group="price-impact")
+def test_load_transactions_and_estimate_price_impacts(
+    benchmark: BenchmarkFixture, engine: Engine
+):
+    impacts = benchmark(
+        lambda: estimate_price_impacts(get_transaction_prices(engine=engine))
+    )
+    assert impacts
+
+
+@mark.benchmark(group="price-impact")
+def test_plan_orders(benchmark: BenchmarkFixture):
+    generator = random.Random(40)
+    purchase_prices = [generator.randint(10, 2000) for _ in range(CANDIDATES)]
+    benchmark(
+        plan_orders,
+        purchase_prices=purchase_prices,
+        sell_prices=[price * generator.uniform(0.9, 1.5) for price in purchase_prices],
+        trade_volumes=[generator.choice([10, 20, 60, 100]) for _ in range(CANDIDATES)],
+        purchase_impacts=[generator.uniform(0, 0.08) for _ in range(CANDIDATES)],
+        sell_impacts=[generator.uniform(0, 0.08) for _ in range(CANDIDATES)],
+        cargo_space=120,
+        budget=100_000,
+        travel_seconds=[generator.uniform(20, 600) for _ in range(CANDIDATES)],
+    )
@@ -0,0 +1,87 @@
+"""
+Range queries against a price history of a million observations (100 markets trading 20
+goods, observed every 5 minutes for about 42 hours). Run with:
+
+BENCHMARK=1 pytest trader/tests/benchmarks --benchmark-only
+"""
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from pytest import fixture, mark
+from pytest_benchmark.fixture import BenchmarkFixture
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, create_engine
+
+from trader.dao.market_prices import (
+    MarketPrice,
+    MarketSymbol,
+    encode_symbols,
+    get_market_price_history,
+)
+
+WAYPOINTS = 100
+GOODS = 20
+OBSERVATIONS = 500
+INTERVAL = timedelta(minutes=5)
+NOW = datetime(2026, 10, 19, tzinfo=UTC)
+
+
+@fixture(scope="module")
+def engine(tmp_path_factory) -> Engine:
+    path: Path = tmp_path_factory.mktemp("prices") / "prices.db"
+    engine = create_engine(f"sqlite:///{path}")
+    MarketSymbol.metadata.create_all(
+        engine, tables=[MarketSymbol.__table__, MarketPrice.__table__]  # type: ignore
+    )
+    waypoints = [f"X1-BENCH-{idx}" for idx in range(WAYPOINTS)]
+    goods = [f"GOOD_{idx}" for idx in range(GOODS)]
+    with Session(engine) as session:
+        ids = encode_symbols(session, waypoints + goods + ["MODERATE"])
+        session.commit()
+    start = int((NOW - INTERVAL * OBSERVATIONS).timestamp())
+    rows = (
+        (
+            ids[waypoint],
+            ids[good],
+            start + step * int(INTERVAL.total_seconds()),
+            ids["MODERATE"],
+            100,
+            step % 97 + 10,
+            step % 89 + 12,
+        )
+        for waypoint in waypoints
+        for good in goods
+        for step in range(OBSERVATIONS)
+    )
+    connection = engine.raw_connection()
+    connection.executemany("INSERT INTO marketprice VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    connection.commit()
+    connection.close()
+    return engine
+
+
+@mark.benchmark(group="market-prices")
+def test_price_of_good_at_every_market_over_6h(
+    benchmark: BenchmarkFixture, engine: Engine
+):
+    history = benchmark(
+        get_market_price_history,
+        engine=engine,
+        good_symbol="GOOD_7",
+        since=NOW - timedelta(hours=6),
+    )
+    assert len(history) == WAYPOINTS * int(timedelta(hours=6) / INTERVAL)
+
+
+@mark.benchmark(group="market-prices")
+def test_price_of_good_at_one_market_over_6h(
+    benchmark: BenchmarkFixture, engine: Engine
+):
+    history = benchmark(
+        get_market_price_history,
+        engine=engine,
+        good_symbol="GOOD_7",
+        since=NOW - timedelta(hours=6),
+        waypoint_symbol="X1-BENCH-42",
+    )
+    assert len(history) == int(timedelta(hours=6) / INTERVAL)
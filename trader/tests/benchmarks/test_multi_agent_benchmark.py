@@ -0,0 +1,76 @@
+"""
+Aggregate request throughput of several agents run side by side in one process,
+against a local server that rate limits each token the way the API does. Every agent
+has its own request queue and so its own rate limit, so throughput should scale
+linearly with the number of tokens. Run with:
+
+BENCHMARK=1 pytest trader/tests/benchmarks --benchmark-only
+"""
+from time import perf_counter
+from typing import Iterator, List
+from uuid import uuid4
+
+import httpx
+from pytest import MonkeyPatch, fixture, mark
+from pytest_benchmark.fixture import BenchmarkFixture
+from pytest_socket import enable_socket
+
+from trader.client.client import Client
+from trader.client.request import ClientRequest
+from trader.queues import request_queue as request_queue_module
+from trader.tests.mocks.flaky_server import FlakyServer
+
+REQUESTS_PER_SECOND = 20
+REQUESTS_PER_AGENT = 40
+
+
+@fixture
+def server() -> Iterator[FlakyServer]:
+    enable_socket()
+    server = FlakyServer(requests_per_second=REQUESTS_PER_SECOND)
+    server.start()
+    yield server
+    server.stop()
+
+
+@mark.parametrize("agents", [1, 2, 4])
+@mark.benchmark(group="multi-agent")
+def test_throughput_scales_with_agents(
+    benchmark: BenchmarkFixture,
+    server: FlakyServer,
+    monkeypatch: MonkeyPatch,
+    agents: int,
+):
+    monkeypatch.setattr(
+        request_queue_module, "MAXIMUM_REQUESTS_PER_SECOND", REQUESTS_PER_SECOND
+    )
+    clients = [Client(api_key=f"benchmark-{uuid4()}") for _ in range(agents)]
+    throughputs: List[float] = []
+
+    def send_requests():
+        start = perf_counter()
+        request_ids = [
+            (
+                client,
+                client.request_queue.enqueue(
+                    priority=0,
+                    request=ClientRequest(
+                        function=httpx.get,
+                        arguments={
+                            "url": server.url("/my/agent"),
+                            "headers": {"Authorization": client.core_client.bearer},
+                        },
+                    ),
+                ),
+            )
+            for _ in range(REQUESTS_PER_AGENT)
+            for client in clients
+        ]
+        for client, request_id in request_ids:
+            assert client.request_queue.wait_for_response(request_id).is_success
+        throughputs.append(len(request_ids) / (perf_counter() - start))
+
+    benchmark.pedantic(send_requests, rounds=3, iterations=1)
+    benchmark.extra_info["agents"] = agents
+    benchmark.extra_info["requests_per_second"] = sum(throughputs) / len(throughputs)
+    assert len(set(server.served_by_token.values())) == 1
@@ -0,0 +1,63 @@
+"""
+Cost of planning trades for a system from scratch against reusing a memoized plan, as
+every trader in the system did before plans were shared. Run with:
+
+BENCHMARK=1 pytest trader/tests/benchmarks --benchmark-only
+"""
+from typing import List, Tuple
+
+from pytest import fixture, mark
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from trader.dao.markets import MarketTradeGood
+from trader.dao.waypoints import Waypoint
+from trader.fleet.planner import Planner, get_market_snapshot_version, plan_trades
+from trader.tests.factories.synthetic import (
+    SYSTEM_SYMBOL,
+    build_market_trade_goods,
+    build_waypoints,
+    to_dao_waypoints,
+)
+
+WAYPOINTS = 40
+
+
+@fixture
+def system() -> Tuple[List[MarketTradeGood], List[Waypoint]]:
+    waypoints = build_waypoints(count=WAYPOINTS, seed=37)
+    trade_goods = build_market_trade_goods(waypoints=waypoints, seed=37)
+    return trade_goods, to_dao_waypoints(waypoints)
+
+
+@mark.benchmark(group="planner")
+def test_plan_trades_from_scratch(
+    benchmark: BenchmarkFixture, system: Tuple[List[MarketTradeGood], List[Waypoint]]
+):
+    trade_goods, waypoints = system
+    benchmark(
+        plan_trades,
+        trade_goods=trade_goods,
+        waypoints=waypoints,
+        limit=10,
+        prefer_within_cluster=True,
+    )
+
+
+@mark.benchmark(group="planner")
+def test_plan_trades_memoized(
+    benchmark: BenchmarkFixture, system: Tuple[List[MarketTradeGood], List[Waypoint]]
+):
+    trade_goods, waypoints = system
+    planner = Planner()
+
+    def plan():
+        planner.plan_trades(
+            system_symbol=SYSTEM_SYMBOL,
+            market_snapshot_version=get_market_snapshot_version(trade_goods),
+            trade_goods=trade_goods,
+            waypoints=waypoints,
+        )
+
+    plan()
+    benchmark(plan)
+    planner.shutdown()
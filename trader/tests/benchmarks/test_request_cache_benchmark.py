@@ -0,0 +1,68 @@
+"""
+Cost of reading and writing the request cache with more or fewer responses already
+cached. Run with:
+
+BENCHMARK=1 pytest trader/tests/benchmarks --benchmark-only
+"""
+from typing import Iterator, List, Tuple
+from uuid import uuid4
+
+import httpx
+from pytest import fixture, mark
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from trader.client.request_cache import Cache, RequestKey
+from trader.tests.factories.synthetic import build_market
+
+CACHED_RESPONSES = [100, 10_000]
+# a market with its trade goods and transactions, a typical cached response
+RESPONSE = httpx.Response(
+    200,
+    content=build_market(waypoint_symbol="X1-CACHE-A1", transactions=20).to_json(),
+)
+
+
+@fixture(params=CACHED_RESPONSES, ids=lambda count: f"cached-{count}")
+def cache(request) -> Iterator[Tuple[Cache, List[RequestKey]]]:
+    # large enough to keep every response, so nothing is evicted while measuring
+    cache: Cache = type.__call__(
+        Cache,
+        disable_background_processes=True,
+        maximum_entries=10 * request.param,
+        maximum_bytes=2**40,
+    )
+    base_url = f"https://example.com/{uuid4()}"
+    keys = [
+        RequestKey.create(method="GET", url=f"{base_url}/{idx}")
+        for idx in range(request.param)
+    ]
+    for key in keys:
+        cache.set_kv_cache(key=key, response=RESPONSE)
+    yield cache, keys
+    cache.invalidate_url(url=base_url, include_subpaths=True)
+
+
+@mark.benchmark(group="cache-get")
+def test_get_kv_cache_hit(
+    benchmark: BenchmarkFixture, cache: Tuple[Cache, List[RequestKey]]
+):
+    cache_instance, keys = cache
+    cached_response = benchmark(cache_instance.get_kv_cache, key=keys[len(keys) // 2])
+    assert cached_response
+
+
+@mark.benchmark(group="cache-get")
+def test_get_kv_cache_miss(
+    benchmark: BenchmarkFixture, cache: Tuple[Cache, List[RequestKey]]
+):
+    cache_instance, _ = cache
+    key = RequestKey.create(method="GET", url=f"https://example.com/{uuid4()}")
+    assert benchmark(cache_instance.get_kv_cache, key=key) is None
+
+
+@mark.benchmark(group="cache-set")
+def test_set_kv_cache(
+    benchmark: BenchmarkFixture, cache: Tuple[Cache, List[RequestKey]]
+):
+    cache_instance, keys = cache
+    benchmark(cache_instance.set_kv_cache, key=keys[0], response=RESPONSE)
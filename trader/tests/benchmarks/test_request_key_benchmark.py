@@ -0,0 +1,39 @@
+"""
+Cost of deriving the cache identity of a request. Run with:
+
+BENCHMARK=1 pytest trader/tests/benchmarks --benchmark-only
+"""
+import hashlib
+import json
+
+from pytest import mark
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from trader.client.request_cache import RequestKey
+
+URL = "https://api.spacetraders.io/v2/systems/X1-DF55/waypoints"
+DATA = {"shipType": "SHIP_MINING_DRONE", "waypointSymbol": "X1-DF55-20250Z"}
+PARAMS = {"limit": 20, "page": 3}
+
+
+def legacy_request_key():
+    # previous scheme, which serialized and hashed the request on every cache call
+    for _ in range(2):
+        hashlib.md5(
+            bytes(
+                f"GET-{URL}-{json.dumps(DATA, sort_keys=True)}-{json.dumps(PARAMS, sort_keys=True)}",
+                "UTF-8",
+            )
+        ).hexdigest()
+    json.dumps(DATA, sort_keys=True)
+    json.dumps(DATA, sort_keys=True)
+
+
+@mark.benchmark(group="request-key")
+def test_request_key(benchmark: BenchmarkFixture):
+    benchmark(RequestKey.create, method="GET", url=URL, data=DATA, params=PARAMS)
+
+
+@mark.benchmark(group="request-key")
+def test_legacy_request_key(benchmark: BenchmarkFixture):
+    benchmark(legacy_request_key)
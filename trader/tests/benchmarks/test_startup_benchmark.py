@@ -0,0 +1,51 @@
+"""
+Cold start cost of the CLI, measured in fresh interpreters with -X importtime. Run with:
+
+BENCHMARK=1 pytest trader/tests/benchmarks --benchmark-only
+"""
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+from pytest import mark
+from pytest_benchmark.fixture import BenchmarkFixture
+
+IMPORT_TIME_PATTERN = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|\s+(\S+)")
+ROUNDS = 5
+
+
+def import_times(statement: str, cwd: Path) -> Dict[str, int]:
+    """
+    Runs statement in a fresh interpreter and returns the cumulative import time in
+    microseconds of each top level import.
+    """
+    # run from a temporary directory so the cli log file and database stay out of the tree
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        check=True,
+        capture_output=True,
+        cwd=cwd,
+        text=True,
+    ).stderr
+    return {
+        module: int(cumulative)
+        for cumulative, module in IMPORT_TIME_PATTERN.findall(stderr)
+    }
+
+
+@mark.benchmark(group="startup")
+@mark.parametrize(
+    "statement",
+    [
+        "import trader.cli",
+        "from trader.cli import cli; cli.main(['--help'], standalone_mode=False)",
+    ],
+    ids=["import", "help"],
+)
+def test_cli_cold_start(benchmark: BenchmarkFixture, statement: str, tmp_path: Path):
+    times = benchmark.pedantic(
+        import_times, args=(statement,), kwargs={"cwd": tmp_path}, rounds=ROUNDS
+    )
+    benchmark.extra_info["trader.cli_import_us"] = times["trader.cli"]
@@ -1,3 +1,6 @@
+import os
+
+import pytest
 from pytest_socket import disable_socket
 
 from trader.tests.mocks.common import default_read_api_key_from_disk as _
@@ -8,5 +11,15 @@ pytest_plugins = [
 ]
 
 
+def pytest_collection_modifyitems(config, items):
+    # benchmarks are slow and noisy, only run them when explicitly requested
+    if "BENCHMARK" in os.environ:
+        return
+    skip_benchmark = pytest.mark.skip(reason="set BENCHMARK=1 to run benchmarks")
+    for item in items:
+        if "benchmark" in getattr(item, "fixturenames", []):
+            item.add_marker(skip_benchmark)
+
+
 def pytest_runtest_setup():
     disable_socket()
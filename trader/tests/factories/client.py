@@ -12,7 +12,7 @@ from trader.client.cooldown import Cooldown
 from trader.client.extraction import Extraction
 from trader.client.faction import Faction
 from trader.client.fuel import Refuel
-from trader.client.market import Market, PurchaseOrSale
+from trader.client.market import Market, PurchaseOrSale, TradeGood
 from trader.client.navigation import Dock, NavigationAndFuel, Orbit
 from trader.client.payload import (
     AgentPayload,
@@ -79,6 +79,10 @@ class MarketFactory(DataclassFactory[Market]):
     __model__ = Market
 
 
+class TradeGoodFactory(DataclassFactory[TradeGood]):
+    __model__ = TradeGood
+
+
 class SaleFactory(DataclassFactory[PurchaseOrSale]):
     __model__ = PurchaseOrSale
 
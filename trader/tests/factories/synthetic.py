@@ -0,0 +1,176 @@
+"""
+Synthetic systems of waypoints and markets built on the client factories, for
+benchmarking at scale. Generation is seeded so every run measures the same data.
+"""
+from random import Random
+from typing import List, Union
+
+from trader.client.market import (
+    Exchange,
+    Export,
+    Import,
+    Market,
+    TradeGood,
+    Transaction,
+)
+from trader.client.waypoint import Orbital, Traits, Waypoint
+from trader.dao.markets import MarketTradeGood
+from trader.dao.waypoints import Waypoint as WaypointDAO
+from trader.dao.waypoints import WaypointTrait
+from trader.tests.factories.client import (
+    MarketFactory,
+    TradeGoodFactory,
+    WaypointFactory,
+)
+
+SYSTEM_SYMBOL = "X1-SYNTH"
+GOODS = [
+    "IRON_ORE",
+    "COPPER_ORE",
+    "ALUMINUM_ORE",
+    "FUEL",
+    "FOOD",
+    "FABRICS",
+    "MACHINERY",
+    "ELECTRONICS",
+]
+SUPPLIES = ["SCARCE", "LIMITED", "MODERATE", "HIGH", "ABUNDANT"]
+
+
+def seed_factories(seed: int) -> Random:
+    for factory in [MarketFactory, TradeGoodFactory, WaypointFactory]:
+        factory.seed_random(seed)
+    return Random(seed)
+
+
+def build_waypoints(
+    count: int, system_symbol: str = SYSTEM_SYMBOL, seed: int = 0
+) -> List[Waypoint]:
+    """
+    Waypoints scattered around the system, every one of them a marketplace
+    """
+    generator = seed_factories(seed)
+    return [
+        WaypointFactory.build(
+            symbol=f"{system_symbol}-{idx}",
+            waypoint_system_type="PLANET",
+            system_symbol=system_symbol,
+            x=generator.randint(-500, 500),
+            y=generator.randint(-500, 500),
+            orbitals=[Orbital(symbol=f"{system_symbol}-{idx}-MOON")],
+            traits=[
+                Traits(
+                    symbol="MARKETPLACE",
+                    name="Marketplace",
+                    description="A thriving center of commerce.",
+                )
+            ],
+            orbits=None,
+        )
+        for idx in range(count)
+    ]
+
+
+def to_dao_waypoints(waypoints: List[Waypoint]) -> List[WaypointDAO]:
+    """
+    Waypoints as loaded from the database, without saving them
+    """
+    dao_waypoints = []
+    for waypoint in waypoints:
+        dao_waypoint = WaypointDAO(
+            id=waypoint.symbol,
+            waypoint_system_type=waypoint.waypoint_system_type,
+            system_symbol=waypoint.system_symbol,
+            symbol=waypoint.symbol,
+            x=waypoint.x,
+            y=waypoint.y,
+        )
+        dao_waypoint.traits = [
+            WaypointTrait(
+                symbol=trait.symbol, name=trait.name, description=trait.description
+            )
+            for trait in waypoint.traits
+        ]
+        dao_waypoints.append(dao_waypoint)
+    return dao_waypoints
+
+
+def build_market(
+    waypoint_symbol: str, goods: List[str] = GOODS, transactions: int = 0, seed: int = 0
+) -> Market:
+    """
+    A market trading every good, priced around a base price per good so markets of a
+    system have arbitrage between them
+    """
+    generator = seed_factories(seed)
+    trade_goods = []
+    for good_idx, good in enumerate(goods):
+        purchase_price = max(
+            1, round((good_idx + 1) * 20 * generator.uniform(0.6, 1.4))
+        )
+        trade_goods.append(
+            TradeGoodFactory.build(
+                symbol=good,
+                trade_volume=generator.choice([10, 20, 40, 60]),
+                supply=generator.choice(SUPPLIES),
+                purchase_price=purchase_price,
+                sell_price=max(1, purchase_price - generator.randint(1, 10)),
+            )
+        )
+    return MarketFactory.build(
+        symbol=waypoint_symbol,
+        exports=[Export(symbol=good, name=good, description="") for good in goods[:2]],
+        imports=[Import(symbol=good, name=good, description="") for good in goods[2:4]],
+        exchange=[
+            Exchange(symbol=good, name=good, description="") for good in goods[4:]
+        ],
+        transactions=[
+            Transaction(
+                waypoint_symbol=waypoint_symbol,
+                ship_symbol="SYNTH-1",
+                trade_symbol=trade_good.symbol,
+                transaction_type="PURCHASE",
+                units=trade_good.trade_volume,
+                price_per_unit=trade_good.purchase_price,
+                total_price=trade_good.trade_volume * trade_good.purchase_price,
+                timestamp=f"2023-06-01T00:{idx % 60:02}:00.000Z",
+            )
+            for idx, trade_good in enumerate(
+                trade_goods[idx % len(trade_goods)] for idx in range(transactions)
+            )
+        ],
+        trade_goods=trade_goods,
+    )
+
+
+def to_dao_trade_good(
+    trade_good: TradeGood, waypoint: Union[Waypoint, WaypointDAO]
+) -> MarketTradeGood:
+    """
+    A trade good of the market at waypoint as loaded from the database, without saving it
+    """
+    return MarketTradeGood(
+        symbol=trade_good.symbol,
+        trade_volume=trade_good.trade_volume,
+        supply=trade_good.supply,
+        purchase_price=trade_good.purchase_price,
+        sell_price=trade_good.sell_price,
+        waypoint_symbol=waypoint.symbol,
+        system_symbol=waypoint.system_symbol,
+    )
+
+
+def build_market_trade_goods(
+    waypoints: List[Waypoint], seed: int = 0
+) -> List[MarketTradeGood]:
+    """
+    Trade goods of a market at every waypoint, as loaded from the database
+    """
+    return [
+        to_dao_trade_good(trade_good=trade_good, waypoint=waypoint)
+        for idx, waypoint in enumerate(waypoints)
+        for trade_good in build_market(
+            waypoint_symbol=waypoint.symbol, seed=seed + idx
+        ).trade_goods
+        or []
+    ]
@@ -0,0 +1,116 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import monotonic, sleep
+from typing import Dict, List, Optional
+
+
+@dataclass
+class Fault:
+    """
+    How the server misbehaves for one request, dropping the connection without a
+    response, stalling before responding and/or responding with an error
+    """
+
+    status_code: int = 200
+    headers: Dict[str, str] = field(default_factory=dict)
+    delay: float = 0
+    drop: bool = False
+
+
+class FlakyServer:
+    """
+    Local stand in for the API that works through a script of faults per path before
+    responding normally, to test how requests cope with an unreliable API.
+
+    If requests_per_second is set, each token (Authorization header) is rate limited
+    like the API, with a 429 and retry-after for requests over the limit.
+    """
+
+    faults: Dict[str, List[Fault]]
+    hits: Dict[str, int]
+    lock: Lock
+    requests_per_second: Optional[float]
+    server: ThreadingHTTPServer
+    # monotonic time each token may next make a request
+    token_available_at: Dict[str, float]
+    served_by_token: Dict[str, int]
+
+    def __init__(self, requests_per_second: Optional[float] = None):
+        self.faults = defaultdict(list)
+        self.hits = defaultdict(int)
+        self.lock = Lock()
+        self.requests_per_second = requests_per_second
+        self.token_available_at = defaultdict(float)
+        self.served_by_token = defaultdict(int)
+        flaky_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def respond(self):
+                fault = flaky_server.next_fault(
+                    path=self.path, token=self.headers.get("Authorization", "")
+                )
+                if fault.delay:
+                    sleep(fault.delay)
+                if fault.drop:
+                    self.close_connection = True
+                    return
+                body = f'{{"path": "{self.path}"}}'.encode()
+                self.send_response(fault.status_code)
+                for name, value in fault.headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self.respond()
+
+            def do_POST(self):
+                self.respond()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+
+    def next_fault(self, path: str, token: str = "") -> Fault:
+        with self.lock:
+            self.hits[path] += 1
+            if self.requests_per_second:
+                now = monotonic()
+                available_at = self.token_available_at[token]
+                if now < available_at:
+                    return Fault(
+                        status_code=429,
+                        headers={"retry-after": f"{available_at - now:.3f}"},
+                    )
+                self.token_available_at[token] = now + 1 / self.requests_per_second
+            if self.faults[path]:
+                return self.faults[path].pop(0)
+            self.served_by_token[token] += 1
+        return Fault()
+
+    def add_faults(self, path: str, faults: List[Fault]):
+        with self.lock:
+            self.faults[path].extend(faults)
+
+    def clear_faults(self, path: str):
+        with self.lock:
+            self.faults[path] = []
+
+    def url(self, path: str) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def start(self):
+        thread = Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
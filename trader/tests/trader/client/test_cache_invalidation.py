@@ -0,0 +1,31 @@
+from trader.client.cache_invalidation import get_invalidated_paths
+
+
+def test_ship_mutation_invalidates_ship_reads():
+    assert get_invalidated_paths(method="POST", path="/my/ships/SHIP-1/dock") == [
+        "/my/ships",
+        "/my/ships/SHIP-1/*",
+    ]
+
+
+def test_method_must_match():
+    assert get_invalidated_paths(method="GET", path="/my/ships/SHIP-1/dock") == []
+    assert get_invalidated_paths(method="POST", path="/my/ships/SHIP-1/cargo") == []
+
+
+def test_placeholders_are_filled_from_request_body():
+    paths = get_invalidated_paths(
+        method="POST",
+        path="/my/ships",
+        data={"shipType": "SHIP_MINING_DRONE", "waypointSymbol": "X1-DF55-20250Z"},
+    )
+    assert "/systems/X1-DF55/waypoints/X1-DF55-20250Z/shipyard" in paths
+    assert "/my/agent" in paths
+
+
+def test_unresolved_targets_are_skipped():
+    assert get_invalidated_paths(method="POST", path="/my/ships") == [
+        "/my/ships",
+        "/my/agent",
+        "/agents",
+    ]
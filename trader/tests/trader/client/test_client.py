@@ -0,0 +1,111 @@
+import time
+from typing import Any
+from unittest.mock import patch
+from uuid import uuid4
+
+import httpx
+
+from trader.client.client import BASE_URL, REVALIDATION_PRIORITY, Client
+from trader.client.request_cache import RequestKey
+from trader.dao.dao import DAO
+
+
+def test_stale_response_is_served_and_revalidated_at_lowest_priority():
+    client = Client(api_key="test", disable_background_processes=True)
+    url = f"https://example.com/{uuid4()}"
+    client.core_client.cache.set_kv_cache(
+        key=RequestKey.create(method="GET", url=url),
+        response=httpx.Response(200, content=b"stale"),
+        cache_timeout=-1,
+        stale_while_revalidate=60,
+    )
+    priorities = []
+
+    def dispatch_request(priority: int, **_: Any) -> httpx.Response:
+        priorities.append(priority)
+        return httpx.Response(200, content=b"fresh")
+
+    with patch.object(client, "dispatch_request", side_effect=dispatch_request):
+        response = client.execute_single_request(
+            url=url, method="GET", stale_while_revalidate=60
+        )
+        assert response.content == b"stale"
+        deadline = time.time() + 5
+        while client.core_client.revalidations and time.time() < deadline:
+            time.sleep(0.01)
+
+    assert priorities == [REVALIDATION_PRIORITY]
+    cached_response = client.core_client.cache.get_kv_cache(
+        key=RequestKey.create(method="GET", url=url)
+    )
+    assert cached_response and cached_response.response.content == b"fresh"
+
+
+def test_stale_response_without_policy_forces_blocking_fetch():
+    client = Client(api_key="test", disable_background_processes=True)
+    url = f"https://example.com/{uuid4()}"
+    client.core_client.cache.set_kv_cache(
+        key=RequestKey.create(method="GET", url=url),
+        response=httpx.Response(200, content=b"stale"),
+        cache_timeout=-1,
+        stale_while_revalidate=60,
+    )
+    with patch.object(
+        client,
+        "dispatch_request",
+        return_value=httpx.Response(200, content=b"fresh"),
+    ):
+        response = client.execute_single_request(url=url, method="GET")
+    assert response.content == b"fresh"
+
+
+def test_mutation_invalidates_dependent_cached_reads():
+    client = Client(api_key="test", disable_background_processes=True)
+    call_sign = f"SHIP-{uuid4()}"
+    cargo_key = RequestKey.create(
+        method="GET", url=f"{BASE_URL}/my/ships/{call_sign}/cargo"
+    )
+    agent_key = RequestKey.create(method="GET", url=f"{BASE_URL}/my/agent")
+    for key in [cargo_key, agent_key]:
+        client.core_client.cache.set_kv_cache(key=key, response=httpx.Response(200))
+
+    with patch.object(client, "dispatch_request", return_value=httpx.Response(200)):
+        client.execute_single_request(
+            url=f"{BASE_URL}/my/ships/{call_sign}/extract", method="POST"
+        )
+
+    assert client.core_client.cache.get_kv_cache(key=cargo_key) is None
+    assert client.core_client.cache.get_kv_cache(key=agent_key)
+
+
+def test_agents_have_their_own_client_and_queue_but_share_cache_and_database():
+    first = Client(api_key="first-agent", disable_background_processes=True)
+    second = Client(api_key="second-agent", disable_background_processes=True)
+    assert first.core_client is not second.core_client
+    assert first.request_queue is not second.request_queue
+    assert first.core_client.cache is second.core_client.cache
+    assert first.core_client.cache.dao is DAO()
+    assert (
+        Client(api_key="first-agent", disable_background_processes=True).core_client
+        is first.core_client
+    )
+
+
+def test_agent_responses_are_only_served_from_cache_to_that_agent():
+    first = Client(api_key="first-agent", disable_background_processes=True)
+    second = Client(api_key="second-agent", disable_background_processes=True)
+    agent_url = f"{BASE_URL}/my/agent-{uuid4()}"
+    system_url = f"{BASE_URL}/systems/{uuid4()}"
+
+    def fetch(client: Client, url: str) -> bytes:
+        with patch.object(
+            client,
+            "dispatch_request",
+            return_value=httpx.Response(200, content=client.core_client.api_key.encode()),  # type: ignore
+        ):
+            return client.execute_single_request(url=url, method="GET").content
+
+    assert fetch(first, agent_url) == b"first-agent"
+    assert fetch(second, agent_url) == b"second-agent"
+    assert fetch(first, system_url) == b"first-agent"
+    assert fetch(second, system_url) == b"first-agent"
@@ -0,0 +1,207 @@
+from uuid import uuid4
+
+import httpx
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, delete
+
+from trader.client import request_cache
+from trader.client.request_cache import PRUNE_BATCH_SIZE, Cache, RequestKey
+from trader.dao.requests import CachedRequest
+
+
+def test_fresh_response_is_not_stale():
+    cache = Cache()
+    url = f"https://example.com/{uuid4()}"
+    cache.set_kv_cache(
+        key=RequestKey.create(method="GET", url=url), response=httpx.Response(200)
+    )
+    cached_response = cache.get_kv_cache(key=RequestKey.create(method="GET", url=url))
+    assert cached_response and not cached_response.stale
+
+
+def test_response_within_stale_window_is_served_as_stale():
+    cache = Cache()
+    url = f"https://example.com/{uuid4()}"
+    cache.set_kv_cache(
+        key=RequestKey.create(method="GET", url=url),
+        response=httpx.Response(200, content=b"stale"),
+        cache_timeout=-1,
+        stale_while_revalidate=60,
+    )
+    cached_response = cache.get_kv_cache(key=RequestKey.create(method="GET", url=url))
+    assert cached_response and cached_response.stale
+    assert cached_response.response.content == b"stale"
+
+
+def test_response_past_maximum_staleness_is_a_miss():
+    cache = Cache()
+    url = f"https://example.com/{uuid4()}"
+    cache.set_kv_cache(
+        key=RequestKey.create(method="GET", url=url),
+        response=httpx.Response(200),
+        cache_timeout=-10,
+        stale_while_revalidate=5,
+    )
+    assert cache.get_kv_cache(key=RequestKey.create(method="GET", url=url)) is None
+
+
+def test_set_replaces_existing_record():
+    cache = Cache()
+    url = f"https://example.com/{uuid4()}"
+    cache.set_kv_cache(
+        key=RequestKey.create(method="GET", url=url),
+        response=httpx.Response(200, content=b"1"),
+    )
+    cache.set_kv_cache(
+        key=RequestKey.create(method="GET", url=url),
+        response=httpx.Response(200, content=b"2"),
+    )
+    cached_response = cache.get_kv_cache(key=RequestKey.create(method="GET", url=url))
+    assert cached_response and cached_response.response.content == b"2"
+
+
+def clear_cache(cache: Cache):
+    with Session(cache.dao.engine) as session:
+        session.exec(delete(CachedRequest))  # type: ignore
+        session.commit()
+
+
+def get_prune_count() -> int:
+    prune_duration = request_cache.cache_prune_duration.get()
+    return prune_duration.count if prune_duration else 0
+
+
+def test_prune_removes_expired_records_in_batches():
+    cache = Cache()
+    clear_cache(cache)
+    for idx in range(PRUNE_BATCH_SIZE + 1):
+        cache.set_kv_cache(
+            key=RequestKey.create(
+                method="GET", url=f"https://example.com/expired/{idx}"
+            ),
+            response=httpx.Response(200),
+            cache_timeout=-1,
+        )
+    expirations = cache.expirations
+    prunes = get_prune_count()
+    cache.prune()
+    assert cache.expirations - expirations == PRUNE_BATCH_SIZE + 1
+    assert cache.entries == 0
+    assert get_prune_count() == prunes + 1
+
+
+def test_prune_evicts_least_recently_used_records_over_budget():
+    cache = Cache()
+    clear_cache(cache)
+    urls = [f"https://example.com/lru/{idx}" for idx in range(3)]
+    for url in urls:
+        cache.set_kv_cache(
+            key=RequestKey.create(method="GET", url=url), response=httpx.Response(200)
+        )
+
+    maximum_entries = cache.maximum_entries
+    cache.maximum_entries = 2
+    try:
+        evictions = cache.evictions
+        cache.prune()
+    finally:
+        cache.maximum_entries = maximum_entries
+
+    assert cache.evictions - evictions == 1
+    assert cache.entries == 2
+    assert cache.get_kv_cache(key=RequestKey.create(method="GET", url=urls[0])) is None
+    assert cache.get_kv_cache(key=RequestKey.create(method="GET", url=urls[2]))
+
+
+def test_prune_evicts_records_over_byte_budget():
+    cache = Cache()
+    clear_cache(cache)
+    for idx in range(3):
+        cache.set_kv_cache(
+            key=RequestKey.create(method="GET", url=f"https://example.com/bytes/{idx}"),
+            response=httpx.Response(200, content=b"x" * 1024),
+        )
+    _, total_bytes = cache.get_cache_usage()
+
+    maximum_bytes = cache.maximum_bytes
+    cache.maximum_bytes = total_bytes - 1
+    try:
+        cache.prune()
+    finally:
+        cache.maximum_bytes = maximum_bytes
+
+    assert cache.entries == 2
+    assert cache.total_bytes < total_bytes
+
+
+def test_request_key_is_canonical():
+    key = RequestKey.create(
+        method="GET", url="https://example.com", params={"page": 1, "limit": 20}
+    )
+    assert key == RequestKey.create(
+        method="GET", url="https://example.com", params={"limit": 20, "page": 1}
+    )
+    assert key.id != RequestKey.create(method="GET", url="https://example.com").id
+    assert key.params == '{"limit": 20, "page": 1}'
+    assert key.data == "{}"
+
+
+def test_params_are_stored_in_params_column():
+    cache = Cache()
+    key = RequestKey.create(
+        method="POST",
+        url=f"https://example.com/{uuid4()}",
+        data={"units": 1},
+        params={"page": 2},
+    )
+    cache.set_kv_cache(key=key, response=httpx.Response(200))
+    with Session(cache.dao.engine) as session:
+        cached_request = session.get(CachedRequest, key.id)
+    assert cached_request
+    assert cached_request.data == '{"units": 1}'
+    assert cached_request.params == '{"page": 2}'
+
+
+def test_invalidate_url_prefix():
+    cache = Cache()
+    prefix = f"https://example.com/{uuid4()}"
+    keys = [
+        RequestKey.create(method="GET", url=prefix),
+        RequestKey.create(method="GET", url=f"{prefix}/ships", params={"page": 1}),
+        RequestKey.create(method="GET", url=f"{prefix}/ships", params={"page": 2}),
+    ]
+    unrelated_key = RequestKey.create(
+        method="GET", url=f"https://example.com/{uuid4()}"
+    )
+    for key in [*keys, unrelated_key]:
+        cache.set_kv_cache(key=key, response=httpx.Response(200))
+
+    assert cache.invalidate_url_prefix(url_prefix=prefix) == len(keys)
+    assert all(cache.get_kv_cache(key=key) is None for key in keys)
+    assert cache.get_kv_cache(key=unrelated_key)
+
+
+def test_invalidate_url_only_matches_whole_path_segments():
+    cache = Cache()
+    url = f"https://example.com/{uuid4()}/SHIP-1"
+    keys = [
+        RequestKey.create(method="GET", url=url),
+        RequestKey.create(method="GET", url=f"{url}/cargo"),
+        RequestKey.create(method="GET", url=f"{url}0"),
+    ]
+    for key in keys:
+        cache.set_kv_cache(key=key, response=httpx.Response(200))
+
+    assert cache.invalidate_url(url=url) == 1
+    assert cache.get_kv_cache(key=keys[1])
+    assert cache.invalidate_url(url=url, include_subpaths=True) == 1
+    assert cache.get_kv_cache(key=keys[2])
+
+
+def test_invalidation_failures_are_logged_rather_than_raised(monkeypatch):
+    def locked_session(*args, **kwargs):
+        raise OperationalError("DELETE", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(request_cache, "Session", locked_session)
+    url = f"https://example.com/{uuid4()}"
+    assert Cache().invalidate_url(url=url, include_subpaths=True) == 0
@@ -0,0 +1,70 @@
+from threading import Barrier, Thread
+from time import sleep
+from typing import List
+
+import httpx
+import pytest
+
+from trader.client.request_coalescer import RequestCoalescer
+
+CONCURRENT_CALLERS = 5
+
+
+def test_concurrent_identical_requests_share_one_call():
+    coalescer = RequestCoalescer()
+    barrier = Barrier(CONCURRENT_CALLERS)
+    calls: List[int] = []
+    responses: List[httpx.Response] = []
+
+    def request() -> httpx.Response:
+        calls.append(1)
+        sleep(0.2)  # long enough for every caller to arrive while in flight
+        return httpx.Response(200, content=b"{}")
+
+    def caller():
+        barrier.wait()
+        responses.append(coalescer.execute(key="same", request=request))
+
+    threads = [Thread(target=caller) for _ in range(CONCURRENT_CALLERS)]
+    [thread.start() for thread in threads]
+    [thread.join() for thread in threads]
+
+    assert len(calls) == 1
+    assert len(responses) == CONCURRENT_CALLERS
+    assert all([response is responses[0] for response in responses])
+    assert coalescer.dispatched_requests == 1
+    assert coalescer.coalesced_requests == CONCURRENT_CALLERS - 1
+    assert coalescer.in_flight == {}
+
+
+def test_sequential_requests_are_not_coalesced():
+    coalescer = RequestCoalescer()
+    for _ in range(3):
+        coalescer.execute(key="same", request=lambda: httpx.Response(200))
+    assert coalescer.dispatched_requests == 3
+    assert coalescer.coalesced_requests == 0
+
+
+def test_exceptions_reach_every_caller():
+    coalescer = RequestCoalescer()
+    barrier = Barrier(2)
+    errors: List[Exception] = []
+
+    def request() -> httpx.Response:
+        sleep(0.2)
+        raise httpx.ConnectError("boom")
+
+    def caller():
+        barrier.wait()
+        try:
+            coalescer.execute(key="same", request=request)
+        except httpx.ConnectError as e:
+            errors.append(e)
+
+    threads = [Thread(target=caller) for _ in range(2)]
+    [thread.start() for thread in threads]
+    [thread.join() for thread in threads]
+
+    assert len(errors) == 2
+    with pytest.raises(httpx.ConnectError):
+        coalescer.execute(key="same", request=request)
@@ -0,0 +1,98 @@
+from pathlib import Path
+from typing import Iterator
+from uuid import uuid4
+
+import httpx
+from pytest import MonkeyPatch, fixture
+from pytest_socket import enable_socket
+
+from trader.client import traffic as traffic_module
+from trader.client.request import ClientRequest
+from trader.client.traffic import (
+    RecordingTransport,
+    ReplayTransport,
+    TrafficArchive,
+    get_traffic_summary,
+    read_traffic_archive,
+)
+from trader.queues.request_queue import RequestQueue
+from trader.tests.mocks.flaky_server import Fault, FlakyServer
+
+
+@fixture
+def server() -> Iterator[FlakyServer]:
+    enable_socket()
+    server = FlakyServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+@fixture
+def archive_path(server: FlakyServer, tmp_path: Path) -> str:
+    """
+    An archive of a GET failing then succeeding and a POST with a body
+    """
+    path = str(tmp_path / f"{uuid4()}.jsonl.gz")
+    archive = TrafficArchive(path=path)
+    server.add_faults("/ships?page=1", [Fault(status_code=503)])
+    with httpx.Client(transport=RecordingTransport(archive=archive)) as client:
+        client.get(server.url("/ships"), params={"page": 1})
+        client.get(server.url("/ships"), params={"page": 1})
+        client.post(server.url("/ships/A/navigate"), json={"waypointSymbol": "B"})
+    archive.close()
+    return path
+
+
+def test_traffic_is_archived_in_order_with_timings(archive_path: str):
+    exchanges = read_traffic_archive(archive_path)
+    assert [(exchange.method, exchange.status_code) for exchange in exchanges] == [
+        ("GET", 503),
+        ("GET", 200),
+        ("POST", 200),
+    ]
+    assert exchanges[0].params == {"page": "1"}
+    assert exchanges[2].body == {"waypointSymbol": "B"}
+    assert all(exchange.elapsed >= 0 for exchange in exchanges)
+    assert exchanges[0].offset <= exchanges[1].offset <= exchanges[2].offset
+
+    summary = get_traffic_summary(exchanges)
+    assert [(row.endpoint, row.requests, row.errors) for row in summary] == [
+        ("GET /ships", 2, 1),
+        ("POST /ships/A/navigate", 1, 0),
+    ]
+
+
+def test_replay_answers_from_the_archive_without_the_api(archive_path: str):
+    replay = ReplayTransport(exchanges=read_traffic_archive(archive_path), speed=0)
+    # any server will do, requests never leave the transport
+    with httpx.Client(transport=replay, base_url="http://replayed.invalid") as client:
+        statuses = [client.get("/ships", params={"page": 1}).status_code for _ in "abc"]
+        # answered in recorded order, the last answer repeating
+        assert statuses == [503, 200, 200]
+        navigation = client.post("/ships/A/navigate", json={"waypointSymbol": "B"})
+        assert navigation.json() == {"path": "/ships/A/navigate"}
+        assert client.post("/ships/A/navigate", json={}).status_code == 404
+    assert (replay.served, replay.missed) == (4, 1)
+
+
+def test_request_queue_replays_when_asked_to(
+    archive_path: str, server: FlakyServer, monkeypatch: MonkeyPatch
+):
+    monkeypatch.setattr(traffic_module, "REPLAY_TRAFFIC", archive_path)
+    request_queue: RequestQueue = type.__call__(
+        RequestQueue, client_id=str(uuid4()), disable_background_processes=True
+    )
+    server.stop()
+    request_id = request_queue.enqueue(
+        priority=1,
+        request=ClientRequest(
+            function=httpx.post,
+            arguments={
+                "url": server.url("/ships/A/navigate"),
+                "json": {"waypointSymbol": "B"},
+            },
+        ),
+    )
+    request_queue.dequeue()
+    assert request_queue.wait_for_response(request_id).status_code == 200
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from alembic.script import ScriptDirectory
+from pytest import raises
+from sqlalchemy import inspect, text
+from sqlmodel import SQLModel, create_engine
+
+from trader.dao.dao import SCHEMA_REVISION, ensure_schema, get_schema_revision
+from trader.exceptions import TraderDaoException
+from trader.tests.plugins.alembic import ALEMBIC_CFG
+
+
+def test_schema_revision_is_alembic_head():
+    assert (
+        SCHEMA_REVISION == ScriptDirectory.from_config(ALEMBIC_CFG).get_current_head()
+    )
+
+
+def test_fresh_database_is_created_and_stamped(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    ensure_schema(engine=engine)
+    assert get_schema_revision(engine=engine) == SCHEMA_REVISION
+    # second start takes the fast path
+    ensure_schema(engine=engine)
+
+
+def test_unversioned_database_falls_back_to_create_all(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'unversioned.db'}")
+    SQLModel.metadata.tables["queue"].create(engine)
+    ensure_schema(engine=engine)
+    assert get_schema_revision(engine=engine) is None
+    assert "cachedrequest" in inspect(engine).get_table_names()
+
+
+def test_outdated_database_raises(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'outdated.db'}")
+    ensure_schema(engine=engine)
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE alembic_version SET version_num = 'outdated'"))
+    with raises(TraderDaoException):
+        ensure_schema(engine=engine)
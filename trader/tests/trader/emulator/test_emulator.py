@@ -0,0 +1,239 @@
+import json
+from datetime import timedelta
+from typing import Any, Dict, Iterator, Optional
+from uuid import uuid4
+
+import pytest
+from pytest import MonkeyPatch, fixture
+from pytest_socket import enable_socket
+
+from trader.client import client as client_module
+from trader.client.client import Client
+from trader.emulator.galaxy import generate_galaxy
+from trader.emulator.server import EmulatorServer
+from trader.emulator.world import EXTRACTION_COOLDOWN_SECONDS, STARTING_CREDITS, World
+from trader.exceptions import TraderClientException
+from trader.queues import request_queue as request_queue_module
+
+SPEED = 100
+
+
+@fixture
+def emulator() -> EmulatorServer:
+    # handle() is called directly in most tests, the server is only bound here
+    enable_socket()
+    return EmulatorServer(
+        world=World(galaxy=generate_galaxy(seed=7, systems=3), speed=SPEED),
+        requests_per_second=1000,
+        burst=1000,
+    )
+
+
+def call(
+    emulator: EmulatorServer,
+    method: str,
+    path: str,
+    token: Optional[str] = None,
+    body: Optional[Dict[str, Any]] = None,
+) -> Any:
+    status_code, content, _ = emulator.handle(
+        method=method,
+        path=f"/v2{path}",
+        authorization=f"Bearer {token}" if token else None,
+        body=json.dumps(body).encode() if body else b"",
+    )
+    if not content:
+        return None
+    payload = json.loads(content)
+    if status_code >= 400:
+        return payload["error"]
+    return payload["data"]
+
+
+def test_galaxy_is_generated_deterministically_from_its_seed():
+    galaxy = generate_galaxy(seed=7, systems=3)
+    assert galaxy == generate_galaxy(seed=7, systems=3)
+    assert galaxy != generate_galaxy(seed=8, systems=3)
+
+    headquarters = galaxy.waypoints[galaxy.headquarters]
+    system_waypoints = galaxy.systems[headquarters.system_symbol].waypoints
+    assert galaxy.headquarters in galaxy.markets
+    assert galaxy.headquarters in galaxy.shipyards
+    assert "FUEL" in galaxy.markets[galaxy.headquarters].goods
+    assert any(waypoint.deposits for waypoint in system_waypoints)
+
+
+def test_travel_and_cooldowns_run_at_emulated_speed(emulator: EmulatorServer):
+    token = emulator.register("TIMERS")
+    ship_symbol = "TIMERS-1"
+    galaxy = emulator.world.galaxy
+    asteroid = next(
+        waypoint
+        for waypoint in galaxy.waypoints.values()
+        if waypoint.deposits
+        and waypoint.system_symbol
+        == galaxy.waypoints[galaxy.headquarters].system_symbol
+    )
+
+    destination = {"waypointSymbol": asteroid.symbol}
+    navigate_path = f"/my/ships/{ship_symbol}/navigate"
+
+    error = call(emulator, "POST", navigate_path, token, body=destination)
+    assert error["code"] == 4236
+    call(emulator, "POST", f"/my/ships/{ship_symbol}/orbit", token)
+    navigation = call(emulator, "POST", navigate_path, token, body=destination)
+    assert navigation["nav"]["status"] == "IN_TRANSIT"
+    assert navigation["fuel"]["consumed"]["amount"] > 0
+    ship = emulator.world.ships[ship_symbol]
+    assert ship.arrival - ship.departure_time < timedelta(seconds=60 / SPEED * 10)
+    error = call(emulator, "POST", f"/my/ships/{ship_symbol}/extract", token)
+    assert error["code"] == 4214
+    assert "Ship is currently in-transit" in error["message"]
+
+    ship.arrival = emulator.world.now()
+    extraction = call(emulator, "POST", f"/my/ships/{ship_symbol}/extract", token)
+    assert extraction["extraction"]["yield"]["symbol"] in asteroid.deposits
+    assert extraction["cooldown"]["totalSeconds"] == -(
+        -EXTRACTION_COOLDOWN_SECONDS // SPEED
+    )
+    assert call(emulator, "GET", f"/my/ships/{ship_symbol}/cooldown", token)
+    assert (
+        call(emulator, "POST", f"/my/ships/{ship_symbol}/extract", token)["code"]
+        == 4000
+    )
+
+    ship.cooldown_expiration = emulator.world.now()
+    assert call(emulator, "GET", f"/my/ships/{ship_symbol}/cooldown", token) is None
+
+
+def test_trades_move_prices_and_markets_recover(emulator: EmulatorServer):
+    token = emulator.register("MERCHANT")
+    ship_symbol = "MERCHANT-1"
+    headquarters = emulator.world.galaxy.headquarters
+    system_symbol = emulator.world.galaxy.waypoints[headquarters].system_symbol
+    market_path = f"/systems/{system_symbol}/waypoints/{headquarters}/market"
+    assert "tradeGoods" not in call(emulator, "GET", market_path)
+
+    capacity = call(emulator, "GET", f"/my/ships/{ship_symbol}/cargo", token)[
+        "capacity"
+    ]
+    good = next(
+        good
+        for good in call(emulator, "GET", market_path, token)["tradeGoods"]
+        if good["symbol"] != "FUEL" and good["tradeVolume"] <= capacity
+    )
+    purchase = call(
+        emulator,
+        "POST",
+        f"/my/ships/{ship_symbol}/purchase",
+        token,
+        body={"symbol": good["symbol"], "units": good["tradeVolume"]},
+    )
+    assert purchase["transaction"]["pricePerUnit"] == good["purchasePrice"]
+    assert (
+        purchase["agent"]["credits"]
+        == STARTING_CREDITS - purchase["transaction"]["totalPrice"]
+    )
+    # buying a full trade volume raises the price by the supply's impact
+    level, _ = emulator.world.price_levels[(headquarters, good["symbol"])]
+    assert level > 1
+
+    error = call(
+        emulator,
+        "POST",
+        f"/my/ships/{ship_symbol}/sell",
+        token,
+        body={"symbol": good["symbol"], "units": good["tradeVolume"] + 1},
+    )
+    assert error["code"] == 4604
+
+    # an hour of game time later the market has all but recovered
+    level, updated_at = emulator.world.price_levels[(headquarters, good["symbol"])]
+    emulator.world.price_levels[(headquarters, good["symbol"])] = (
+        level,
+        updated_at - timedelta(hours=1) / SPEED,
+    )
+    assert emulator.world.get_prices(headquarters, good["symbol"])[0] == pytest.approx(
+        good["purchasePrice"], abs=1
+    )
+
+
+def test_requests_are_rate_limited_per_agent():
+    enable_socket()
+    emulator = EmulatorServer(requests_per_second=1, burst=2)
+    tokens = [emulator.register("LIMITED"), emulator.register("OTHER")]
+
+    statuses = [
+        emulator.handle(
+            method="GET", path="/v2/my/agent", authorization=f"Bearer {token}", body=b""
+        )[0]
+        for token in [tokens[0]] * 3 + [tokens[1]]
+    ]
+    assert statuses == [200, 200, 429, 200]
+    _, _, headers = emulator.handle(
+        method="GET", path="/v2/my/agent", authorization=f"Bearer {tokens[0]}", body=b""
+    )
+    assert 0 < float(headers["retry-after"]) <= 1
+    assert emulator.rate_limited == 2
+
+
+def test_malformed_requests_are_rejected(emulator: EmulatorServer):
+    token = emulator.register("MALFORMED")
+    requests = [
+        ("POST", "/v2/register", b"{not json"),
+        ("POST", "/v2/register", b"[]"),
+        ("GET", "/v2/systems?limit=many", b""),
+        ("GET", "/v2/my/ships?page=next", b""),
+        ("POST", "/v2/register", b'{"symbol": 1, "faction": "COSMIC"}'),
+        ("POST", "/v2/my/ships", b'{"shipType": ["SHIP_PROBE"]}'),
+        ("POST", "/v2/my/ships", b'{"shipType": "SHIP_PROBE", "waypointSymbol": 1}'),
+        ("PATCH", "/v2/my/ships/MALFORMED-1/nav", b'{"flightMode": null}'),
+        ("POST", "/v2/my/ships/MALFORMED-1/navigate", b'{"waypointSymbol": {}}'),
+        (
+            "POST",
+            "/v2/my/ships/MALFORMED-1/sell",
+            b'{"symbol": "IRON_ORE", "units": "abc"}',
+        ),
+        (
+            "POST",
+            "/v2/my/ships/MALFORMED-1/sell",
+            b'{"symbol": "IRON_ORE", "units": [1]}',
+        ),
+        ("POST", "/v2/my/ships/MALFORMED-1/purchase", b'{"symbol": 7, "units": 1}'),
+    ]
+    for method, path, body in requests:
+        status_code, _, _ = emulator.handle(
+            method=method, path=path, authorization=f"Bearer {token}", body=body
+        )
+        assert status_code == 400
+
+
+@fixture
+def served_emulator(
+    emulator: EmulatorServer, monkeypatch: MonkeyPatch
+) -> Iterator[EmulatorServer]:
+    enable_socket()
+    emulator.start()
+    monkeypatch.setattr(client_module, "BASE_URL", emulator.url())
+    monkeypatch.setattr(request_queue_module, "MAXIMUM_REQUESTS_PER_SECOND", 100)
+    yield emulator
+    emulator.stop()
+
+
+def test_client_plays_against_the_emulator(served_emulator: EmulatorServer):
+    symbol = f"AGENT-{uuid4().hex[:6]}".upper()
+    client = Client(api_key=served_emulator.register(symbol))
+
+    ships = client.ships().data or []
+    assert [ship.frame.name for ship in ships] == ["Frigate", "Probe"]
+    ship = ships[0]
+    market = client.market(
+        system_symbol=ship.nav.system_symbol, waypoint_symbol=ship.nav.waypoint_symbol
+    ).data
+    assert market and market.trade_goods
+    good = market.trade_goods[0]
+    sale = client.buy(call_sign=ship.symbol, symbol=good.symbol, units=1).data
+    assert sale and sale.transaction.total_price == good.purchase_price
+    assert client.cargo(call_sign=ship.symbol).data.units == 1  # type: ignore
+    with pytest.raises(TraderClientException, match="not currently in orbit"):
+        client.extract(call_sign=ship.symbol)
@@ -0,0 +1,143 @@
+from datetime import UTC, datetime, timedelta
+from math import dist
+from pathlib import Path
+from statistics import pstdev
+
+import pytest
+from sqlmodel import create_engine
+
+from trader.client.market import Market
+from trader.client.system import System
+from trader.client.waypoint import Waypoint
+from trader.dao.dao import ensure_schema
+from trader.dao.market_prices import get_market_price_history
+from trader.dao.markets import get_market_trade_goods_by_system
+from trader.dao.waypoints import get_waypoints_by_system_symbol
+from trader.emulator.galaxy import generate_galaxy
+from trader.emulator.populate import (
+    create_database,
+    populate_database,
+    to_client_market,
+    to_client_system,
+    to_client_waypoint,
+)
+from trader.emulator.world import World
+from trader.exceptions import TraderDaoException
+
+
+def test_large_systems_cluster_their_asteroid_fields():
+    galaxy = generate_galaxy(seed=3, systems=1, waypoints_per_system=200)
+    system = next(iter(galaxy.systems.values()))
+    asteroids = [
+        waypoint
+        for waypoint in system.waypoints
+        if waypoint.waypoint_type == "ASTEROID_FIELD"
+    ]
+    assert len(system.waypoints) == 200
+    assert len(asteroids) == 66
+    # every field has another within a short hop, while the belt spans far more
+    nearest = [
+        min(
+            dist((asteroid.x, asteroid.y), (other.x, other.y))
+            for other in asteroids
+            if other is not asteroid
+        )
+        for asteroid in asteroids
+    ]
+    belt_span = max(
+        dist((asteroid.x, asteroid.y), (other.x, other.y))
+        for asteroid in asteroids
+        for other in asteroids
+    )
+    assert max(nearest) < belt_span / 5
+
+
+def test_prices_are_correlated_within_systems():
+    galaxy = generate_galaxy(seed=3, systems=200)
+    prices_by_system = {}
+    for market in galaxy.markets.values():
+        good = market.goods.get("MACHINERY")
+        if good and good.trade_type == "EXCHANGE":
+            system_symbol = galaxy.waypoints[market.symbol].system_symbol
+            prices_by_system.setdefault(system_symbol, []).append(
+                good.base_purchase_price
+            )
+    within = [pstdev(prices) for prices in prices_by_system.values() if len(prices) > 1]
+    across = pstdev([prices[0] for prices in prices_by_system.values()])
+    assert sum(within) / len(within) < across / 2
+
+
+def test_client_dataclasses_match_the_emulated_api():
+    galaxy = generate_galaxy(seed=3, systems=2)
+    world = World(galaxy=galaxy)
+    system = next(iter(galaxy.systems.values()))
+    assert to_client_system(system) == System.from_dict(world.system(system.symbol))
+    for waypoint in system.waypoints:
+        assert to_client_waypoint(waypoint) == Waypoint.from_dict(
+            world.waypoint(system.symbol, waypoint.symbol)
+        )
+    market = galaxy.markets[galaxy.headquarters]
+    assert to_client_market(market, with_trade_goods=False) == Market.from_dict(
+        world.market(None, market.symbol)
+    )
+    trade_goods = to_client_market(market).trade_goods or []
+    assert [
+        (good.symbol, good.purchase_price, good.sell_price) for good in trade_goods
+    ] == [(symbol, *world.get_prices(market.symbol, symbol)) for symbol in market.goods]
+
+
+def test_populated_database_reads_back_through_the_dao(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'galaxy.db'}")
+    ensure_schema(engine=engine)
+    observed_at = datetime(2023, 6, 1, tzinfo=UTC)
+    counts = populate_database(
+        engine=engine,
+        seed=3,
+        systems=5,
+        waypoints_per_system=30,
+        observations=4,
+        batch_size=2,
+        observed_at=observed_at,
+    )
+    galaxy = generate_galaxy(seed=3, systems=5, waypoints_per_system=30)
+    assert (counts.systems, counts.waypoints, counts.markets) == (
+        5,
+        150,
+        len(galaxy.markets),
+    )
+
+    system = next(iter(galaxy.systems.values()))
+    waypoints = get_waypoints_by_system_symbol(
+        engine=engine, system_symbol=system.symbol
+    )
+    assert {
+        waypoint.symbol: [trait.symbol for trait in waypoint.traits]
+        for waypoint in waypoints
+    } == {waypoint.symbol: waypoint.traits for waypoint in system.waypoints}
+    trade_goods = get_market_trade_goods_by_system(
+        engine=engine, system_symbol=system.symbol
+    )
+    market = galaxy.markets[galaxy.headquarters]
+    assert {
+        (good.symbol, good.purchase_price)
+        for good in trade_goods
+        if good.waypoint_symbol == market.symbol
+    } == {(good.symbol, good.base_purchase_price) for good in market.goods.values()}
+
+    history = get_market_price_history(
+        engine=engine,
+        good_symbol="FUEL",
+        since=observed_at - timedelta(days=1),
+        waypoint_symbol=market.symbol,
+    )
+    assert [price.observed_at for price in history] == [
+        observed_at - timedelta(hours=hours) for hours in [3, 2, 1, 0]
+    ]
+    assert history[-1].purchase_price == market.goods["FUEL"].base_purchase_price
+
+
+def test_databases_are_only_created_anew(tmp_path: Path):
+    path = str(tmp_path / "galaxy.db")
+    assert create_database(path=path, systems=2).systems == 2
+    with pytest.raises(TraderDaoException, match="already exists"):
+        create_database(path=path, systems=2)
@@ -0,0 +1,185 @@
+from types import SimpleNamespace
+from typing import Iterator, List
+
+from pytest import fixture
+
+from trader.dao.markets import MarketTradeGood
+from trader.dao.waypoints import Waypoint
+from trader.fleet.assignment import (
+    TradeAssigner,
+    TraderPosition,
+    solve_trade_assignment,
+)
+from trader.fleet.planner import Planner
+from trader.roles.merchant.finder import generate_trade_candidates
+from trader.tests.factories.client import ShipFactory, TradeGoodFactory, WaypointFactory
+from trader.tests.factories.synthetic import (
+    SYSTEM_SYMBOL,
+    to_dao_trade_good,
+    to_dao_waypoints,
+)
+
+
+@fixture
+def waypoints() -> List[Waypoint]:
+    return to_dao_waypoints(
+        [
+            WaypointFactory.build(
+                symbol=f"{SYSTEM_SYMBOL}-{symbol}",
+                system_symbol=SYSTEM_SYMBOL,
+                x=x,
+                y=y,
+                traits=[],
+            )
+            for symbol, x, y in [
+                ("A", 0, 0),
+                ("B", 10, 0),
+                ("C", 100, 0),
+                ("D", 110, 0),
+            ]
+        ]
+    )
+
+
+def build_good(
+    symbol: str, waypoint: Waypoint, purchase_price: int, sell_price: int
+) -> MarketTradeGood:
+    return to_dao_trade_good(
+        trade_good=TradeGoodFactory.build(
+            symbol=symbol,
+            trade_volume=10,
+            supply="MODERATE",
+            purchase_price=purchase_price,
+            sell_price=sell_price,
+        ),
+        waypoint=waypoint,
+    )
+
+
+@fixture
+def trade_goods(waypoints: List[Waypoint]) -> List[MarketTradeGood]:
+    a, b, c, d = waypoints
+    return [
+        # ore is cheapest at A, iron at C and both sell best at D
+        build_good("ORE", a, 10, 9),
+        build_good("ORE", b, 20, 19),
+        build_good("ORE", d, 40, 30),
+        build_good("IRON", c, 10, 9),
+        build_good("IRON", d, 30, 25),
+        # never worth trading
+        build_good("FOOD", a, 10, 9),
+        build_good("FOOD", b, 10, 10),
+    ]
+
+
+@fixture
+def trade_assigner() -> Iterator[TradeAssigner]:
+    planner = Planner()
+    planner.processes = 0
+    trade_assigner = TradeAssigner()
+    trade_assigner.contexts.clear()
+    trade_assigner.claimed.clear()
+    trade_assigner.pending.clear()
+    trade_assigner.solves = 0
+    yield trade_assigner
+    trade_assigner.contexts.clear()
+
+
+def test_trade_candidates_are_one_per_purchase_market(
+    trade_goods: List[MarketTradeGood], waypoints: List[Waypoint]
+):
+    candidates = generate_trade_candidates(trade_goods=trade_goods, waypoints=waypoints)
+    assert {candidate.purchase_market for candidate in candidates} == {
+        ("ORE", waypoints[0].symbol),
+        ("ORE", waypoints[1].symbol),
+        ("IRON", waypoints[2].symbol),
+    }
+    assert all(
+        candidate.opportunity.sell_waypoint_symbol == waypoints[3].symbol
+        for candidate in candidates
+    )
+
+
+def test_traders_are_handed_distinct_nearby_trades(
+    trade_goods: List[MarketTradeGood], waypoints: List[Waypoint]
+):
+    candidates = generate_trade_candidates(trade_goods=trade_goods, waypoints=waypoints)
+    traders = [
+        TraderPosition(call_sign="NEAR-C", x=100, y=0, cargo_space=10),
+        TraderPosition(call_sign="NEAR-A", x=0, y=0, cargo_space=10),
+    ]
+    assignments = solve_trade_assignment(
+        traders=traders, candidates=candidates, budget=1000
+    )
+    assert assignments["NEAR-C"].purchase_market == ("IRON", waypoints[2].symbol)
+    assert assignments["NEAR-A"].opportunity.trade_good_symbol == "ORE"
+
+
+def test_traders_beyond_the_trades_available_are_left_out(
+    trade_goods: List[MarketTradeGood], waypoints: List[Waypoint]
+):
+    candidates = generate_trade_candidates(trade_goods=trade_goods, waypoints=waypoints)
+    traders = [
+        TraderPosition(call_sign=f"SHIP-{idx}", x=0, y=0, cargo_space=10)
+        for idx in range(5)
+    ]
+    assignments = solve_trade_assignment(
+        traders=traders, candidates=candidates, budget=1000
+    )
+    assert len(assignments) == len(candidates)
+    assert len({id(candidate) for candidate in assignments.values()}) == len(candidates)
+
+
+def test_trades_are_solved_once_for_every_trader_in_the_system(
+    trade_assigner: TradeAssigner,
+    trade_goods: List[MarketTradeGood],
+    waypoints: List[Waypoint],
+):
+    for idx, waypoint in enumerate(waypoints[:3]):
+        ship = ShipFactory.build(symbol=f"TRADER-{idx}")
+        ship.nav.system_symbol = SYSTEM_SYMBOL
+        ship.nav.waypoint_symbol = waypoint.symbol
+        ship.cargo.capacity, ship.cargo.units = 10, 0
+        trade_assigner.register(SimpleNamespace(call_sign=ship.symbol, ship=ship))  # type: ignore
+
+    opportunities = [
+        trade_assigner.assign(
+            call_sign=f"TRADER-{idx}",
+            system_symbol=SYSTEM_SYMBOL,
+            credits=100_000,
+            trade_goods=trade_goods,
+            waypoints=waypoints,
+        )
+        for idx in range(3)
+    ]
+    assert trade_assigner.solves == 1
+    assert all(opportunities)
+    assert len(
+        {
+            (opportunity.trade_good_symbol, opportunity.purchase_waypoint_symbol)
+            for opportunity in opportunities
+            if opportunity
+        }
+    ) == len(opportunities)
+
+    # markets still being worked are kept from the trader asking again
+    trade_assigner.assign(
+        call_sign="TRADER-0",
+        system_symbol=SYSTEM_SYMBOL,
+        credits=100_000,
+        trade_goods=trade_goods,
+        waypoints=waypoints,
+    )
+    assert trade_assigner.solves == 2
+    assert len(trade_assigner.claimed) == 3
+    claimed_markets = [
+        candidate.purchase_market for candidate in trade_assigner.claimed.values()
+    ]
+    assert len(set(claimed_markets)) == len(claimed_markets)
+
+    # a finished trade gives its purchase market back to the next solve
+    released_market = trade_assigner.claimed["TRADER-1"].purchase_market
+    trade_assigner.release(call_sign="TRADER-1")
+    assert released_market not in [
+        candidate.purchase_market for candidate in trade_assigner.claimed.values()
+    ]
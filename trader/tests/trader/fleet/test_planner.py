@@ -0,0 +1,140 @@
+from typing import Iterator, List
+from unittest.mock import patch
+
+from pytest import fixture
+
+from trader.client.waypoint import Waypoint
+from trader.dao.dao import DAO
+from trader.dao.markets import get_market_trade_goods_by_system, save_client_market
+from trader.fleet import planner as planner_module
+from trader.fleet.planner import (
+    Planner,
+    get_market_snapshot_version,
+    get_waypoint_set_hash,
+)
+from trader.tests.factories.client import (
+    MarketFactory,
+    TradeGoodFactory,
+    WaypointFactory,
+)
+
+PREDETERMINED_COORDS: List[List[int]] = [[0, 5], [1, 3], [4, 1], [5, 3], [2, 2]]
+
+
+@fixture
+def planner() -> Iterator[Planner]:
+    planner = Planner()
+    planner.processes = 0
+    planner.plans.clear()
+    planner.hits = planner.misses = 0
+    yield planner
+    planner.shutdown()
+
+
+@fixture
+def waypoints() -> List[Waypoint]:
+    waypoints = [WaypointFactory.build() for _ in range(len(PREDETERMINED_COORDS))]
+    for idx, waypoint in enumerate(waypoints):
+        waypoint.x, waypoint.y = PREDETERMINED_COORDS[idx]
+    return waypoints
+
+
+def test_waypoint_set_hash_ignores_order(waypoints: List[Waypoint]):
+    assert get_waypoint_set_hash(waypoints) == get_waypoint_set_hash(
+        list(reversed(waypoints))
+    )
+    waypoints[0].x += 1
+    assert get_waypoint_set_hash(waypoints) != get_waypoint_set_hash(
+        list(reversed(waypoints))[:-1]
+    )
+
+
+def test_route_is_planned_once_per_system_and_start(
+    planner: Planner, waypoints: List[Waypoint]
+):
+    with patch.object(
+        planner_module, "plan_route", wraps=planner_module.plan_route
+    ) as plan_route:
+        routes = [
+            planner.plan_route(
+                system_symbol="X1-TEST",
+                waypoints=waypoints,
+                starting_position=waypoints[0].symbol,
+            )
+            for _ in range(3)
+        ]
+        planner.plan_route(
+            system_symbol="X1-TEST",
+            waypoints=waypoints,
+            starting_position=waypoints[1].symbol,
+        )
+    assert routes[0] is routes[1] is routes[2]
+    assert routes[0][0].symbol == waypoints[0].symbol
+    assert plan_route.call_count == 2
+    assert (planner.hits, planner.misses) == (2, 2)
+
+
+def test_trade_plan_is_made_again_for_a_new_snapshot(planner: Planner):
+    with patch.object(planner_module, "plan_trades", return_value={}) as plan_trades:
+        for version in ["1-1", "1-1", "2-7"]:
+            planner.plan_trades(
+                system_symbol="X1-TEST",
+                market_snapshot_version=version,
+                trade_goods=[],
+                waypoints=[],
+            )
+    assert plan_trades.call_count == 2
+
+
+def test_failed_plans_are_not_memoized(planner: Planner, waypoints: List[Waypoint]):
+    with patch.object(
+        planner_module, "plan_route", side_effect=[ValueError, []]
+    ) as plan_route:
+        for expected_exception in [True, False]:
+            try:
+                planner.plan_route(
+                    system_symbol="X1-TEST",
+                    waypoints=waypoints,
+                    starting_position=waypoints[0].symbol,
+                )
+                assert not expected_exception
+            except ValueError:
+                assert expected_exception
+    assert plan_route.call_count == 2
+
+
+def test_plans_are_made_in_worker_processes(
+    planner: Planner, waypoints: List[Waypoint]
+):
+    planner.processes = 1
+    route = planner.plan_route(
+        system_symbol="X1-TEST",
+        waypoints=waypoints,
+        starting_position=waypoints[2].symbol,
+    )
+    assert planner.executor
+    assert [waypoint.symbol for waypoint in route][0] == waypoints[2].symbol
+    assert {waypoint.symbol for waypoint in route} == {
+        waypoint.symbol for waypoint in waypoints
+    }
+
+
+def test_market_snapshot_version_only_moves_with_prices():
+    engine = DAO().engine
+    market = MarketFactory.build(
+        transactions=None, trade_goods=[TradeGoodFactory.build() for _ in range(2)]
+    )
+    system_symbol = f"SNAPSHOT-{market.symbol}"
+
+    def get_version() -> str:
+        return get_market_snapshot_version(
+            get_market_trade_goods_by_system(engine=engine, system_symbol=system_symbol)
+        )
+
+    save_client_market(engine=engine, market=market, system_symbol=system_symbol)
+    version = get_version()
+    save_client_market(engine=engine, market=market, system_symbol=system_symbol)
+    assert version == get_version()
+    market.trade_goods[0].sell_price += 1  # type: ignore
+    save_client_market(engine=engine, market=market, system_symbol=system_symbol)
+    assert version != get_version()
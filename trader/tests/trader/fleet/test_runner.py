@@ -0,0 +1,148 @@
+import multiprocessing
+from threading import Thread
+from typing import Any, Dict, Iterator, Tuple
+
+import httpx
+from pytest import fixture, raises
+
+from trader.client.payload import ShipPayload
+from trader.client.request import ClientRequest
+from trader.dao.ships import Ship
+from trader.exceptions import TraderQueueException
+from trader.fleet.runner import FleetRunner
+from trader.fleet.state import FleetSnapshot, FleetState, RemoteFleetState
+from trader.queues.remote_request_queue import RemoteRequestQueue
+from trader.tests.factories.client import AgentFactory, ShipFactory
+from trader.util import clock
+
+
+class StubRequestQueue:
+    def __init__(self):
+        self.requests: Dict[str, Dict[str, Any]] = {}
+
+    def enqueue(self, priority: int, request: ClientRequest) -> str:
+        request_id = str(len(self.requests))
+        self.requests[request_id] = request.arguments
+        return request_id
+
+    def wait_for_response(self, request_id: str) -> httpx.Response:
+        url = self.requests[request_id]["url"]
+        if "fail" in url:
+            raise httpx.ConnectError("unreachable")
+        return httpx.Response(
+            200, content=url.encode(), request=httpx.Request("GET", url)
+        )
+
+
+def build_ships(count: int):
+    return [
+        Ship(
+            id=f"SHIP-{idx}",
+            call_sign=f"SHIP-{idx}",
+            faction="COSMIC",
+            frame_name="Frigate",
+            system_symbol="X1",
+            waypoint_symbol="X1-A",
+        )
+        for idx in range(count)
+    ]
+
+
+@fixture(scope="module")
+def remote_request_queue() -> Iterator[Tuple[RemoteRequestQueue, FleetRunner]]:
+    context = multiprocessing.get_context("spawn")
+    runner = FleetRunner(api_key="test", ships=build_ships(1), logic_by_frame={})
+    runner.request_queue = StubRequestQueue()  # type: ignore
+    runner.incoming_requests = context.Queue()
+    runner.outgoing_responses = [context.Queue()]
+    thread = Thread(target=runner.serve_requests)
+    thread.daemon = True
+    thread.start()
+    # constructed without installing, so other tests keep their own request queue
+    yield RemoteRequestQueue(
+        worker_id=0,
+        outgoing_requests=runner.incoming_requests,
+        incoming_responses=runner.outgoing_responses[0],
+    ), runner
+
+
+def test_shard_spreads_ships_across_processes():
+    runner = FleetRunner(
+        api_key="test", ships=build_ships(5), logic_by_frame={}, processes=2
+    )
+    assert [len(shard) for shard in runner.shard()] == [3, 2]
+
+
+def test_processes_are_capped_by_ship_count():
+    runner = FleetRunner(
+        api_key="test", ships=build_ships(2), logic_by_frame={}, processes=8
+    )
+    assert runner.processes == 2
+
+
+def test_requests_are_served_by_coordinator(
+    remote_request_queue: Tuple[RemoteRequestQueue, FleetRunner]
+):
+    queue, _ = remote_request_queue
+    request_ids = [
+        queue.enqueue(
+            priority=0,
+            request=ClientRequest(
+                function=httpx.get, arguments={"url": f"https://example.com/{idx}"}
+            ),
+        )
+        for idx in range(3)
+    ]
+    responses = [queue.wait_for_response(request_id=id) for id in request_ids]
+    assert [response.content for response in responses] == [
+        f"https://example.com/{idx}".encode() for idx in range(3)
+    ]
+
+
+def test_coordinator_errors_are_raised_in_worker(
+    remote_request_queue: Tuple[RemoteRequestQueue, FleetRunner]
+):
+    queue, _ = remote_request_queue
+    request_id = queue.enqueue(
+        priority=0,
+        request=ClientRequest(
+            function=httpx.get, arguments={"url": "https://example.com/fail"}
+        ),
+    )
+    with raises(TraderQueueException):
+        queue.wait_for_response(request_id=request_id)
+
+
+def test_fleet_state_is_served_by_coordinator(monkeypatch):
+    context = multiprocessing.get_context("spawn")
+    runner = FleetRunner(api_key="test", ships=build_ships(1), logic_by_frame={})
+    runner.fleet_state = type.__call__(
+        FleetState, api_key="test", disable_background_processes=True
+    )
+    ships = [ShipFactory.build() for _ in range(3)]
+    runner.fleet_state.load(
+        FleetSnapshot(ships=ships, agent=AgentFactory.build(), refreshed_at=clock.now())
+    )
+    runner.snapshot_requests = context.Queue()
+    runner.outgoing_snapshots = [context.Queue()]
+    thread = Thread(target=runner.serve_snapshots)
+    thread.daemon = True
+    thread.start()
+
+    # built outside the singleton so other tests keep their own fleet state
+    fleet_state: RemoteFleetState = type.__call__(
+        RemoteFleetState,
+        api_key="test",
+        worker_id=0,
+        snapshot_requests=runner.snapshot_requests,
+        incoming_snapshots=runner.outgoing_snapshots[0],
+    )
+    monkeypatch.setattr(
+        fleet_state.client, "ship", lambda call_sign: ShipPayload(data=ships[0])
+    )
+    refreshed_ship = fleet_state.refresh_ship(call_sign=ships[0].symbol)
+    assert fleet_state.get_ship(call_sign=ships[1].symbol) == ships[1]
+    # a ship refreshed since the coordinator's last refresh isn't replaced by it
+    assert fleet_state.ships[ships[0].symbol] is refreshed_ship
+    assert fleet_state.get_agent() == runner.fleet_state.agent
+    assert runner.fleet_state.bulk_refreshes == 0
@@ -0,0 +1,54 @@
+from typing import Iterator
+from unittest.mock import patch
+
+from pytest import fixture
+
+from trader.client.payload import AgentPayload, ShipPayload, ShipsPayload
+from trader.fleet.state import FleetState
+from trader.tests.factories.client import AgentFactory, ShipFactory
+
+
+@fixture
+def fleet_state() -> Iterator[FleetState]:
+    fleet_state = FleetState(api_key="test", disable_background_processes=True)
+    fleet_state.ships = {}
+    fleet_state.refreshed_at = None
+    ships = [ShipFactory.build() for _ in range(3)]
+    with patch.object(
+        fleet_state.client, "ships", return_value=ShipsPayload(data=ships)
+    ), patch.object(
+        fleet_state.client,
+        "agent",
+        return_value=AgentPayload(data=AgentFactory.build()),
+    ), patch.object(
+        fleet_state.client,
+        "ship",
+        side_effect=lambda call_sign: ShipPayload(
+            data=ShipFactory.build(symbol=call_sign)
+        ),
+    ):
+        yield fleet_state
+
+
+def test_ship_reads_are_served_from_one_bulk_refresh(fleet_state: FleetState):
+    ships = fleet_state.client.ships.return_value.data  # type: ignore
+    for ship in ships:
+        assert fleet_state.get_ship(call_sign=ship.symbol) == ship
+    assert fleet_state.get_agent()
+    fleet_state.client.ships.assert_called_once()  # type: ignore
+    fleet_state.client.ship.assert_not_called()  # type: ignore
+
+
+def test_unknown_ship_is_fetched_individually(fleet_state: FleetState):
+    ship = fleet_state.get_ship(call_sign="UNKNOWN-1")
+    assert ship.symbol == "UNKNOWN-1"
+    assert fleet_state.get_ship(call_sign="UNKNOWN-1") == ship
+    fleet_state.client.ship.assert_called_once()  # type: ignore
+
+
+def test_refresh_ship_replaces_only_that_ship(fleet_state: FleetState):
+    fleet_state.refresh()
+    call_signs = list(fleet_state.ships.keys())
+    refreshed_ship = fleet_state.refresh_ship(call_sign=call_signs[0])
+    assert fleet_state.ships[call_signs[0]] == refreshed_ship
+    assert list(fleet_state.ships.keys()) == call_signs
@@ -0,0 +1,53 @@
+from typing import Iterator
+from uuid import uuid4
+
+import pytest
+from pytest import fixture
+
+from trader.exceptions import TraderQueueException
+from trader.queues.base_queue import Queue
+
+
+@fixture
+def queue() -> Iterator[Queue]:
+    queue_id = f"test-{uuid4()}"
+    queue = Queue(queue_id=queue_id, queue_name=queue_id)
+    yield queue
+    queue.delete()
+
+
+def test_append_and_pop_in_order(queue: Queue):
+    queue.append(function=print, data=1)
+    queue.append(function=len, data=2)
+    assert queue.len() == 2
+    assert queue.pop() == (print, 1)
+    assert queue.pop() == (len, 2)
+    assert queue.len() == 0
+
+
+def test_order_is_monotonic_after_pops(queue: Queue):
+    queue.append(function=print, data=1)
+    queue.pop()
+    queue.append(function=print, data=2)
+    queue.append(function=print, data=3)
+    # previously order was derived from the count and could collide after pops
+    assert [data for _, data in queue.pop_many(count=2)] == [2, 3]
+
+
+def test_append_many_and_pop_many(queue: Queue):
+    queue.append_many(elements=[(print, idx) for idx in range(10)])
+    assert queue.len() == 10
+    assert [data for _, data in queue.pop_many(count=4)] == [0, 1, 2, 3]
+    assert [data for _, data in queue.pop_many(count=100)] == [4, 5, 6, 7, 8, 9]
+    assert queue.pop_many(count=1) == []
+
+
+def test_pop_empty_queue_raises(queue: Queue):
+    with pytest.raises(TraderQueueException):
+        queue.pop()
+
+
+def test_purge(queue: Queue):
+    queue.append_many(elements=[(print, idx) for idx in range(3)])
+    queue.purge()
+    assert queue.len() == 0
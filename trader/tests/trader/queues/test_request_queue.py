@@ -0,0 +1,338 @@
+from threading import Timer
+from time import monotonic, sleep
+from typing import Iterator, List
+from uuid import uuid4
+
+import httpx
+import pytest
+from pytest import MonkeyPatch, fixture
+from pytest_socket import enable_socket
+
+from trader.client.request import CancellationToken, ClientRequest
+from trader.exceptions import (
+    TraderCircuitOpenException,
+    TraderRequestAbandonedException,
+    TraderRequestCancelledException,
+)
+from trader.queues import request_queue as request_queue_module
+from trader.queues.circuit_breaker import CircuitBreaker
+from trader.queues.request_queue import MINIMUM_PRIORITY, RequestQueue
+from trader.tests.mocks.flaky_server import Fault, FlakyServer
+
+
+@fixture
+def server() -> Iterator[FlakyServer]:
+    enable_socket()
+    server = FlakyServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+@fixture
+def request_queue(monkeypatch: MonkeyPatch) -> Iterator[RequestQueue]:
+    monkeypatch.setattr(request_queue_module, "RETRY_BASE_DELAY", 0.01)
+    # built outside the singleton, which may be dispatching for other tests
+    request_queue: RequestQueue = type.__call__(
+        RequestQueue, client_id=str(uuid4()), disable_background_processes=True
+    )
+    request_queue.circuit_breaker = CircuitBreaker(
+        failure_threshold=3, reset_timeout=0.2
+    )
+    yield request_queue
+    for flows in request_queue.requests.values():
+        for flow in flows.values():
+            flow.queue.delete()
+
+
+def get(server: FlakyServer, path: str, **arguments) -> ClientRequest:
+    return ClientRequest(
+        function=httpx.get, arguments={"url": server.url(path), **arguments}
+    )
+
+
+def dispatch_until_answered(
+    request_queue: RequestQueue, request_ids: List[str], timeout: float = 5
+):
+    deadline = monotonic() + timeout
+    while not all(request_id in request_queue.responses for request_id in request_ids):
+        assert monotonic() < deadline, "requests were never answered"
+        request_queue.dequeue()
+        sleep(0.01)
+
+
+def test_failing_request_does_not_block_other_requests(
+    server: FlakyServer, request_queue: RequestQueue, monkeypatch: MonkeyPatch
+):
+    monkeypatch.setattr(request_queue_module, "RETRY_BASE_DELAY", 0.5)
+    server.add_faults("/flaky", [Fault(status_code=503), Fault(status_code=503)])
+    flaky_request_id = request_queue.enqueue(priority=1, request=get(server, "/flaky"))
+    healthy_request_id = request_queue.enqueue(
+        priority=1, request=get(server, "/healthy")
+    )
+
+    request_queue.dequeue()
+    request_queue.dequeue()
+    assert healthy_request_id in request_queue.responses
+    assert flaky_request_id not in request_queue.responses
+
+    dispatch_until_answered(request_queue, [flaky_request_id])
+    assert request_queue.wait_for_response(flaky_request_id).status_code == 200
+    assert server.hits["/flaky"] == 3
+
+
+def test_rate_limited_request_holds_dispatch_until_retry_after(
+    server: FlakyServer, request_queue: RequestQueue
+):
+    server.add_faults(
+        "/limited", [Fault(status_code=429, headers={"retry-after": "0.3"})]
+    )
+    start = monotonic()
+    limited_request_id = request_queue.enqueue(
+        priority=1, request=get(server, "/limited")
+    )
+    request_queue.dequeue()
+    other_request_id = request_queue.enqueue(priority=1, request=get(server, "/other"))
+    request_queue.dequeue()
+    assert server.hits["/other"] == 0
+
+    dispatch_until_answered(request_queue, [limited_request_id, other_request_id])
+    assert monotonic() - start >= 0.3
+    assert request_queue.wait_for_response(limited_request_id).status_code == 200
+    assert request_queue.rate_limited == 1
+
+
+def test_timed_out_request_is_retried(server: FlakyServer, request_queue: RequestQueue):
+    server.add_faults("/slow", [Fault(delay=0.5)])
+    request_id = request_queue.enqueue(
+        priority=1, request=get(server, "/slow", timeout=0.1)
+    )
+    dispatch_until_answered(request_queue, [request_id])
+    assert request_queue.wait_for_response(request_id).status_code == 200
+    assert server.hits["/slow"] == 2
+
+
+def test_server_errors_on_mutations_are_not_retried(
+    server: FlakyServer, request_queue: RequestQueue
+):
+    server.add_faults("/purchase", [Fault(status_code=500)])
+    request_id = request_queue.enqueue(
+        priority=1,
+        request=ClientRequest(
+            function=httpx.post, arguments={"url": server.url("/purchase")}
+        ),
+    )
+    dispatch_until_answered(request_queue, [request_id])
+    assert request_queue.wait_for_response(request_id).status_code == 500
+    assert server.hits["/purchase"] == 1
+
+
+def test_exhausted_retries_are_raised_to_the_caller(
+    server: FlakyServer, request_queue: RequestQueue, monkeypatch: MonkeyPatch
+):
+    monkeypatch.setattr(request_queue_module, "MAXIMUM_RETRIES_PER_REQUEST", 2)
+    server.add_faults("/dropped", [Fault(drop=True)] * 5)
+    request_id = request_queue.enqueue(priority=1, request=get(server, "/dropped"))
+    dispatch_until_answered(request_queue, [request_id])
+    with pytest.raises(httpx.RemoteProtocolError):
+        request_queue.wait_for_response(request_id)
+    assert server.hits["/dropped"] == 3
+
+
+def test_circuit_breaker_sheds_background_requests_until_api_recovers(
+    server: FlakyServer, request_queue: RequestQueue
+):
+    server.add_faults("/down", [Fault(status_code=500)] * 10)
+    request_id = request_queue.enqueue(priority=1, request=get(server, "/down"))
+    deadline = monotonic() + 5
+    while not request_queue.circuit_breaker.is_open():
+        assert monotonic() < deadline
+        request_queue.dequeue()
+        sleep(0.01)
+    assert server.hits["/down"] == 3
+
+    background_request_id = request_queue.enqueue(
+        priority=MINIMUM_PRIORITY, request=get(server, "/revalidate")
+    )
+    request_queue.dequeue()
+    with pytest.raises(TraderCircuitOpenException):
+        request_queue.wait_for_response(background_request_id)
+    assert server.hits["/revalidate"] == 0
+    assert server.hits["/down"] == 3
+
+    server.clear_faults("/down")
+    dispatch_until_answered(request_queue, [request_id])
+    assert request_queue.wait_for_response(request_id).status_code == 200
+    assert not request_queue.circuit_breaker.is_open()
+
+
+def test_cancelled_and_expired_requests_are_dropped_without_dispatch(
+    server: FlakyServer, request_queue: RequestQueue
+):
+    cancellation = CancellationToken()
+    cancelled_request_ids = [
+        request_queue.enqueue(
+            priority=2,
+            request=ClientRequest(
+                function=httpx.get,
+                arguments={"url": server.url("/cancelled")},
+                cancellation=cancellation,
+            ),
+        )
+        for _ in range(2)
+    ]
+    expired_request_id = request_queue.enqueue(
+        priority=2,
+        request=ClientRequest(
+            function=httpx.get,
+            arguments={"url": server.url("/expired")},
+            deadline=monotonic() - 1,
+        ),
+    )
+    request_id = request_queue.enqueue(priority=1, request=get(server, "/healthy"))
+    cancellation.cancel()
+
+    # dropped requests don't use up the dispatch, the next live request goes out
+    request_queue.dequeue()
+    assert request_queue.wait_for_response(request_id).status_code == 200
+    for dropped_request_id in cancelled_request_ids + [expired_request_id]:
+        with pytest.raises(TraderRequestCancelledException):
+            request_queue.wait_for_response(dropped_request_id)
+    assert server.hits["/cancelled"] == server.hits["/expired"] == 0
+    assert request_queue.dropped_cancelled == 2
+    assert request_queue.dropped_expired == 1
+
+
+def test_waiting_caller_gives_up_once_cancelled(
+    server: FlakyServer, request_queue: RequestQueue
+):
+    cancellation = CancellationToken()
+    request_id = request_queue.enqueue(
+        priority=1,
+        request=ClientRequest(
+            function=httpx.get,
+            arguments={"url": server.url("/abandoned")},
+            cancellation=cancellation,
+        ),
+    )
+    cancellation.cancel()
+    with pytest.raises(TraderRequestCancelledException):
+        request_queue.wait_for_response(request_id)
+
+    request_queue.dequeue()
+    assert server.hits["/abandoned"] == 0
+    assert request_queue.dropped_cancelled == 1
+    # nobody is left waiting on the dropped request, so nothing is kept for them
+    assert request_id not in request_queue.responses
+    assert not request_queue.abandoned
+
+
+def test_waiting_caller_is_told_when_giving_up_on_a_sent_request(
+    server: FlakyServer, request_queue: RequestQueue
+):
+    server.add_faults("/sent", [Fault(delay=0.5)])
+    cancellation = CancellationToken()
+    request_id = request_queue.enqueue(
+        priority=1,
+        request=ClientRequest(
+            function=httpx.post,
+            arguments={"url": server.url("/sent"), "timeout": 0.1},
+            cancellation=cancellation,
+        ),
+    )
+    # sent once, timed out and set aside to retry
+    request_queue.dequeue()
+    cancellation.cancel()
+    with pytest.raises(TraderRequestAbandonedException):
+        request_queue.wait_for_response(request_id)
+
+    sleep(0.1)
+    request_queue.dequeue()
+    assert server.hits["/sent"] == 1
+    assert request_id not in request_queue.responses
+    assert not request_queue.abandoned
+    assert not request_queue.in_flight
+
+
+dispatched_urls: List[str] = []
+
+
+def record_url(url: str) -> httpx.Response:
+    dispatched_urls.append(url)
+    return httpx.Response(200)
+
+
+def enqueue_for_ship(
+    request_queue: RequestQueue, ship: str, count: int, priority: int = 1
+) -> List[str]:
+    return [
+        request_queue.enqueue(
+            priority=priority,
+            request=ClientRequest(
+                function=record_url, arguments={"url": ship}, flow=ship
+            ),
+        )
+        for _ in range(count)
+    ]
+
+
+def dispatch(request_queue: RequestQueue, count: int) -> List[str]:
+    dispatched_urls.clear()
+    for _ in range(count):
+        request_queue.dequeue()
+    return list(dispatched_urls)
+
+
+def test_ships_at_the_same_priority_take_turns(request_queue: RequestQueue):
+    enqueue_for_ship(request_queue, "CHATTY", 6)
+    enqueue_for_ship(request_queue, "QUIET", 2)
+    assert dispatch(request_queue, 5) == [
+        "CHATTY",
+        "QUIET",
+        "CHATTY",
+        "QUIET",
+        "CHATTY",
+    ]
+    assert request_queue.dispatched_by_flow == {"CHATTY": 3, "QUIET": 2}
+    assert request_queue.get_flow_shares() == {"CHATTY": 0.6, "QUIET": 0.4}
+
+
+def test_ships_share_dispatch_by_weight(request_queue: RequestQueue):
+    request_queue.set_flow_weight("TRADER", 2)
+    request_queue.set_flow_weight("PROBE", 0.5)
+    enqueue_for_ship(request_queue, "TRADER", 8)
+    enqueue_for_ship(request_queue, "PROBE", 8)
+    assert dispatch(request_queue, 10).count("TRADER") == 8
+
+
+def test_flow_weights_must_be_positive(request_queue: RequestQueue):
+    for weight in [0, -1]:
+        with pytest.raises(ValueError):
+            request_queue.set_flow_weight("IDLE", weight)
+    assert "IDLE" not in request_queue.weights
+
+
+def test_lower_priority_requests_age_into_dispatch(
+    request_queue: RequestQueue, monkeypatch: MonkeyPatch
+):
+    monkeypatch.setattr(request_queue_module, "PRIORITY_AGING_SECONDS", 0.1)
+    enqueue_for_ship(request_queue, "EXPLORER", 1, priority=1)
+    enqueue_for_ship(request_queue, "BACKGROUND", 1, priority=MINIMUM_PRIORITY)
+    sleep(0.25)
+    enqueue_for_ship(request_queue, "TRADER", 2, priority=2)
+    # background work never ages past anything else
+    assert dispatch(request_queue, 4) == [
+        "EXPLORER",
+        "TRADER",
+        "TRADER",
+        "BACKGROUND",
+    ]
+    assert request_queue.waited_by_flow["EXPLORER"] >= 0.25
+
+
+def test_waiting_callers_wake_as_soon_as_answered(request_queue: RequestQueue):
+    request_id = enqueue_for_ship(request_queue, "WAITING", 1)[0]
+    Timer(0.05, request_queue.dequeue).start()
+    started = monotonic()
+    assert request_queue.wait_for_response(request_id).status_code == 200
+    assert monotonic() - started < request_queue_module.RESPONSE_WAIT_INTERVAL
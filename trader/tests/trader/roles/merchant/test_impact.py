@@ -0,0 +1,115 @@
+from datetime import UTC, datetime, timedelta
+from typing import List
+
+from pytest import approx
+from sqlmodel import Session
+
+from trader.dao.dao import DAO
+from trader.dao.markets import MarketTransaction
+from trader.roles.merchant.impact import (
+    estimate_price_impacts,
+    get_price_impact,
+    get_transaction_prices,
+    plan_order,
+    plan_orders,
+    split_into_tranches,
+)
+
+START = datetime(2026, 10, 19, tzinfo=UTC)
+
+
+def build_transactions(
+    transaction_type: str, prices: List[int], interval: timedelta
+) -> List[MarketTransaction]:
+    return [
+        MarketTransaction(
+            id=f"IMPACT-{transaction_type}-{idx}",
+            ship_symbol="SHIP-1",
+            trade_symbol="IRON_ORE",
+            transaction_type=transaction_type,
+            units=10,
+            price_per_unit=price,
+            total_price=price * 10,
+            created_at=START + interval * idx,
+            waypoint_symbol="X1-IMPACT-A",
+            system_symbol="X1-IMPACT",
+        )
+        for idx, price in enumerate(prices)
+    ]
+
+
+def test_price_impacts_are_measured_between_back_to_back_transactions():
+    transactions = build_transactions(
+        "PURCHASE", [100, 105, 110, 100], timedelta(minutes=1)
+    ) + build_transactions("SELL", [200, 190, 300], timedelta(minutes=1))
+    # the market recovered before this one, so it is left out
+    transactions[3].created_at = START + timedelta(hours=1)
+    engine = DAO().engine
+    with Session(engine) as session:
+        [session.merge(transaction) for transaction in transactions]
+        session.commit()
+
+    impacts = estimate_price_impacts(
+        get_transaction_prices(engine=engine, waypoint_symbols=["X1-IMPACT-A"])
+    )
+    purchase_impact = impacts[("X1-IMPACT-A", "IRON_ORE", "PURCHASE")]
+    assert purchase_impact == approx((0.05 + 5 / 105) / 2)
+    # a price jump after a sale isn't counted as negative impact
+    assert impacts[("X1-IMPACT-A", "IRON_ORE", "SELL")] == approx(0.025)
+
+
+def test_price_impact_falls_back_to_supply():
+    assert get_price_impact(
+        {}, "X1-IMPACT-B", "IRON_ORE", "PURCHASE", "SCARCE"
+    ) > get_price_impact({}, "X1-IMPACT-B", "IRON_ORE", "PURCHASE", "ABUNDANT")
+
+
+def test_orders_fill_the_hold_without_price_impact():
+    order = plan_order(
+        purchase_price=100,
+        sell_price=150,
+        trade_volume=10,
+        purchase_impact=0,
+        sell_impact=0,
+        cargo_space=35,
+        budget=100_000,
+        travel_seconds=60,
+    )
+    assert order.units == 35
+    assert order.tranches == [10, 10, 10, 5]
+    assert order.expected_profit == approx(35 * 50)
+
+
+def test_orders_stop_once_price_impact_eats_the_margin():
+    order = plan_order(
+        purchase_price=100,
+        sell_price=120,
+        trade_volume=10,
+        purchase_impact=0.1,
+        sell_impact=0.1,
+        cargo_space=100,
+        budget=100_000,
+        travel_seconds=60,
+    )
+    assert 0 < order.units < 100
+    assert order.expected_profit > 0
+
+
+def test_orders_are_limited_by_budget_and_skipped_when_unprofitable():
+    units, profits, _ = plan_orders(
+        purchase_prices=[100, 100],
+        sell_prices=[150, 90],
+        trade_volumes=[10, 10],
+        purchase_impacts=[0, 0],
+        sell_impacts=[0, 0],
+        cargo_space=100,
+        budget=2_550,
+        travel_seconds=[60, 60],
+    )
+    assert list(units) == [25, 0]
+    assert profits[1] == 0
+
+
+def test_split_into_tranches():
+    assert split_into_tranches(units=0, trade_volume=10) == []
+    assert split_into_tranches(units=25, trade_volume=10) == [10, 10, 5]
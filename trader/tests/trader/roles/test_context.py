@@ -0,0 +1,66 @@
+from typing import Iterator
+from unittest.mock import patch
+
+from pytest import fixture
+
+from trader.client.payload import AgentPayload, ShipPayload, ShipsPayload
+from trader.fleet.state import FleetState
+from trader.roles.context import ShipContext
+from trader.roles.harvester import Harvester
+from trader.roles.merchant.merchant import Merchant
+from trader.tests.factories.client import AgentFactory, ShipFactory
+
+CALL_SIGN = "CONTEXT-1"
+
+
+@fixture
+def fleet_state() -> Iterator[FleetState]:
+    fleet_state = FleetState(api_key="test", disable_background_processes=True)
+    fleet_state.ships = {}
+    fleet_state.refreshed_at = None
+    with patch.object(
+        fleet_state.client,
+        "ships",
+        return_value=ShipsPayload(data=[ShipFactory.build(symbol=CALL_SIGN)]),
+    ), patch.object(
+        fleet_state.client,
+        "agent",
+        return_value=AgentPayload(data=AgentFactory.build()),
+    ), patch.object(
+        fleet_state.client,
+        "ship",
+        side_effect=lambda call_sign: ShipPayload(
+            data=ShipFactory.build(symbol=call_sign)
+        ),
+    ):
+        yield fleet_state
+
+
+def count_requests(fleet_state: FleetState) -> int:
+    return sum(
+        getattr(fleet_state.client, method).call_count  # type: ignore
+        for method in ["ships", "agent", "ship"]
+    )
+
+
+def test_roles_sharing_a_context_hydrate_once(fleet_state: FleetState):
+    context = ShipContext(api_key="test", call_sign=CALL_SIGN)
+    Harvester(api_key="test", call_sign=CALL_SIGN, base_priority=0, context=context)
+    Merchant(api_key="test", call_sign=CALL_SIGN, base_priority=0, context=context)
+    # the bulk ships and agent refresh, with no requests per ship or per role
+    assert count_requests(fleet_state) == 2
+
+
+def test_reload_by_one_role_is_seen_by_all(fleet_state: FleetState):
+    context = ShipContext(api_key="test", call_sign=CALL_SIGN)
+    harvester = Harvester(
+        api_key="test", call_sign=CALL_SIGN, base_priority=0, context=context
+    )
+    merchant = Merchant(
+        api_key="test", call_sign=CALL_SIGN, base_priority=0, context=context
+    )
+    ship = merchant.ship
+    harvester.reload_ship()
+    assert merchant.ship is harvester.ship
+    assert merchant.ship is not ship
+    fleet_state.client.ship.assert_called_once()  # type: ignore
@@ -0,0 +1,35 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ANALYTICS_MODULES = ["pandas", "sklearn", "scipy", "networkx", "matplotlib"]
+
+
+def run_python(statement: str, cwd: Path) -> str:
+    # run in a fresh interpreter, as the cli configures logging on import
+    return subprocess.run(
+        [sys.executable, "-c", statement],
+        check=True,
+        capture_output=True,
+        cwd=cwd,
+        text=True,
+    ).stdout
+
+
+def test_import_does_not_load_analytics_stack(tmp_path: Path):
+    modules = run_python(
+        "import sys, trader.cli; print(' '.join(sys.modules))", cwd=tmp_path
+    ).split()
+    assert [module for module in ANALYTICS_MODULES if module in modules] == []
+    assert "trader.main" not in modules
+
+
+def test_help_does_not_construct_trader(tmp_path: Path):
+    output = run_python(
+        "from trader.cli import cli, get_trader; "
+        "cli.main(['--help'], standalone_mode=False); "
+        "print(get_trader.cache_info().currsize)",
+        cwd=tmp_path,
+    )
+    assert output.splitlines()[-1] == "0"
+    assert not list(tmp_path.glob("*.db"))
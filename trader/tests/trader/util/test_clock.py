@@ -0,0 +1,56 @@
+from datetime import UTC, datetime, timedelta
+from time import perf_counter
+from typing import Iterator
+
+import pytest
+from pytest import fixture
+
+from trader.roles.common import get_seconds_until
+from trader.util import clock
+from trader.util.clock import AcceleratedClock, SimulatedClock, build_clock
+
+START = datetime(2023, 6, 1, tzinfo=UTC)
+
+
+@fixture
+def simulated() -> Iterator[SimulatedClock]:
+    simulated = SimulatedClock(start=START)
+    previous = clock.set_clock(simulated)
+    yield simulated
+    clock.set_clock(previous)
+
+
+def test_simulated_clock_only_moves_when_slept_through(simulated: SimulatedClock):
+    started = perf_counter()
+    clock.sleep(60 * 60)
+    assert perf_counter() - started < 1
+    assert clock.now() == START + timedelta(hours=1)
+    assert clock.monotonic() == 60 * 60
+
+    simulated.advance(30)
+    assert clock.now() == START + timedelta(hours=1, seconds=30)
+
+
+def test_waits_for_arrivals_follow_the_clock(simulated: SimulatedClock):
+    arrival = (START + timedelta(seconds=90)).isoformat()
+    assert get_seconds_until(arrival) == 91
+
+    simulated.advance(120)
+    # already arrived, no waiting a day for the negative delta to wrap around
+    assert get_seconds_until(arrival) == 1
+
+
+def test_accelerated_clock_runs_faster_than_the_wall():
+    accelerated = AcceleratedClock(speed=100, epoch=datetime.now(UTC))
+    started, started_at = perf_counter(), accelerated.now()
+    accelerated.sleep(5)
+    elapsed = perf_counter() - started
+    assert 0.05 <= elapsed < 1
+    assert accelerated.now() - started_at >= timedelta(seconds=5)
+
+
+def test_clock_is_built_from_its_name():
+    assert isinstance(build_clock("simulated", epoch=START.isoformat()), SimulatedClock)
+    assert build_clock("accelerated", speed=10).speed == 10  # type: ignore
+    with pytest.raises(ValueError):
+        build_clock("sundial")
@@ -0,0 +1,130 @@
+from pathlib import Path
+from uuid import uuid4
+
+import httpx
+import pytest
+from pytest_socket import enable_socket
+from sqlalchemy import text
+
+from trader.client.request import ClientRequest
+from trader.dao import dao as dao_module
+from trader.dao.dao import DAO
+from trader.queues import request_queue as request_queue_module
+from trader.queues.request_queue import RequestQueue
+from trader.util.metrics import (
+    MetricsRegistry,
+    get_histogram_quantile,
+    get_metric_rows,
+    parse_metrics,
+)
+
+
+def build_registry() -> MetricsRegistry:
+    # built outside the singleton the runtime's metrics are registered with
+    return type.__call__(MetricsRegistry, dump_path=None, port=None)
+
+
+def test_metrics_render_as_openmetrics_text():
+    registry = build_registry()
+    registry.counter("trader_test_requests", "Requests", labels=["status"]).inc(
+        2, status='say "hi"'
+    )
+    registry.gauge("trader_test_depth", "Depth").set(3)
+    histogram = registry.histogram(
+        "trader_test_seconds", "Durations", labels=["kind"], buckets=[0.1, 1]
+    )
+    for value in [0.05, 0.5, 5]:
+        histogram.observe(value, kind="a")
+
+    assert registry.render().splitlines() == [
+        "# TYPE trader_test_depth gauge",
+        "# HELP trader_test_depth Depth",
+        "trader_test_depth 3",
+        "# TYPE trader_test_requests counter",
+        "# HELP trader_test_requests Requests",
+        'trader_test_requests_total{status="say \\"hi\\""} 2',
+        "# TYPE trader_test_seconds histogram",
+        "# HELP trader_test_seconds Durations",
+        'trader_test_seconds_bucket{kind="a",le="0.1"} 1',
+        'trader_test_seconds_bucket{kind="a",le="1.0"} 2',
+        'trader_test_seconds_bucket{kind="a",le="+Inf"} 3',
+        'trader_test_seconds_count{kind="a"} 3',
+        'trader_test_seconds_sum{kind="a"} 5.55',
+        "# EOF",
+    ]
+    types, samples = parse_metrics(registry.render())
+    assert types["trader_test_requests"] == "counter"
+    assert samples[1].labels == {"status": 'say "hi"'}
+
+
+def test_metrics_are_registered_once_by_name():
+    registry = build_registry()
+    counter = registry.counter("trader_test_shared", "Shared")
+    assert registry.counter("trader_test_shared", "Shared") is counter
+    with pytest.raises(ValueError, match="already registered as a counter"):
+        registry.gauge("trader_test_shared", "Shared")
+    with pytest.raises(ValueError, match="labelled by"):
+        counter.inc(status="200")
+
+
+def test_histograms_are_summarized_for_the_cli():
+    assert get_histogram_quantile(0.5, [(1, 0), (2, 10), (float("inf"), 10)]) == 1.5
+    assert get_histogram_quantile(0.99, [(1, 5), (float("inf"), 10)]) == 1
+
+    registry = build_registry()
+    registry.counter("trader_test_hits", "Hits").inc(4)
+    histogram = registry.histogram("trader_test_wait_seconds", "Waits", buckets=[1, 2])
+    for _ in range(10):
+        histogram.observe(1.5)
+    rows = get_metric_rows(registry.render())
+    assert [(row.name, row.metric_type, row.value) for row in rows] == [
+        ("trader_test_hits_total", "counter", "4"),
+        ("trader_test_wait_seconds", "histogram", "count=10 mean=1.5 p50=1.5 p95=1.95"),
+    ]
+
+
+def test_metrics_are_dumped_and_served(tmp_path: Path):
+    registry = build_registry()
+    registry.gauge("trader_test_served", "Served").set(1)
+    path = tmp_path / "metrics.txt"
+    registry.dump(str(path))
+    assert path.read_text() == registry.render()
+
+    enable_socket()
+    registry.serve(port=0)
+    assert registry.server
+    host, port = registry.server.server_address[:2]
+    response = httpx.get(f"http://{host}:{port}/metrics")
+    registry.server.shutdown()
+    assert response.headers["content-type"].startswith("application/openmetrics-text")
+    assert "trader_test_served 1" in response.text
+
+
+def test_request_queue_reports_depth_and_latency():
+    priority = "7"
+    request_queue: RequestQueue = type.__call__(
+        RequestQueue, client_id=str(uuid4()), disable_background_processes=True
+    )
+    latency = request_queue_module.request_latency.get(priority=priority)
+    answered = latency.count if latency else 0
+    depth = request_queue_module.queue_depth.get(priority=priority)
+
+    request_id = request_queue.enqueue(
+        priority=7,
+        request=ClientRequest(function=lambda: httpx.Response(200), arguments={}),
+    )
+    assert request_queue_module.queue_depth.get(priority=priority) == depth + 1
+    request_queue.dequeue()
+    assert request_queue.wait_for_response(request_id).status_code == 200
+    assert request_queue_module.queue_depth.get(priority=priority) == depth
+    latency = request_queue_module.request_latency.get(priority=priority)
+    assert latency and latency.count == answered + 1
+
+
+def test_database_statements_are_timed():
+    queries = dao_module.query_duration.get(operation="SELECT")
+    executed = queries.count if queries else 0
+    with DAO().engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    queries = dao_module.query_duration.get(operation="SELECT")
+    assert queries and queries.count == executed + 1
@@ -0,0 +1,146 @@
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import UTC, datetime, timedelta
+from threading import Lock
+from typing import Optional
+
+# real (default), accelerated (runs CLOCK_SPEED times faster than the wall clock) or
+# simulated (time only moves when slept through or advanced, for deterministic runs)
+CLOCK = os.environ.get("CLOCK", "real")
+CLOCK_SPEED = float(os.environ.get("CLOCK_SPEED", 1))
+# processes sharing an accelerated clock (ex: fleet workers, the emulator) must agree on
+# the moment it started from, as an ISO timestamp
+CLOCK_EPOCH = os.environ.get("CLOCK_EPOCH")
+
+
+class Clock(ABC):
+    """
+    Source of time for everything waiting on the game (travel, cooldowns, polling
+    loops) or stamping records with it. Swapping the clock lets whole fleets run
+    hours of game time in seconds, or step through time deterministically in tests.
+    """
+
+    @abstractmethod
+    def now(self) -> datetime:
+        pass
+
+    @abstractmethod
+    def monotonic(self) -> float:
+        pass
+
+    @abstractmethod
+    def sleep(self, seconds: float):
+        pass
+
+
+class RealClock(Clock):
+    def now(self) -> datetime:
+        return datetime.now(UTC)
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        time.sleep(max(0.0, seconds))
+
+
+class AcceleratedClock(Clock):
+    """
+    Game time runs speed times faster than the wall clock from the epoch on, so a
+    sleep of a minute is over in a minute / speed
+    """
+
+    epoch: datetime
+    speed: float
+
+    def __init__(self, speed: float, epoch: Optional[datetime] = None):
+        if speed <= 0:
+            raise ValueError(f"Clock speed must be positive, got {speed}")
+        self.epoch = epoch or datetime.now(UTC)
+        self.speed = speed
+
+    def now(self) -> datetime:
+        return self.epoch + (datetime.now(UTC) - self.epoch) * self.speed
+
+    def monotonic(self) -> float:
+        return time.monotonic() * self.speed
+
+    def sleep(self, seconds: float):
+        time.sleep(max(0.0, seconds) / self.speed)
+
+
+class SimulatedClock(Clock):
+    """
+    Time stands still until slept through or advanced, each sleep returning at once
+    having moved the clock forward. Meant for single threaded runs, as every sleeping
+    thread moves time for all of them.
+    """
+
+    current: datetime
+    elapsed: float
+    lock: Lock
+
+    def __init__(self, start: Optional[datetime] = None):
+        self.current = start or datetime.now(UTC)
+        self.elapsed = 0.0
+        self.lock = Lock()
+
+    def now(self) -> datetime:
+        return self.current
+
+    def monotonic(self) -> float:
+        return self.elapsed
+
+    def advance(self, seconds: float):
+        with self.lock:
+            seconds = max(0.0, seconds)
+            self.current += timedelta(seconds=seconds)
+            self.elapsed += seconds
+
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+        # still yield, so other threads aren't starved by loops sleeping on the clock
+        time.sleep(0)
+
+
+def build_clock(
+    kind: str = CLOCK, speed: float = CLOCK_SPEED, epoch: Optional[str] = CLOCK_EPOCH
+) -> Clock:
+    if kind == "real":
+        return RealClock()
+    if kind == "accelerated":
+        return AcceleratedClock(
+            speed=speed, epoch=datetime.fromisoformat(epoch) if epoch else None
+        )
+    if kind == "simulated":
+        return SimulatedClock(start=datetime.fromisoformat(epoch) if epoch else None)
+    raise ValueError(f"Unknown clock {kind}, expected real, accelerated or simulated")
+
+
+_clock = build_clock()
+
+
+def get_clock() -> Clock:
+    return _clock
+
+
+def set_clock(clock: Clock) -> Clock:
+    """
+    Replaces the clock used everywhere, returning the previous one to restore
+    """
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+def now() -> datetime:
+    return _clock.now()
+
+
+def monotonic() -> float:
+    return _clock.monotonic()
+
+
+def sleep(seconds: float):
+    _clock.sleep(seconds)
@@ -0,0 +1,454 @@
+import atexit
+import os
+import re
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import perf_counter, sleep
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from loguru import logger
+
+from trader.print.models import MetricRow
+from trader.util.singleton import Singleton
+
+# set METRICS_FILE to a path to dump metrics there in the OpenMetrics text format every
+# METRICS_DUMP_INTERVAL seconds and on exit ({pid} is replaced, so fleet workers each
+# keep their own), or METRICS_PORT to serve them over http for scraping
+METRICS_FILE = os.environ.get("METRICS_FILE")
+METRICS_PORT = os.environ.get("METRICS_PORT")
+METRICS_DUMP_INTERVAL = float(os.environ.get("METRICS_DUMP_INTERVAL", 15))
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+# seconds, spanning a cached read to a ship waiting out a long flight
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+LabelValues = Tuple[str, ...]
+SAMPLE_PATTERN = re.compile(
+    r"^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(?P<labels>.*)\})?\s+(?P<value>\S+)"
+)
+LABEL_PATTERN = re.compile(
+    r'(?P<name>[a-zA-Z_][a-zA-Z0-9_]*)="(?P<value>(?:[^"\\]|\\.)*)"'
+)
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{escape_label_value(value)}"' for name, value in zip(names, values)
+    )
+    return f"{{{pairs}}}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    """
+    A metric family, holding one value per combination of its label values
+    """
+
+    metric_type: str = "unknown"
+    name: str
+    help: str
+    label_names: Tuple[str, ...]
+    lock: Lock
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.lock = Lock()
+
+    def get_label_values(self, labels: Dict[str, str]) -> LabelValues:
+        if labels.keys() != set(self.label_names):
+            raise ValueError(
+                f"{self.name} is labelled by {self.label_names}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        pass
+
+
+class Counter(Metric):
+    metric_type = "counter"
+    values: Dict[LabelValues, float]
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        super().__init__(name=name, help=help, label_names=label_names)
+        # unlabelled metrics are reported from the start, not once first updated
+        self.values = {} if self.label_names else {(): 0}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self.get_label_values(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self.values.get(self.get_label_values(labels), 0)
+
+    def render(self) -> List[str]:
+        with self.lock:
+            values = sorted(self.values.items())
+        return [
+            f"{self.name}_total{format_labels(self.label_names, key)} {format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+    values: Dict[LabelValues, float]
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        super().__init__(name=name, help=help, label_names=label_names)
+        # unlabelled metrics are reported from the start, not once first updated
+        self.values = {} if self.label_names else {(): 0}
+
+    def set(self, value: float, **labels: str):
+        key = self.get_label_values(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self.get_label_values(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels: str) -> float:
+        return self.values.get(self.get_label_values(labels), 0)
+
+    def render(self) -> List[str]:
+        with self.lock:
+            values = sorted(self.values.items())
+        return [
+            f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}"
+            for key, value in values
+        ]
+
+
+MetricType = TypeVar("MetricType", bound=Metric)
+
+
+@dataclass
+class HistogramValue:
+    # observations in each bucket alone, the last being everything above the bounds
+    bucket_counts: List[int]
+    count: int = 0
+    sum: float = 0
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+    buckets: Tuple[float, ...]
+    values: Dict[LabelValues, HistogramValue]
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name=name, help=help, label_names=label_names)
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self.get_label_values(labels)
+        with self.lock:
+            histogram = self.values.get(key)
+            if histogram is None:
+                histogram = self.values[key] = HistogramValue(
+                    bucket_counts=[0] * (len(self.buckets) + 1)
+                )
+            histogram.bucket_counts[bisect_left(self.buckets, value)] += 1
+            histogram.count += 1
+            histogram.sum += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """
+        Observes the seconds spent in the block, including when it raises
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def get(self, **labels: str) -> Optional[HistogramValue]:
+        return self.values.get(self.get_label_values(labels))
+
+    def render(self) -> List[str]:
+        lines = []
+        with self.lock:
+            values = sorted(
+                (key, list(value.bucket_counts), value.count, value.sum)
+                for key, value in self.values.items()
+            )
+        bucket_label_names = self.label_names + ("le",)
+        for key, bucket_counts, count, total in values:
+            cumulative = 0
+            for bound, bucket_count in zip(
+                self.buckets + (float("inf"),), bucket_counts
+            ):
+                cumulative += bucket_count
+                labels = format_labels(
+                    bucket_label_names, key + (format_value(float(bound)),)
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.label_names, key)
+            lines.append(f"{self.name}_count{labels} {count}")
+            lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+        return lines
+
+
+class MetricsRegistry(metaclass=Singleton):
+    """
+    Counters, gauges and histograms of the runtime (request queue, cache, database,
+    action queues) kept in memory per process, to tell whether a run is bound by the
+    rate limit, the SQLite lock or planning. Modules register their metrics once at
+    import and update them as they go, which only takes a lock and a dict update.
+
+    Rendered in the OpenMetrics text format, dumped to METRICS_FILE and/or served on
+    METRICS_PORT when set, and read back by `cli.py metrics`.
+    """
+
+    lock: Lock
+    metrics: Dict[str, Metric]
+    server: Optional[ThreadingHTTPServer] = None
+
+    def __init__(
+        self,
+        dump_path: Optional[str] = METRICS_FILE,
+        port: Optional[str] = METRICS_PORT,
+    ):
+        self.lock = Lock()
+        self.metrics = {}
+        if dump_path:
+            path = dump_path.replace("{pid}", str(os.getpid()))
+            thread = Thread(target=self.run_dump_loop, args=(path,))
+            thread.daemon = True
+            thread.start()
+            atexit.register(self.dump, path)
+        if port:
+            self.serve(port=int(port))
+
+    def register(self, metric: MetricType) -> MetricType:
+        """
+        Adds the metric, or returns the one already registered under its name, so
+        modules imported more than once (ex: in tests) share their metrics
+        """
+        with self.lock:
+            existing = self.metrics.get(metric.name)
+            if existing is None:
+                self.metrics[metric.name] = metric
+                return metric
+        if type(existing) is not type(metric):
+            raise ValueError(
+                f"{metric.name} is already registered as a {existing.metric_type}"
+            )
+        return existing  # type: ignore
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name=name, help=help, label_names=labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name=name, help=help, label_names=labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(
+            Histogram(name=name, help=help, label_names=labels, buckets=buckets)
+        )
+
+    def render(self) -> str:
+        lines = []
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        for metric in metrics:
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.extend(metric.render())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        # written aside and moved into place, so readers never see a partial dump
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            file.write(self.render())
+        os.replace(temporary_path, path)
+
+    def run_dump_loop(self, path: str):
+        while True:
+            sleep(METRICS_DUMP_INTERVAL)
+            try:
+                self.dump(path)
+            except OSError as e:
+                logger.warning(f"Failed to dump metrics to {path}: {e}")
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        try:
+            self.server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            # ex: fleet workers started with the coordinator's METRICS_PORT
+            logger.warning(f"Metrics of process {os.getpid()} not served: {e}")
+            return
+        self.server.daemon_threads = True
+        thread = Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+
+@dataclass
+class MetricSample:
+    name: str
+    labels: Dict[str, str]
+    value: float
+
+
+def parse_metrics(text: str) -> Tuple[Dict[str, str], List[MetricSample]]:
+    """
+    Reads OpenMetrics text back into the type of each family and its samples
+    """
+    types: Dict[str, str] = {}
+    samples: List[MetricSample] = []
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, metric_type = line.split(" ", 3)
+            types[name] = metric_type
+            continue
+        match = SAMPLE_PATTERN.match(line)
+        if line.startswith("#") or not match:
+            continue
+        labels = {
+            label["name"]: label["value"].replace('\\"', '"').replace("\\n", "\n")
+            for label in LABEL_PATTERN.finditer(match["labels"] or "")
+        }
+        samples.append(
+            MetricSample(name=match["name"], labels=labels, value=float(match["value"]))
+        )
+    return types, samples
+
+
+def get_histogram_quantile(
+    quantile: float, buckets: List[Tuple[float, float]]
+) -> float:
+    """
+    Estimates a quantile from cumulative (upper bound, count) buckets, interpolating
+    linearly within the bucket it falls in as Prometheus does
+    """
+    buckets = sorted(buckets)
+    total = buckets[-1][1] if buckets else 0
+    if not total:
+        return 0
+    rank = quantile * total
+    lower_bound, lower_count = 0.0, 0.0
+    for bound, cumulative in buckets:
+        if cumulative >= rank:
+            if bound == float("inf"):
+                return lower_bound
+            if cumulative == lower_count:
+                return bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (
+                cumulative - lower_count
+            )
+        lower_bound, lower_count = bound, cumulative
+    return lower_bound
+
+
+def get_metric_rows(text: str) -> List[MetricRow]:
+    """
+    A row per counter and gauge value and per histogram, summarized by its count,
+    mean and estimated median and 95th percentile
+    """
+    types, samples = parse_metrics(text)
+    rows: List[MetricRow] = []
+    histograms: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for sample in samples:
+        for suffix in ["_bucket", "_count", "_sum"]:
+            family = sample.name.removesuffix(suffix)
+            if sample.name.endswith(suffix) and types.get(family) == "histogram":
+                break
+        else:
+            family = sample.name.removesuffix("_total")
+            rows.append(
+                MetricRow(
+                    name=sample.name,
+                    metric_type=types.get(family, "unknown"),
+                    labels=format_label_pairs(sample.labels),
+                    value=format_number(sample.value),
+                )
+            )
+            continue
+        labels = {name: value for name, value in sample.labels.items() if name != "le"}
+        histogram = histograms.setdefault(
+            (family, format_label_pairs(labels)), {"buckets": []}
+        )
+        if suffix == "_bucket":
+            histogram["buckets"].append((float(sample.labels["le"]), sample.value))
+        else:
+            histogram[suffix] = sample.value
+    for (family, labels), histogram in histograms.items():
+        count = histogram.get("_count", 0)
+        mean = histogram.get("_sum", 0) / count if count else 0
+        p50, p95 = [
+            get_histogram_quantile(quantile, histogram["buckets"])
+            for quantile in [0.5, 0.95]
+        ]
+        rows.append(
+            MetricRow(
+                name=family,
+                metric_type="histogram",
+                labels=labels,
+                value=(
+                    f"count={format_number(count)} mean={format_number(mean)} "
+                    f"p50={format_number(p50)} p95={format_number(p95)}"
+                ),
+            )
+        )
+    return sorted(rows, key=lambda row: (row.name, row.labels))
+
+
+def format_label_pairs(labels: Dict[str, str]) -> str:
+    return ", ".join(f"{name}={value}" for name, value in sorted(labels.items()))
+
+
+def format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:.4g}"
@@ -1,3 +1,8 @@
+import inspect
+from threading import RLock
+from typing import Any, Dict, Hashable, Tuple
+
+
 class Singleton(type):
     """
     This should enable singleton usage with any class specified. Can be used with:
@@ -13,3 +18,42 @@ class Singleton(type):
         if cls not in cls._instances:
             cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
         return cls._instances[cls]
+
+
+class KeyedSingleton(type):
+    """
+    Like Singleton, but with one instance per value of an init argument rather than one
+    per process. The argument is named by the class's singleton_key, api_key by default,
+    so each agent (token) gets its own instance. Can be used with:
+
+    class Something(metaclass=KeyedSingleton)
+    """
+
+    _instances: Dict[Tuple[type, Hashable], Any] = {}
+    # reentrant as instances may construct other keyed singletons in their init
+    _lock = RLock()
+
+    def get_singleton_key(cls, *args, **kwargs) -> Hashable:
+        arguments = inspect.signature(cls.__init__).bind_partial(None, *args, **kwargs)
+        arguments.apply_defaults()
+        return arguments.arguments.get(getattr(cls, "singleton_key", "api_key"))
+
+    def __call__(cls, *args, **kwargs):
+        key = (cls, cls.get_singleton_key(*args, **kwargs))
+        with cls._lock:
+            if key not in cls._instances:
+                cls._instances[key] = super(KeyedSingleton, cls).__call__(
+                    *args, **kwargs
+                )
+            return cls._instances[key]
+
+    def register_instance(cls, instance: Any, *args, **kwargs) -> None:
+        """
+        Registers an instance built elsewhere as the one for the key the arguments
+        resolve to, so it is returned in place of constructing cls. Ex: a stand in for
+        cls in a worker process, registered before anything constructs cls.
+        """
+        if not isinstance(instance, cls):
+            raise TypeError(f"{instance} is not an instance of {cls.__name__}")
+        with cls._lock:
+            cls._instances[(cls, cls.get_singleton_key(*args, **kwargs))] = instance